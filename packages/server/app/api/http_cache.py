@@ -0,0 +1,194 @@
+"""
+HTTP Caching
+ETag / Last-Modified validators, conditional GETs and Cache-Control policies
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+
+import config
+from app.api.responses import FastJSONResponse, api_response
+from app.models.schemas import StoryStatus
+
+
+class Validator(NamedTuple):
+    """Validator of the last full response for a resource view"""
+    etag: str
+    last_modified: Optional[datetime]
+    cache_control: str
+    stored_at: float
+    version: Optional[int] = None   # Stored version of the resource the response was built from
+
+
+class ValidatorCache:
+    """
+    In-process registry of response validators
+
+    Lets a conditional GET be answered with 304 without rebuilding the
+    response. Entries are keyed by (view, resource key) and dropped when the
+    resource is written through the API or when they are older than the TTL.
+
+    Invalidation only reaches this process. With several workers, views
+    that record the resource's stored version are re-checked against it
+    before answering 304; other views rely on the (short) TTL alone.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], Validator] = {}
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+
+    def get(self, view: str, key: str) -> Optional[Validator]:
+        """Get a live validator"""
+        with self._lock:
+            entry = self._entries.get((view, key))
+            if entry and time.monotonic() - entry.stored_at > self.ttl:
+                del self._entries[(view, key)]
+                return None
+            return entry
+
+    def set(self, view: str, key: str, validator: Validator) -> None:
+        """Store the validator of a freshly built response"""
+        with self._lock:
+            self._entries[(view, key)] = validator
+
+    def invalidate(self, key: str) -> None:
+        """Drop every view of a resource (call after writing it)"""
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[1] == key]:
+                del self._entries[entry_key]
+        for listener in self._listeners:
+            listener(key)
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """Also notify another cache of the resource when it is invalidated"""
+        self._listeners.append(listener)
+
+    def clear(self) -> None:
+        """Drop all validators"""
+        with self._lock:
+            self._entries.clear()
+
+
+validator_cache = ValidatorCache(config.HTTP_CACHE_VALIDATOR_TTL)
+
+
+# ============================================================================
+# Helpers
+# ============================================================================
+
+def make_etag(body: bytes) -> str:
+    """Weak ETag from the response body (weak, since compression may re-encode it)"""
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    """Format a datetime as an HTTP date (naive datetimes are local time)"""
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def story_cache_control(status: Optional[StoryStatus]) -> str:
+    """Cache-Control policy for a story view based on its status"""
+    if status == StoryStatus.COMPLETED:
+        return config.COMPLETED_STORY_CACHE_CONTROL
+    return config.DRAFT_STORY_CACHE_CONTROL
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against a validator
+
+    If-None-Match takes precedence; ETags are compared weakly.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or _opaque(etag) in {_opaque(tag) for tag in candidates}
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified.astimezone(timezone.utc).timestamp()) <= int(since.timestamp())
+
+    return False
+
+
+def _opaque(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def _validator_headers(validator: Validator) -> Dict[str, str]:
+    headers = {"ETag": validator.etag, "Cache-Control": validator.cache_control}
+    if validator.last_modified:
+        headers["Last-Modified"] = http_date(validator.last_modified)
+    return headers
+
+
+# ============================================================================
+# Route integration
+# ============================================================================
+
+def not_modified(request: Request, view: str, key: str, version: Optional[int] = None) -> Optional[Response]:
+    """
+    Answer a conditional GET from the validator registry
+
+    Args:
+        request: Incoming request (for conditional headers)
+        view: Name of the endpoint view
+        key: Resource key
+        version: Current stored version of the resource, if the view tracks
+            one; a validator built from another version is discarded, which
+            catches writes made by other workers
+
+    Returns:
+        A 304 response if the client's copy is current, otherwise None
+        (the route then builds the full response with cached_response)
+    """
+    validator = validator_cache.get(view, key)
+    if validator and validator.version != version:
+        return None
+    if validator and is_not_modified(request, validator.etag, validator.last_modified):
+        return Response(status_code=304, headers=_validator_headers(validator))
+    return None
+
+
+def cached_response(
+    request: Request,
+    view: str,
+    key: str,
+    data: Any,
+    cache_control: str,
+    last_modified: Optional[datetime] = None,
+    version: Optional[int] = None
+) -> Response:
+    """
+    Build a successful API response with caching headers and register its validator
+
+    Args:
+        request: Incoming request (for conditional headers)
+        view: Name of the endpoint view ("story", "read", ...)
+        key: Resource key used for invalidation (story ID)
+        data: Response data
+        cache_control: Cache-Control policy
+        last_modified: Last modification time of the resource, if known
+        version: Stored version read before the data (see not_modified)
+    """
+    response: FastJSONResponse = api_response(success=True, data=data)
+    validator = Validator(make_etag(response.body), last_modified, cache_control, time.monotonic(), version)
+    validator_cache.set(view, key, validator)
+
+    if is_not_modified(request, validator.etag, last_modified):
+        return Response(status_code=304, headers=_validator_headers(validator))
+
+    response.headers.update(_validator_headers(validator))
+    return response
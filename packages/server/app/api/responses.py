@@ -0,0 +1,36 @@
+"""
+API response helpers
+Encode responses with the shared serializer instead of FastAPI's generic encoder
+"""
+
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+from app import serialization
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by the active serializer (pydantic models are encoded directly)"""
+
+    def render(self, content: Any) -> bytes:
+        return serialization.dumps(content)
+
+
+def api_response(
+    success: bool,
+    data: Any = None,
+    error: Optional[Dict[str, str]] = None,
+    status_code: int = 200
+) -> FastJSONResponse:
+    """
+    Build a standard {"success", "data", "error"} response
+
+    Returning a Response from a route skips FastAPI's response_model
+    validation and jsonable_encoder pass; data may be a dict or a pydantic
+    model, which is serialized by alias in the same single pass.
+    """
+    return FastJSONResponse(
+        content={"success": success, "data": data, "error": error},
+        status_code=status_code
+    )
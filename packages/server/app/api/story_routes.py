@@ -4,7 +4,7 @@ Complete implementation of the new story API specification
 """
 
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from app.models.schemas import (ERROR_CODES, APIResponse,
                                 CharacterAssignmentRequest,
@@ -16,7 +16,8 @@ from app.models.schemas import (ERROR_CODES, APIResponse,
                                 LocationUpdateRequest, NodeCreateRequest,
                                 NodeUpdateRequest, PresetCharacter,
                                 ReadingCompletionRequest, ReadingProgress,
-                                ReadingProgressRequest, SceneGenerationStatus,
+                                ReadingProgressRequest, ReadingStepRequest,
+                                SceneGenerationStatus,
                                 SceneRegenerateMultipleRequest,
                                 SceneRegenerateRequest,
                                 SceneVersionSelectRequest, ShareLinkRequest,
@@ -24,12 +25,46 @@ from app.models.schemas import (ERROR_CODES, APIResponse,
                                 StoryEdge, StoryForReading,
                                 StoryGenerateRequest, StoryGenerateResponse,
                                 StoryListItem, StoryListResponse, StoryNode,
-                                StoryTree)
+                                StoryTree, TreeBatchRequest)
+from app.services.edit_journal import EditJournalError
+from app.services.single_flight import generation_flights
 from app.services.story_service import StoryService
-from fastapi import APIRouter, HTTPException, Path, Query, status
-
-router = APIRouter(prefix="/api/v1", tags=["stories"])
+from app.services.story_versions import StoryVersionConflict, parse_if_match
+from app.services.tree_batch import TreeBatchError
+from fastapi import APIRouter, HTTPException, Path, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+import config
+from app.api.http_cache import (cached_response, not_modified,
+                                story_cache_control, validator_cache)
+from app.api.responses import FastJSONResponse, api_response
+from app.api.views import (READING_FIELDS, STORY_FIELDS, STORY_LIST_FIELDS,
+                           compact_reading_story, compact_story, parse_fields,
+                           project, project_story_list, view_key)
+
+router = APIRouter(prefix="/api/v1", tags=["stories"], default_response_class=FastJSONResponse)
 story_service = StoryService()
+validator_cache.add_listener(story_service.story_packager.invalidate)
+story_service.image_upgrades.add_listener(validator_cache.invalidate)
+story_service.add_listener(validator_cache.invalidate)
+
+
+def _expected_version(http_request: Request) -> Tuple[Optional[int], Optional[FastJSONResponse]]:
+    """
+    Story version required by the If-Match header
+    
+    Returns:
+        (version or None for unconditional writes, VALIDATION_ERROR response
+        if the header is malformed)
+    """
+    try:
+        return parse_if_match(http_request.headers.get("if-match")), None
+    except ValueError as e:
+        return None, api_response(
+            success=False,
+            error={"code": "VALIDATION_ERROR", "message": str(e)}
+        )
 
 
 # ============================================================================
@@ -41,17 +76,39 @@ async def get_stories(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     status: Optional[str] = Query(None, regex="^(all|completed|draft)$"),
-    sort_by: Optional[str] = Query(None, regex="^(recent|title|readCount)$")
+    sort_by: Optional[str] = Query(None, regex="^(recent|title|readCount)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated top-level fields to return"),
+    include: Optional[str] = Query(None, description="Alias of fields"),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page"),
+    include_total: bool = Query(True, description="Count matching stories (cached briefly)")
 ):
     """API 1-1 & 9-1: Story List Retrieval (Simple and Detailed)"""
     try:
-        stories_data = story_service.get_all_stories(limit, offset, status, sort_by)
-        return APIResponse(
+        selected = parse_fields(fields, include, STORY_LIST_FIELDS)
+        stories_data = story_service.get_all_stories(
+            limit, offset, status, sort_by,
+            fields=selected,
+            cursor=cursor,
+            include_total=include_total
+        )
+    except ValueError as e:
+        return api_response(
+            success=False,
+            error={"code": "VALIDATION_ERROR", "message": str(e)}
+        )
+    except Exception as e:
+        return api_response(
+            success=False,
+            error={"code": "SERVER_ERROR", "message": str(e)}
+        )
+    
+    try:
+        return api_response(
             success=True,
-            data=stories_data.model_dump(by_alias=True)
+            data=project_story_list(stories_data, selected)
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -71,12 +128,13 @@ async def generate_story(request: StoryGenerateRequest):
             story_format=request.storyFormat,
             character_count=request.characterCount
         )
-        return APIResponse(
+        # The typed response is serialized once, by alias, with no intermediate dicts
+        return api_response(
             success=True,
             data=story_data
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "GENERATION_FAILED", "message": str(e)}
         )
@@ -89,21 +147,44 @@ async def generate_story(request: StoryGenerateRequest):
 
 
 @router.get("/stories/{story_id}", response_model=APIResponse)
-async def get_story_details(story_id: str = Path(..., description="Story ID")):
+async def get_story_details(
+    request: Request,
+    story_id: str = Path(..., description="Story ID"),
+    format: Optional[str] = Query(None, regex="^(full|compact)$", description="compact omits the edge list"),
+    fields: Optional[str] = Query(None, description="Comma-separated top-level fields to return"),
+    include: Optional[str] = Query(None, description="Alias of fields")
+):
     """API 3-1: Story Details Retrieval"""
     try:
-        story = story_service.get_story(story_id)
+        selected = parse_fields(fields, include, STORY_FIELDS)
+    except ValueError as e:
+        return api_response(
+            success=False,
+            error={"code": "VALIDATION_ERROR", "message": str(e)}
+        )
+    
+    view = view_key("story", format, selected)
+    try:
+        version = story_service.get_story_version(story_id)
+        cached = not_modified(request, view, story_id, version)
+        if cached:
+            return cached
+        
+        story = story_service.get_story(story_id, fields=selected)
         if not story:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
-            success=True,
-            data=story.model_dump(by_alias=True)
+        return cached_response(
+            request, view, story_id,
+            data=compact_story(story, selected) if format == "compact" else project(story, selected),
+            cache_control=story_cache_control(story.status),
+            last_modified=story.updatedAt,
+            version=version
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -111,24 +192,35 @@ async def get_story_details(story_id: str = Path(..., description="Story ID")):
 
 @router.patch("/stories/{story_id}/nodes/{node_id}", response_model=APIResponse)
 async def update_node(
+    http_request: Request,
     story_id: str = Path(..., description="Story ID"),
     node_id: str = Path(..., description="Node ID"),
     request: NodeUpdateRequest = None
 ):
-    """API 3-2: Node Update"""
+    """API 3-2: Node Update (If-Match: "v<version>" makes it conditional)"""
+    expected_version, invalid = _expected_version(http_request)
+    if invalid:
+        return invalid
     try:
-        updated_node = story_service.update_node(story_id, node_id, request)
-        if not updated_node:
-            return APIResponse(
+        result = story_service.update_node(story_id, node_id, request, expected_version)
+        validator_cache.invalidate(story_id)
+        if not result:
+            return api_response(
                 success=False,
                 error={"code": "NODE_NOT_FOUND", "message": "Node not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
-            data={"node": updated_node.model_dump(by_alias=True)}
+            data=result
+        )
+    except StoryVersionConflict as e:
+        return api_response(
+            success=False,
+            error=story_service.get_version_conflict(e),
+            status_code=409
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -136,23 +228,74 @@ async def update_node(
 
 @router.post("/stories/{story_id}/nodes", response_model=APIResponse)
 async def add_node(
+    http_request: Request,
     story_id: str = Path(..., description="Story ID"),
     request: NodeCreateRequest = None
 ):
-    """API 3-3: Add Node"""
+    """API 3-3: Add Node (If-Match: "v<version>" makes it conditional)"""
+    expected_version, invalid = _expected_version(http_request)
+    if invalid:
+        return invalid
+    try:
+        result = story_service.add_node(story_id, request, expected_version)
+        validator_cache.invalidate(story_id)
+        if not result:
+            return api_response(
+                success=False,
+                error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
+            )
+        return api_response(
+            success=True,
+            data=result
+        )
+    except StoryVersionConflict as e:
+        return api_response(
+            success=False,
+            error=story_service.get_version_conflict(e),
+            status_code=409
+        )
+    except Exception as e:
+        return api_response(
+            success=False,
+            error={"code": "SERVER_ERROR", "message": str(e)}
+        )
+
+
+@router.post("/stories/{story_id}/tree:batch", response_model=APIResponse)
+async def apply_tree_batch(
+    http_request: Request,
+    request: TreeBatchRequest,
+    story_id: str = Path(..., description="Story ID")
+):
+    """API 3-5: Apply several node edits at once (all or nothing, conditional on If-Match or version)"""
+    expected_version, invalid = _expected_version(http_request)
+    if invalid:
+        return invalid
     try:
-        new_node = story_service.add_node(story_id, request)
-        if not new_node:
-            return APIResponse(
+        result = story_service.apply_tree_batch(story_id, request, expected_version)
+        if not result:
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        validator_cache.invalidate(story_id)
+        return api_response(
             success=True,
-            data={"node": new_node.model_dump(by_alias=True)}
+            data=result
+        )
+    except TreeBatchError as e:
+        return api_response(
+            success=False,
+            error={"code": "VALIDATION_ERROR", "message": str(e), "operationIndex": e.index}
+        )
+    except StoryVersionConflict as e:
+        return api_response(
+            success=False,
+            error=story_service.get_version_conflict(e),
+            status_code=409
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -160,23 +303,115 @@ async def add_node(
 
 @router.delete("/stories/{story_id}/nodes/{node_id}", response_model=APIResponse)
 async def delete_node(
+    http_request: Request,
     story_id: str = Path(..., description="Story ID"),
     node_id: str = Path(..., description="Node ID")
 ):
-    """API 3-4: Delete Node"""
+    """API 3-4: Delete Node (If-Match: "v<version>" makes it conditional)"""
+    expected_version, invalid = _expected_version(http_request)
+    if invalid:
+        return invalid
     try:
-        result = story_service.delete_node(story_id, node_id)
+        result = story_service.delete_node(story_id, node_id, expected_version)
+        validator_cache.invalidate(story_id)
         if not result:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "NODE_NOT_FOUND", "message": "Node not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data=result
         )
+    except StoryVersionConflict as e:
+        return api_response(
+            success=False,
+            error=story_service.get_version_conflict(e),
+            status_code=409
+        )
     except Exception as e:
-        return APIResponse(
+        return api_response(
+            success=False,
+            error={"code": "SERVER_ERROR", "message": str(e)}
+        )
+
+
+
+@router.post("/stories/{story_id}/undo", response_model=APIResponse)
+async def undo_edit(
+    http_request: Request,
+    story_id: str = Path(..., description="Story ID")
+):
+    """API 3-6: Undo the latest tree edit (If-Match: "v<version>" makes it conditional)"""
+    return _step_edit(http_request, story_id, "undo")
+
+
+@router.post("/stories/{story_id}/redo", response_model=APIResponse)
+async def redo_edit(
+    http_request: Request,
+    story_id: str = Path(..., description="Story ID")
+):
+    """API 3-6b: Redo the latest undone tree edit (If-Match: "v<version>" makes it conditional)"""
+    return _step_edit(http_request, story_id, "redo")
+
+
+def _step_edit(http_request: Request, story_id: str, action: str) -> FastJSONResponse:
+    """Shared body of the undo and redo endpoints"""
+    expected_version, invalid = _expected_version(http_request)
+    if invalid:
+        return invalid
+    try:
+        if action == "undo":
+            result = story_service.undo_edit(story_id, expected_version)
+        else:
+            result = story_service.redo_edit(story_id, expected_version)
+        if not result:
+            return api_response(
+                success=False,
+                error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
+            )
+        validator_cache.invalidate(story_id)
+        return api_response(
+            success=True,
+            data=result
+        )
+    except EditJournalError as e:
+        return api_response(
+            success=False,
+            error={"code": "UNDO_UNAVAILABLE", "message": str(e)}
+        )
+    except StoryVersionConflict as e:
+        return api_response(
+            success=False,
+            error=story_service.get_version_conflict(e),
+            status_code=409
+        )
+    except Exception as e:
+        return api_response(
+            success=False,
+            error={"code": "SERVER_ERROR", "message": str(e)}
+        )
+
+
+@router.get("/stories/{story_id}/changes", response_model=APIResponse)
+async def get_story_changes(
+    story_id: str = Path(..., description="Story ID"),
+    since: int = Query(..., ge=0, description="Story version the client already has")
+):
+    """API 3-7: Tree changes since a story version (complete=false means reload)"""
+    try:
+        result = story_service.get_story_changes(story_id, since)
+        if not result:
+            return api_response(
+                success=False,
+                error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
+            )
+        return api_response(
+            success=True,
+            data=result
+        )
+    except Exception as e:
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -189,7 +424,7 @@ async def delete_node(
 # ============================================================================
 
 @router.get("/characters", response_model=APIResponse)
-async def get_preset_characters():
+async def get_preset_characters(request: Request):
     """
     API 4-1: Retrieve Preset Characters List
     
@@ -207,13 +442,18 @@ async def get_preset_characters():
     - Male: James, John, Joseph, Noah, William
     """
     try:
+        cached = not_modified(request, "characters", "preset")
+        if cached:
+            return cached
+        
         characters = story_service.get_preset_characters()
-        return APIResponse(
-            success=True,
-            data={"characters": [char.model_dump(by_alias=True) for char in characters]}
+        return cached_response(
+            request, "characters", "preset",
+            data={"characters": characters},
+            cache_control=config.PRESET_CHARACTERS_CACHE_CONTROL
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -240,20 +480,21 @@ async def save_character_assignments(
     """
     try:
         assignments = story_service.save_character_assignments(story_id, request.assignments)
+        validator_cache.invalidate(story_id)
         if not assignments:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data={
                 "storyId": story_id,
-                "assignments": [assignment.model_dump(by_alias=True) for assignment in assignments]
+                "assignments": assignments
             }
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -275,22 +516,22 @@ async def get_character_assignments(story_id: str = Path(..., description="Story
         assignments = story_service.get_character_assignments(story_id)
         if assignments is None:
             # Return empty list if no assignments found
-            return APIResponse(
+            return api_response(
                 success=True,
                 data={
                     "storyId": story_id,
                     "assignments": []
                 }
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data={
                 "storyId": story_id,
-                "assignments": [assignment.model_dump(by_alias=True) for assignment in assignments]
+                "assignments": assignments
             }
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -301,22 +542,27 @@ async def get_character_assignments(story_id: str = Path(..., description="Story
 # ============================================================================
 
 @router.get("/stories/{story_id}/locations", response_model=APIResponse)
-async def get_story_locations(story_id: str = Path(..., description="Story ID")):
+async def get_story_locations(request: Request, story_id: str = Path(..., description="Story ID")):
     """API 5-1: Retrieve Location Backgrounds List"""
     try:
+        cached = not_modified(request, "locations", story_id)
+        if cached:
+            return cached
+        
         locations = story_service.get_story_locations(story_id)
         if locations is None:
             # Return empty list if no locations found
-            return APIResponse(
+            return api_response(
                 success=True,
                 data={"locations": []}
             )
-        return APIResponse(
-            success=True,
-            data={"locations": [loc.model_dump(by_alias=False) for loc in locations]}
+        return cached_response(
+            request, "locations", story_id,
+            data={"locations": [loc.model_dump(by_alias=False) for loc in locations]},
+            cache_control=config.DRAFT_STORY_CACHE_CONTROL
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -331,17 +577,18 @@ async def update_location_description(
     """API 5-2: Update Location Description"""
     try:
         location = story_service.update_location_description(story_id, location_id, request)
+        validator_cache.invalidate(story_id)
         if not location:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "LOCATION_NOT_FOUND", "message": "Location not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
-            data={"location": location.model_dump(by_alias=True)}
+            data={"location": location}
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -365,9 +612,17 @@ async def generate_all_location_images(
     **Output:**
     - `success`: Boolean indicating if generation was successful
     - `url`: URL of the generated image
+    
+    Identical requests for the story while one is running (double-clicks,
+    retries) wait for it and share its result.
     """
     try:
-        image_url = story_service.generate_all_location_images(story_id, request.locations)
+        image_url = await run_in_threadpool(
+            generation_flights.do,
+            generation_flights.key(story_id, "locations/generate-all", request),
+            lambda: story_service.generate_all_location_images(story_id, request.locations, request.quality)
+        )
+        validator_cache.invalidate(story_id)
         if not image_url:
             raise HTTPException(
                 status_code=404,
@@ -395,16 +650,16 @@ async def check_location_image_generation_status(
     try:
         status_data = story_service.check_location_image_generation_status(story_id, job_id)
         if not status_data:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
-            data=status_data.model_dump(by_alias=True)
+            data=status_data
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -416,20 +671,29 @@ async def regenerate_individual_location_image(
     location_id: str = Path(..., description="Location ID"),
     request: LocationImageRegenerateRequest = None
 ):
-    """API 5-5: Regenerate Individual Location Image"""
+    """API 5-5: Regenerate Individual Location Image (identical in-flight requests share one generation)"""
     try:
-        result = story_service.regenerate_individual_location_image(story_id, location_id, request.description)
+        result = await run_in_threadpool(
+            generation_flights.do,
+            generation_flights.key(story_id, f"locations/{location_id}/regenerate", request),
+            lambda: story_service.regenerate_individual_location_image(
+                story_id, location_id, request.description if request else None,
+                request.quality if request else "final"
+            ),
+            lambda result: bool(result) and result.get("status") != "failed"
+        )
+        validator_cache.invalidate(story_id)
         if not result:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "LOCATION_NOT_FOUND", "message": "Location not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data=result
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "GENERATION_FAILED", "message": str(e)}
         )
@@ -441,20 +705,29 @@ async def select_location_image_version(
     story_id: str = Path(..., description="Story ID"),
     location_id: str = Path(..., description="Location ID")
 ):
-    """API 5-6: Select Location Image Version"""
+    """
+    API 5-6: Select Location Image Version
+    
+    Selecting a draft preview queues a final-quality render of it in the
+    background ("upgrade": "queued"); the location switches to the final
+    image when it is ready, unless another version was selected meanwhile.
+    Drafts that cannot be re-rendered with the same composition (no seed,
+    e.g. from Gemini) stay selected as they are ("upgrade": "unavailable").
+    """
     try:
         result = story_service.select_location_image_version(story_id, location_id, request.versionId)
+        validator_cache.invalidate(story_id)
         if not result:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "LOCATION_NOT_FOUND", "message": "Location not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data=result
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -469,25 +742,33 @@ async def generate_all_scene_images(
     request: SceneRegenerateMultipleRequest,
     story_id: str = Path(..., description="Story ID")
 ):
-    """API 6-1: Generate All Scene Images (Character + Background Composite)"""
+    """
+    API 6-1: Generate All Scene Images (Character + Background Composite)
+    
+    Identical requests for the story while one is running share its result.
+    """
     try:
         # Extract sceneIds, handle None or empty list
         scene_ids = None
         if request and request.sceneIds:
             scene_ids = request.sceneIds
         
-        result = story_service.generate_all_scene_images(story_id, scene_ids)
+        result = await run_in_threadpool(
+            generation_flights.do,
+            generation_flights.key(story_id, "scenes/generate-all-images", scene_ids),
+            lambda: story_service.generate_all_scene_images(story_id, scene_ids)
+        )
         if not result:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data=result
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "GENERATION_FAILED", "message": str(e)}
         )
@@ -502,16 +783,16 @@ async def check_scene_image_generation_status(
     try:
         status_data = story_service.check_scene_image_generation_status(story_id, job_id)
         if not status_data:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
-            data=status_data.model_dump(by_alias=True)
+            data=status_data
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -528,17 +809,18 @@ async def regenerate_individual_scene_image(
     """API 6-4: Regenerate Individual Scene Image"""
     try:
         result = story_service.regenerate_individual_scene_image(story_id, scene_id, request.additionalPrompt)
+        validator_cache.invalidate(story_id)
         if not result:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "NODE_NOT_FOUND", "message": "Scene not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data=result
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "GENERATION_FAILED", "message": str(e)}
         )
@@ -553,17 +835,18 @@ async def select_scene_image_version(
     """API 6-5: Select Scene Image Version"""
     try:
         result = story_service.select_scene_image_version(story_id, scene_id, request.versionId)
+        validator_cache.invalidate(story_id)
         if not result:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "NODE_NOT_FOUND", "message": "Scene not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data=result
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -577,17 +860,18 @@ async def bulk_regenerate_scene_images(
     """API 6-6: Bulk Regenerate Scene Images"""
     try:
         result = story_service.bulk_regenerate_scene_images(story_id, request.sceneIds)
+        validator_cache.invalidate(story_id)
         if not result:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data=result
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "GENERATION_FAILED", "message": str(e)}
         )
@@ -595,23 +879,30 @@ async def bulk_regenerate_scene_images(
 
 @router.post("/stories/{story_id}/complete", response_model=APIResponse)
 async def complete_story(
+    http_request: Request,
     story_id: str = Path(..., description="Story ID"),
     request: StoryCompleteRequest = None
 ):
-    """API 6-7: Complete Story"""
+    """API 6-7: Complete Story (If-Match: "v<version>" makes it conditional)"""
+    expected_version, invalid = _expected_version(http_request)
+    if invalid:
+        return invalid
     try:
-        result = story_service.complete_story(story_id, request.title)
+        result = story_service.complete_story(story_id, request.title, expected_version)
+        validator_cache.invalidate(story_id)
         if not result:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        # Started after the invalidation so the new package is not dropped by it
+        story_service.build_story_package_in_background(story_id)
+        return api_response(
             success=True,
             data=result
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -626,21 +917,67 @@ async def complete_story(
 # ============================================================================
 
 @router.get("/stories/{story_id}/read", response_model=APIResponse)
-async def get_story_for_reading(story_id: str = Path(..., description="Story ID")):
+async def get_story_for_reading(
+    request: Request,
+    story_id: str = Path(..., description="Story ID"),
+    format: Optional[str] = Query(None, regex="^(full|compact)$", description="compact sends only the fields the reader uses"),
+    fields: Optional[str] = Query(None, description="Comma-separated top-level fields to return"),
+    include: Optional[str] = Query(None, description="Alias of fields")
+):
     """API 8-1: Retrieve Story for Reading"""
     try:
-        story_data = story_service.get_story_for_reading(story_id)
+        selected = parse_fields(fields, include, READING_FIELDS)
+    except ValueError as e:
+        return api_response(
+            success=False,
+            error={"code": "VALIDATION_ERROR", "message": str(e)}
+        )
+    
+    view = view_key("read", format, selected)
+    try:
+        version = story_service.get_story_version(story_id)
+        cached = not_modified(request, view, story_id, version)
+        if cached:
+            return cached
+        
+        story_data = story_service.get_story_for_reading(story_id, fields=selected)
         if not story_data:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
-            success=True,
-            data=story_data.model_dump(by_alias=True)
+        return cached_response(
+            request, view, story_id,
+            data=compact_reading_story(story_data, selected) if format == "compact" else project(story_data, selected),
+            cache_control=story_cache_control(story_data.status),
+            last_modified=story_data.updatedAt,
+            version=version
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
+            success=False,
+            error={"code": "SERVER_ERROR", "message": str(e)}
+        )
+
+
+@router.get("/stories/{story_id}/package")
+async def get_story_package(story_id: str = Path(..., description="Story ID")):
+    """API 8-1b: Download the offline reading package (zip)"""
+    try:
+        # Building a package downloads every asset, so keep it off the event loop
+        package_path = await run_in_threadpool(story_service.get_story_package, story_id)
+        if not package_path:
+            return api_response(
+                success=False,
+                error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
+            )
+        return FileResponse(
+            package_path,
+            media_type="application/zip",
+            filename=f"story-{story_id}.zip"
+        )
+    except Exception as e:
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -655,37 +992,84 @@ async def save_reading_progress(
     try:
         result = story_service.save_reading_progress(story_id, request)
         if not result:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data=result
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
+            success=False,
+            error={"code": "SERVER_ERROR", "message": str(e)}
+        )
+
+
+@router.post("/stories/{story_id}/reading-progress/steps", response_model=APIResponse)
+async def append_reading_step(
+    request: ReadingStepRequest,
+    story_id: str = Path(..., description="Story ID")
+):
+    """
+    API 8-2b: Save Reading Progress as a single step (safe to resend)
+    
+    Steps are checked against the reader's progress buffered in this worker,
+    so with several workers a reader must be routed to the same one (see
+    READING_PROGRESS_* in config); otherwise a valid step can be reported as
+    SEQUENCE_GAP or SEQUENCE_CONFLICT until the buffered progress is written.
+    """
+    try:
+        result = story_service.append_reading_step(story_id, request)
+        if result["status"] == "gap":
+            return api_response(
+                success=False,
+                error={
+                    "code": "SEQUENCE_GAP",
+                    "message": f"Expected step {result['expectedSeq']}, got {request.seq}",
+                    "expectedSeq": result["expectedSeq"]
+                }
+            )
+        if result["status"] == "conflict":
+            return api_response(
+                success=False,
+                error={
+                    "code": "SEQUENCE_CONFLICT",
+                    "message": f"Step {request.seq} was saved with a different node",
+                    "expectedSeq": result["expectedSeq"]
+                }
+            )
+        return api_response(
+            success=True,
+            data=result
+        )
+    except Exception as e:
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
 
 
 @router.get("/stories/{story_id}/reading-progress", response_model=APIResponse)
-async def get_reading_progress(story_id: str = Path(..., description="Story ID")):
+async def get_reading_progress(
+    story_id: str = Path(..., description="Story ID"),
+    reader_id: Optional[str] = Query(None, description="Reader whose progress to return (latest reader if omitted)")
+):
     """API 8-3: Retrieve Reading Progress"""
     try:
-        progress = story_service.get_reading_progress(story_id)
+        progress = story_service.get_reading_progress(story_id, reader_id)
         if progress is None:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
-            data=progress.model_dump(by_alias=True)
+            data=progress
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -700,16 +1084,16 @@ async def record_reading_completion(
     try:
         result = story_service.record_reading_completion(story_id, request)
         if not result:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data=result
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -724,17 +1108,39 @@ async def delete_story(story_id: str = Path(..., description="Story ID")):
     """API 9-2: Delete Story"""
     try:
         result = story_service.delete_story(story_id)
+        validator_cache.invalidate(story_id)
         if not result:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
             data=result
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
+            success=False,
+            error={"code": "SERVER_ERROR", "message": str(e)}
+        )
+
+
+@router.get("/stories/{story_id}/statistics", response_model=APIResponse)
+async def get_story_statistics(story_id: str = Path(..., description="Story ID")):
+    """API 9-3: Story Statistics"""
+    try:
+        statistics = story_service.get_story_statistics(story_id)
+        if not statistics:
+            return api_response(
+                success=False,
+                error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
+            )
+        return api_response(
+            success=True,
+            data=statistics
+        )
+    except Exception as e:
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -757,16 +1163,16 @@ async def generate_share_link(
     try:
         share_data = story_service.generate_share_link(story_id, request.expiresIn if request else 2592000)
         if not share_data:
-            return APIResponse(
+            return api_response(
                 success=False,
                 error={"code": "STORY_NOT_FOUND", "message": "Story not found"}
             )
-        return APIResponse(
+        return api_response(
             success=True,
-            data=share_data.model_dump(by_alias=True)
+            data=share_data
         )
     except Exception as e:
-        return APIResponse(
+        return api_response(
             success=False,
             error={"code": "SERVER_ERROR", "message": str(e)}
         )
@@ -784,5 +1190,9 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "Fable Tales Story API",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "llmCache": story_service.openai_service.response_cache.stats(),
+        "generationFlights": generation_flights.stats(),
+        "imageProviders": story_service.image_router.stats(),
+        "imageUpgrades": story_service.image_upgrades.stats()
     }
@@ -0,0 +1,81 @@
+"""
+Response views
+Compact encodings and sparse field projections of story payloads
+"""
+
+from typing import Any, Dict, Optional, Set
+
+from app.models.schemas import (Story, StoryForReading, StoryListItem,
+                                StoryListResponse)
+
+# Tree edges are derivable from choices[].nextNodeId
+COMPACT_STORY_EXCLUDE = {"tree": {"edges"}}
+
+# Fields the reading view never uses
+COMPACT_READING_EXCLUDE = {
+    "nodes": {"__all__": {"sceneNumber": True, "choices": {"__all__": {"isCorrect"}}}}
+}
+
+# Top-level fields selectable with ?fields= on each endpoint
+STORY_FIELDS = set(Story.model_fields)
+STORY_LIST_FIELDS = set(StoryListItem.model_fields)
+READING_FIELDS = {name for name, field in StoryForReading.model_fields.items() if not field.exclude}
+
+
+def parse_fields(fields: Optional[str], include: Optional[str], allowed: Set[str]) -> Optional[Set[str]]:
+    """
+    Parse ?fields= / ?include= into a set of top-level field names
+
+    Args:
+        fields: Comma-separated field names
+        include: Same as fields (both may be given; they are merged)
+        allowed: Field names the endpoint can return
+
+    Returns:
+        Requested fields (always including "id"), or None for the full payload
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    requested = {
+        name.strip()
+        for value in (fields, include) if value
+        for name in value.split(",") if name.strip()
+    }
+    if not requested:
+        return None
+
+    unknown = requested - allowed
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}. Available: {', '.join(sorted(allowed))}")
+    return requested | {"id"}
+
+
+def view_key(name: str, format: Optional[str] = None, fields: Optional[Set[str]] = None) -> str:
+    """Cache key of an endpoint view (one validator per format and field set)"""
+    key = f"{name}:{format or 'full'}"
+    return f"{key}:{','.join(sorted(fields))}" if fields else key
+
+
+def project(model: Any, fields: Optional[Set[str]]) -> Any:
+    """Keep only the requested top-level fields (the model itself when fields is None)"""
+    if fields is None:
+        return model
+    return model.model_dump(by_alias=True, include=fields)
+
+
+def project_story_list(response: StoryListResponse, fields: Optional[Set[str]]) -> Any:
+    """Keep only the requested fields of each list item"""
+    if fields is None:
+        return response
+    return response.model_dump(by_alias=True, include={"stories": {"__all__": fields}, "total": True, "hasMore": True, "nextCursor": True})
+
+
+def compact_story(story: Story, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Story without the edge list (clients rebuild edges from the choices)"""
+    return story.model_dump(by_alias=True, include=fields, exclude=COMPACT_STORY_EXCLUDE)
+
+
+def compact_reading_story(story: StoryForReading, fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Reading story with only the fields the reader uses and no null fields"""
+    return story.model_dump(by_alias=True, include=fields, exclude=COMPACT_READING_EXCLUDE, exclude_none=True)
@@ -0,0 +1,146 @@
+"""
+File Store
+Atomic file writes and per-file locks shared by the JSON storage managers
+"""
+
+import os
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+import config
+
+try:
+    import fcntl
+except ImportError:     # Windows: locks only cover threads of this process
+    fcntl = None
+
+PathLike = Union[str, Path]
+
+# Directory (next to the locked files) holding the advisory lock files
+LOCK_DIR = ".locks"
+
+
+class _FileLock:
+    """
+    Re-entrant lock on one path for threads and processes
+
+    Threads of this process queue on an RLock; the first acquisition also
+    takes an exclusive flock on the path's lock file, which excludes other
+    processes (e.g. other uvicorn workers). The flock is only taken once
+    per outermost acquisition, since two flocks on separately opened
+    descriptors of the same file would deadlock even within one process.
+    """
+
+    def __init__(self, lock_path: str):
+        self.lock_path = lock_path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0 and fcntl is not None:
+                os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+                self._handle = open(self.lock_path, "a+b")
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+            self._depth += 1
+        except BaseException:
+            if self._handle is not None and self._depth == 0:
+                self._handle.close()
+                self._handle = None
+            self._thread_lock.release()
+            raise
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._handle is not None:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
+        self._thread_lock.release()
+
+
+_locks: "weakref.WeakValueDictionary[str, _FileLock]" = weakref.WeakValueDictionary()
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path: PathLike) -> _FileLock:
+    path = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(path)
+        if lock is None:
+            directory, name = os.path.split(path)
+            lock = _FileLock(os.path.join(directory, LOCK_DIR, f"{name}.lock"))
+            _locks[path] = lock
+        return lock
+
+
+@contextmanager
+def locked(path: PathLike) -> Iterator[None]:
+    """
+    Hold the advisory lock of a file
+
+    Use around read-modify-write sequences. Readers do not need it: files
+    are only ever replaced whole, so a read sees either the old or the new
+    content.
+    """
+    lock = _lock_for(path)
+    lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def write_bytes(path: PathLike, data: bytes, fsync: bool = config.JSON_STORAGE_FSYNC) -> None:
+    """
+    Replace a file's content atomically
+
+    The data goes to a temporary file in the same directory, which is
+    flushed (and fsynced) and then renamed over the target. A crash leaves
+    either the old file or the new one, never a truncated mix; the rename
+    itself is made durable by syncing the directory.
+    """
+    path = os.fspath(path)
+    directory, name = os.path.split(os.path.abspath(path))
+    with locked(path):
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        if fsync:
+            _sync_directory(directory)
+
+
+def append_bytes(path: PathLike, data: bytes, fsync: bool = config.JSON_STORAGE_FSYNC) -> None:
+    """Append to a file under its lock (readers should ignore an unterminated last line)"""
+    with locked(path), open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+
+
+def _sync_directory(directory: str) -> None:
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -7,7 +7,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 # ============================================================================
 # Enums
@@ -84,6 +84,11 @@ class ImageVersion(BaseModel):
     versionId: str
     url: str = Field(alias="imageUrl")  # Support both url and imageUrl
     generatedAt: datetime = Field(alias="createdAt")  # Support both generatedAt and createdAt
+    quality: str = "final"   # "draft" previews are re-rendered at final quality once selected
+    prompt: Optional[str] = None
+    seed: Optional[int] = None
+    model: Optional[str] = None   # Model that rendered it (a draft is re-rendered on the same one)
+    upgradedFrom: Optional[str] = None   # Draft version this final render replaces
 
     class Config:
         populate_by_name = True  # Allow both field name and alias
@@ -115,6 +120,7 @@ class Story(BaseModel):
     locations: List[Location]
     createdAt: datetime
     updatedAt: datetime
+    version: int = 0  # Incremented by every save; used for If-Match
 
 # ============================================================================
 # Character Models
@@ -169,6 +175,7 @@ class LocationImageItem(BaseModel):
 class LocationImageGenerationRequest(BaseModel):
     """Request to generate location images"""
     locations: List[LocationImageItem]
+    quality: str = Field("final", pattern="^(draft|final)$")   # draft: cheaper model, fewer steps, half size
 
 class LocationImageGenerationResponse(BaseModel):
     """Response for location image generation"""
@@ -184,6 +191,7 @@ class LocationImageGenerationStatus(BaseModel):
 class LocationImageRegenerateRequest(BaseModel):
     """Request to regenerate location image"""
     description: Optional[str] = None
+    quality: str = Field("final", pattern="^(draft|final)$")
 
 class LocationImageVersionSelectRequest(BaseModel):
     """Request to select location image version"""
@@ -231,6 +239,7 @@ class ReadingProgressRequest(BaseModel):
     currentNodeId: str
     visitedNodeIds: List[str]
     choicesMade: List[ChoiceMade]
+    readerId: Optional[str] = None
 
 class ReadingProgress(BaseModel):
     """Reading progress data"""
@@ -239,6 +248,21 @@ class ReadingProgress(BaseModel):
     visitedNodeIds: List[str]
     choicesMade: List[ChoiceMade]
     lastReadAt: datetime
+    sessionId: Optional[str] = None
+
+class ReadingStepRequest(BaseModel):
+    """
+    One reading step (delta progress save)
+
+    Step `seq` visits `nodeId`, reached through `choice` (None for the start
+    node). Steps are numbered from 1 within a reading session, so a step
+    that was already applied can be resent safely.
+    """
+    seq: int = Field(ge=1)
+    nodeId: str
+    choice: Optional[ChoiceMade] = None
+    sessionId: Optional[str] = None
+    readerId: Optional[str] = None
 
 class ReadingCompletionRequest(BaseModel):
     """Request to record reading completion"""
@@ -246,6 +270,7 @@ class ReadingCompletionRequest(BaseModel):
     endingType: EndingType
     totalNodesVisited: int
     readingTimeSeconds: int
+    readerId: Optional[str] = None
 
 # ============================================================================
 # Story Management Models
@@ -266,8 +291,9 @@ class StoryListItem(BaseModel):
 class StoryListResponse(BaseModel):
     """Response for story list endpoints"""
     stories: List[StoryListItem]
-    total: int
+    total: Optional[int]
     hasMore: bool
+    nextCursor: Optional[str] = None
 
 class StoryGenerateRequest(BaseModel):
     """Request to generate a new story"""
@@ -300,6 +326,25 @@ class NodeCreateRequest(BaseModel):
     type: NodeType
     choices: List[Choice]
 
+class TreeOperation(BaseModel):
+    """One edit in a tree batch"""
+    op: str = Field(..., pattern="^(add|update|delete|link)$")
+    nodeId: Optional[str] = None        # update/delete/link: node ID or ref of an earlier add
+    ref: Optional[str] = None           # add: name later operations can use for the new node
+    parentNodeId: Optional[str] = None  # add: node whose choice should lead to the new node
+    choiceId: Optional[str] = None      # add: that choice; link: choice to re-point
+    nextNodeId: Optional[str] = None    # link: new target (None unlinks the choice)
+    title: Optional[str] = None
+    text: Optional[str] = None
+    location: Optional[str] = None
+    type: Optional[NodeType] = None
+    choices: Optional[List[Choice]] = None
+
+class TreeBatchRequest(BaseModel):
+    """Ordered node operations applied atomically"""
+    operations: List[TreeOperation] = Field(..., min_length=1, max_length=500)
+    version: Optional[int] = None  # Apply only if the story is still at this version
+
 class StoryFinalizeRequest(BaseModel):
     """Request to finalize story structure"""
     tree: StoryTree
@@ -340,6 +385,10 @@ class StoryStatistics(BaseModel):
     completionRate: int
     choiceDistribution: List[ChoiceDistribution]
     mostVisitedScenes: List[Dict[str, Any]]
+    endingCounts: Dict[str, int] = {}
+    readingTimeHistogram: List[Dict[str, Any]] = []
+    totalEndings: int = 0
+    pathCount: int = 0  # Distinct start-to-ending read paths
 
 # ============================================================================
 # Reading Models (for child mode)
@@ -357,6 +406,20 @@ class ReadingNode(BaseModel):
     choices: List[Choice]
     lessonMessage: Optional[str] = None
     previousNodeId: Optional[str] = None
+    scenesToEnd: Optional[int] = None  # Fewest scenes left until an ending
+
+class PrefetchAsset(BaseModel):
+    """Asset of a scene the reader may open next"""
+    type: str  # "image" or "audio"
+    url: str
+    bytes: Optional[int] = None  # None until the size is known
+
+class PrefetchTarget(BaseModel):
+    """Scene reachable from the current one by a single choice"""
+    nodeId: str
+    choiceId: str
+    likelihood: float  # Estimated share of readers taking this choice
+    assets: List[PrefetchAsset]
 
 class StoryForReading(BaseModel):
     """Story data formatted for reading"""
@@ -365,6 +428,12 @@ class StoryForReading(BaseModel):
     lesson: str
     nodes: List[ReadingNode]
     startNodeId: str
+    # Node ID -> next scenes to warm while it is read, most likely first
+    prefetch: Dict[str, List[PrefetchTarget]] = {}
+    version: Optional[int] = None  # Story version the bundle was built from
+    # Used for HTTP caching headers only, not part of the response body
+    status: Optional[StoryStatus] = Field(default=None, exclude=True)
+    updatedAt: Optional[datetime] = Field(default=None, exclude=True)
 
 # ============================================================================
 # Image Upload Models
@@ -395,6 +464,14 @@ class ErrorResponse(BaseModel):
     code: str
     message: str
 
+# ============================================================================
+# Type Adapters
+# ============================================================================
+
+# Built once at import so hot parsing paths reuse the compiled validators
+STORY_ADAPTER = TypeAdapter(Story)
+STORY_TREE_ADAPTER = TypeAdapter(StoryTree)
+
 # ============================================================================
 # Error Codes
 # ============================================================================
@@ -410,5 +487,9 @@ ERROR_CODES = {
     "IMAGE_UPLOAD_FAILED": "Image upload failed",
     "UNAUTHORIZED": "Unauthorized",
     "VALIDATION_ERROR": "Validation error",
+    "SEQUENCE_GAP": "Reading step out of sequence",
+    "SEQUENCE_CONFLICT": "Reading step conflicts with saved progress",
+    "VERSION_CONFLICT": "Story was changed by someone else",
+    "UNDO_UNAVAILABLE": "Nothing to undo or redo, or a later edit changed the same nodes",
     "SERVER_ERROR": "Server error occurred"
 }
\ No newline at end of file
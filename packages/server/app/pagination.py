@@ -0,0 +1,86 @@
+"""
+Keyset Pagination
+Opaque cursors and in-memory keyset indexes for the story library
+
+Pages are ordered by (sort key, id) so every row has a unique position, and
+the cursor records the position of the last row served. The next page is
+"rows after this position", which costs the same at any depth.
+"""
+
+import base64
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, List, Optional, Tuple
+
+from app import serialization
+
+# sort_by -> descending?
+SORT_DIRECTIONS = {
+    "recent": True,     # updated_at, newest first
+    "title": False,     # title, A-Z (untitled first)
+    "readCount": True,  # read count, most read first
+}
+DEFAULT_SORT = "recent"
+
+Position = Tuple[Any, str]
+
+
+def normalize_sort(sort_by: Optional[str]) -> str:
+    """Map a sort_by query value to a keyset sort (unknown values use the default)"""
+    return sort_by if sort_by in SORT_DIRECTIONS else DEFAULT_SORT
+
+
+def encode_cursor(sort: str, status: Optional[str], position: Position) -> str:
+    """Encode the position of the last row served as an opaque token"""
+    payload = serialization.dumps([sort, status, position[0], position[1]])
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, sort: str, status: Optional[str]) -> Position:
+    """
+    Decode a cursor token
+
+    Raises:
+        ValueError: If the token is malformed or was issued for another sort/filter
+    """
+    try:
+        payload = serialization.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        cursor_sort, cursor_status, value, story_id = payload
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or cursor_status != status:
+        raise ValueError("Cursor does not match the requested sort_by/status")
+    return value, story_id
+
+
+class KeysetIndex:
+    """
+    Sorted (key, id) positions supporting O(log n + page) keyset pages
+
+    Keys must be mutually comparable (use "" rather than None for missing titles).
+    """
+
+    def __init__(self, positions: Iterable[Position]):
+        self.positions: List[Position] = sorted(positions)
+
+    def page(self, after: Optional[Position], limit: int, descending: bool) -> Tuple[List[str], bool]:
+        """
+        IDs of the rows following a position
+
+        Args:
+            after: Position of the last row already served (None for the first page)
+            limit: Page size
+            descending: Walk the index from the largest position down
+
+        Returns:
+            (story IDs of the page, whether more rows follow)
+        """
+        positions = self.positions
+        if descending:
+            end = len(positions) if after is None else bisect_left(positions, tuple(after))
+            start = max(0, end - limit)
+            ids = [story_id for _, story_id in reversed(positions[start:end])]
+            return ids, start > 0
+
+        start = 0 if after is None else bisect_right(positions, tuple(after))
+        ids = [story_id for _, story_id in positions[start:start + limit]]
+        return ids, start + limit < len(positions)
@@ -0,0 +1,129 @@
+"""
+JSON Serialization
+Pluggable JSON backend shared by the API responses and the JSON storage managers
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+import pydantic_core
+from pydantic import BaseModel
+
+import config
+from app import file_store
+
+
+class JSONSerializer:
+    """
+    A named pair of compact dumps/loads functions
+
+    dumps must accept pydantic models, datetimes and enums anywhere in the
+    value and return UTF-8 bytes; loads must accept bytes or str.
+    """
+
+    def __init__(self, name: str, dumps: Callable[[Any], bytes], loads: Callable[[Union[bytes, str]], Any]):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+
+def _pydantic_dumps(value: Any) -> bytes:
+    return pydantic_core.to_json(value, by_alias=True, fallback=str)
+
+
+def _pydantic_loads(data: Union[bytes, str]) -> Any:
+    return pydantic_core.from_json(data)
+
+
+def _to_builtin(value: Any) -> Any:
+    """Fallback for encoders that do not know pydantic models, datetimes or enums"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    return pydantic_core.to_jsonable_python(value, fallback=str)
+
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_to_builtin).encode("utf-8")
+
+
+SERIALIZERS: Dict[str, JSONSerializer] = {
+    "pydantic": JSONSerializer("pydantic", _pydantic_dumps, _pydantic_loads),
+    "json": JSONSerializer("json", _stdlib_dumps, json.loads),
+}
+
+try:
+    import orjson
+
+    SERIALIZERS["orjson"] = JSONSerializer(
+        "orjson",
+        lambda value: orjson.dumps(value, default=_to_builtin),
+        orjson.loads
+    )
+except ImportError:
+    pass
+
+
+_active = SERIALIZERS.get(config.JSON_SERIALIZER, SERIALIZERS["pydantic"])
+
+
+def get_serializer() -> JSONSerializer:
+    """Get the active serializer"""
+    return _active
+
+
+def set_serializer(name: str) -> JSONSerializer:
+    """
+    Switch the active serializer
+
+    Args:
+        name: Registered serializer name ("pydantic", "json", "orjson" if installed)
+
+    Returns:
+        The newly active serializer
+    """
+    global _active
+    if name not in SERIALIZERS:
+        raise Exception(f"Unknown JSON serializer '{name}'. Available: {', '.join(SERIALIZERS)}")
+    _active = SERIALIZERS[name]
+    return _active
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a value to compact JSON bytes"""
+    return _active.dumps(value)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON bytes or text"""
+    return _active.loads(data)
+
+
+def dump_file(value: Any, path: Union[str, Path]) -> None:
+    """Write a value to a JSON file (compact, no indentation; replaced atomically)"""
+    file_store.write_bytes(path, dumps(value))
+
+
+def load_file(path: Union[str, Path]) -> Any:
+    """Read a JSON file"""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def update_file(path: Union[str, Path], update: Callable[[Optional[Any]], Optional[Any]]) -> Optional[Any]:
+    """
+    Read-modify-write a JSON file under its lock
+
+    Args:
+        update: Gets the current value (None if the file does not exist)
+            and returns the value to write, or None to leave the file as is
+
+    Returns:
+        The value returned by update
+    """
+    with file_store.locked(path):
+        current = load_file(path) if Path(path).exists() else None
+        value = update(current)
+        if value is not None:
+            dump_file(value, path)
+        return value
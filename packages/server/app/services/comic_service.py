@@ -3,11 +3,13 @@ Comic Service
 Main business logic for comic creation workflow
 """
 
+import hashlib
+import json
 import uuid
 from typing import Dict, List, Any, Optional
 
+import config
 from app.storage.data_manager import DataManager
-from app.models.schemas import JobStatus
 from external_services import OpenAIService, FALAIService
 from master_prompts import (
     SCENE_GENERATION_SYSTEM_PROMPT,
@@ -193,44 +195,80 @@ class ComicService:
     # ========================================================================
     
     def generate_comic_panels(self, job_id: str) -> Dict[str, Any]:
-        """Generate comic panels using FAL.ai"""
+        """
+        Generate comic panels using FAL.ai
+        
+        Image prompts and panel images are checkpointed in the job as each
+        one completes, so running this again after a failure only pays for
+        the panels that are still missing. Failed images are retried up to
+        COMIC_PANEL_ATTEMPTS batches per run. The checkpoint is discarded
+        if the scenes or characters changed since it was written.
+        """
         job = self.data_manager.get_job(job_id)
         if not job:
             return {"job_id": job_id, "status": "failed", "error": "Job not found"}
         
+        if job["status"] == "completed" and job["data"].get("comic_id"):
+            return self._completed_response(job_id, job["data"]["comic_id"], job["data"].get("comic_panels", []))
+        
         try:
             self.data_manager.update_job_status(
                 job_id,
                 status="processing",
                 step="generating_images",
-                progress=75
+                progress=max(job.get("progress") or 0, 75)
             )
             
             scenes = job["data"].get("scenes", [])
             characters = job["data"].get("characters", [])
             topic = job["data"].get("topic", "")
+            checkpoint = self._panel_checkpoint(job, scenes, characters)
+            panel_ids = [str(idx) for idx in range(1, len(scenes) + 1)]
             
-            # Generate image prompts
-            image_prompts = []
-            for scene in scenes:
-                prompt = self.openai_service.generate_image_prompt(
+            if checkpoint["images"]:
+                print(f"🔁 Resuming comic {job_id}: {len(checkpoint['images'])}/{len(scenes)} panels already generated")
+            
+            # Generate image prompts (one OpenAI call per panel not prompted yet)
+            for panel_id, scene in zip(panel_ids, scenes):
+                if panel_id in checkpoint["prompts"]:
+                    continue
+                checkpoint["prompts"][panel_id] = self.openai_service.generate_image_prompt(
                     scene_description=scene.get("description", ""),
                     dialogue=scene.get("dialogue", ""),
                     characters=[c.get("name", "") for c in characters],
                     visual_elements=scene.get("visual_elements", [])
                 )
-                image_prompts.append(prompt)
+                self._save_panel_checkpoint(job_id, checkpoint, len(scenes))
+            
+            # Generate the missing images, saving each as it completes
+            for _ in range(config.COMIC_PANEL_ATTEMPTS):
+                missing = [panel_id for panel_id in panel_ids if panel_id not in checkpoint["images"]]
+                if not missing:
+                    break
+                
+                prompts = [checkpoint["prompts"][panel_id] for panel_id in missing]
+                for result in self.fal_ai_service.iter_batch_images(prompts):
+                    panel_id = missing[result.index]
+                    if result.ok:
+                        checkpoint["images"][panel_id] = result.url
+                        checkpoint["errors"].pop(panel_id, None)
+                    else:
+                        print(f"⚠️ Panel {panel_id} image failed: {result.error}")
+                        checkpoint["errors"][panel_id] = result.error
+                    self._save_panel_checkpoint(job_id, checkpoint, len(scenes))
             
-            # Generate images
-            image_urls = self.fal_ai_service.generate_batch_images(image_prompts)
+            missing = [panel_id for panel_id in panel_ids if panel_id not in checkpoint["images"]]
+            if missing:
+                raise Exception(f"Images for panels {', '.join(missing)} failed; retry to generate only these")
             
             # Create comic panels
             comic_panels = []
-            for idx, (scene, url) in enumerate(zip(scenes, image_urls)):
+            for idx, scene in enumerate(scenes, 1):
+                url = checkpoint["images"][str(idx)]
                 panel = {
-                    "panel_id": idx + 1,
-                    "scene_id": scene.get("scene_id", idx + 1),
-                    "image_url": url or "https://placeholder-image.png",
+                    "panel_id": idx,
+                    "scene_id": scene.get("scene_id", idx),
+                    "image_url": url,
                     "description": scene.get("description", ""),
                     "dialogue": scene.get("dialogue", ""),
                     "title": scene.get("title", "")
@@ -239,9 +277,9 @@ class ComicService:
                 
                 # Store image reference
                 self.data_manager.store_panel_image_url(
-                    image_url=url or "https://placeholder-image.png",
+                    image_url=url,
                     comic_id=job_id,
-                    panel_id=idx + 1
+                    panel_id=idx
                 )
             
             # Save complete comic
@@ -267,23 +305,43 @@ class ComicService:
                 }
             )
             
-            return {
-                "job_id": job_id,
-                "status": "completed",
-                "step": "completed",
-                "message": "Comic generated successfully!",
-                "comic_panels": comic_panels,
-                "comic_id": comic_id
-            }
+            return self._completed_response(job_id, comic_id, comic_panels)
             
         except Exception as e:
             self.data_manager.update_job_status(
                 job_id,
                 status="failed",
-                step="error"
+                step="error",
+                data_update={"error": str(e)}
             )
             return {"job_id": job_id, "status": "failed", "error": str(e)}
     
+    def _panel_checkpoint(self, job: Dict[str, Any], scenes: List[Dict[str, Any]], characters: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Saved panel progress of a job, or a fresh one if its inputs changed"""
+        inputs = hashlib.sha256(
+            json.dumps({"scenes": scenes, "characters": characters}, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        checkpoint = job["data"].get("panel_checkpoint")
+        if not checkpoint or checkpoint.get("inputs") != inputs:
+            checkpoint = {"inputs": inputs, "prompts": {}, "images": {}, "errors": {}}
+        return checkpoint
+    
+    def _save_panel_checkpoint(self, job_id: str, checkpoint: Dict[str, Any], total: int):
+        """Persist panel progress (prompts and images each count for half of the last 25%)"""
+        done = len(checkpoint["prompts"]) + len(checkpoint["images"])
+        progress = 75 + int(24 * done / (2 * total)) if total else 75
+        self.data_manager.save_job_checkpoint(job_id, "panel_checkpoint", checkpoint, progress)
+    
+    def _completed_response(self, job_id: str, comic_id: str, comic_panels: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "job_id": job_id,
+            "status": "completed",
+            "step": "completed",
+            "message": "Comic generated successfully!",
+            "comic_panels": comic_panels,
+            "comic_id": comic_id
+        }
+    
     # ========================================================================
     # Status & Retrieval
     # ========================================================================
@@ -0,0 +1,274 @@
+"""
+Story Edit Journal
+Append-only node deltas per story version, with periodic snapshots, for undo/redo and change feeds
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import config
+from app.models.schemas import StoryNode, StoryTree
+from app.services.story_graph import StoryGraph
+
+# Node ID -> node.model_dump(mode="json"), as produced by tree_batch.snapshot()
+NodeState = Dict[str, Dict[str, Any]]
+
+
+class EditJournalError(Exception):
+    """An undo or redo cannot be applied"""
+
+
+def node_changes(before: NodeState, after: NodeState) -> Dict[str, Dict[str, Any]]:
+    """
+    Compact delta between two node states
+
+    Returns:
+        {node_id: {"before": fields, "after": fields}} for every changed node.
+        Updated nodes carry only their changed fields (choices and location
+        included); added and deleted nodes carry the whole node on one side
+        and None on the other.
+    """
+    changes = {}
+    for node_id in list(before) + [node_id for node_id in after if node_id not in before]:
+        old, new = before.get(node_id), after.get(node_id)
+        if old == new:
+            continue
+        if old is None or new is None:
+            changes[node_id] = {"before": old, "after": new}
+            continue
+        fields = [name for name in new if old.get(name) != new[name]]
+        changes[node_id] = {
+            "before": {name: old.get(name) for name in fields},
+            "after": {name: new[name] for name in fields}
+        }
+    return changes
+
+
+def apply_changes(nodes: NodeState, changes: Dict[str, Dict[str, Any]], direction: str) -> NodeState:
+    """
+    Replay ("after") or reverse ("before") a delta on a node state
+
+    Raises:
+        EditJournalError: If a node no longer matches the other side of the
+            delta (it was changed by a later edit)
+    """
+    source = "before" if direction == "after" else "after"
+    result = dict(nodes)
+    for node_id, change in changes.items():
+        current, expected, target = result.get(node_id), change[source], change[direction]
+        if expected is None:
+            matches = current is None
+        else:
+            matches = current is not None and all(current.get(name) == value for name, value in expected.items())
+        if not matches:
+            raise EditJournalError(f"Node '{node_id}' was changed by a later edit")
+
+        if target is None:
+            del result[node_id]
+        elif current is None:
+            result[node_id] = dict(target)
+        else:
+            result[node_id] = {**current, **target}
+    return result
+
+
+def tree_from_nodes(nodes: NodeState) -> StoryTree:
+    """Story tree for a node state (edges are derived from the choices)"""
+    ordered = sorted(nodes.values(), key=lambda node: node["sceneNumber"])
+    tree = StoryTree(nodes=[StoryNode(**node) for node in ordered], edges=[])
+    tree.edges = StoryGraph(tree).edges_from_choices()
+    return tree
+
+
+class JournalHead:
+    """Node state and undo/redo stacks at the newest journaled version"""
+
+    def __init__(self, version: int, nodes: NodeState, undo: Optional[List[int]] = None,
+                 redo: Optional[List[int]] = None, deltas: int = 0):
+        self.version = version
+        self.nodes = nodes
+        self.undo = undo or []    # Versions of edits that can be undone, newest last
+        self.redo = redo or []    # Versions of undone edits that can be redone, newest last
+        self.deltas = deltas      # Deltas since the last snapshot
+
+    def snapshot_entry(self) -> Dict[str, Any]:
+        return {
+            "kind": "snapshot",
+            "version": self.version,
+            "nodes": self.nodes,
+            "undo": self.undo,
+            "redo": self.redo,
+            "createdAt": datetime.now().isoformat()
+        }
+
+
+class EditJournal:
+    """
+    Per-story journal of tree edits
+
+    Every journaled save appends one delta keyed by the version it created,
+    so entries are unique without a separate sequence. Replaying the latest
+    snapshot plus the deltas after it gives the current tree without loading
+    the story, which is what undo and redo start from. A delta whose base is
+    not the previous journaled version (the story was saved outside the
+    journal, or two unconditional writers raced) ends the replay; the next
+    edit journals a fresh snapshot.
+    """
+
+    def __init__(self, data_manager, snapshot_interval: int = config.EDIT_JOURNAL_SNAPSHOT_INTERVAL,
+                 undo_depth: int = config.EDIT_JOURNAL_UNDO_DEPTH, max_stories: int = config.EDIT_JOURNAL_CACHE_SIZE):
+        self.data_manager = data_manager
+        self.snapshot_interval = snapshot_interval
+        self.undo_depth = undo_depth
+        self.max_stories = max_stories
+        self._heads: "OrderedDict[str, JournalHead]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def head(self, story_id: str, refresh: bool = False) -> Optional[JournalHead]:
+        """
+        Replayed journal head of a story
+
+        Args:
+            refresh: Ignore the in-memory head (another process may have
+                journaled edits since)
+
+        Returns:
+            The head, or None if nothing was journaled for the story
+        """
+        with self._lock:
+            cached = self._heads.get(story_id)
+            if cached and not refresh:
+                self._heads.move_to_end(story_id)
+                return cached
+
+        base = self.data_manager.get_story_edit_snapshot(story_id)
+        if base is None:
+            return None
+        head = JournalHead(base["version"], base["nodes"], base.get("undo"), base.get("redo"))
+        for entry in self.data_manager.get_story_edits(story_id, after_version=head.version):
+            if entry["kind"] != "delta":
+                continue
+            if entry["baseVersion"] != head.version:
+                break
+            try:
+                head = self._advance(head, entry, apply_changes(head.nodes, entry["nodes"], "after"))
+            except EditJournalError:
+                break
+
+        self._remember(story_id, head)
+        return head
+
+    def record(self, story_id: str, base_version: int, before: NodeState, after: NodeState, version: int,
+               action: str = "edit", target: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Journal a saved edit
+
+        Args:
+            base_version: Version the edit was made on
+            before: Node state at base_version
+            after: Node state that was saved as `version`
+            action: "edit", or "undo"/"redo" of the edit journaled as `target`
+
+        Returns:
+            The delta entry
+        """
+        head = self.head(story_id)
+        if head is None or head.version != base_version:
+            head = self.head(story_id, refresh=True)
+
+        entries = []
+        if head is None or head.version != base_version:
+            # First journaled edit, or the story was saved outside the journal since
+            head = JournalHead(base_version, before, head.undo if head else None, head.redo if head else None)
+            entries.append(head.snapshot_entry())
+
+        entry = {
+            "kind": "delta",
+            "version": version,
+            "baseVersion": base_version,
+            "action": action,
+            "target": target,
+            "nodes": node_changes(before, after),
+            "createdAt": datetime.now().isoformat()
+        }
+        entries.append(entry)
+        head = self._advance(head, entry, after)
+        if head.deltas >= self.snapshot_interval:
+            head.deltas = 0
+            entries.append(head.snapshot_entry())
+
+        self.data_manager.append_story_edits(story_id, entries)
+        self._remember(story_id, head)
+        return entry
+
+    def forget(self, story_id: str) -> None:
+        """Drop the in-memory head (e.g. after a failed journal write)"""
+        with self._lock:
+            self._heads.pop(story_id, None)
+
+    def changes_since(self, story_id: str, since_version: int, current_version: int) -> Dict[str, Any]:
+        """
+        Change feed from a client's version to the current one
+
+        Returns:
+            {"sinceVersion", "version", "complete", "edits", "upsertedNodes",
+            "deletedNodeIds"}; complete is False when the journal does not
+            cover every version in between, and the client must reload
+        """
+        feed = {
+            "sinceVersion": since_version,
+            "version": current_version,
+            "complete": since_version == current_version,
+            "edits": [],
+            "upsertedNodes": [],
+            "deletedNodeIds": []
+        }
+        if since_version >= current_version:
+            return feed
+
+        version, touched = since_version, []
+        for entry in self.data_manager.get_story_edits(story_id, after_version=since_version):
+            if entry["kind"] != "delta":
+                continue
+            if entry["baseVersion"] != version:
+                return feed
+            version = entry["version"]
+            feed["edits"].append({"version": version, "action": entry["action"], "nodeIds": list(entry["nodes"])})
+            touched += [node_id for node_id in entry["nodes"] if node_id not in touched]
+
+        head = self.head(story_id)
+        if head is None or head.version != current_version:
+            head = self.head(story_id, refresh=True)
+        if version != current_version or head is None or head.version != current_version:
+            feed["edits"] = []
+            return feed
+
+        feed["complete"] = True
+        feed["upsertedNodes"] = [head.nodes[node_id] for node_id in touched if node_id in head.nodes]
+        feed["deletedNodeIds"] = [node_id for node_id in touched if node_id not in head.nodes]
+        return feed
+
+    def _advance(self, head: JournalHead, entry: Dict[str, Any], nodes: NodeState) -> JournalHead:
+        """Head after a delta (undo/redo stacks follow the usual editor rules)"""
+        undo, redo = list(head.undo), list(head.redo)
+        if entry["action"] == "undo":
+            if undo and undo[-1] == entry["target"]:
+                undo.pop()
+            redo.append(entry["target"])
+        elif entry["action"] == "redo":
+            if redo and redo[-1] == entry["target"]:
+                redo.pop()
+            undo.append(entry["target"])
+        elif entry["nodes"]:
+            undo.append(entry["version"])
+            redo = []
+        return JournalHead(entry["version"], nodes, undo[-self.undo_depth:], redo, head.deltas + 1)
+
+    def _remember(self, story_id: str, head: JournalHead) -> None:
+        with self._lock:
+            self._heads[story_id] = head
+            self._heads.move_to_end(story_id)
+            while len(self._heads) > self.max_stories:
+                self._heads.popitem(last=False)
@@ -0,0 +1,248 @@
+"""
+Image Provider Routing
+Picks provider, model and quality tier per request and fails over on latency or error spikes
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+
+class ImageRoute:
+    """One provider/model candidate for a request class"""
+
+    def __init__(self, provider: str, model: str, steps: Optional[int] = None, scale: float = 1.0):
+        self.provider = provider
+        self.model = model
+        self.steps = steps    # Inference steps (FAL only)
+        self.scale = scale    # Fraction of the requested width and height to render at
+
+
+# (purpose, quality) -> candidates in order of preference. Backgrounds are
+# FAL's strength and scenes Gemini's. Background drafts are selected and then
+# re-rendered at final quality from their seed, which only keeps the
+# composition on the same model at the same size, so they use the final
+# model at full size with fewer steps; scene drafts go to the cheapest model.
+DEFAULT_ROUTES: Dict[Tuple[str, str], List[ImageRoute]] = {
+    ("background", "final"): [
+        ImageRoute("fal", "fal-ai/flux/dev", steps=28),
+        ImageRoute("gemini", "gemini-2.5-flash-image"),
+    ],
+    ("background", "draft"): [
+        ImageRoute("fal", "fal-ai/flux/dev", steps=8),
+        ImageRoute("gemini", "gemini-2.5-flash-image"),
+    ],
+    ("scene", "final"): [
+        ImageRoute("gemini", "gemini-2.5-flash-image"),
+        ImageRoute("fal", "fal-ai/flux/dev", steps=28),
+    ],
+    ("scene", "draft"): [
+        ImageRoute("fal", "fal-ai/flux/schnell", steps=4, scale=config.IMAGE_DRAFT_SCALE),
+        ImageRoute("gemini", "gemini-2.5-flash-image"),
+    ],
+}
+
+
+class GeneratedImage:
+    """Result of a routed generation: a URL (FAL) or raw image bytes (Gemini)"""
+
+    def __init__(self, route: ImageRoute, quality: str, url: Optional[str] = None,
+                 data: Optional[bytes] = None, latency: float = 0.0, seed: Optional[int] = None):
+        self.provider = route.provider
+        self.model = route.model
+        self.quality = quality
+        self.url = url
+        self.data = data
+        self.latency = latency
+        self.seed = seed    # FAL only; lets a draft be re-rendered at final quality
+
+
+class LatencyHistogram:
+    """Sliding-window latency histogram and error rate of one provider"""
+
+    # Upper bounds of the latency buckets in seconds (the last one is open)
+    BUCKETS = (1, 2, 5, 10, 20, 40, 80, 160)
+
+    def __init__(self, window_seconds: float = config.IMAGE_ROUTER_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._samples: "deque[Tuple[float, float, bool]]" = deque()   # (at, latency, ok)
+
+    def record(self, latency: float, ok: bool, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._samples.append((now, latency, ok))
+        self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        while self._samples and now - self._samples[0][0] > self.window_seconds:
+            self._samples.popleft()
+
+    def counts(self, now: Optional[float] = None) -> List[int]:
+        """Calls per latency bucket in the window (failures included)"""
+        self._trim(time.monotonic() if now is None else now)
+        counts = [0] * (len(self.BUCKETS) + 1)
+        for _, latency, _ in self._samples:
+            counts[next((i for i, bound in enumerate(self.BUCKETS) if latency <= bound), len(self.BUCKETS))] += 1
+        return counts
+
+    def percentile(self, fraction: float, now: Optional[float] = None) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile (inf for the open bucket)"""
+        counts = self.counts(now)
+        total = sum(counts)
+        if not total:
+            return None
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= fraction * total:
+                return float(self.BUCKETS[index]) if index < len(self.BUCKETS) else float("inf")
+        return float("inf")
+
+    def samples(self, now: Optional[float] = None) -> int:
+        self._trim(time.monotonic() if now is None else now)
+        return len(self._samples)
+
+    def error_rate(self, now: Optional[float] = None) -> Optional[float]:
+        self._trim(time.monotonic() if now is None else now)
+        if not self._samples:
+            return None
+        return sum(1 for _, _, ok in self._samples if not ok) / len(self._samples)
+
+
+class ImageRouter:
+    """
+    Routes image generation over FAL.ai and Gemini
+
+    Each request names a purpose ("background" or "scene") and a quality
+    tier ("draft" or "final"), which select an ordered list of routes.
+    Providers that are not configured, or whose error rate or p95 latency
+    in the window is over the limits of the tier, are skipped; a failing
+    call falls through to the next route. When every provider is degraded
+    the routes are tried in their normal order anyway.
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, Any],
+        routes: Optional[Dict[Tuple[str, str], List[ImageRoute]]] = None,
+        window_seconds: float = config.IMAGE_ROUTER_WINDOW_SECONDS,
+        min_samples: int = config.IMAGE_ROUTER_MIN_SAMPLES,
+        max_error_rate: float = config.IMAGE_ROUTER_MAX_ERROR_RATE
+    ):
+        self.providers = providers
+        self.routes = routes or DEFAULT_ROUTES
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.latency_budgets = {
+            "draft": config.IMAGE_DRAFT_LATENCY_BUDGET_SECONDS,
+            "final": config.IMAGE_FINAL_LATENCY_BUDGET_SECONDS
+        }
+        self.histograms = {name: LatencyHistogram(window_seconds) for name in providers}
+        self._lock = threading.Lock()
+
+    def generate(self, purpose: str, prompt: str, quality: str = "final",
+                 width: int = 1024, height: int = 768, seed: Optional[int] = None,
+                 model: Optional[str] = None) -> GeneratedImage:
+        """
+        Generate an image on the best available route
+
+        Args:
+            purpose: "background" or "scene"
+            quality: "draft" (fewer steps, cheaper model or smaller image) or "final"
+            width, height: Final image size (routes may render at a fraction of it)
+            seed: Noise seed for FAL (random if not given; recorded on the result)
+            model: Only use routes on this model (e.g. to re-render a draft from
+                its seed); there is no failover to other models
+
+        Raises:
+            ValueError: For an unknown purpose or quality, or a model without a route
+            Exception: If every route failed
+        """
+        candidates = self.routes.get((purpose, quality))
+        if not candidates:
+            raise ValueError(f"No image route for {purpose} at {quality} quality")
+        if model is not None:
+            candidates = [route for route in candidates if route.model == model]
+            if not candidates:
+                raise ValueError(f"No {quality} {purpose} route on {model}")
+
+        configured = [route for route in candidates if self._configured(route.provider)]
+        healthy = [route for route in configured if not self.degraded(route.provider, quality)]
+        order = healthy + [route for route in configured if route not in healthy]
+        if not order:
+            raise Exception(f"No image provider is configured for {purpose} images")
+
+        if seed is None:
+            seed = random.randrange(2 ** 31)
+
+        errors = []
+        for route in order:
+            if route not in healthy:
+                print(f"⚠️ Trying degraded provider {route.provider} as a last resort", flush=True)
+            started = time.monotonic()
+            try:
+                result = self._call(route, prompt, _scaled(width, route.scale), _scaled(height, route.scale), seed)
+                if not result:
+                    raise Exception("No image returned")
+            except Exception as e:
+                self._record(route.provider, time.monotonic() - started, ok=False)
+                print(f"⚠️ {route.provider} ({route.model}) failed, failing over: {str(e)}", flush=True)
+                errors.append(f"{route.provider}: {str(e)}")
+                continue
+
+            latency = time.monotonic() - started
+            self._record(route.provider, latency, ok=True)
+            if route.provider == "fal":
+                return GeneratedImage(route, quality, url=result, latency=latency, seed=seed)
+            return GeneratedImage(route, quality, data=result, latency=latency)
+
+        raise Exception(f"Image generation failed on every provider ({'; '.join(errors)})")
+
+    def can_rerender(self, purpose: str, model: Optional[str], seed: Optional[int]) -> bool:
+        """Whether a draft can be re-rendered at final quality with the same composition (same model and seed)"""
+        return seed is not None and any(route.model == model for route in self.routes.get((purpose, "final"), []))
+
+    def degraded(self, provider: str, quality: str = "final") -> bool:
+        """Whether a provider's recent error rate or p95 latency is over the limits"""
+        with self._lock:
+            histogram = self.histograms[provider]
+            if histogram.samples() < self.min_samples:
+                return False
+            p95 = histogram.percentile(0.95)
+            return histogram.error_rate() > self.max_error_rate or p95 > self.latency_budgets[quality]
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-provider window statistics and latency histogram"""
+        with self._lock:
+            return {
+                name: {
+                    "calls": histogram.samples(),
+                    "errorRate": histogram.error_rate(),
+                    "p95Seconds": histogram.percentile(0.95),
+                    "histogram": dict(zip([f"<={bound}s" for bound in LatencyHistogram.BUCKETS] + ["more"], histogram.counts()))
+                }
+                for name, histogram in self.histograms.items()
+            }
+
+    def _configured(self, provider: str) -> bool:
+        return provider in self.providers and getattr(self.providers[provider], "client", None) is not None
+
+    def _call(self, route: ImageRoute, prompt: str, width: int, height: int, seed: int) -> Any:
+        service = self.providers[route.provider]
+        if route.provider == "fal":
+            return service.generate_image(prompt=prompt, width=width, height=height, model=route.model,
+                                          steps=route.steps, seed=seed)
+        return service.generate_image(prompt, model=route.model)
+
+    def _record(self, provider: str, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.histograms[provider].record(latency, ok)
+
+
+def _scaled(size: int, scale: float) -> int:
+    """Dimension rendered by a route (multiple of 8, as diffusion models expect)"""
+    if scale == 1.0:
+        return size
+    return max(256, int(size * scale) // 8 * 8)
@@ -0,0 +1,105 @@
+"""
+Image Upgrade Queue
+Background worker that renders selected draft images at final quality
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+UpgradeKey = Tuple[str, str, str]   # (story_id, location_id, draft version_id)
+
+
+class ImageUpgradeQueue:
+    """
+    Runs upgrade jobs one at a time on a daemon thread
+
+    A job is keyed by the draft it upgrades; submitting a key that is
+    already waiting or running does nothing, so re-selecting a draft never
+    pays for a second render. Listeners are called with the story ID after
+    each successful job (e.g. to drop HTTP cache validators). The worker
+    starts on the first submit.
+    """
+
+    def __init__(self, upgrade: Callable[..., Any]):
+        """
+        Create a queue
+
+        Args:
+            upgrade: Job body, called as upgrade(*args) with the submitted
+                arguments; exceptions are logged and count as failures
+        """
+        self.upgrade = upgrade
+        self.completed = 0
+        self.failed = 0
+        self._queue: "queue.Queue[Tuple[UpgradeKey, tuple]]" = queue.Queue()
+        self._active: Dict[UpgradeKey, str] = {}    # key -> "queued" or "running"
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """Call listener(story_id) after every successful upgrade"""
+        self._listeners.append(listener)
+
+    def submit(self, key: UpgradeKey, *args: Any) -> bool:
+        """
+        Queue an upgrade
+
+        Returns:
+            False if the same upgrade is already queued or running
+        """
+        with self._lock:
+            if key in self._active:
+                return False
+            self._active[key] = "queued"
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="image-upgrades", daemon=True)
+                self._thread.start()
+        self._queue.put((key, args))
+        return True
+
+    def status(self, key: UpgradeKey) -> Optional[str]:
+        """"queued", "running", or None once finished (or never submitted)"""
+        with self._lock:
+            return self._active.get(key)
+
+    def join(self) -> None:
+        """Block until every submitted upgrade has finished"""
+        self._queue.join()
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth and outcomes since startup"""
+        with self._lock:
+            running = sum(1 for state in self._active.values() if state == "running")
+            return {
+                "queued": len(self._active) - running,
+                "running": running,
+                "completed": self.completed,
+                "failed": self.failed
+            }
+
+    def _run(self) -> None:
+        while True:
+            key, args = self._queue.get()
+            with self._lock:
+                self._active[key] = "running"
+            try:
+                self.upgrade(*args)
+                ok = True
+            except Exception as e:
+                print(f"❌ Image upgrade failed for {key[1]} ({key[2]}): {str(e)}", flush=True)
+                ok = False
+
+            with self._lock:
+                del self._active[key]
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            try:
+                if ok:
+                    for listener in self._listeners:
+                        listener(key[0])
+            finally:
+                self._queue.task_done()
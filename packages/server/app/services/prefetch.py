@@ -0,0 +1,154 @@
+"""
+Reading Prefetch
+Per-scene plan of the assets a reader is likely to need next
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+import requests
+
+import config
+from app.models.schemas import PrefetchAsset, PrefetchTarget, ReadingNode
+
+
+def _content_length(url: str) -> Optional[int]:
+    """Size of a remote asset from a HEAD request"""
+    response = requests.head(url, timeout=config.ASSET_SIZE_TIMEOUT_SECONDS, allow_redirects=True)
+    response.raise_for_status()
+    length = response.headers.get("content-length")
+    return int(length) if length else None
+
+
+class AssetSizeCache:
+    """
+    Remembers the byte size of asset URLs
+
+    Lookups never block the reading view: unknown URLs are reported as None
+    and measured in the background, so the next request has their sizes.
+    Failed lookups are not retried until the URL is evicted.
+    """
+
+    def __init__(
+        self,
+        measure: Callable[[str], Optional[int]] = _content_length,
+        max_entries: int = config.ASSET_SIZE_CACHE_SIZE,
+        background: bool = True
+    ):
+        """
+        Create a cache
+
+        Args:
+            measure: Returns the size of a URL in bytes
+            max_entries: Number of URLs remembered (least recently used are evicted)
+            background: Measure unknown URLs in a thread (False measures inline)
+        """
+        self.measure = measure
+        self.max_entries = max_entries
+        self.background = background
+        self._sizes: "OrderedDict[str, Optional[int]]" = OrderedDict()
+        self._pending: set = set()
+        self._lock = threading.Lock()
+
+    def sizes(self, urls: Iterable[str]) -> Dict[str, Optional[int]]:
+        """
+        Known sizes of the given URLs (None where not measured yet)
+
+        Args:
+            urls: Asset URLs
+        """
+        known = {}
+        unknown = []
+        with self._lock:
+            for url in dict.fromkeys(urls):
+                if url in self._sizes:
+                    self._sizes.move_to_end(url)
+                    known[url] = self._sizes[url]
+                else:
+                    known[url] = None
+                    if url not in self._pending:
+                        self._pending.add(url)
+                        unknown.append(url)
+
+        if unknown:
+            if self.background:
+                threading.Thread(target=self._measure_all, args=(unknown,), name="asset-sizes", daemon=True).start()
+            else:
+                self._measure_all(unknown)
+                with self._lock:
+                    known.update({url: self._sizes.get(url) for url in unknown})
+        return known
+
+    def record(self, url: str, size: Optional[int]) -> None:
+        """Remember the size of a URL"""
+        with self._lock:
+            self._pending.discard(url)
+            self._sizes[url] = size
+            self._sizes.move_to_end(url)
+            while len(self._sizes) > self.max_entries:
+                self._sizes.popitem(last=False)
+
+    def _measure_all(self, urls: List[str]) -> None:
+        """Measure URLs one after another"""
+        for url in urls:
+            try:
+                size = self.measure(url)
+            except Exception as e:
+                print(f"⚠️ Could not get size of {url}: {str(e)}", flush=True)
+                size = None
+            self.record(url, size)
+
+
+def build_prefetch_plan(
+    nodes: List[ReadingNode],
+    choice_counts: Dict[str, Dict[str, int]],
+    sizes: Dict[str, Optional[int]]
+) -> Dict[str, List[PrefetchTarget]]:
+    """
+    Next scenes to warm for every node, most likely choice first
+
+    The likelihood of a choice is its share of the recorded choices at that
+    node, with one pseudo-count per choice so unread stories fall back to an
+    even split. Ties keep the authored choice order.
+
+    Args:
+        nodes: Reading nodes with their resolved image/audio URLs
+        choice_counts: Node ID -> choice ID -> times taken
+        sizes: Asset URL -> byte size (None if unknown)
+
+    Returns:
+        Node ID -> prefetch targets (ending nodes have none)
+    """
+    nodes_by_id = {node.id: node for node in nodes}
+    plan: Dict[str, List[PrefetchTarget]] = {}
+
+    for node in nodes:
+        linked = [choice for choice in node.choices if choice.nextNodeId in nodes_by_id]
+        if not linked:
+            continue
+
+        counts = choice_counts.get(node.id, {})
+        total = sum(counts.get(choice.id, 0) for choice in linked) + len(linked)
+        targets = []
+        for choice in linked:
+            next_node = nodes_by_id[choice.nextNodeId]
+            assets = [PrefetchAsset(type="image", url=next_node.imageUrl, bytes=sizes.get(next_node.imageUrl))]
+            if next_node.audioUrl:
+                assets.append(PrefetchAsset(type="audio", url=next_node.audioUrl, bytes=sizes.get(next_node.audioUrl)))
+            targets.append(PrefetchTarget(
+                nodeId=next_node.id,
+                choiceId=choice.id,
+                likelihood=round((counts.get(choice.id, 0) + 1) / total, 3),
+                assets=assets
+            ))
+
+        # sorted() is stable, so equal likelihoods keep the authored order
+        plan[node.id] = sorted(targets, key=lambda target: -target.likelihood)
+
+    return plan
+
+
+def asset_urls(nodes: List[ReadingNode]) -> List[str]:
+    """Every image and audio URL of the reading nodes"""
+    return [url for node in nodes for url in (node.imageUrl, node.audioUrl) if url]
@@ -0,0 +1,197 @@
+"""
+Reading Progress Write Buffer
+Write-behind buffer that coalesces bursts of reading progress saves
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import config
+
+Key = Tuple[str, str]
+
+# Reader ID used for progress saved without one
+ANONYMOUS_READER = "anonymous"
+
+
+class PendingProgress:
+    """Latest unsaved progress for one (story, reader)"""
+
+    def __init__(self, progress: Any, now: float):
+        self.progress = progress
+        self.first_buffered_at = now
+        self.last_buffered_at = now
+        self.updates = 1
+
+
+class ProgressWriteBuffer:
+    """
+    Keeps only the latest progress per (story, reader) and writes it later
+
+    Progress is cumulative, so the newest save replaces every earlier one
+    that has not been written yet. An entry is written once the reader has
+    been idle for `idle_seconds`, or at the latest `max_delay_seconds` after
+    its first unsaved update (the durability bound), whichever comes first.
+    flush() writes immediately, e.g. before a completion or at shutdown.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[str, str, Any], None],
+        idle_seconds: float = config.READING_PROGRESS_IDLE_SECONDS,
+        max_delay_seconds: float = config.READING_PROGRESS_MAX_DELAY_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Create a buffer
+
+        Args:
+            write: Storage write, called as write(story_id, reader_id, progress)
+            idle_seconds: Quiet period after which a reader's progress is written
+            max_delay_seconds: Longest time an update may stay unwritten
+            clock: Time source (monotonic seconds)
+        """
+        self.write = write
+        self.idle_seconds = idle_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.clock = clock
+        self.pending: Dict[Key, PendingProgress] = {}
+        self.saves = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ========================================================================
+    # Buffering
+    # ========================================================================
+
+    def put(self, story_id: str, reader_id: Optional[str], progress: Any) -> None:
+        """Buffer a progress save (writes through once the durability bound is hit)"""
+        key = (story_id, reader_id or ANONYMOUS_READER)
+        now = self.clock()
+        with self._lock:
+            self.saves += 1
+            entry = self.pending.get(key)
+            if entry is None:
+                self.pending[key] = PendingProgress(progress, now)
+                return
+            entry.progress = progress
+            entry.last_buffered_at = now
+            entry.updates += 1
+            overdue = now - entry.first_buffered_at >= self.max_delay_seconds
+
+        if overdue:
+            self._write_keys([key])
+
+    def get(self, story_id: str, reader_id: Optional[str] = None) -> Optional[Any]:
+        """
+        Unsaved progress for a story (read-through for get_reading_progress)
+
+        Args:
+            story_id: Story ID
+            reader_id: Reader to look up, or None for the story's most recent update
+        """
+        with self._lock:
+            if reader_id is not None:
+                entry = self.pending.get((story_id, reader_id))
+                return entry.progress if entry else None
+
+            entries = [entry for (pending_story, _), entry in self.pending.items() if pending_story == story_id]
+            if not entries:
+                return None
+            return max(entries, key=lambda entry: entry.last_buffered_at).progress
+
+    def discard(self, story_id: str) -> None:
+        """Drop unsaved progress for a story (e.g. when it is deleted)"""
+        with self._lock:
+            for key in [key for key in self.pending if key[0] == story_id]:
+                del self.pending[key]
+
+    # ========================================================================
+    # Flushing
+    # ========================================================================
+
+    def flush(self, story_id: Optional[str] = None) -> int:
+        """
+        Write unsaved progress now
+
+        Args:
+            story_id: Only flush this story (None flushes everything)
+
+        Returns:
+            Number of writes
+        """
+        with self._lock:
+            keys = [key for key in self.pending if story_id is None or key[0] == story_id]
+        return self._write_keys(keys)
+
+    def flush_due(self) -> int:
+        """Write entries that are idle or have reached the durability bound"""
+        now = self.clock()
+        with self._lock:
+            keys = [
+                key for key, entry in self.pending.items()
+                if now - entry.last_buffered_at >= self.idle_seconds
+                or now - entry.first_buffered_at >= self.max_delay_seconds
+            ]
+        return self._write_keys(keys)
+
+    def _write_keys(self, keys: List[Key]) -> int:
+        """
+        Write entries and drop them from the buffer
+
+        An entry stays readable through get() while it is being written and
+        is only dropped once the write succeeded and no newer save replaced
+        its progress meanwhile; a failed write leaves it for the next flush.
+        """
+        written = 0
+        for key in keys:
+            with self._lock:
+                entry = self.pending.get(key)
+                progress = entry.progress if entry else None
+            if entry is None:
+                continue
+
+            try:
+                self.write(key[0], key[1], progress)
+            except Exception as e:
+                print(f"❌ Error writing buffered reading progress for story {key[0]}: {str(e)}", flush=True)
+                continue
+
+            written += 1
+            with self._lock:
+                if self.pending.get(key) is entry and entry.progress is progress:
+                    del self.pending[key]
+
+        with self._lock:
+            self.writes += written
+        return written
+
+    # ========================================================================
+    # Background Flusher
+    # ========================================================================
+
+    def start(self, interval_seconds: Optional[float] = None) -> None:
+        """Start the background thread that calls flush_due() periodically"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        interval = interval_seconds or min(self.idle_seconds, self.max_delay_seconds) / 2
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.flush_due()
+
+        self._thread = threading.Thread(target=run, name="progress-write-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write everything still buffered"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
@@ -0,0 +1,119 @@
+"""
+Single-Flight Generation
+Coalesces identical in-flight generation requests into one provider call
+"""
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+import config
+
+FlightKey = Tuple[str, str, str]
+
+
+class _Flight:
+    """One running or recently finished call"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.finished_at: Optional[float] = None
+
+
+class SingleFlight:
+    """
+    Runs a call once per key while identical requests are in flight
+
+    Requests with the same key that arrive while the call runs wait for it
+    and get its result, or its exception. For reuse_seconds after a
+    successful call its result is returned again without calling; failures
+    are never reused, so a retry after an error calls the provider again.
+    Flights live in this process only.
+    """
+
+    def __init__(self, reuse_seconds: float = config.GENERATION_RESULT_REUSE_SECONDS):
+        self.reuse_seconds = reuse_seconds
+        self.calls = 0       # Calls actually made
+        self.joined = 0      # Requests that waited for a running call
+        self.reused = 0      # Requests answered with a recent result
+        self._flights: Dict[FlightKey, _Flight] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(story_id: str, operation: str, payload: Any = None) -> FlightKey:
+        """(story, operation, hash of the request input)"""
+        if isinstance(payload, BaseModel):
+            payload = payload.model_dump(mode="json")
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return story_id, operation, digest
+
+    def do(self, key: FlightKey, call: Callable[[], Any], reusable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Result of call(), shared with identical concurrent requests
+
+        Args:
+            reusable: Whether a result may be reused after the call finished
+                (e.g. not for a result that reports a failure); every
+                successful result is reusable by default
+
+        Raises:
+            Whatever call() raised (for every request that joined it)
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.calls += 1
+            elif flight.done.is_set():
+                self.reused += 1
+            else:
+                self.joined += 1
+
+        if not leader:
+            if not flight.done.is_set():
+                print(f"🔁 Joining in-flight {key[1]} for story {key[0]}", flush=True)
+            flight.done.wait()
+        else:
+            try:
+                flight.result = call()
+            except BaseException as e:
+                flight.error = e
+            finally:
+                flight.finished_at = time.monotonic()
+                with self._lock:
+                    reuse = flight.error is None and (reusable is None or reusable(flight.result))
+                    if not reuse or self.reuse_seconds <= 0:
+                        self._flights.pop(key, None)
+                flight.done.set()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def stats(self) -> Dict[str, int]:
+        """Call/join/reuse counts since startup"""
+        with self._lock:
+            in_flight = sum(1 for flight in self._flights.values() if not flight.done.is_set())
+            return {"calls": self.calls, "joined": self.joined, "reused": self.reused, "inFlight": in_flight}
+
+    def _expire(self, now: float) -> None:
+        """Remove finished calls whose reuse window has passed (lock held)"""
+        expired = [
+            key for key, flight in self._flights.items()
+            if flight.finished_at is not None and now - flight.finished_at > self.reuse_seconds
+        ]
+        for key in expired:
+            del self._flights[key]
+
+
+# Shared by the generation endpoints
+generation_flights = SingleFlight()
@@ -0,0 +1,179 @@
+"""
+Story Analysis
+Path enumeration and ending reachability, computed once per tree structure
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Set
+
+import config
+from app.models.schemas import StoryTree
+from app.services.story_graph import ENDING_TYPES, StoryGraph
+
+
+def tree_fingerprint(tree: StoryTree) -> str:
+    """
+    Hash of everything the analysis depends on (node IDs, types and links)
+
+    Text, titles and images do not change the analysis, so editing them
+    keeps the cached result.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for node in tree.nodes:
+        digest.update(f"{node.id}|{node.type.value}".encode("utf-8"))
+        for choice in node.choices:
+            digest.update(f">{choice.id}:{choice.nextNodeId}".encode("utf-8"))
+        digest.update(b";")
+    return digest.hexdigest()
+
+
+class StoryAnalysis:
+    """
+    Read-only facts about a story graph
+
+    Holds parent links, per-node distances to every ending, dead-end and
+    unreachable nodes, and the root-to-ending paths (capped at max_paths;
+    paths never revisit a node, so cycles do not multiply them).
+    """
+
+    def __init__(self, tree: StoryTree, max_paths: int = config.STORY_ANALYSIS_MAX_PATHS, fingerprint: Optional[str] = None):
+        """
+        Analyze a tree
+
+        Args:
+            tree: Story tree (not modified)
+            max_paths: Stop enumerating paths after this many
+            fingerprint: tree_fingerprint(tree), if already known
+        """
+        graph = StoryGraph(tree)
+        self.fingerprint = fingerprint or tree_fingerprint(tree)
+        self.start_node_id = graph.start_node_id
+        self.parent_links: Dict[str, Optional[str]] = graph.parent_links()
+        self.ending_ids: List[str] = [node.id for node in tree.nodes if node.type in ENDING_TYPES]
+
+        self.ending_distances = self._ending_distances(graph)
+        self.unreachable: List[str] = [node.id for node in tree.nodes if node.id not in self.parent_links]
+        self.dead_ends: List[str] = [
+            node.id for node in tree.nodes
+            if node.type not in ENDING_TYPES and not self.ending_distances[node.id]
+        ]
+
+        self.paths: List[List[str]] = []
+        self.paths_truncated = False
+        self._enumerate_paths(graph, max_paths)
+
+    def _ending_distances(self, graph: StoryGraph) -> Dict[str, Dict[str, int]]:
+        """Breadth-first search backwards from each ending: node -> ending -> scenes to go"""
+        distances: Dict[str, Dict[str, int]] = {node_id: {} for node_id in graph.nodes_by_id}
+        for ending_id in self.ending_ids:
+            distances[ending_id][ending_id] = 0
+            queue = deque([ending_id])
+            while queue:
+                node_id = queue.popleft()
+                for parent_id in graph.parents.get(node_id, []):
+                    if parent_id in distances and ending_id not in distances[parent_id]:
+                        distances[parent_id][ending_id] = distances[node_id][ending_id] + 1
+                        queue.append(parent_id)
+        return distances
+
+    def _enumerate_paths(self, graph: StoryGraph, max_paths: int) -> None:
+        """Depth-first enumeration of simple start-to-ending paths"""
+        if self.start_node_id is None or not self.ending_distances.get(self.start_node_id):
+            return
+
+        endings = set(self.ending_ids)
+        path = [self.start_node_id]
+        on_path: Set[str] = {self.start_node_id}
+        stack = [iter(dict.fromkeys(graph.children.get(self.start_node_id, [])))]
+
+        while stack:
+            child_id = next(stack[-1], None)
+            if child_id is None:
+                stack.pop()
+                on_path.discard(path.pop())
+                continue
+            # Only follow links that can still end the story
+            if child_id in on_path or not self.ending_distances.get(child_id):
+                continue
+
+            if child_id in endings:
+                if len(self.paths) >= max_paths:
+                    self.paths_truncated = True
+                    return
+                self.paths.append(path + [child_id])
+                continue
+
+            path.append(child_id)
+            on_path.add(child_id)
+            stack.append(iter(dict.fromkeys(graph.children.get(child_id, []))))
+
+    # ========================================================================
+    # Queries
+    # ========================================================================
+
+    def scenes_to_end(self, node_id: str) -> Optional[int]:
+        """Fewest scenes from a node to any ending (None if no ending can be reached)"""
+        distances = self.ending_distances.get(node_id)
+        return min(distances.values()) if distances else None
+
+    def validation_errors(self) -> List[str]:
+        """Structural problems that make parts of the story unreadable"""
+        errors = [f"Node '{node_id}' is not reachable from the start node" for node_id in self.unreachable]
+        errors += [f"Node '{node_id}' cannot reach any ending" for node_id in self.dead_ends]
+        return errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable summary of the analysis"""
+        return {
+            "startNodeId": self.start_node_id,
+            "endingIds": self.ending_ids,
+            "pathCount": len(self.paths),
+            "pathsTruncated": self.paths_truncated,
+            "paths": self.paths,
+            "scenesToEnd": {node_id: self.scenes_to_end(node_id) for node_id in self.ending_distances},
+            "deadEnds": self.dead_ends,
+            "unreachable": self.unreachable,
+            "parentLinks": self.parent_links
+        }
+
+
+class StoryAnalysisCache:
+    """
+    Analyses keyed by tree fingerprint (least recently used are evicted)
+
+    Every version of every story is analyzed once; requests for an
+    unchanged tree only pay for the fingerprint.
+    """
+
+    def __init__(self, max_entries: int = config.STORY_ANALYSIS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.builds = 0
+        self._entries: "OrderedDict[str, StoryAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, tree: StoryTree) -> StoryAnalysis:
+        """Analysis of a tree, computed on first use"""
+        fingerprint = tree_fingerprint(tree)
+        with self._lock:
+            analysis = self._entries.get(fingerprint)
+            if analysis is not None:
+                self._entries.move_to_end(fingerprint)
+                return analysis
+
+        analysis = StoryAnalysis(tree, fingerprint=fingerprint)
+        with self._lock:
+            self.builds += 1
+            self._entries[fingerprint] = analysis
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analysis
+
+    def clear(self) -> None:
+        """Drop all analyses"""
+        with self._lock:
+            self._entries.clear()
+
+
+story_analysis_cache = StoryAnalysisCache()
@@ -0,0 +1,288 @@
+"""
+Story Graph
+Linear-time index over a story tree used for validation, ID remapping and edits
+"""
+
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.models.schemas import Choice, NodeType, StoryEdge, StoryNode, StoryTree
+
+ENDING_TYPES = (NodeType.GOOD_ENDING, NodeType.BAD_ENDING)
+
+
+class StoryGraph:
+    """
+    Index built once from a StoryTree
+
+    Holds node-by-id, choices-by-node, in/out adjacency derived from the
+    choices, and lazily computed reachability from the start node. All
+    queries and edits are O(V+E) or better. Edits keep the index and the
+    underlying tree (including its edge list) in sync.
+    """
+
+    def __init__(self, tree: StoryTree):
+        """
+        Build the index
+
+        Args:
+            tree: Story tree to index (edited in place by mutating methods)
+        """
+        self.tree = tree
+        self._index()
+
+    def _index(self) -> None:
+        """(Re)build all lookup tables from the tree"""
+        tree = self.tree
+        self.nodes_by_id: Dict[str, StoryNode] = {}
+        self.choices_by_node: Dict[str, List[Choice]] = {}
+        self.choice_owner: Dict[str, str] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.parents: Dict[str, List[str]] = {}
+        self.start_node_id: Optional[str] = None
+        self._reachable: Optional[Set[str]] = None
+
+        for node in tree.nodes:
+            self.nodes_by_id[node.id] = node
+            self.choices_by_node[node.id] = node.choices
+            self.children[node.id] = []
+            self.parents.setdefault(node.id, [])
+            if node.type == NodeType.START and self.start_node_id is None:
+                self.start_node_id = node.id
+
+        if self.start_node_id is None and tree.nodes:
+            self.start_node_id = tree.nodes[0].id
+
+        for node in tree.nodes:
+            for choice in node.choices:
+                if choice.id:
+                    self.choice_owner[choice.id] = node.id
+                if choice.nextNodeId:
+                    self.children[node.id].append(choice.nextNodeId)
+                    self.parents.setdefault(choice.nextNodeId, []).append(node.id)
+
+    # ========================================================================
+    # Queries
+    # ========================================================================
+
+    def node(self, node_id: str) -> Optional[StoryNode]:
+        """Get a node by ID"""
+        return self.nodes_by_id.get(node_id)
+
+    @property
+    def reachable(self) -> Set[str]:
+        """IDs of all nodes reachable from the start node"""
+        if self._reachable is None:
+            self._reachable = set(self.parent_links())
+        return self._reachable
+
+    def is_reachable(self, node_id: str) -> bool:
+        """Check whether a node can be reached from the start node"""
+        return node_id in self.reachable
+
+    def parent_links(self) -> Dict[str, Optional[str]]:
+        """
+        Breadth-first parent of every reachable node
+
+        The parent is the node through which the node is first reached from
+        the start, which is what the reading view uses as previousNodeId.
+
+        Returns:
+            Map of node ID -> parent node ID (None for the start node)
+        """
+        if self.start_node_id is None:
+            return {}
+
+        parents = {self.start_node_id: None}
+        queue = deque([self.start_node_id])
+        while queue:
+            node_id = queue.popleft()
+            for child_id in self.children.get(node_id, []):
+                if child_id in self.nodes_by_id and child_id not in parents:
+                    parents[child_id] = node_id
+                    queue.append(child_id)
+        return parents
+
+    def edges_from_choices(self) -> List[StoryEdge]:
+        """Edge list derived from the choices (one edge per linked choice)"""
+        return [
+            StoryEdge(**{"from": node.id, "to": choice.nextNodeId, "choiceId": choice.id})
+            for node in self.tree.nodes
+            for choice in node.choices
+            if choice.nextNodeId and choice.id
+        ]
+
+    def validation_errors(self, node_range: Optional[Tuple[int, int]] = (5, 10)) -> List[str]:
+        """
+        Check that the tree structure is properly formed
+
+        Args:
+            node_range: Allowed (min, max) node count, or None to skip the check
+
+        Returns:
+            List of validation errors (empty if the tree is valid)
+        """
+        nodes = self.tree.nodes
+        edges = self.tree.edges
+        validation_errors = []
+
+        # Check 1: Node count
+        if node_range and not node_range[0] <= len(nodes) <= node_range[1]:
+            validation_errors.append(f"Expected {node_range[0]}-{node_range[1]} nodes, but got {len(nodes)}")
+
+        # Check 2 & 3: Exactly 1 start and 1 good_ending node
+        type_counts: Dict[str, int] = {}
+        for node in nodes:
+            type_counts[node.type.value] = type_counts.get(node.type.value, 0) + 1
+        for node_type in ("start", "good_ending"):
+            if type_counts.get(node_type, 0) != 1:
+                validation_errors.append(f"Expected exactly 1 '{node_type}' node, but got {type_counts.get(node_type, 0)}")
+
+        # Check 4: Ending nodes should have no choices
+        choice_count = 0
+        for node in nodes:
+            choice_count += len(node.choices)
+            if node.type in ENDING_TYPES and node.choices:
+                validation_errors.append(f"Ending node '{node.id}' should not have choices, but has {len(node.choices)}")
+
+        # Check 5: Number of edges must match number of choices
+        if len(edges) != choice_count:
+            validation_errors.append(f"Expected {choice_count} edges to match {choice_count} choices, but got {len(edges)} edges")
+
+        # Check 6 & 7: Every choice has a matching edge and a valid target
+        edge_map = {(edge.from_, edge.choiceId): edge.to for edge in edges}
+        for node in nodes:
+            for choice in node.choices:
+                edge_key = (node.id, choice.id)
+                if edge_key not in edge_map:
+                    validation_errors.append(f"Missing edge for choice '{choice.id}' in node '{node.id}'")
+                elif edge_map[edge_key] != choice.nextNodeId:
+                    validation_errors.append(
+                        f"Edge mismatch for choice '{choice.id}': "
+                        f"choice points to '{choice.nextNodeId}' but edge points to '{edge_map[edge_key]}'"
+                    )
+                if choice.nextNodeId and choice.nextNodeId not in self.nodes_by_id:
+                    validation_errors.append(
+                        f"Invalid nextNodeId '{choice.nextNodeId}' in choice '{choice.id}' - node doesn't exist"
+                    )
+
+        return validation_errors
+
+    # ========================================================================
+    # Edits
+    # ========================================================================
+
+    def remap_ids(
+        self,
+        new_node_id: Callable[[str], str],
+        new_choice_id: Callable[[str], str]
+    ) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Replace every node and choice ID and update all references in one pass
+
+        Args:
+            new_node_id: Produces the new ID for an old node ID
+            new_choice_id: Produces the new ID for an old choice ID
+
+        Returns:
+            (node ID map, choice ID map) from old to new IDs
+        """
+        node_id_map = {node.id: new_node_id(node.id) for node in self.tree.nodes}
+        choice_id_map = {}
+
+        for node in self.tree.nodes:
+            node.id = node_id_map[node.id]
+            for choice in node.choices:
+                if choice.id:
+                    choice_id_map[choice.id] = new_choice_id(choice.id)
+                    choice.id = choice_id_map[choice.id]
+                if choice.nextNodeId:
+                    choice.nextNodeId = node_id_map.get(choice.nextNodeId, choice.nextNodeId)
+
+        self.tree.edges = self.edges_from_choices()
+        self._index()
+        return node_id_map, choice_id_map
+
+    def set_choices(self, node_id: str, choices: List[Choice]) -> None:
+        """Replace a node's choices and update adjacency and edges"""
+        node = self.nodes_by_id[node_id]
+
+        for child_id in self.children[node_id]:
+            self.parents[child_id].remove(node_id)
+        for choice in node.choices:
+            self.choice_owner.pop(choice.id, None)
+
+        node.choices = choices
+        self.choices_by_node[node_id] = choices
+        self.children[node_id] = []
+        for choice in choices:
+            if choice.id:
+                self.choice_owner[choice.id] = node_id
+            if choice.nextNodeId:
+                self.children[node_id].append(choice.nextNodeId)
+                self.parents.setdefault(choice.nextNodeId, []).append(node_id)
+
+        self.tree.edges = [edge for edge in self.tree.edges if edge.from_ != node_id] + [
+            StoryEdge(**{"from": node_id, "to": choice.nextNodeId, "choiceId": choice.id})
+            for choice in choices
+            if choice.nextNodeId and choice.id
+        ]
+        self._reachable = None
+
+    def add_node(self, node: StoryNode, parent_node_id: Optional[str] = None, choice_id: Optional[str] = None) -> None:
+        """
+        Add a node, optionally linking it from a parent's choice
+
+        Args:
+            node: New node
+            parent_node_id: Node whose choice should lead to the new node
+            choice_id: Choice of the parent node to point at the new node
+        """
+        self.tree.nodes.append(node)
+        self.nodes_by_id[node.id] = node
+        self.choices_by_node[node.id] = node.choices
+        self.children[node.id] = []
+        self.parents.setdefault(node.id, [])
+        self.set_choices(node.id, node.choices)
+
+        parent = self.nodes_by_id.get(parent_node_id) if parent_node_id else None
+        if parent and choice_id:
+            for choice in parent.choices:
+                if choice.id == choice_id:
+                    choice.nextNodeId = node.id
+            self.set_choices(parent.id, parent.choices)
+
+    def delete_node(self, node_id: str) -> Optional[List[str]]:
+        """
+        Delete a node and unlink every choice that pointed to it
+
+        Args:
+            node_id: Node to delete
+
+        Returns:
+            IDs of the nodes whose choices were unlinked, or None if not found
+        """
+        node = self.nodes_by_id.pop(node_id, None)
+        if node is None:
+            return None
+
+        affected_nodes = list(dict.fromkeys(self.parents.pop(node_id, [])))
+        for parent_id in affected_nodes:
+            for choice in self.choices_by_node.get(parent_id, []):
+                if choice.nextNodeId == node_id:
+                    choice.nextNodeId = None
+            self.children[parent_id] = [child for child in self.children[parent_id] if child != node_id]
+
+        for child_id in self.children.pop(node_id, []):
+            if child_id in self.parents:
+                self.parents[child_id] = [parent for parent in self.parents[child_id] if parent != node_id]
+        for choice in self.choices_by_node.pop(node_id, []):
+            self.choice_owner.pop(choice.id, None)
+
+        self.tree.nodes = [other for other in self.tree.nodes if other.id != node_id]
+        self.tree.edges = [edge for edge in self.tree.edges if edge.from_ != node_id and edge.to != node_id]
+        if self.start_node_id == node_id:
+            self.start_node_id = self.tree.nodes[0].id if self.tree.nodes else None
+        self._reachable = None
+
+        return [parent_id for parent_id in affected_nodes if parent_id != node_id]
@@ -0,0 +1,227 @@
+"""
+Story Package
+Offline reading package: one zip with the reading bundle, scene images, narration and a manifest
+"""
+
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from PIL import Image
+
+import config
+from app import serialization
+from app.models.schemas import StoryForReading
+
+PACKAGE_FORMAT_VERSION = 1
+
+IMAGE_CONTENT_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+def _download(url: str) -> bytes:
+    """Fetch a remote asset"""
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    return response.content
+
+
+class StoryPackager:
+    """
+    Builds and caches offline packages on disk
+
+    Package layout:
+        manifest.json    files with sizes and checksums, plus missing assets
+        story.json       reading bundle with asset URLs rewritten to package paths
+        images/<node>.jpg
+        audio/<node>.mp3
+
+    A package is dropped with invalidate() when its story changes; a build
+    that overlaps a change is discarded rather than cached.
+    """
+
+    def __init__(
+        self,
+        package_path: str = config.STORY_PACKAGE_PATH,
+        fetch: Callable[[str], bytes] = _download,
+        image_max_size: int = config.STORY_PACKAGE_IMAGE_MAX_SIZE,
+        image_quality: int = config.STORY_PACKAGE_IMAGE_QUALITY
+    ):
+        """
+        Create a packager
+
+        Args:
+            package_path: Directory for cached packages
+            fetch: Downloads an asset URL to bytes
+            image_max_size: Longest image side in the package (pixels)
+            image_quality: JPEG quality for packaged images
+        """
+        self.package_path = package_path
+        self.fetch = fetch
+        self.image_max_size = image_max_size
+        self.image_quality = image_quality
+        self._generations: Dict[str, int] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        os.makedirs(package_path, exist_ok=True)
+
+    def package_file(self, story_id: str) -> str:
+        """Path of a story's cached package"""
+        return os.path.join(self.package_path, f"{story_id}.zip")
+
+    def get_cached(self, story_id: str) -> Optional[str]:
+        """Path of the cached package, or None if it has not been built"""
+        path = self.package_file(story_id)
+        return path if os.path.exists(path) else None
+
+    def invalidate(self, story_id: str) -> None:
+        """Drop a story's package (call when the story changes)"""
+        with self._lock:
+            self._generations[story_id] = self._generations.get(story_id, 0) + 1
+        try:
+            os.remove(self.package_file(story_id))
+        except FileNotFoundError:
+            pass
+
+    # ========================================================================
+    # Building
+    # ========================================================================
+
+    def build(self, story: StoryForReading) -> Optional[str]:
+        """
+        Build and cache the package for a reading story
+
+        Concurrent builds of the same story wait for the first one and reuse
+        its result.
+
+        Args:
+            story: Full reading bundle (all nodes)
+
+        Returns:
+            Path of the package, or None if the story changed during the build
+        """
+        with self._lock:
+            story_lock = self._locks.setdefault(story.id, threading.Lock())
+            generation = self._generations.get(story.id, 0)
+
+        with story_lock:
+            cached = self.get_cached(story.id)
+            if cached and self._generations.get(story.id, 0) == generation:
+                return cached
+
+            final_path = self.package_file(story.id)
+            temp_path = f"{final_path}.{threading.get_ident()}.tmp"
+            try:
+                with zipfile.ZipFile(temp_path, "w") as package:
+                    self._write_package(package, story)
+
+                with self._lock:
+                    if self._generations.get(story.id, 0) != generation:
+                        print(f"⚠️ Story {story.id} changed while packaging, discarding package", flush=True)
+                        return None
+                    os.replace(temp_path, final_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+            print(f"📦 Built offline package for story {story.id}: {os.path.getsize(final_path)} bytes", flush=True)
+            return final_path
+
+    def _write_package(self, package: zipfile.ZipFile, story: StoryForReading) -> None:
+        """Write assets, the rewritten bundle and the manifest into an open zip"""
+        files: List[Dict[str, Any]] = []
+        missing: List[Dict[str, str]] = []
+        bundle = story.model_dump(mode="json", by_alias=True)
+        # Every asset is already local, so there is nothing to prefetch
+        bundle.pop("prefetch", None)
+
+        for node in bundle.get("nodes") or []:
+            if node.get("imageUrl"):
+                asset = self._fetch_asset(node["imageUrl"], missing)
+                if asset is not None:
+                    data, extension = self.optimize_image(asset)
+                    path = f"images/{node['id']}.{extension}"
+                    content_type = IMAGE_CONTENT_TYPES.get(extension, "application/octet-stream")
+                    files.append(self._add(package, path, data, content_type, node["imageUrl"]))
+                    node["imageUrl"] = path
+
+            if node.get("audioUrl"):
+                asset = self._fetch_asset(node["audioUrl"], missing)
+                if asset is not None:
+                    path = f"audio/{node['id']}.mp3"
+                    files.append(self._add(package, path, asset, "audio/mpeg", node["audioUrl"]))
+                    node["audioUrl"] = path
+
+        bundle_bytes = serialization.dumps(bundle)
+        files.insert(0, self._add(package, "story.json", bundle_bytes, "application/json", None, compress=True))
+
+        manifest = {
+            "formatVersion": PACKAGE_FORMAT_VERSION,
+            "storyId": story.id,
+            "title": story.title,
+            "storyVersion": story.version,
+            "storyUpdatedAt": story.updatedAt.isoformat() if story.updatedAt else None,
+            "builtAt": datetime.now().isoformat(),
+            "startNodeId": story.startNodeId,
+            "totalBytes": sum(entry["bytes"] for entry in files),
+            "files": files,
+            "missing": missing
+        }
+        package.writestr(_zip_info("manifest.json", compress=True), serialization.dumps(manifest))
+
+    def _fetch_asset(self, url: str, missing: List[Dict[str, str]]) -> Optional[bytes]:
+        """Download an asset, recording it as missing on failure"""
+        try:
+            return self.fetch(url)
+        except Exception as e:
+            print(f"⚠️ Could not fetch {url} for offline package: {str(e)}", flush=True)
+            missing.append({"url": url, "error": str(e)})
+            return None
+
+    def _add(self, package: zipfile.ZipFile, path: str, data: bytes, content_type: str,
+             source_url: Optional[str], compress: bool = False) -> Dict[str, Any]:
+        """Add one file and return its manifest entry"""
+        package.writestr(_zip_info(path, compress), data)
+        entry = {
+            "path": path,
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "contentType": content_type
+        }
+        if source_url:
+            entry["sourceUrl"] = source_url
+        return entry
+
+    def optimize_image(self, data: bytes) -> Tuple[bytes, str]:
+        """
+        Downscale and re-encode a scene image as JPEG
+
+        Returns:
+            (image bytes, file extension); the original bytes are kept when
+            they cannot be decoded or the JPEG would be larger
+        """
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                original_format = (image.format or "png").lower()
+                image.thumbnail((self.image_max_size, self.image_max_size))
+                output = io.BytesIO()
+                image.convert("RGB").save(output, "JPEG", quality=self.image_quality, optimize=True)
+        except Exception as e:
+            print(f"⚠️ Could not optimize image for offline package: {str(e)}", flush=True)
+            return data, "bin"
+
+        optimized = output.getvalue()
+        if len(optimized) >= len(data) and original_format in ("jpeg", "png", "webp"):
+            return data, "jpg" if original_format == "jpeg" else original_format
+        return optimized, "jpg"
+
+
+def _zip_info(path: str, compress: bool) -> zipfile.ZipInfo:
+    """Zip entry: JSON is deflated, already-compressed media is stored"""
+    info = zipfile.ZipInfo(path, date_time=datetime.now().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    return info
@@ -5,26 +5,47 @@ Main business logic for story creation, management, and reading workflow
 
 import json
 import os
+import threading
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
 
 import config
-from app.models.schemas import (CharacterAssignment, CharacterRole,
+from app.models.schemas import (STORY_ADAPTER, STORY_TREE_ADAPTER,
+                                CharacterAssignment, CharacterRole,
                                 GenerationStatus, ImageVersion, Location,
                                 LocationImageGenerationStatus, NodeType,
                                 PresetCharacter, ReadingCompletionRequest,
                                 ReadingNode, ReadingProgress,
-                                ReadingProgressRequest, SceneGenerationStatus,
+                                ReadingProgressRequest, ReadingStepRequest,
+                                SceneGenerationStatus,
                                 ShareLinkResponse, Story, StoryEdge,
-                                StoryForReading, StoryListItem,
-                                StoryListResponse, StoryNode, StoryStatus,
-                                StoryTree)
+                                StoryForReading, StoryGenerateResponse,
+                                StoryListItem, StoryListResponse, StoryNode,
+                                StoryStatistics, StoryStatus, StoryTree,
+                                TreeBatchRequest)
+from app.services.edit_journal import (EditJournal, EditJournalError,
+                                       apply_changes, tree_from_nodes)
+from app.services.image_router import GeneratedImage, ImageRouter
+from app.services.image_upgrades import ImageUpgradeQueue
+from app.services.prefetch import AssetSizeCache, asset_urls, build_prefetch_plan
+from app.services.progress_buffer import ANONYMOUS_READER, ProgressWriteBuffer
+from app.services.story_analysis import story_analysis_cache
+from app.services.story_graph import StoryGraph
+from app.services.story_package import StoryPackager
+from app.services.story_versions import StoryVersionConflict, StoryVersionHistory
+from app.services.tree_batch import TreeBatch, diff_tree, snapshot
+from app.services.tree_repair import repair_tree_structure
 from app.storage.supabase_data_manager import SupabaseDataManager
 from external_services import ElevenLabsService, FALAIService, OpenAIService
 from gemini_service import GeminiService
 from master_prompts import (STORY_GENERATION_SYSTEM_PROMPT,
-                            STORY_GENERATION_USER_PROMPT_TEMPLATE)
+                            STORY_GENERATION_USER_PROMPT_TEMPLATE,
+                            STORY_REPAIR_SYSTEM_PROMPT,
+                            STORY_REPAIR_USER_PROMPT_TEMPLATE)
 
 
 class StoryService:
@@ -36,10 +57,23 @@ class StoryService:
     def __init__(self):
         """Initialize story service"""
         self.data_manager = SupabaseDataManager()
+        self.progress_buffer = ProgressWriteBuffer(self.data_manager.save_reading_progress)
+        self.story_packager = StoryPackager()
+        self.asset_sizes = AssetSizeCache()
+        self.version_history = StoryVersionHistory()
+        self.edit_journal = EditJournal(self.data_manager)
         self.openai_service = OpenAIService()
         self.fal_ai_service = FALAIService()
         self.gemini_service = GeminiService()
         self.elevenlabs_service = ElevenLabsService()
+        self.image_router = ImageRouter({"fal": self.fal_ai_service, "gemini": self.gemini_service})
+        self.image_upgrades = ImageUpgradeQueue(self._upgrade_location_image)
+        
+        # Called with the story ID after a generation job writes new images
+        self._listeners: List[Callable[[str], None]] = []
+        
+        # Story list totals per status filter: status -> (total, counted at)
+        self._list_totals: Dict[Optional[str], Tuple[int, float]] = {}
         
         # Get frontend URL from config (use first CORS origin)
         cors_origins = config.CORS_ORIGINS
@@ -54,156 +88,110 @@ class StoryService:
         # This method is kept for compatibility but doesn't need to do anything
         pass
     
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """Call listener(story_id) whenever a generation job writes images of a story"""
+        self._listeners.append(listener)
+    
+    def _notify(self, story_id: str) -> None:
+        for listener in self._listeners:
+            listener(story_id)
+    
     # ========================================================================
     # Story Generation and Management
     # ========================================================================
     
-    def _convert_ids_to_uuids(self, story_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _convert_ids_to_uuids(self, graph: StoryGraph, story: Story) -> None:
         """
         Convert all simple string IDs (node_1, choice_1, etc.) to UUIDs
         and update all references throughout the story structure
         """
-        # Create ID mappings
-        node_id_map = {}
-        choice_id_map = {}
-        char_id_map = {}
-        loc_id_map = {}
-        
-        # Generate UUIDs for all nodes
-        for node in story_data["tree"]["nodes"]:
-            node_id_map[node["id"]] = str(uuid.uuid4())
-        
-        # Generate UUIDs for all choices
-        for node in story_data["tree"]["nodes"]:
-            for choice in node.get("choices", []):
-                choice_id_map[choice["id"]] = str(uuid.uuid4())
-        
-        # Generate UUIDs for all characters
-        for char in story_data.get("characters", []):
-            char_id_map[char["id"]] = str(uuid.uuid4())
-        
-        # Generate UUIDs for all locations
-        for loc in story_data.get("locations", []):
-            loc_id_map[loc["id"]] = str(uuid.uuid4())
-        
-        # Update node IDs and choice references
-        for node in story_data["tree"]["nodes"]:
-            # Update node ID
-            node["id"] = node_id_map[node["id"]]
-            
-            # Update choice IDs and nextNodeId references
-            for choice in node.get("choices", []):
-                choice["id"] = choice_id_map[choice["id"]]
-                if choice.get("nextNodeId"):
-                    choice["nextNodeId"] = node_id_map[choice["nextNodeId"]]
-        
-        # Update edge references
-        for edge in story_data["tree"]["edges"]:
-            # Handle both 'from' and 'from_' keys
-            from_key = "from_" if "from_" in edge else "from"
-            edge[from_key] = node_id_map[edge[from_key]]
-            edge["to"] = node_id_map[edge["to"]]
-            edge["choiceId"] = choice_id_map[edge["choiceId"]]
-        
-        # Update character IDs
-        for char in story_data.get("characters", []):
-            char["id"] = char_id_map[char["id"]]
-        
-        # Update location IDs
-        for loc in story_data.get("locations", []):
-            loc["id"] = loc_id_map[loc["id"]]
+        node_id_map, choice_id_map = graph.remap_ids(
+            lambda _: str(uuid.uuid4()),
+            lambda _: str(uuid.uuid4())
+        )
+        
+        # Characters and locations are not referenced by ID anywhere else
+        for character in story.characters:
+            character.id = str(uuid.uuid4())
+        for location in story.locations:
+            location.id = str(uuid.uuid4())
         
         print(f"✓ Converted IDs to UUIDs: {len(node_id_map)} nodes, {len(choice_id_map)} choices", flush=True)
+    
+    def _check_tree(self, tree_data: Dict[str, Any]) -> Tuple[Optional[StoryTree], List[str]]:
+        """
+        Parse a raw tree and check that its structure is properly formed
+        Expected: 5-10 nodes with exactly 1 start, 1 good_ending, and multiple normal/choice/bad_ending nodes
         
-        return story_data
+        Returns:
+            (parsed tree or None if it does not match the schema, list of validation errors)
+        """
+        try:
+            tree = STORY_TREE_ADAPTER.validate_python(tree_data)
+        except ValidationError as e:
+            return None, [f"Tree JSON does not match the schema: {error['loc']}: {error['msg']}" for error in e.errors()]
+        
+        return tree, StoryGraph(tree).validation_errors() + story_analysis_cache.get(tree).validation_errors()
     
-    def _validate_tree_connectivity(self, tree_data: Dict[str, Any]) -> None:
+    def _collect_tree_validation_errors(self, tree_data: Dict[str, Any]) -> List[str]:
+        """
+        Check that the tree structure is properly formed
+        
+        Returns:
+            List of validation errors (empty if the tree is valid)
+        """
+        return self._check_tree(tree_data)[1]
+    
+    def _validate_tree_connectivity(self, tree_data: Dict[str, Any]) -> StoryTree:
         """
         Validate that the tree structure is properly formed
-        Expected: 5-10 nodes with exactly 1 start, 1 good_ending, and multiple normal/choice/bad_ending nodes
+        
+        Returns:
+            The parsed tree
         
         Raises:
             Exception: If tree validation fails
         """
-        nodes = tree_data.get("nodes", [])
-        edges = tree_data.get("edges", [])
-        
-        validation_errors = []
-        
-        # Check 1: Must have 5-10 nodes
-        if len(nodes) < 5 or len(nodes) > 10:
-            validation_errors.append(f"Expected 5-10 nodes, but got {len(nodes)}")
-        
-        # Build a map of node IDs
-        node_ids = {node["id"] for node in nodes}
-        
-        # Count node types
-        node_type_counts = {}
-        for node in nodes:
-            node_type = node.get("type", "unknown")
-            node_type_counts[node_type] = node_type_counts.get(node_type, 0) + 1
-        
-        # Check 2: Must have exactly 1 start node
-        if node_type_counts.get("start", 0) != 1:
-            validation_errors.append(f"Expected exactly 1 'start' node, but got {node_type_counts.get('start', 0)}")
-        
-        # Check 3: Must have exactly 1 good_ending node
-        if node_type_counts.get("good_ending", 0) != 1:
-            validation_errors.append(f"Expected exactly 1 'good_ending' node, but got {node_type_counts.get('good_ending', 0)}")
-        
-        # Check 4: Ending nodes should have no choices
-        for node in nodes:
-            node_type = node.get("type", "")
-            choices = node.get("choices", [])
-            if node_type in ["bad_ending", "good_ending"] and len(choices) > 0:
-                validation_errors.append(f"Ending node '{node['id']}' should not have choices, but has {len(choices)}")
-        
-        # Collect all choices and their nextNodeIds
-        all_choices = []
-        for node in nodes:
-            for choice in node.get("choices", []):
-                all_choices.append({
-                    "node_id": node["id"],
-                    "choice_id": choice["id"],
-                    "next_node_id": choice.get("nextNodeId")
-                })
-        
-        # Check 5: Number of edges must match number of choices
-        if len(edges) != len(all_choices):
-            validation_errors.append(f"Expected {len(all_choices)} edges to match {len(all_choices)} choices, but got {len(edges)} edges")
-        
-        # Validate: Every choice must have a corresponding edge
-        edge_map = {(edge["from"], edge["choiceId"]): edge["to"] for edge in edges}
-        
-        # Check 6: Every choice must have a corresponding edge
-        for choice in all_choices:
-            edge_key = (choice["node_id"], choice["choice_id"])
-            if edge_key not in edge_map:
-                validation_errors.append(
-                    f"Missing edge for choice '{choice['choice_id']}' in node '{choice['node_id']}'"
-                )
-            elif edge_map[edge_key] != choice["next_node_id"]:
-                validation_errors.append(
-                    f"Edge mismatch for choice '{choice['choice_id']}': "
-                    f"choice points to '{choice['next_node_id']}' but edge points to '{edge_map[edge_key]}'"
-                )
-        
-        # Check 7: All nextNodeIds must reference valid nodes
-        for choice in all_choices:
-            if choice["next_node_id"] and choice["next_node_id"] not in node_ids:
-                validation_errors.append(
-                    f"Invalid nextNodeId '{choice['next_node_id']}' in choice '{choice['choice_id']}' - node doesn't exist"
-                )
-        
+        tree, validation_errors = self._check_tree(tree_data)
         if validation_errors:
             error_msg = "Tree validation failed:\n" + "\n".join(f"  - {err}" for err in validation_errors)
             print(f"VALIDATION ERROR:\n{error_msg}", flush=True)
             raise Exception(error_msg)
         
-        print(f"✓ Tree validation passed: {len(nodes)} nodes, {len(edges)} edges, {len(all_choices)} choices", flush=True)
-        print(f"  Node types: {node_type_counts}", flush=True)
+        print(f"✓ Tree validation passed: {len(tree.nodes)} nodes, {len(tree.edges)} edges", flush=True)
+        return tree
+    
+    def _repair_story_tree(self, tree_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Bring a generated tree into a valid state without regenerating the story
+        
+        Runs the deterministic local repair first; only if errors remain is the
+        model asked to fix the tree, with just the errors and the tree as input.
+        
+        Returns:
+            The (possibly replaced) tree dictionary
+        """
+        repairs = repair_tree_structure(tree_data)
+        for repair in repairs:
+            print(f"🔧 {repair}", flush=True)
+        
+        validation_errors = self._collect_tree_validation_errors(tree_data)
+        attempts = 0
+        while validation_errors and attempts < config.STORY_REPAIR_MAX_LLM_ATTEMPTS:
+            attempts += 1
+            print(f"🔧 Local repair left {len(validation_errors)} error(s), requesting LLM fix (attempt {attempts})", flush=True)
+            tree_data = self.openai_service.repair_story_tree(
+                tree_data,
+                validation_errors,
+                system_prompt=STORY_REPAIR_SYSTEM_PROMPT,
+                user_prompt_template=STORY_REPAIR_USER_PROMPT_TEMPLATE
+            )
+            repair_tree_structure(tree_data)
+            validation_errors = self._collect_tree_validation_errors(tree_data)
+        
+        return tree_data
     
-    def generate_story(self, lesson: str, theme: str, story_format: str, character_count: int = 4) -> Dict[str, Any]:
+    def generate_story(self, lesson: str, theme: str, story_format: str, character_count: int = 4) -> StoryGenerateResponse:
         """Generate a new story with AI"""
         story_id = str(uuid.uuid4())
         print('Generating story...', flush=True)
@@ -225,96 +213,40 @@ class StoryService:
                 system_prompt=STORY_GENERATION_SYSTEM_PROMPT,
                 user_prompt=user_prompt
             )
-            print(story_data, flush=True)
+            print(f"✓ Story generated: {len(story_data.get('tree', {}).get('nodes', []))} nodes", flush=True)
             
-            # Validate tree connectivity
-            self._validate_tree_connectivity(story_data["tree"])
+            # Repair structural problems, then validate tree connectivity
+            story_data["tree"] = self._repair_story_tree(story_data["tree"])
+            tree = self._validate_tree_connectivity(story_data["tree"])
             
-            # Convert all simple IDs to UUIDs and update references
-            story_data = self._convert_ids_to_uuids(story_data)
+            # Parse the whole payload into a Story in one pass (the tree is already parsed)
+            now = datetime.now()
+            story = STORY_ADAPTER.validate_python({
+                "id": story_id,
+                "lesson": lesson,
+                "theme": theme,
+                "storyFormat": story_format,
+                "status": StoryStatus.DRAFT,
+                "tree": tree,
+                "characters": story_data["characters"],
+                "locations": story_data["locations"],
+                "createdAt": now,
+                "updatedAt": now
+            })
             
-            # Convert the response to our schema objects
-            from app.models.schemas import (CharacterRole, Choice, Location,
-                                            StoryEdge, StoryNode, StoryTree)
-
-            # Convert nodes
-            nodes = []
-            for node_data in story_data["tree"]["nodes"]:
-                choices = []
-                for choice_data in node_data.get("choices", []):
-                    choice = Choice(
-                        id=choice_data.get("id"),
-                        text=choice_data["text"],
-                        nextNodeId=choice_data.get("nextNodeId"),
-                        isCorrect=choice_data.get("isCorrect", True)
-                    )
-                    choices.append(choice)
-                
-                node = StoryNode(
-                    id=node_data["id"],
-                    sceneNumber=node_data["sceneNumber"],
-                    title=node_data["title"],
-                    text=node_data["text"],
-                    location=node_data["location"],
-                    type=node_data["type"],
-                    choices=choices
-                )
-                nodes.append(node)
-            
-            # Convert edges
-            edges = []
-            for edge_data in story_data["tree"]["edges"]:
-                edge = StoryEdge(
-                    **edge_data  # This will handle the alias correctly
-                )
-                edges.append(edge)
-            
-            # Create tree
-            tree = StoryTree(nodes=nodes, edges=edges)
-            
-            # Convert characters
-            characters = []
-            for char_data in story_data["characters"]:
-                character = CharacterRole(
-                    id=char_data["id"],
-                    role=char_data["role"],
-                    description=char_data["description"]
-                )
-                characters.append(character)
-            
-            # Convert locations
-            locations = []
-            for loc_data in story_data["locations"]:
-                location = Location(
-                    id=loc_data["id"],
-                    name=loc_data["name"],
-                    sceneNumbers=loc_data["sceneNumbers"],
-                    description=loc_data["description"]
-                )
-                locations.append(location)
+            # Convert all simple IDs to UUIDs and update references
+            self._convert_ids_to_uuids(StoryGraph(story.tree), story)
             
             # Save story
-            story = Story(
-                id=story_id,
-                lesson=lesson,
-                theme=theme,
-                storyFormat=story_format,
-                status=StoryStatus.DRAFT,
-                tree=tree,
-                characters=characters,
-                locations=locations,
-                createdAt=datetime.now(),
-                updatedAt=datetime.now()
-            )
-            
             self.data_manager.save_story(story)
+            self._list_totals.clear()
             
-            return {
-                "storyId": story_id,
-                "tree": tree.model_dump(by_alias=True),
-                "characters": [char.model_dump(by_alias=True) for char in characters],
-                "locations": [loc.model_dump(by_alias=True) for loc in locations]
-            }
+            return StoryGenerateResponse(
+                storyId=story_id,
+                tree=story.tree,
+                characters=story.characters,
+                locations=story.locations
+            )
             
         except Exception as e:
             raise Exception(f"Failed to generate story: {str(e)}")
@@ -418,9 +350,22 @@ class StoryService:
             "locations": locations
         }
     
-    def get_story(self, story_id: str) -> Optional[Story]:
-        """Get a story by ID"""
-        return self.data_manager.get_story(story_id)
+    def get_story(self, story_id: str, fields: Optional[Set[str]] = None) -> Optional[Story]:
+        """
+        Get a story by ID
+        
+        Args:
+            fields: Top-level fields to load (None for the full story)
+        """
+        story = self.data_manager.get_story(story_id, fields=fields)
+        if story and (fields is None or "tree" in fields):
+            # A client may edit from this version; keep it to diff against on conflict
+            self.version_history.record(story)
+        return story
+    
+    def get_story_version(self, story_id: str) -> Optional[int]:
+        """Current stored version of a story (None if it does not exist)"""
+        return self.data_manager.get_story_version(story_id)
     
     def get_stories_list(self, limit: int, offset: int, status: Optional[str] = None) -> StoryListResponse:
         """Get list of stories with pagination"""
@@ -432,24 +377,144 @@ class StoryService:
         )
     
     
-    def get_all_stories(self, limit: int, offset: int, status: Optional[str] = None, sort_by: Optional[str] = None) -> StoryListResponse:
-        """Get all stories with detailed information"""
-        stories = self.data_manager.get_all_stories(limit, offset, status, sort_by)
+    def get_all_stories(
+        self,
+        limit: int,
+        offset: int,
+        status: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        fields: Optional[Set[str]] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> StoryListResponse:
+        """
+        Get all stories with detailed information
+        
+        The first page and every cursor page are keyset pages; a non-zero
+        offset without a cursor falls back to offset pagination.
+        
+        Args:
+            fields: List item fields to load (None for all). With a field set
+                the items are partial and left unvalidated.
+            cursor: nextCursor of the previous page
+            include_total: Count the matching stories (cached for STORY_LIST_TOTAL_TTL)
+        
+        Raises:
+            ValueError: If the cursor is invalid for this sort/status
+        """
+        if status == "all":
+            status = None
+        
+        next_cursor = None
+        if cursor or offset == 0:
+            stories, next_cursor = self.data_manager.get_stories_page(limit, status, sort_by, cursor, fields=fields)
+            has_more = next_cursor is not None
+        else:
+            stories = self.data_manager.get_all_stories(limit, offset, status, sort_by, fields=fields)
+            has_more = len(stories) == limit
+        
+        if fields is not None:
+            stories = [StoryListItem.model_construct(**story) for story in stories]
         return StoryListResponse(
             stories=stories,
-            total=self.data_manager.get_stories_count(status),
-            hasMore=len(stories) == limit
+            total=self._get_stories_total(status) if include_total else None,
+            hasMore=has_more,
+            nextCursor=next_cursor
         )
     
+    def _get_stories_total(self, status: Optional[str]) -> int:
+        """Story count for a status filter, reused for STORY_LIST_TOTAL_TTL seconds"""
+        cached = self._list_totals.get(status)
+        if cached and time.monotonic() - cached[1] < config.STORY_LIST_TOTAL_TTL:
+            return cached[0]
+        
+        total = self.data_manager.get_stories_count(status)
+        self._list_totals[status] = (total, time.monotonic())
+        return total
+    
     # ========================================================================
     # Story Tree Editing
     # ========================================================================
     
-    def update_node(self, story_id: str, node_id: str, request) -> Optional[StoryNode]:
-        """Update a story node"""
+    def _load_for_edit(self, story_id: str, expected_version: Optional[int]) -> Optional[Story]:
+        """
+        Load a story to modify it
+        
+        Raises:
+            StoryVersionConflict: If the story is no longer at expected_version
+        """
         story = self.data_manager.get_story(story_id)
         if not story:
             return None
+        self.version_history.record(story)
+        if expected_version is not None and story.version != expected_version:
+            raise StoryVersionConflict(story_id, expected_version, story.version)
+        return story
+    
+    def _save_edit(
+        self,
+        story: Story,
+        expected_version: Optional[int],
+        before: Optional[Dict[str, Dict[str, Any]]] = None,
+        action: str = "edit",
+        target: Optional[int] = None
+    ) -> None:
+        """
+        Save an edited story (conditionally when expected_version is given)
+        
+        Args:
+            before: snapshot() of the tree as loaded. Tree edits pass it so only
+                the changed rows are written and the delta is journaled; without
+                it the whole story is saved.
+            action: "edit", or "undo"/"redo" of the edit journaled as `target`
+        """
+        base_version = story.version
+        story.updatedAt = datetime.now()
+        if before is None:
+            self.data_manager.save_story(story, expected_version=expected_version)
+            self.version_history.record(story)
+            return
+        
+        self.data_manager.save_story_tree_changes(story, diff_tree(before, story.tree), expected_version=expected_version)
+        self.version_history.record(story)
+        try:
+            self.edit_journal.record(story.id, base_version, before, snapshot(story.tree), story.version, action, target)
+        except Exception as e:
+            # The edit itself is saved; the next one restarts the journal from a snapshot
+            self.edit_journal.forget(story.id)
+            print(f"⚠️ Failed to journal edit of story {story.id}: {str(e)}", flush=True)
+    
+    def get_version_conflict(self, conflict: StoryVersionConflict) -> Dict[str, Any]:
+        """
+        Error details for a rejected conditional write
+        
+        Returns:
+            Error with the current version and the server-side changes since
+            the version the client edited
+        """
+        story = self.data_manager.get_story(conflict.story_id)
+        error = {
+            "code": "VERSION_CONFLICT",
+            "message": str(conflict),
+            "expectedVersion": conflict.expected_version,
+            "currentVersion": story.version if story else None
+        }
+        if story:
+            self.version_history.record(story)
+            error["diff"] = self.version_history.diff(conflict.expected_version, story)
+        return error
+    
+    def update_node(self, story_id: str, node_id: str, request, expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Update a story node
+        
+        Returns:
+            {"node", "version"}, or None if the story or node does not exist
+        """
+        story = self._load_for_edit(story_id, expected_version)
+        if not story:
+            return None
+        before = snapshot(story.tree)
         
         # Find and update the node
         for node in story.tree.nodes:
@@ -461,20 +526,27 @@ class StoryService:
                 if request.location:
                     node.location = request.location
                 if request.choices:
-                    node.choices = request.choices
+                    for choice in request.choices:
+                        choice.id = choice.id or str(uuid.uuid4())
+                    StoryGraph(story.tree).set_choices(node.id, request.choices)
                 
                 # Update story
-                story.updatedAt = datetime.now()
-                self.data_manager.save_story(story)
-                return node
+                self._save_edit(story, expected_version, before)
+                return {"node": node, "version": story.version}
         
         return None
     
-    def add_node(self, story_id: str, request) -> Optional[StoryNode]:
-        """Add a new node to the story"""
-        story = self.data_manager.get_story(story_id)
+    def add_node(self, story_id: str, request, expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Add a new node to the story
+        
+        Returns:
+            {"node", "version"}, or None if the story does not exist
+        """
+        story = self._load_for_edit(story_id, expected_version)
         if not story:
             return None
+        before = snapshot(story.tree)
         
         # Create new node
         new_node = StoryNode(
@@ -487,69 +559,175 @@ class StoryService:
             choices=request.choices if hasattr(request, 'choices') else []
         )
         
-        # Add to story tree
-        story.tree.nodes.append(new_node)
+        for choice in new_node.choices:
+            choice.id = choice.id or str(uuid.uuid4())
         
-        # Add edge from parent to new node
-        if hasattr(request, 'parentNodeId') and request.parentNodeId:
-            new_edge = StoryEdge(
-                from_node=request.parentNodeId,
-                to=new_node.id
-            )
-            story.tree.edges.append(new_edge)
-            
-            # If choiceId is provided, update the parent node's choice to point to new node
-            if hasattr(request, 'choiceId') and request.choiceId:
-                for node in story.tree.nodes:
-                    if node.id == request.parentNodeId:
-                        for choice in node.choices:
-                            if choice.id == request.choiceId:
-                                choice.nextNodeId = new_node.id
-                                break
-                        break
+        # Add to story tree, pointing the parent's choice at the new node
+        StoryGraph(story.tree).add_node(
+            new_node,
+            parent_node_id=getattr(request, 'parentNodeId', None),
+            choice_id=getattr(request, 'choiceId', None)
+        )
         
-        story.updatedAt = datetime.now()
-        self.data_manager.save_story(story)
+        self._save_edit(story, expected_version, before)
         
-        return new_node
+        return {"node": new_node, "version": story.version}
     
-    def delete_node(self, story_id: str, node_id: str) -> Optional[Dict[str, Any]]:
+    def delete_node(self, story_id: str, node_id: str, expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Delete a node from the story"""
-        story = self.data_manager.get_story(story_id)
+        story = self._load_for_edit(story_id, expected_version)
         if not story:
             return None
+        before = snapshot(story.tree)
         
-        # Find and remove the node
-        node_to_remove = None
-        affected_nodes = []
+        # Remove the node and unlink every choice that pointed to it
+        affected_nodes = StoryGraph(story.tree).delete_node(node_id)
+        if affected_nodes is None:
+            return None
         
-        for node in story.tree.nodes:
-            if node.id == node_id:
-                node_to_remove = node
-                # Check which nodes have choices pointing to this node
-                for other_node in story.tree.nodes:
-                    if other_node != node_to_remove:
-                        for choice in other_node.choices:
-                            if choice.nextNodeId == node_id:
-                                affected_nodes.append(other_node.id)
-                                choice.nextNodeId = None
-        
-        if node_to_remove:
-            story.tree.nodes.remove(node_to_remove)
-            # Remove edges involving this node
-            story.tree.edges = [edge for edge in story.tree.edges if edge.from_ != node_id and edge.to != node_id]
-            story.updatedAt = datetime.now()
-            self.data_manager.save_story(story)
-            
-            return {
-                "deletedNodeId": node_id,
-                "affectedNodes": affected_nodes,
-                "message": "Node deleted successfully"
-            }
+        self._save_edit(story, expected_version, before)
         
-        return None
+        return {
+            "deletedNodeId": node_id,
+            "affectedNodes": affected_nodes,
+            "version": story.version,
+            "message": "Node deleted successfully"
+        }
     
     
+    def apply_tree_batch(self, story_id: str, request: TreeBatchRequest, expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Apply several node operations with one load and one incremental save
+        
+        Either every operation is applied or none is: the story is edited in
+        memory and only persisted when the whole batch succeeded.
+        
+        Returns:
+            Per-operation results, changed node IDs and structural warnings,
+            or None if the story does not exist
+        
+        Raises:
+            TreeBatchError: If an operation is invalid (nothing is saved)
+            StoryVersionConflict: If the story is not at the expected version
+                (If-Match or request.version)
+        """
+        if expected_version is None:
+            expected_version = request.version
+        story = self._load_for_edit(story_id, expected_version)
+        if not story:
+            return None
+        
+        before = snapshot(story.tree)
+        batch = TreeBatch(story.tree)
+        results = batch.apply(request.operations)
+        
+        changes = diff_tree(before, story.tree)
+        if not changes.is_empty():
+            self._save_edit(story, expected_version, before)
+        
+        # Editors may pass through incomplete states, so structure problems are reported, not rejected
+        warnings = batch.graph.validation_errors(node_range=None) + story_analysis_cache.get(story.tree).validation_errors()
+        
+        return {
+            "storyId": story_id,
+            "results": results,
+            "updatedNodeIds": [node.id for node in changes.upserted_nodes],
+            "relinkedNodeIds": changes.relinked_node_ids,
+            "deletedNodeIds": changes.deleted_node_ids,
+            "version": story.version,
+            "warnings": warnings
+        }
+    
+    # ========================================================================
+    # Edit Journal
+    # ========================================================================
+    
+    def undo_edit(self, story_id: str, expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Undo the latest tree edit that is not undone yet"""
+        return self._step_edit(story_id, "undo", expected_version)
+    
+    def redo_edit(self, story_id: str, expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Redo the latest undone tree edit"""
+        return self._step_edit(story_id, "redo", expected_version)
+    
+    def _step_edit(self, story_id: str, action: str, expected_version: Optional[int]) -> Optional[Dict[str, Any]]:
+        """
+        Reverse ("undo") or replay ("redo") one journaled edit
+        
+        When the journal head is at the current version the tree is rebuilt
+        from the journal and only the story's version is read. After a save
+        outside the journal (e.g. completing the story) the tree is loaded
+        instead and the journal continues from it.
+        
+        Returns:
+            The new version, the nodes the step changed and whether more
+            undo/redo steps remain, or None if the story does not exist
+        
+        Raises:
+            EditJournalError: If there is nothing to undo/redo, or a later
+                edit changed the same nodes
+            StoryVersionConflict: If the story is not at expected_version
+        """
+        current = self.data_manager.get_story_version(story_id)
+        if current is None:
+            return None
+        if expected_version is not None and current != expected_version:
+            raise StoryVersionConflict(story_id, expected_version, current)
+        
+        head = self.edit_journal.head(story_id)
+        if head is None or head.version != current:
+            head = self.edit_journal.head(story_id, refresh=True)
+        stack = (head.undo if action == "undo" else head.redo) if head else []
+        if not stack:
+            raise EditJournalError(f"Nothing to {action}")
+        target = stack[-1]
+        entry = self.data_manager.get_story_edit(story_id, target)
+        if entry is None:
+            raise EditJournalError(f"Edit {target} is no longer in the journal")
+        
+        if head.version == current:
+            before = head.nodes
+            story = Story.model_construct(id=story_id, version=current)
+        else:
+            story = self._load_for_edit(story_id, current)
+            if not story:
+                return None
+            before = snapshot(story.tree)
+        
+        nodes = apply_changes(before, entry["nodes"], "before" if action == "undo" else "after")
+        story.tree = tree_from_nodes(nodes)
+        self._save_edit(story, current, before, action, target)
+        
+        head = self.edit_journal.head(story_id)
+        return {
+            "storyId": story_id,
+            "action": action,
+            "editVersion": target,
+            "version": story.version,
+            "nodes": [nodes[node_id] for node_id in entry["nodes"] if node_id in nodes],
+            "deletedNodeIds": [node_id for node_id in entry["nodes"] if node_id not in nodes],
+            "canUndo": bool(head and head.undo),
+            "canRedo": bool(head and head.redo)
+        }
+    
+    def get_story_changes(self, story_id: str, since_version: int) -> Optional[Dict[str, Any]]:
+        """
+        Node changes since a version, from the edit journal
+        
+        Lets an editor or reader update a cached tree or reading bundle
+        instead of reloading it. When "complete" is False the journal does
+        not cover the gap (e.g. the story was regenerated or completed) and
+        the client must reload.
+        
+        Returns:
+            Change feed (see EditJournal.changes_since), or None if the story
+            does not exist
+        """
+        current = self.data_manager.get_story_version(story_id)
+        if current is None:
+            return None
+        return {"storyId": story_id, **self.edit_journal.changes_since(story_id, since_version, current)}
+    
     # ========================================================================
     # Character Management
     # ========================================================================
@@ -630,8 +808,8 @@ class StoryService:
         
         return None
     
-    def generate_all_location_images(self, story_id: str, locations) -> Optional[str]:
-        """Generate location background images for all locations using FAL.ai"""
+    def generate_all_location_images(self, story_id: str, locations, quality: str = "final") -> Optional[str]:
+        """Generate location background images for all locations (see ImageRouter for the provider choice)"""
         try:
             story = self.data_manager.get_story(story_id)
             if not story:
@@ -652,30 +830,17 @@ class StoryService:
                     print(f"🎨 Generating image for location {location.locationId}", flush=True)
                     description = location.description
                     
-                    # Generate image using FAL.ai
-                    fal_image_url = self.fal_ai_service.generate_image(
-                        prompt=description,
-                        width=1024,
-                        height=768
-                    )
+                    # Generate image on the best available provider for the tier
+                    image = self.image_router.generate("background", description, quality=quality)
                     
-                    if not fal_image_url:
-                        print(f"❌ Failed to generate image for location {location.locationId}", flush=True)
+                    # Try to upload to Supabase storage, but fall back to the provider URL if it fails
+                    supabase_url = self._store_generated_image(image, f"locations/{story_id}_{location.locationId}_{str(uuid.uuid4())[:8]}")
+                    final_url = supabase_url or image.url
+                    if not final_url:
+                        print(f"❌ Failed to store image for location {location.locationId}", flush=True)
                         failed_count += 1
                         continue
                     
-                    # Try to upload to Supabase storage, but fall back to FAL.ai URL if it fails
-                    filename = f"locations/{story_id}_{location.locationId}_{str(uuid.uuid4())[:8]}.jpg"
-                    try:
-                        supabase_url = self.data_manager.upload_image_to_storage(fal_image_url, filename)
-                        final_url = supabase_url if supabase_url else fal_image_url
-                        if not supabase_url:
-                            print(f"⚠️ Supabase storage upload failed for location {location.locationId}, using FAL.ai URL as fallback", flush=True)
-                    except Exception as e:
-                        print(f"⚠️ Supabase storage error for location {location.locationId}: {str(e)}, using FAL.ai URL as fallback", flush=True)
-                        final_url = fal_image_url
-                        supabase_url = None
-                    
                     # Generate a version ID for this image
                     version_id = str(uuid.uuid4())
                     
@@ -696,14 +861,7 @@ class StoryService:
                     self.data_manager.update_location_image(location_data)
                     
                     # Create a version entry for this generated image
-                    version_entry = {
-                        "id": str(uuid.uuid4()),
-                        "background_id": location.locationId,
-                        "version_id": version_id,
-                        "image_url": final_url,
-                        "created_at": datetime.now().isoformat()
-                    }
-                    self.data_manager.supabase.table("background_versions").insert(version_entry).execute()
+                    self._save_location_version(location.locationId, version_id, image, final_url, description)
                     
                     last_generated_url = final_url
                     generated_count += 1
@@ -711,7 +869,7 @@ class StoryService:
                     if supabase_url:
                         print(f"✅ Image uploaded to Supabase storage for location {location.locationId}: {supabase_url}", flush=True)
                     else:
-                        print(f"⚠️ Using FAL.ai URL for location {location.locationId}", flush=True)
+                        print(f"⚠️ Using {image.provider} URL for location {location.locationId}", flush=True)
                         
                 except Exception as e:
                     print(f"❌ Error generating image for location {location.locationId}: {str(e)}", flush=True)
@@ -729,6 +887,25 @@ class StoryService:
             print(f"Error in generate_all_location_images: {str(e)}", flush=True)
             raise Exception(f"Location image generation failed: {str(e)}")
     
+    def _store_generated_image(self, image: GeneratedImage, path: str) -> Optional[str]:
+        """
+        Upload a routed image to Supabase storage
+        
+        Args:
+            image: Result of ImageRouter.generate (a URL or base64 data)
+            path: Storage path without extension
+            
+        Returns:
+            Storage URL, or None if the upload failed
+        """
+        try:
+            if image.url:
+                return self.data_manager.upload_image_to_storage(image.url, f"{path}.jpg")
+            return self.data_manager.upload_base64_image_to_storage(image.data, f"{path}.png")
+        except Exception as e:
+            print(f"⚠️ Supabase storage error for {path}: {str(e)}", flush=True)
+            return None
+    
     def check_location_image_generation_status(self, story_id: str, job_id: Optional[str] = None) -> Optional[LocationImageGenerationStatus]:
         """Check location image generation status"""
         status_data = self.data_manager.get_location_image_generation_status(story_id, job_id)
@@ -737,8 +914,8 @@ class StoryService:
         
         return LocationImageGenerationStatus(**status_data)
     
-    def regenerate_individual_location_image(self, story_id: str, location_id: str, description: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        """Regenerate individual location image using FAL.ai"""
+    def regenerate_individual_location_image(self, story_id: str, location_id: str, description: Optional[str] = None, quality: str = "final") -> Optional[Dict[str, Any]]:
+        """Regenerate individual location image (see ImageRouter for the provider choice)"""
         locations = self.get_story_locations(story_id)
         if not locations:
             return None
@@ -749,68 +926,31 @@ class StoryService:
                     # Use provided description or existing description
                     prompt = description if description else location.description
                     
-                    # Generate new image using FAL.ai
-                    fal_image_url = self.fal_ai_service.generate_image(
-                        prompt=prompt,
-                        width=1024,
-                        height=768
-                    )
-                    
-                    if not fal_image_url:
-                        raise Exception("Failed to generate image from FAL.ai")
+                    # Generate new image on the best available provider for the tier
+                    image = self.image_router.generate("background", prompt, quality=quality)
                     
-                    # Try to upload to Supabase storage, fall back to FAL.ai URL if it fails
-                    filename = f"locations/{story_id}_{location_id}_{str(uuid.uuid4())[:8]}.jpg"
-                    try:
-                        supabase_url = self.data_manager.upload_image_to_storage(fal_image_url, filename)
-                        final_url = supabase_url if supabase_url else fal_image_url
-                        if not supabase_url:
-                            print("⚠️ Supabase storage upload failed, using FAL.ai URL as fallback", flush=True)
-                    except Exception as e:
-                        print(f"⚠️ Supabase storage error: {str(e)}, using FAL.ai URL as fallback", flush=True)
-                        final_url = fal_image_url
+                    # Try to upload to Supabase storage, fall back to the provider URL if it fails
+                    final_url = self._store_generated_image(image, f"locations/{story_id}_{location_id}_{str(uuid.uuid4())[:8]}") or image.url
+                    if not final_url:
+                        raise Exception(f"Failed to store image from {image.provider}")
                     
-                    # Create new version
+                    # Record the version, then point the location at it
                     version_id = str(uuid.uuid4())
-                    new_version = ImageVersion(
-                        versionId=version_id,
-                        imageUrl=final_url,
-                        createdAt=datetime.now()
-                    )
-                    
-                    location.imageVersions.append(new_version)
-                    location.imageUrl = final_url
-                    location.generationStatus = GenerationStatus.COMPLETED
-                    location.selectedVersionId = version_id  # Auto-select the new version
-                    
-                    # Update description if provided
-                    if description:
-                        location.description = description
-                    
-                    # Save updated location to database
-                    self.data_manager.save_story_locations(story_id, [loc.model_dump() for loc in locations])
-                    
-                    # Also create a version entry in the database
-                    version_data = {
-                        "id": str(uuid.uuid4()),  # Use a plain UUID for the primary key
-                        "background_id": location_id,
-                        "version_id": version_id,
-                        "image_url": final_url,
-                        "created_at": datetime.now().isoformat()
-                    }
-                    self.data_manager.supabase.table("background_versions").insert(version_data).execute()
+                    self._save_location_version(location_id, version_id, image, final_url, prompt)
+                    self.data_manager.set_location_image(location_id, version_id, final_url, description=description)
                     
                     return {
                         "locationId": location_id,
                         "versionId": version_id,
                         "imageUrl": final_url,
+                        "quality": image.quality,
+                        "provider": image.provider,
                         "status": "completed"
                     }
                     
                 except Exception as e:
+                    # The location keeps its selected image
                     print(f"Error regenerating location {location_id}: {str(e)}", flush=True)
-                    location.generationStatus = GenerationStatus.FAILED
-                    self.data_manager.save_story_locations(story_id, [loc.model_dump() for loc in locations])
                     
                     return {
                         "locationId": location_id,
@@ -830,20 +970,84 @@ class StoryService:
             if location.id == location_id:
                 for version in location.imageVersions:
                     if version.versionId == version_id:
-                        location.selectedVersionId = version_id
-                        location.imageUrl = version.url
+                        upgrade = None
+                        if version.quality == "draft":
+                            # Select the final render of this draft if it exists, otherwise queue it
+                            final = next((v for v in location.imageVersions if v.upgradedFrom == version_id), None)
+                            if final:
+                                version = final
+                                upgrade = "completed"
+                            elif not self.image_router.can_rerender("background", version.model, version.seed):
+                                # e.g. Gemini drafts, which have no seed: kept as they are
+                                upgrade = "unavailable"
+                            else:
+                                self.image_upgrades.submit(
+                                    (story_id, location_id, version_id),
+                                    story_id, location_id, version, location.description
+                                )
+                                upgrade = "queued"
                         
                         # Save updated location
-                        self.data_manager.save_story_locations(story_id, [loc.model_dump() for loc in locations])
+                        self.data_manager.set_location_image(location_id, version.versionId, version.url)
                         
                         return {
                             "locationId": location_id,
-                            "selectedVersionId": version_id,
-                            "imageUrl": version.url
+                            "selectedVersionId": version.versionId,
+                            "imageUrl": version.url,
+                            "upgrade": upgrade
                         }
         
         return None
     
+    def _upgrade_location_image(self, story_id: str, location_id: str, draft: ImageVersion, description: str) -> Optional[str]:
+        """
+        Render a selected draft at final quality and swap it in (upgrade queue job)
+        
+        The final render reuses the draft's prompt, seed, model and size, so
+        FAL keeps the composition that was picked. The location only switches to it if the
+        draft is still selected; otherwise it is kept as a new version.
+        
+        Returns:
+            The new version ID
+        """
+        prompt = draft.prompt or description
+        image = self.image_router.generate("background", prompt, quality="final", seed=draft.seed, model=draft.model)
+        final_url = self._store_generated_image(image, f"locations/{story_id}_{location_id}_{str(uuid.uuid4())[:8]}") or image.url
+        if not final_url:
+            raise Exception(f"Failed to store image from {image.provider}")
+        
+        version_id = str(uuid.uuid4())
+        self._save_location_version(location_id, version_id, image, final_url, prompt, upgraded_from=draft.versionId)
+        
+        if self.data_manager.set_location_image(location_id, version_id, final_url, expected_version_id=draft.versionId):
+            print(f"✅ Upgraded location {location_id} to a final render ({image.provider})", flush=True)
+        else:
+            print(f"⚠️ Location {location_id} selection changed during the upgrade, keeping it as a version", flush=True)
+        return version_id
+    
+    def _save_location_version(
+        self,
+        location_id: str,
+        version_id: str,
+        image: GeneratedImage,
+        image_url: str,
+        prompt: str,
+        upgraded_from: Optional[str] = None
+    ):
+        """Insert a background_versions row for a generated location image"""
+        self.data_manager.supabase.table("background_versions").insert({
+            "id": str(uuid.uuid4()),  # Use a plain UUID for the primary key
+            "background_id": location_id,
+            "version_id": version_id,
+            "image_url": image_url,
+            "created_at": datetime.now().isoformat(),
+            "quality": image.quality,
+            "prompt": prompt,
+            "seed": image.seed,
+            "model": image.model,
+            "upgraded_from": upgraded_from
+        }).execute()
+    
     # ========================================================================
     # Scene Image Management
     # ========================================================================
@@ -959,23 +1163,19 @@ Generate a single illustration that captures this scene with the characters desc
                     
                     print(f"🎨 Generating scene {scene_num}...")
                     
-                    # Generate image with Gemini (returns base64 data)
-                    base64_image_data = self.gemini_service.generate_image(prompt)
+                    # Generate image (Gemini returns base64 data, FAL a URL)
+                    image = self.image_router.generate("scene", prompt)
                     
                     # Create version ID
                     version_id = str(uuid.uuid4())
                     
-                    # Upload base64 image to Supabase storage
-                    filename = f"scene/{node.id}_{version_id}.png"
-                    image_url = self.data_manager.upload_base64_image_to_storage(
-                        base64_image_data, 
-                        filename
-                    )
+                    # Upload image to Supabase storage
+                    image_url = self._store_generated_image(image, f"scene/{node.id}_{version_id}")
                     
                     if not image_url:
-                        # If upload fails, fall back to base64 data
-                        print(f"⚠️ Failed to upload scene {scene_num} to Supabase, using base64 data as fallback")
-                        image_url = base64_image_data
+                        # If upload fails, fall back to the provider URL or base64 data
+                        print(f"⚠️ Failed to upload scene {scene_num} to Supabase, using {image.provider} output as fallback")
+                        image_url = image.url or image.data
                     
                     # Generate audio for the scene
                     audio_url = None
@@ -1057,6 +1257,7 @@ Generate a single illustration that captures this scene with the characters desc
             
             # Save generation job with results
             self.data_manager.create_scene_generation_job(story_id, job_id, scene_ids)
+            self._notify(story_id)
             
             print(f"✅ Scene generation completed! Generated {len(generated_scenes)} scenes")
             
@@ -1142,32 +1343,91 @@ Generate a single illustration that captures this scene with the characters desc
             "sceneIds": scene_ids
         }
     
-    def complete_story(self, story_id: str, title: str) -> Optional[Dict[str, Any]]:
+    def complete_story(self, story_id: str, title: str, expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Complete a story"""
-        story = self.data_manager.get_story(story_id)
+        story = self._load_for_edit(story_id, expected_version)
         if not story:
             return None
         
         story.title = title
         story.status = StoryStatus.COMPLETED
-        story.updatedAt = datetime.now()
-        self.data_manager.save_story(story)
+        self._save_edit(story, expected_version)
+        self._list_totals.clear()
         
         return {
             "storyId": story_id,
             "status": story.status.value,
             "title": title,
+            "version": story.version,
             "shareUrl": f"https://app.com/story/{story_id}",
+            "offlinePackageUrl": f"/api/v1/stories/{story_id}/package",
             "completedAt": datetime.now().isoformat()
         }
     
+    # ========================================================================
+    # Offline Packages
+    # ========================================================================
+    
+    def get_story_package(self, story_id: str) -> Optional[str]:
+        """
+        Get the offline package for a story, building it if it is not cached
+        
+        Returns:
+            Path of the zip file, or None if the story does not exist
+        """
+        cached = self.story_packager.get_cached(story_id)
+        if cached:
+            return cached
+        
+        # A build discarded because the story changed meanwhile is retried once
+        for _ in range(2):
+            story = self.get_story_for_reading(story_id)
+            if not story:
+                return None
+            path = self.story_packager.build(story)
+            if path:
+                return path
+        raise Exception(f"Story {story_id} kept changing while packaging")
+    
+    def build_story_package_in_background(self, story_id: str) -> None:
+        """Pre-build the offline package so the first download is served from cache"""
+        def run():
+            try:
+                story = self.get_story_for_reading(story_id)
+                if story:
+                    self.story_packager.build(story)
+            except Exception as e:
+                print(f"❌ Error building offline package for story {story_id}: {str(e)}", flush=True)
+        
+        threading.Thread(target=run, name=f"story-package-{story_id}", daemon=True).start()
+    
     # ========================================================================
     # Reading Mode
     # ========================================================================
     
-    def get_story_for_reading(self, story_id: str) -> Optional[StoryForReading]:
-        """Get story formatted for reading"""
-        story = self.data_manager.get_story(story_id)
+    def get_story_for_reading(self, story_id: str, fields: Optional[Set[str]] = None) -> Optional[StoryForReading]:
+        """
+        Get story formatted for reading
+        
+        Args:
+            fields: Top-level fields to return (None for all). The tree is only
+                loaded for nodes/startNodeId/prefetch, and scene images only
+                for nodes/prefetch.
+        """
+        if fields is not None and not fields & {"nodes", "startNodeId", "prefetch"}:
+            story = self.data_manager.get_story(story_id, fields=set())
+            if not story:
+                return None
+            return StoryForReading.model_construct(
+                id=story_id,
+                title=f"{story.lesson.title()} Story",
+                lesson=story.lesson,
+                status=story.status,
+                updatedAt=story.updatedAt,
+                version=story.version
+            )
+        
+        story = self.data_manager.get_story(story_id, fields=None if fields is None else {"tree"})
         if not story:
             return None
         
@@ -1177,8 +1437,9 @@ Generate a single illustration that captures this scene with the characters desc
         #     return None
         
         # Convert nodes to reading format
+        analysis = story_analysis_cache.get(story.tree)
         reading_nodes = []
-        for node in story.tree.nodes:
+        for node in (story.tree.nodes if fields is None or fields & {"nodes", "prefetch"} else []):
             # Get the actual scene image URL from database
             scene_versions = self.data_manager.get_scene_image_versions(story_id, node.id)
             image_url = None
@@ -1225,16 +1486,29 @@ Generate a single illustration that captures this scene with the characters desc
                 type=node.type,
                 choices=node.choices,
                 lessonMessage=node.text if node.type in ["good_ending", "bad_ending"] else None,
-                previousNodeId=None  # Would need to calculate this from edges
+                previousNodeId=analysis.parent_links.get(node.id),
+                scenesToEnd=analysis.scenes_to_end(node.id)
             )
             reading_nodes.append(reading_node)
         
+        prefetch = {}
+        if fields is None or "prefetch" in fields:
+            prefetch = build_prefetch_plan(
+                reading_nodes,
+                self.data_manager.get_choice_counts(story_id),
+                self.asset_sizes.sizes(asset_urls(reading_nodes))
+            )
+        
         return StoryForReading(
             id=story_id,
             title=f"{story.lesson.title()} Story",
             lesson=story.lesson,
             nodes=reading_nodes,
-            startNodeId=story.tree.nodes[0].id if story.tree.nodes else None
+            startNodeId=analysis.start_node_id,
+            prefetch=prefetch,
+            version=story.version,
+            status=story.status,
+            updatedAt=story.updatedAt
         )
     
     def save_reading_progress(self, story_id: str, request: ReadingProgressRequest) -> Optional[Dict[str, Any]]:
@@ -1247,7 +1521,8 @@ Generate a single illustration that captures this scene with the characters desc
             lastReadAt=datetime.now()
         )
         
-        self.data_manager.save_reading_progress(story_id, progress)
+        # Coalesced with the reader's other saves and written behind
+        self.progress_buffer.put(story_id, request.readerId, progress)
         
         return {
             "storyId": story_id,
@@ -1255,9 +1530,67 @@ Generate a single illustration that captures this scene with the characters desc
             "savedAt": datetime.now().isoformat()
         }
     
-    def get_reading_progress(self, story_id: str) -> Optional[ReadingProgress]:
-        """Get reading progress"""
-        progress_data = self.data_manager.get_reading_progress(story_id)
+    def append_reading_step(self, story_id: str, request: ReadingStepRequest) -> Dict[str, Any]:
+        """
+        Merge one reading step into the saved progress
+        
+        Step N of a session is the N-th visited node, so the sequence number
+        is checked against the visited list: an earlier step is an idempotent
+        replay, the next step is appended, and a later one reports the gap.
+        A new sessionId (or no saved progress) starts over at step 1. Steps
+        are sequenced per reader, against that reader's own progress. That
+        progress is buffered per process, so this assumes a reader's steps
+        reach the same worker (single worker or sticky routing).
+        
+        Returns:
+            Dict with "status" ("applied", "duplicate", "gap" or "conflict"),
+            "expectedSeq" and the resulting currentNodeId
+        """
+        progress = self.get_reading_progress(story_id, request.readerId or ANONYMOUS_READER)
+        new_session = progress is None or (request.sessionId is not None and request.sessionId != progress.sessionId)
+        visited = [] if new_session else progress.visitedNodeIds
+        expected_seq = len(visited) + 1
+        
+        result = {"storyId": story_id, "seq": request.seq}
+        if request.seq < expected_seq:
+            status = "duplicate" if visited[request.seq - 1] == request.nodeId else "conflict"
+            return {**result, "status": status, "expectedSeq": expected_seq, "currentNodeId": visited[-1]}
+        if request.seq > expected_seq:
+            return {**result, "status": "gap", "expectedSeq": expected_seq,
+                    "currentNodeId": visited[-1] if visited else None}
+        
+        updated = ReadingProgress(
+            storyId=story_id,
+            currentNodeId=request.nodeId,
+            visitedNodeIds=visited + [request.nodeId],
+            choicesMade=([] if new_session else progress.choicesMade) + ([request.choice] if request.choice else []),
+            lastReadAt=datetime.now(),
+            sessionId=request.sessionId if new_session else progress.sessionId
+        )
+        self.progress_buffer.put(story_id, request.readerId, updated)
+        
+        return {
+            **result,
+            "status": "applied",
+            "expectedSeq": request.seq + 1,
+            "currentNodeId": request.nodeId,
+            "savedAt": datetime.now().isoformat()
+        }
+    
+    def get_reading_progress(self, story_id: str, reader_id: Optional[str] = None) -> Optional[ReadingProgress]:
+        """
+        Get reading progress (unsaved buffered progress first)
+        
+        Args:
+            story_id: Story ID
+            reader_id: Reader to get progress for, or None for the story's
+                most recently read progress
+        """
+        buffered = self.progress_buffer.get(story_id, reader_id)
+        if buffered is not None:
+            return buffered
+        
+        progress_data = self.data_manager.get_reading_progress(story_id, reader_id)
         if not progress_data:
             return None
         
@@ -1265,6 +1598,7 @@ Generate a single illustration that captures this scene with the characters desc
     
     def record_reading_completion(self, story_id: str, request: ReadingCompletionRequest) -> Optional[Dict[str, Any]]:
         """Record reading completion"""
+        self.progress_buffer.flush(story_id)
         self.data_manager.record_reading_completion(story_id, request)
         
         # Get read count
@@ -1277,6 +1611,35 @@ Generate a single illustration that captures this scene with the characters desc
             "congratsMessage": "Congratulations! You made great choices!"
         }
     
+    def get_story_statistics(self, story_id: str) -> Optional[StoryStatistics]:
+        """
+        Get reading statistics for a story
+        
+        The counts come from the incremental rollup; the story tree only adds
+        choice texts, scene numbers and the (cached) ending and path analysis.
+        """
+        story = self.data_manager.get_story(story_id, fields={"id", "tree"})
+        if not story:
+            return None
+        
+        analysis = story_analysis_cache.get(story.tree)
+        statistics = self.data_manager.get_story_statistics(story_id, ending_ids=analysis.ending_ids)
+        if statistics is None:
+            return None
+        statistics["totalEndings"] = len(analysis.ending_ids)
+        statistics["pathCount"] = len(analysis.paths)
+        
+        graph = StoryGraph(story.tree)
+        for distribution in statistics["choiceDistribution"]:
+            texts = {choice.id: choice.text for choice in graph.choices_by_node.get(distribution["nodeId"], [])}
+            for choice in distribution["choices"]:
+                choice["text"] = texts.get(choice["choiceId"])
+        for scene in statistics["mostVisitedScenes"]:
+            node = graph.node(scene["nodeId"])
+            scene["sceneNumber"] = node.sceneNumber if node else None
+        
+        return StoryStatistics(**statistics)
+    
     # ========================================================================
     # Story Management
     # ========================================================================
@@ -1284,6 +1647,8 @@ Generate a single illustration that captures this scene with the characters desc
     def delete_story(self, story_id: str) -> Optional[Dict[str, Any]]:
         """Delete a story"""
         if self.data_manager.delete_story(story_id):
+            self.progress_buffer.discard(story_id)
+            self._list_totals.clear()
             return {
                 "deletedStoryId": story_id,
                 "message": "Story deleted successfully"
@@ -0,0 +1,214 @@
+"""
+Story Statistics
+Incremental reading rollups so story statistics never rescan completions
+"""
+
+import base64
+import hashlib
+import math
+from typing import Any, Dict, List, Optional
+
+import config
+
+
+class HyperLogLog:
+    """
+    Fixed-size distinct counter (about 3% error at the default precision)
+
+    Registers serialize to a short base64 string, so the sketch can live in
+    a JSON column or file next to the other rollups.
+    """
+
+    def __init__(self, precision: int = 10, registers: Optional[bytes] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.size)
+
+    def add(self, value: str) -> None:
+        """Add a value to the set"""
+        hashed = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        """Estimated number of distinct values added"""
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -register for register in self.registers)
+
+        # Linear counting is more accurate for small sets
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)
+        return int(round(estimate))
+
+    def to_string(self) -> str:
+        """Serialize the registers"""
+        return base64.b64encode(bytes(self.registers)).decode("ascii")
+
+    @classmethod
+    def from_string(cls, value: Optional[str]) -> "HyperLogLog":
+        """Restore a sketch from to_string() output (None for an empty sketch)"""
+        registers = base64.b64decode(value) if value else None
+        return cls(registers=registers)
+
+
+class StoryStatsRollup:
+    """
+    Running statistics for one story
+
+    Updated once per completion and once per progress save, read in O(1)
+    regardless of how many times the story has been read.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        """
+        Load a rollup
+
+        Args:
+            data: Output of to_dict(), or None for a story with no reads
+        """
+        data = data or {}
+        buckets = config.READING_TIME_HISTOGRAM_BUCKETS
+        self.total_reads: int = data.get("totalReads", 0)
+        self.sessions_started: int = data.get("sessionsStarted", 0)
+        self.readers = HyperLogLog.from_string(data.get("readers"))
+        self.reading_time_total: int = data.get("readingTimeTotal", 0)
+        self.reading_time_count: int = data.get("readingTimeCount", 0)
+        self.reading_time_histogram: List[int] = data.get("readingTimeHistogram") or [0] * (len(buckets) + 1)
+        self.ending_counts: Dict[str, int] = data.get("endingCounts", {})
+        self.choice_counts: Dict[str, Dict[str, int]] = data.get("choiceCounts", {})
+        self.node_visits: Dict[str, int] = data.get("nodeVisits", {})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form of the rollup"""
+        return {
+            "totalReads": self.total_reads,
+            "sessionsStarted": self.sessions_started,
+            "readers": self.readers.to_string(),
+            "readingTimeTotal": self.reading_time_total,
+            "readingTimeCount": self.reading_time_count,
+            "readingTimeHistogram": self.reading_time_histogram,
+            "endingCounts": self.ending_counts,
+            "choiceCounts": self.choice_counts,
+            "nodeVisits": self.node_visits,
+        }
+
+    # ========================================================================
+    # Updates
+    # ========================================================================
+
+    def add_completion(self, completion: Dict[str, Any]) -> None:
+        """
+        Count a finished reading
+
+        Args:
+            completion: Completion request fields (endingType, readingTimeSeconds, readerId)
+        """
+        self.total_reads += 1
+        self.readers.add(completion.get("readerId") or "anonymous")
+
+        ending_type = completion.get("endingType")
+        if ending_type:
+            self.ending_counts[ending_type] = self.ending_counts.get(ending_type, 0) + 1
+
+        seconds = completion.get("readingTimeSeconds")
+        if seconds:
+            self.reading_time_total += seconds
+            self.reading_time_count += 1
+            bucket = sum(1 for edge in config.READING_TIME_HISTOGRAM_BUCKETS if seconds >= edge)
+            self.reading_time_histogram[bucket] += 1
+
+    def add_progress(self, previous: Optional[Dict[str, Any]], progress: Dict[str, Any]) -> None:
+        """
+        Count the node visits and choices a progress save adds
+
+        Progress lists are cumulative for a reading session, so only the part
+        after the previously saved lists is new. A save that does not extend
+        the previous one starts a new session.
+
+        Args:
+            previous: Previously saved progress (visitedNodeIds, choicesMade) or None
+            progress: Progress being saved
+        """
+        visited = progress.get("visitedNodeIds") or []
+        choices = progress.get("choicesMade") or []
+        previous_visited = (previous or {}).get("visitedNodeIds") or []
+        previous_choices = (previous or {}).get("choicesMade") or []
+
+        continues = (
+            previous is not None
+            and visited[:len(previous_visited)] == previous_visited
+            and choices[:len(previous_choices)] == previous_choices
+        )
+        if not continues:
+            self.sessions_started += 1
+            previous_visited, previous_choices = [], []
+
+        for node_id in visited[len(previous_visited):]:
+            self.node_visits[node_id] = self.node_visits.get(node_id, 0) + 1
+        for choice in choices[len(previous_choices):]:
+            node_choices = self.choice_counts.setdefault(choice["nodeId"], {})
+            node_choices[choice["choiceId"]] = node_choices.get(choice["choiceId"], 0) + 1
+
+    # ========================================================================
+    # Statistics
+    # ========================================================================
+
+    def statistics(self, story_id: str, most_visited_limit: int = 5, ending_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Statistics in the StoryStatistics shape (choice text and scene numbers
+        are not known here and are filled in by StoryService)
+
+        Args:
+            story_id: Story ID
+            most_visited_limit: Number of most visited scenes to return
+            ending_ids: Ending nodes of the story; sessions whose progress
+                reached one count as completed even without a completion call
+        """
+        average_reading_time = self.reading_time_total / self.reading_time_count if self.reading_time_count else 0
+        completed = self.total_reads
+        if ending_ids:
+            completed = max(completed, sum(self.node_visits.get(ending_id, 0) for ending_id in ending_ids))
+        if self.sessions_started:
+            completion_rate = min(100, round(100 * completed / self.sessions_started))
+        else:
+            completion_rate = 100 if completed else 0
+
+        edges = config.READING_TIME_HISTOGRAM_BUCKETS
+        histogram = [
+            {
+                "minSeconds": edges[index - 1] if index else 0,
+                "maxSeconds": edges[index] if index < len(edges) else None,
+                "count": count
+            }
+            for index, count in enumerate(self.reading_time_histogram)
+        ]
+
+        most_visited = sorted(self.node_visits.items(), key=lambda item: (-item[1], item[0]))[:most_visited_limit]
+
+        return {
+            "storyId": story_id,
+            "totalReads": self.total_reads,
+            "uniqueReaders": self.readers.count(),
+            "averageReadingTime": int(average_reading_time),
+            "completionRate": completion_rate,
+            "choiceDistribution": [
+                {
+                    "nodeId": node_id,
+                    "choices": [
+                        {"choiceId": choice_id, "selectedCount": count}
+                        for choice_id, count in sorted(counts.items(), key=lambda item: -item[1])
+                    ]
+                }
+                for node_id, counts in self.choice_counts.items()
+            ],
+            "mostVisitedScenes": [
+                {"nodeId": node_id, "visitCount": count}
+                for node_id, count in most_visited
+            ],
+            "endingCounts": self.ending_counts,
+            "readingTimeHistogram": histogram
+        }
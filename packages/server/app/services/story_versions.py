@@ -0,0 +1,100 @@
+"""
+Story Versions
+Optimistic concurrency for story writes and diffs for conflicting clients
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import config
+from app.models.schemas import Story
+from app.services.tree_batch import diff_tree, snapshot
+
+
+class StoryVersionConflict(Exception):
+    """A conditional write was based on an outdated story version"""
+
+    def __init__(self, story_id: str, expected_version: Optional[int], current_version: Optional[int]):
+        super().__init__(f"Story {story_id} is at version {current_version}, not {expected_version}")
+        self.story_id = story_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+def parse_if_match(value: Optional[str]) -> Optional[int]:
+    """
+    Story version from an If-Match header
+
+    Accepts "v7", W/"v7" or a bare 7; "*" and a missing header mean
+    "any version".
+
+    Raises:
+        ValueError: If the header is not a story version
+    """
+    if value is None or value.strip() == "*":
+        return None
+    tag = value.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    if tag.startswith("v"):
+        tag = tag[1:]
+    if not tag.isdigit():
+        raise ValueError(f"If-Match must be a story version like \"v3\", got {value}")
+    return int(tag)
+
+
+class StoryVersionHistory:
+    """
+    Recent tree snapshots per story, keyed by version
+
+    Lets a conflict response tell the client exactly which nodes changed
+    since the version it edited. Older versions fall out of the history;
+    for those the diff lists the whole current tree.
+    """
+
+    def __init__(self, versions_per_story: int = config.STORY_VERSION_HISTORY_SIZE, max_stories: int = 256):
+        self.versions_per_story = versions_per_story
+        self.max_stories = max_stories
+        self._stories: "OrderedDict[str, OrderedDict[int, Dict[str, Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, story: Story) -> None:
+        """Remember the tree of a loaded or saved story version"""
+        with self._lock:
+            versions = self._stories.setdefault(story.id, OrderedDict())
+            self._stories.move_to_end(story.id)
+            if story.version not in versions:
+                versions[story.version] = snapshot(story.tree)
+            while len(versions) > self.versions_per_story:
+                versions.popitem(last=False)
+            while len(self._stories) > self.max_stories:
+                self._stories.popitem(last=False)
+
+    def diff(self, base_version: Optional[int], story: Story) -> Dict[str, Any]:
+        """
+        Changes from a client's base version to the current story
+
+        Returns:
+            {"baseVersion", "currentVersion", "complete", "addedNodes",
+            "updatedNodes", "deletedNodeIds"}; complete is False when the base
+            version is unknown and every current node is listed as added
+        """
+        with self._lock:
+            before = self._stories.get(story.id, {}).get(base_version)
+
+        changes = diff_tree(before or {}, story.tree)
+        known = set(before or {})
+        changed = {node.id for node in changes.upserted_nodes} | set(changes.relinked_node_ids)
+        return {
+            "baseVersion": base_version,
+            "currentVersion": story.version,
+            "complete": before is not None,
+            "addedNodes": [node.model_dump() for node in changes.upserted_nodes if node.id not in known],
+            "updatedNodes": [
+                node.model_dump() for node in story.tree.nodes
+                if node.id in known and node.id in changed
+            ],
+            "deletedNodeIds": changes.deleted_node_ids
+        }
@@ -0,0 +1,180 @@
+"""
+Story Tree Batch Edits
+Apply an ordered list of node operations to one in-memory story and diff the result
+"""
+
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.models.schemas import Choice, StoryNode, StoryTree, TreeOperation
+from app.services.story_graph import StoryGraph
+
+
+class TreeBatchError(ValueError):
+    """An operation could not be applied (the whole batch is rejected)"""
+
+    def __init__(self, message: str, index: Optional[int] = None):
+        super().__init__(message if index is None else f"Operation {index}: {message}")
+        self.index = index
+
+
+class TreeChanges:
+    """What a batch changed, as needed for an incremental save"""
+
+    def __init__(self, upserted_nodes: List[StoryNode], deleted_node_ids: List[str], relinked_node_ids: List[str],
+                 new_node_ids: Optional[List[str]] = None):
+        self.upserted_nodes = upserted_nodes        # New nodes and nodes with changed fields
+        self.deleted_node_ids = deleted_node_ids
+        self.relinked_node_ids = relinked_node_ids  # Nodes whose choices must be rewritten
+        self.new_node_ids = new_node_ids or []      # Upserted nodes that did not exist before
+
+    def is_empty(self) -> bool:
+        return not (self.upserted_nodes or self.deleted_node_ids or self.relinked_node_ids)
+
+
+def snapshot(tree: StoryTree) -> Dict[str, Dict[str, Any]]:
+    """Node state (JSON-ready) before a batch, for diff_tree()"""
+    return {node.id: node.model_dump(mode="json") for node in tree.nodes}
+
+
+def diff_tree(before: Dict[str, Dict[str, Any]], tree: StoryTree) -> TreeChanges:
+    """Compare a tree with its snapshot()"""
+    upserted, relinked, new = [], [], []
+    for node in tree.nodes:
+        previous = before.get(node.id)
+        current = node.model_dump(mode="json")
+        if previous is None:
+            upserted.append(node)
+            relinked.append(node.id)
+            new.append(node.id)
+            continue
+        if {key: value for key, value in current.items() if key != "choices"} != \
+                {key: value for key, value in previous.items() if key != "choices"}:
+            upserted.append(node)
+        if current["choices"] != previous["choices"]:
+            relinked.append(node.id)
+
+    remaining = {node.id for node in tree.nodes}
+    return TreeChanges(upserted, [node_id for node_id in before if node_id not in remaining], relinked, new)
+
+
+class TreeBatch:
+    """
+    Applies operations in order against one StoryGraph
+
+    Nodes added by the batch can be named with `ref`; later operations may
+    use that ref wherever a node ID is expected.
+    """
+
+    def __init__(self, tree: StoryTree):
+        self.graph = StoryGraph(tree)
+        self.refs: Dict[str, str] = {}
+
+    def apply(self, operations: List[TreeOperation]) -> List[Dict[str, Any]]:
+        """
+        Apply every operation
+
+        Returns:
+            One result per operation ({"op", "nodeId"} plus "ref" for adds)
+
+        Raises:
+            TreeBatchError: If an operation is invalid; the tree may be partly
+                edited, so the caller must discard it
+        """
+        results = []
+        for index, operation in enumerate(operations):
+            handler = getattr(self, f"_{operation.op}")
+            try:
+                results.append(handler(operation))
+            except TreeBatchError as e:
+                raise TreeBatchError(str(e), index)
+
+        dangling = [
+            f"Choice '{choice.id}' in node '{node.id}' points to missing node '{choice.nextNodeId}'"
+            for node in self.graph.tree.nodes
+            for choice in node.choices
+            if choice.nextNodeId and choice.nextNodeId not in self.graph.nodes_by_id
+        ]
+        if dangling:
+            raise TreeBatchError("; ".join(dangling))
+        return results
+
+    def _resolve(self, node_id: Optional[str]) -> Optional[str]:
+        """Node ID for an ID or a ref of a node added earlier in the batch"""
+        return self.refs.get(node_id, node_id) if node_id else node_id
+
+    def _existing(self, node_id: Optional[str]) -> StoryNode:
+        node = self.graph.node(self._resolve(node_id)) if node_id else None
+        if node is None:
+            raise TreeBatchError(f"Node '{node_id}' not found")
+        return node
+
+    def _choices(self, choices: List[Choice]) -> List[Choice]:
+        """Copy choices with refs resolved and missing IDs filled in"""
+        return [
+            choice.model_copy(update={
+                "id": choice.id or str(uuid.uuid4()),
+                "nextNodeId": self._resolve(choice.nextNodeId)
+            })
+            for choice in choices
+        ]
+
+    # ========================================================================
+    # Operations
+    # ========================================================================
+
+    def _add(self, operation: TreeOperation) -> Dict[str, Any]:
+        missing = [name for name in ("title", "text", "location", "type") if getattr(operation, name) is None]
+        if missing:
+            raise TreeBatchError(f"add requires {', '.join(missing)}")
+        if operation.ref and operation.ref in self.refs:
+            raise TreeBatchError(f"Ref '{operation.ref}' is already used")
+
+        parent = self._existing(operation.parentNodeId) if operation.parentNodeId else None
+        if parent and operation.choiceId and operation.choiceId not in {choice.id for choice in parent.choices}:
+            raise TreeBatchError(f"Choice '{operation.choiceId}' not found in node '{parent.id}'")
+
+        node = StoryNode(
+            id=str(uuid.uuid4()),
+            sceneNumber=max((other.sceneNumber for other in self.graph.tree.nodes), default=0) + 1,
+            title=operation.title,
+            text=operation.text,
+            location=operation.location,
+            type=operation.type,
+            choices=[]
+        )
+        if operation.ref:
+            self.refs[operation.ref] = node.id
+        node.choices = self._choices(operation.choices or [])
+        self.graph.add_node(node, parent_node_id=parent.id if parent else None, choice_id=operation.choiceId)
+
+        result = {"op": "add", "nodeId": node.id}
+        if operation.ref:
+            result["ref"] = operation.ref
+        return result
+
+    def _update(self, operation: TreeOperation) -> Dict[str, Any]:
+        node = self._existing(operation.nodeId)
+        for name in ("title", "text", "location", "type"):
+            value = getattr(operation, name)
+            if value is not None:
+                setattr(node, name, value)
+        if operation.choices is not None:
+            self.graph.set_choices(node.id, self._choices(operation.choices))
+        return {"op": "update", "nodeId": node.id}
+
+    def _delete(self, operation: TreeOperation) -> Dict[str, Any]:
+        node = self._existing(operation.nodeId)
+        self.graph.delete_node(node.id)
+        return {"op": "delete", "nodeId": node.id}
+
+    def _link(self, operation: TreeOperation) -> Dict[str, Any]:
+        node = self._existing(operation.nodeId)
+        choice = next((choice for choice in node.choices if choice.id == operation.choiceId), None)
+        if choice is None:
+            raise TreeBatchError(f"Choice '{operation.choiceId}' not found in node '{node.id}'")
+
+        target = self._existing(operation.nextNodeId).id if operation.nextNodeId else None
+        choice.nextNodeId = target
+        self.graph.set_choices(node.id, node.choices)
+        return {"op": "link", "nodeId": node.id, "choiceId": choice.id, "nextNodeId": target}
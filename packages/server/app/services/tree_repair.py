@@ -0,0 +1,122 @@
+"""
+Story Tree Repair
+Deterministic fixes for structural problems in generated story trees
+"""
+
+from typing import Any, Dict, List, Optional
+
+ENDING_NODE_TYPES = ("good_ending", "bad_ending")
+
+
+def _resolve_node_id(raw_id: Any, node_ids: Dict[str, str], scene_ids: Dict[int, str]) -> Optional[str]:
+    """
+    Resolve a possibly malformed node reference to an existing node ID
+
+    Args:
+        raw_id: Reference as produced by the model (e.g. "Node_3", " node_3", 3)
+        node_ids: Map of normalized node ID -> real node ID
+        scene_ids: Map of scene number -> real node ID
+
+    Returns:
+        The real node ID, or None if it cannot be resolved unambiguously
+    """
+    if raw_id is None:
+        return None
+
+    normalized = str(raw_id).strip().lower()
+    if normalized in node_ids:
+        return node_ids[normalized]
+
+    # Fall back to the scene number encoded in the reference ("node_3", "3")
+    digits = normalized.rsplit("_", 1)[-1]
+    if digits.isdigit():
+        return scene_ids.get(int(digits))
+
+    return None
+
+
+def repair_tree_structure(tree_data: Dict[str, Any]) -> List[str]:
+    """
+    Repair structural inconsistencies that can be derived from the choices
+
+    The choices are treated as the source of truth: ending nodes lose their
+    choices, choice IDs are made unique, dangling nextNodeIds are resolved
+    where the target is unambiguous, and the edge list is rebuilt from the
+    remaining choices. The tree is modified in place.
+
+    Args:
+        tree_data: Raw tree dictionary with "nodes" and "edges"
+
+    Returns:
+        List of human-readable descriptions of the repairs applied
+    """
+    repairs = []
+    nodes = tree_data.get("nodes") or []
+
+    node_ids = {}
+    scene_ids = {}
+    shared_scene_numbers = set()
+    for node in nodes:
+        if node.get("id") is None:
+            continue
+        node_ids[str(node["id"]).strip().lower()] = node["id"]
+        if isinstance(node.get("sceneNumber"), int):
+            if node["sceneNumber"] in scene_ids:
+                shared_scene_numbers.add(node["sceneNumber"])
+            scene_ids[node["sceneNumber"]] = node["id"]
+
+    # A scene number used by several nodes does not identify a target
+    for scene_number in shared_scene_numbers:
+        del scene_ids[scene_number]
+
+    real_ids = set(node_ids.values())
+    seen_choice_ids = set()
+    for node in nodes:
+        if not isinstance(node.get("choices"), list):
+            node["choices"] = []
+
+        # Ending nodes are terminal
+        if node.get("type") in ENDING_NODE_TYPES and node["choices"]:
+            repairs.append(f"Removed {len(node['choices'])} choice(s) from ending node '{node.get('id')}'")
+            node["choices"] = []
+            continue
+
+        for index, choice in enumerate(node["choices"], 1):
+            # Choice IDs must exist and be unique across the tree
+            choice_id = choice.get("id")
+            if not choice_id or choice_id in seen_choice_ids:
+                new_id = f"{node.get('id')}_choice_{index}"
+                while new_id in seen_choice_ids:
+                    new_id = f"{new_id}_dup"
+                repairs.append(f"Assigned choice ID '{new_id}' in node '{node.get('id')}' (was {choice_id!r})")
+                choice["id"] = new_id
+            seen_choice_ids.add(choice["id"])
+
+            # Dangling nextNodeId references
+            next_node_id = choice.get("nextNodeId")
+            if next_node_id is not None and next_node_id not in real_ids:
+                resolved = _resolve_node_id(next_node_id, node_ids, scene_ids)
+                if resolved:
+                    repairs.append(f"Resolved nextNodeId '{next_node_id}' -> '{resolved}' in choice '{choice['id']}'")
+                    choice["nextNodeId"] = resolved
+
+    # Rebuild edges from the choices
+    edges = [
+        {"from": node["id"], "to": choice["nextNodeId"], "choiceId": choice["id"]}
+        for node in nodes
+        for choice in node["choices"]
+        if choice.get("nextNodeId") is not None
+    ]
+    if _edge_keys(tree_data.get("edges") or []) != _edge_keys(edges):
+        repairs.append(f"Rebuilt edge list from choices ({len(tree_data.get('edges') or [])} -> {len(edges)} edges)")
+    tree_data["edges"] = edges
+
+    return repairs
+
+
+def _edge_keys(edges: List[Dict[str, Any]]) -> set:
+    """Comparable representation of an edge list"""
+    return {
+        (edge.get("from", edge.get("from_")), edge.get("to"), edge.get("choiceId"))
+        for edge in edges
+    }
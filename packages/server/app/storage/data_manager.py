@@ -63,6 +63,20 @@ class DataManager:
             data=data_update
         )
     
+    def save_job_checkpoint(
+        self,
+        job_id: str,
+        key: str,
+        checkpoint: Dict[str, Any],
+        progress: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Persist a step's partial results in the job data (status and step unchanged)"""
+        return self.json_storage.update_job(
+            job_id,
+            data={key: checkpoint},
+            progress=progress
+        )
+    
     def get_all_jobs(self) -> List[Dict[str, Any]]:
         """Get all jobs"""
         return self.json_storage.list_jobs()
@@ -10,7 +10,8 @@ import uuid
 from typing import Optional, Dict, Any, List
 from pathlib import Path
 from datetime import datetime
-import json
+
+from app import serialization
 
 
 class ImageStorage:
@@ -98,8 +99,7 @@ class ImageStorage:
         }
         
         # Save metadata
-        self.metadata[image_id] = metadata
-        self._save_metadata()
+        self._update_metadata({image_id: metadata})
         
         return metadata
     
@@ -137,8 +137,7 @@ class ImageStorage:
         }
         
         # Save metadata
-        self.metadata[image_id] = metadata
-        self._save_metadata()
+        self._update_metadata({image_id: metadata})
         
         return metadata
     
@@ -228,8 +227,7 @@ class ImageStorage:
             "created_at": datetime.now().isoformat()
         }
         
-        self.metadata[image_id] = reference
-        self._save_metadata()
+        self._update_metadata({image_id: reference})
         
         return reference
     
@@ -241,19 +239,34 @@ class ImageStorage:
         """Load image metadata from file"""
         if self.metadata_file.exists():
             try:
-                with open(self.metadata_file, 'r') as f:
-                    self.metadata = json.load(f)
-            except (json.JSONDecodeError, IOError):
+                self.metadata = serialization.load_file(self.metadata_file)
+            except (ValueError, IOError):
                 self.metadata = {}
         else:
             self.metadata = {}
     
-    def _save_metadata(self) -> None:
-        """Save image metadata to file"""
+    def _update_metadata(self, changes: Dict[str, Optional[Dict[str, Any]]]) -> None:
+        """
+        Apply metadata changes to the file and reload it
+        
+        The file is re-read under its lock, so records written by other
+        processes since this one loaded it are kept.
+        
+        Args:
+            changes: Image ID -> new record, or None to remove it
+        """
+        def update(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            metadata = current or {}
+            for image_id, record in changes.items():
+                if record is None:
+                    metadata.pop(image_id, None)
+                else:
+                    metadata[image_id] = record
+            return metadata
+        
         try:
-            with open(self.metadata_file, 'w') as f:
-                json.dump(self.metadata, f, indent=2)
-        except IOError as e:
+            self.metadata = serialization.update_file(self.metadata_file, update)
+        except (ValueError, IOError) as e:
             print(f"Error saving image metadata: {str(e)}")
     
     def get_all_metadata(self) -> Dict[str, Any]:
@@ -288,8 +301,7 @@ class ImageStorage:
                 pass
         
         # Remove metadata
-        del self.metadata[image_id]
-        self._save_metadata()
+        self._update_metadata({image_id: None})
         
         return True
     
@@ -4,13 +4,14 @@ Manages persistent data storage using JSON files
 Designed to be easily migrated to Supabase
 """
 
-import json
 import os
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 from datetime import datetime
 import uuid
 
+from app import serialization
+
 
 class JSONStorage:
     """Handle JSON-based data storage"""
@@ -58,8 +59,7 @@ class JSONStorage:
         }
         
         job_file = self.jobs_path / f"{job_id}.json"
-        with open(job_file, 'w') as f:
-            json.dump(job_data, f, indent=2)
+        serialization.dump_file(job_data, job_file)
         
         return job_data
     
@@ -79,9 +79,8 @@ class JSONStorage:
             return None
         
         try:
-            with open(job_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
+            return serialization.load_file(job_file)
+        except (ValueError, IOError):
             return None
     
     def update_job(
@@ -107,28 +106,31 @@ class JSONStorage:
         Returns:
             Updated job data or None
         """
-        job = self.get_job(job_id)
-        if not job:
-            return None
-        
-        if status:
-            job["status"] = status
-        if step:
-            job["step"] = step
-        if data:
-            job["data"].update(data)
-        if error:
-            job["error"] = error
-        if progress is not None:
-            job["progress"] = progress
-        
-        job["updated_at"] = datetime.now().isoformat()
+        def update(job: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if not job:
+                return None
+            
+            if status:
+                job["status"] = status
+            if step:
+                job["step"] = step
+            if data:
+                job["data"].update(data)
+            if error:
+                job["error"] = error
+            if progress is not None:
+                job["progress"] = progress
+            
+            job["updated_at"] = datetime.now().isoformat()
+            return job
         
+        # Locked read-modify-write, so concurrent updates (also from other
+        # worker processes) are not lost
         job_file = self.jobs_path / f"{job_id}.json"
-        with open(job_file, 'w') as f:
-            json.dump(job, f, indent=2)
-        
-        return job
+        try:
+            return serialization.update_file(job_file, update)
+        except ValueError:
+            return None
     
     def list_jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -144,11 +146,10 @@ class JSONStorage:
         
         for job_file in self.jobs_path.glob("*.json"):
             try:
-                with open(job_file, 'r') as f:
-                    job = json.load(f)
-                    if status is None or job.get("status") == status:
-                        jobs.append(job)
-            except (json.JSONDecodeError, IOError):
+                job = serialization.load_file(job_file)
+                if status is None or job.get("status") == status:
+                    jobs.append(job)
+            except (ValueError, IOError):
                 continue
         
         return jobs
@@ -181,8 +182,7 @@ class JSONStorage:
         }
         
         comic_file = self.comics_path / f"{comic_id}.json"
-        with open(comic_file, 'w') as f:
-            json.dump(comic_record, f, indent=2)
+        serialization.dump_file(comic_record, comic_file)
         
         return comic_record
     
@@ -202,9 +202,8 @@ class JSONStorage:
             return None
         
         try:
-            with open(comic_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
+            return serialization.load_file(comic_file)
+        except (ValueError, IOError):
             return None
     
     def list_comics(self) -> List[Dict[str, Any]]:
@@ -218,10 +217,9 @@ class JSONStorage:
         
         for comic_file in self.comics_path.glob("*.json"):
             try:
-                with open(comic_file, 'r') as f:
-                    comic = json.load(f)
-                    comics.append(comic)
-            except (json.JSONDecodeError, IOError):
+                comic = serialization.load_file(comic_file)
+                comics.append(comic)
+            except (ValueError, IOError):
                 continue
         
         return comics
@@ -3,13 +3,24 @@ Story Data Manager
 Handles data storage and retrieval for story-based system
 """
 
-import json
 import os
 import uuid
-from typing import Dict, List, Any, Optional
+from urllib.parse import quote
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 
+from pydantic import BaseModel
+
+from app import file_store, serialization
 from app.models.schemas import Story, StoryStatus
+from app.pagination import (SORT_DIRECTIONS, KeysetIndex, decode_cursor,
+                            encode_cursor, normalize_sort)
+from app.services.story_stats import StoryStatsRollup
+from app.services.story_versions import StoryVersionConflict
+from app.services.tree_batch import TreeChanges
+
+# Summary keys returned as story list items
+LIST_ITEM_KEYS = ("id", "title", "lesson", "coverImage", "status", "createdAt", "sceneCount", "readCount", "lastReadAt")
 
 
 class StoryDataManager:
@@ -28,9 +39,16 @@ class StoryDataManager:
         self.reading_path = os.path.join(data_path, "reading")
         self.jobs_path = os.path.join(data_path, "jobs")
         self.share_path = os.path.join(data_path, "share")
+        self.journals_path = os.path.join(data_path, "journals")
+        self.summaries_file = os.path.join(data_path, "story_summaries.json")
         
         # Create directories if they don't exist
         self._ensure_directories()
+        
+        # Story summaries (loaded lazily) and keyset indexes per (sort, status)
+        self._library: Optional[Dict[str, Dict[str, Any]]] = None
+        self._library_stamp: Optional[Tuple[int, int, int]] = None
+        self._keyset_indexes: Dict[Tuple[str, Optional[str]], KeysetIndex] = {}
     
     def _ensure_directories(self):
         """Ensure all required directories exist"""
@@ -42,7 +60,8 @@ class StoryDataManager:
             self.scenes_path,
             self.reading_path,
             self.jobs_path,
-            self.share_path
+            self.share_path,
+            self.journals_path
         ]
         
         for directory in directories:
@@ -52,21 +71,70 @@ class StoryDataManager:
     # Story Management
     # ========================================================================
     
-    def save_story(self, story: Story):
-        """Save a story to storage"""
+    def save_story_tree_changes(self, story: Story, changes: TreeChanges, expected_version: Optional[int] = None) -> None:
+        """
+        Persist a tree edit (the story file is always written whole)
+        
+        Only the tree and updatedAt are taken from `story`, so a partial Story
+        rebuilt from the edit journal can be saved too.
+        """
+        story_file = os.path.join(self.stories_path, f"{story.id}.json")
+        with file_store.locked(story_file):
+            stored = self.get_story(story.id)
+            if stored is None:
+                self.save_story(story, expected_version=expected_version)
+                return
+            stored.tree = story.tree
+            stored.updatedAt = story.updatedAt
+            self.save_story(stored, expected_version=expected_version)
+            story.version = stored.version
+    
+    def save_story(self, story: Story, expected_version: Optional[int] = None):
+        """
+        Save a story to storage
+        
+        Args:
+            story: Story to save (its version is set to the new version)
+            expected_version: Only save if the stored story is at this version
+        
+        Raises:
+            StoryVersionConflict: If expected_version is outdated
+        """
         story_file = os.path.join(self.stories_path, f"{story.id}.json")
-        with open(story_file, 'w') as f:
-            json.dump(story.model_dump(), f, indent=2, default=str)
+        # The file lock serializes the version check and write across threads and worker processes
+        with file_store.locked(story_file):
+            current = self.get_story_version(story.id)
+            if expected_version is not None and current != expected_version:
+                raise StoryVersionConflict(story.id, expected_version, current)
+            story.version = (current or 0) + 1
+            serialization.dump_file(story, story_file)
+        
+        self._update_library(story.id, lambda previous: self._library_entry(story, previous))
+    
+    def get_story_version(self, story_id: str) -> Optional[int]:
+        """Current version of a story (None if it does not exist)"""
+        story_file = os.path.join(self.stories_path, f"{story_id}.json")
+        if not os.path.exists(story_file):
+            return None
+        try:
+            return serialization.load_file(story_file).get("version", 0)
+        except ValueError:
+            return 0
     
-    def get_story(self, story_id: str) -> Optional[Story]:
-        """Get a story by ID"""
+    def get_story(self, story_id: str, fields: Optional[Set[str]] = None) -> Optional[Story]:
+        """
+        Get a story by ID
+        
+        Args:
+            fields: Accepted for interface parity with SupabaseDataManager; the
+                story file is read whole, so the full story is returned
+        """
         story_file = os.path.join(self.stories_path, f"{story_id}.json")
         if not os.path.exists(story_file):
             return None
         
         try:
-            with open(story_file, 'r') as f:
-                story_data = json.load(f)
+            story_data = serialization.load_file(story_file)
             
             # Convert datetime strings to datetime objects
             if 'createdAt' in story_data:
@@ -81,7 +149,7 @@ class StoryDataManager:
                         edge['from'] = edge.pop('from_')
             
             return Story(**story_data)
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
+        except (KeyError, ValueError) as e:
             print(f"Error parsing story {story_id}: {e}")
             return None
     
@@ -115,31 +183,206 @@ class StoryDataManager:
         """Get completed stories for child mode"""
         return self.get_stories_list(limit, offset, "completed")
     
-    def get_all_stories(self, limit: int, offset: int, status: Optional[str] = None, sort_by: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get all stories with detailed information"""
-        return self.get_stories_list(limit, offset, status)
+    def get_all_stories(
+        self,
+        limit: int,
+        offset: int,
+        status: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        fields: Optional[Set[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all stories with detailed information
+        
+        Args:
+            fields: List item fields to return (None for all)
+        """
+        stories = self.get_stories_list(limit, offset, status)
+        if fields is None:
+            return stories
+        return [
+            {key: value for key, value in story.items() if key in fields or key == "id"}
+            for story in stories
+        ]
     
     def get_stories_count(self, status: Optional[str] = None) -> int:
         """Get total count of stories"""
-        story_files = [f for f in os.listdir(self.stories_path) if f.endswith('.json')]
-        
+        library = self._get_library()
         if status is None:
-            return len(story_files)
+            return len(library)
+        return sum(1 for entry in library.values() if entry["status"] == status)
+    
+    def get_stories_page(
+        self,
+        limit: int,
+        status: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Set[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one keyset page of stories
         
-        count = 0
-        for story_file in story_files:
-            story_id = story_file[:-5]
-            story = self.get_story(story_id)
-            if story and story.status.value == status:
-                count += 1
+        Args:
+            limit: Page size
+            status: Optional status filter
+            sort_by: "recent", "title" or "readCount"
+            cursor: Token from a previous page's nextCursor
+            fields: List item fields to return (None for all)
+            
+        Returns:
+            (stories, cursor for the next page or None on the last page)
+        
+        Raises:
+            ValueError: If the cursor is invalid for this sort/status
+        """
+        sort = normalize_sort(sort_by)
+        after = decode_cursor(cursor, sort, status) if cursor else None
+        
+        index = self._keyset_indexes.get((sort, status))
+        if index is None:
+            index = KeysetIndex(
+                (self._sort_key(entry, sort), story_id)
+                for story_id, entry in self._get_library().items()
+                if status is None or entry["status"] == status
+            )
+            self._keyset_indexes[(sort, status)] = index
+        
+        page_ids, has_more = index.page(after, limit, SORT_DIRECTIONS[sort])
+        
+        stories = []
+        for story_id in page_ids:
+            entry = self._library[story_id]
+            stories.append({
+                key: entry[key] for key in LIST_ITEM_KEYS
+                if fields is None or key in fields or key == "id"
+            })
+        
+        next_cursor = None
+        if has_more and page_ids:
+            last = self._library[page_ids[-1]]
+            next_cursor = encode_cursor(sort, status, (self._sort_key(last, sort), last["id"]))
+        return stories, next_cursor
+    
+    def _sort_key(self, entry: Dict[str, Any], sort: str) -> Any:
+        """Keyset sort value of a library entry"""
+        if sort == "title":
+            return entry["title"] or ""
+        if sort == "readCount":
+            return entry["readCount"]
+        return entry["updatedAt"]
+    
+    # ========================================================================
+    # Story Summaries
+    # ========================================================================
+    
+    def _get_library(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summary of every stored story (story_summaries.json)
+        
+        Built from the story files the first time and kept current by
+        save_story, delete_story, record_reading_completion and
+        save_scene_image_versions. Reloaded when another worker process
+        has rewritten the file.
+        """
+        stamp = self._summaries_stamp()
+        if self._library is None or stamp != self._library_stamp:
+            library = None
+            if stamp is not None:
+                try:
+                    library = serialization.load_file(self.summaries_file)
+                except ValueError as e:
+                    print(f"Error loading story summaries, rebuilding: {e}")
+            
+            if library is None:
+                library = {}
+                for story_file in os.listdir(self.stories_path):
+                    if not story_file.endswith('.json'):
+                        continue
+                    story = self.get_story(story_file[:-5])
+                    if story:
+                        library[story.id] = self._library_entry(story)
+                self._library = library
+                self._save_library()
+            else:
+                self._library = library
+                self._library_stamp = stamp
+                self._keyset_indexes.clear()
+        return self._library
+    
+    def _summaries_stamp(self) -> Optional[Tuple[int, int, int]]:
+        """(inode, mtime, size) of the summaries file; every atomic rewrite is a new inode"""
+        try:
+            stat = os.stat(self.summaries_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _save_library(self):
+        """Persist the summaries and drop the keyset indexes built from them"""
+        serialization.dump_file(self._library, self.summaries_file)
+        self._library_stamp = self._summaries_stamp()
+        self._keyset_indexes.clear()
+    
+    def _update_library(self, story_id: str, change: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]):
+        """
+        Change one story's summary (locked read-modify-write of the file)
+        
+        Args:
+            change: Gets a copy of the current summary (None if missing) and
+                returns the new one, or None to remove it
+        """
+        with file_store.locked(self.summaries_file):
+            library = self._get_library()
+            previous = library.get(story_id)
+            entry = change(dict(previous) if previous else None)
+            if entry == previous:
+                return
+            if entry is None:
+                del library[story_id]
+            else:
+                library[story_id] = entry
+            self._save_library()
+    
+    def _library_entry(self, story: Story, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Summary of a story (reads and cover carry over from the previous summary)"""
+        start_node = next((node for node in story.tree.nodes if node.type.value == "start"), None)
+        if start_node is None and story.tree.nodes:
+            start_node = story.tree.nodes[0]
+        
+        if previous:
+            read_count, last_read_at = previous["readCount"], previous["lastReadAt"]
+            cover_image = previous["coverImage"]
+        else:
+            read_count, last_read_at = self.get_story_read_count(story.id) or 0, self.get_last_read_time(story.id)
+            cover_image = None
+            if start_node:
+                versions = self.get_scene_image_versions(story.id, start_node.id)
+                cover_image = _current_image(versions) if versions else None
         
-        return count
+        return {
+            "id": story.id,
+            "title": story.title or f"{story.lesson} Story",
+            "lesson": story.lesson,
+            "coverImage": cover_image,
+            "status": story.status.value,
+            "createdAt": story.createdAt.isoformat(),
+            "updatedAt": story.updatedAt.isoformat(),
+            "sceneCount": len(story.tree.nodes),
+            "readCount": read_count,
+            "lastReadAt": last_read_at.isoformat() if isinstance(last_read_at, datetime) else last_read_at,
+            "startNodeId": start_node.id if start_node else None
+        }
     
     def delete_story(self, story_id: str) -> bool:
         """Delete a story"""
         story_file = os.path.join(self.stories_path, f"{story_id}.json")
         if os.path.exists(story_file):
             os.remove(story_file)
+            journal_file = os.path.join(self.journals_path, f"{story_id}.jsonl")
+            if os.path.exists(journal_file):
+                os.remove(journal_file)
+            self._update_library(story_id, lambda previous: None)
             return True
         return False
     
@@ -148,10 +391,9 @@ class StoryDataManager:
         reading_file = os.path.join(self.reading_path, f"{story_id}_completions.json")
         if os.path.exists(reading_file):
             try:
-                with open(reading_file, 'r') as f:
-                    completions = json.load(f)
+                completions = serialization.load_file(reading_file)
                 return len(completions)
-            except (json.JSONDecodeError, KeyError):
+            except (ValueError, KeyError):
                 pass
         return 0
     
@@ -160,16 +402,49 @@ class StoryDataManager:
         reading_file = os.path.join(self.reading_path, f"{story_id}_completions.json")
         if os.path.exists(reading_file):
             try:
-                with open(reading_file, 'r') as f:
-                    completions = json.load(f)
+                completions = serialization.load_file(reading_file)
                 if completions:
                     # Get the most recent completion
                     latest = max(completions, key=lambda x: x.get('completedAt', ''))
                     return datetime.fromisoformat(latest['completedAt'])
-            except (json.JSONDecodeError, KeyError, ValueError):
+            except (KeyError, ValueError):
                 pass
         return None
     
+    # ========================================================================
+    # Edit Journal
+    # ========================================================================
+    
+    def append_story_edits(self, story_id: str, entries: List[Dict[str, Any]]):
+        """Append edit journal entries (one JSON line each)"""
+        journal_file = os.path.join(self.journals_path, f"{story_id}.jsonl")
+        file_store.append_bytes(journal_file, b"".join(serialization.dumps(entry) + b"\n" for entry in entries))
+    
+    def _read_story_edits(self, story_id: str) -> List[Dict[str, Any]]:
+        journal_file = os.path.join(self.journals_path, f"{story_id}.jsonl")
+        if not os.path.exists(journal_file):
+            return []
+        with open(journal_file, "rb") as f:
+            # A line without its newline is an append still in progress
+            entries = [serialization.loads(line) for line in f if line.endswith(b"\n") and line.strip()]
+        return sorted(entries, key=lambda entry: (entry["version"], entry["kind"]))
+    
+    def get_story_edits(self, story_id: str, after_version: int = 0) -> List[Dict[str, Any]]:
+        """Journal entries after a version, oldest first (a version's delta before its snapshot)"""
+        return [entry for entry in self._read_story_edits(story_id) if entry["version"] > after_version]
+    
+    def get_story_edit_snapshot(self, story_id: str) -> Optional[Dict[str, Any]]:
+        """Latest journaled snapshot of a story"""
+        snapshots = [entry for entry in self._read_story_edits(story_id) if entry["kind"] == "snapshot"]
+        return snapshots[-1] if snapshots else None
+    
+    def get_story_edit(self, story_id: str, version: int) -> Optional[Dict[str, Any]]:
+        """Delta journaled for a story version"""
+        for entry in self._read_story_edits(story_id):
+            if entry["kind"] == "delta" and entry["version"] == version:
+                return entry
+        return None
+    
     # ========================================================================
     # Character Management
     # ========================================================================
@@ -182,8 +457,7 @@ class StoryDataManager:
     def save_preset_characters(self, characters: List[Dict[str, Any]]):
         """Save preset characters"""
         preset_file = os.path.join(self.characters_path, "preset_characters.json")
-        with open(preset_file, 'w') as f:
-            json.dump(characters, f, indent=2)
+        serialization.dump_file(characters, preset_file)
     
     def get_preset_characters(self) -> List[Dict[str, Any]]:
         """Get preset characters"""
@@ -192,16 +466,14 @@ class StoryDataManager:
             return []
         
         try:
-            with open(preset_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, KeyError):
+            return serialization.load_file(preset_file)
+        except (ValueError, KeyError):
             return []
     
     def save_character_assignments(self, story_id: str, assignments: List[Dict[str, Any]]):
         """Save character assignments for a story"""
         assignments_file = os.path.join(self.characters_path, f"{story_id}_assignments.json")
-        with open(assignments_file, 'w') as f:
-            json.dump(assignments, f, indent=2, default=str)
+        serialization.dump_file(assignments, assignments_file)
     
     def get_character_assignments(self, story_id: str) -> Optional[List[Dict[str, Any]]]:
         """Get character assignments for a story"""
@@ -210,9 +482,8 @@ class StoryDataManager:
             return None
         
         try:
-            with open(assignments_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, KeyError):
+            return serialization.load_file(assignments_file)
+        except (ValueError, KeyError):
             return None
     
     # ========================================================================
@@ -222,8 +493,7 @@ class StoryDataManager:
     def save_story_backgrounds(self, story_id: str, backgrounds: List[Dict[str, Any]]):
         """Save backgrounds for a story"""
         backgrounds_file = os.path.join(self.backgrounds_path, f"{story_id}_backgrounds.json")
-        with open(backgrounds_file, 'w') as f:
-            json.dump(backgrounds, f, indent=2, default=str)
+        serialization.dump_file(backgrounds, backgrounds_file)
     
     def get_story_backgrounds(self, story_id: str) -> Optional[List[Dict[str, Any]]]:
         """Get backgrounds for a story"""
@@ -232,9 +502,8 @@ class StoryDataManager:
             return None
         
         try:
-            with open(backgrounds_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, KeyError):
+            return serialization.load_file(backgrounds_file)
+        except (ValueError, KeyError):
             return None
     
     def create_background_generation_job(self, story_id: str, job_id: str, backgrounds: List[Dict[str, str]]):
@@ -250,8 +519,7 @@ class StoryDataManager:
         }
         
         job_file = os.path.join(self.jobs_path, f"{job_id}.json")
-        with open(job_file, 'w') as f:
-            json.dump(job_data, f, indent=2)
+        serialization.dump_file(job_data, job_file)
     
     def get_background_generation_status(self, story_id: str, job_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get background generation status"""
@@ -259,10 +527,9 @@ class StoryDataManager:
             job_file = os.path.join(self.jobs_path, f"{job_id}.json")
             if os.path.exists(job_file):
                 try:
-                    with open(job_file, 'r') as f:
-                        job_data = json.load(f)
+                    job_data = serialization.load_file(job_file)
                     return job_data
-                except (json.JSONDecodeError, KeyError):
+                except (ValueError, KeyError):
                     pass
         
         # Return mock status for now
@@ -299,8 +566,7 @@ class StoryDataManager:
         }
         
         job_file = os.path.join(self.jobs_path, f"{job_id}.json")
-        with open(job_file, 'w') as f:
-            json.dump(job_data, f, indent=2)
+        serialization.dump_file(job_data, job_file)
     
     def get_scene_generation_status(self, story_id: str, job_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get scene generation status"""
@@ -308,10 +574,9 @@ class StoryDataManager:
             job_file = os.path.join(self.jobs_path, f"{job_id}.json")
             if os.path.exists(job_file):
                 try:
-                    with open(job_file, 'r') as f:
-                        job_data = json.load(f)
+                    job_data = serialization.load_file(job_file)
                     return job_data
-                except (json.JSONDecodeError, KeyError):
+                except (ValueError, KeyError):
                     pass
         
         # Return mock status for now
@@ -345,14 +610,20 @@ class StoryDataManager:
         }
         
         job_file = os.path.join(self.jobs_path, f"{job_id}.json")
-        with open(job_file, 'w') as f:
-            json.dump(job_data, f, indent=2)
+        serialization.dump_file(job_data, job_file)
     
     def save_scene_image_versions(self, story_id: str, scene_id: str, versions: Dict[str, Any]):
         """Save scene image versions"""
         versions_file = os.path.join(self.scenes_path, f"{story_id}_{scene_id}_versions.json")
-        with open(versions_file, 'w') as f:
-            json.dump(versions, f, indent=2)
+        serialization.dump_file(versions, versions_file)
+        
+        # The start scene's current image is the story's cover
+        def set_cover(summary: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if summary and summary["startNodeId"] == scene_id:
+                summary["coverImage"] = _current_image(versions)
+            return summary
+        
+        self._update_library(story_id, set_cover)
     
     def get_scene_image_versions(self, story_id: str, scene_id: str) -> Optional[Dict[str, Any]]:
         """Get scene image versions"""
@@ -361,59 +632,84 @@ class StoryDataManager:
             return None
         
         try:
-            with open(versions_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, KeyError):
+            return serialization.load_file(versions_file)
+        except (ValueError, KeyError):
             return None
     
     # ========================================================================
     # Reading Progress Management
     # ========================================================================
     
-    def save_reading_progress(self, story_id: str, progress: Dict[str, Any]):
-        """Save reading progress"""
-        progress_file = os.path.join(self.reading_path, f"{story_id}_progress.json")
-        with open(progress_file, 'w') as f:
-            json.dump(progress.model_dump(), f, indent=2, default=str)
-    
-    def get_reading_progress(self, story_id: str) -> Optional[Dict[str, Any]]:
-        """Get reading progress"""
-        progress_file = os.path.join(self.reading_path, f"{story_id}_progress.json")
-        if not os.path.exists(progress_file):
-            return None
+    def save_reading_progress(self, story_id: str, reader_id: str, progress: Dict[str, Any]):
+        """Save a reader's progress and roll up the visits and choices it adds"""
+        progress = _as_dict(progress)
+        progress_file = self._progress_file(story_id, reader_id)
+        with file_store.locked(progress_file):
+            previous = self.get_reading_progress(story_id, reader_id)
+            serialization.dump_file(progress, progress_file)
+            self._update_stats_rollup(story_id, lambda rollup: rollup.add_progress(previous, progress))
+    
+    def get_reading_progress(self, story_id: str, reader_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get reading progress
         
-        try:
-            with open(progress_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, KeyError):
+        Args:
+            story_id: Story ID
+            reader_id: Reader to get progress for, or None for the story's
+                most recently read progress
+        """
+        if reader_id is not None:
+            progress_files = [self._progress_file(story_id, reader_id)]
+        else:
+            prefix = f"{story_id}_progress"
+            progress_files = [
+                os.path.join(self.reading_path, name) for name in os.listdir(self.reading_path)
+                if name == f"{prefix}.json" or (name.startswith(f"{prefix}_") and name.endswith(".json"))
+            ]
+        
+        saved = []
+        for progress_file in progress_files:
+            if not os.path.exists(progress_file):
+                continue
+            try:
+                saved.append(serialization.load_file(progress_file))
+            except (ValueError, KeyError):
+                continue
+        if not saved:
             return None
+        return max(saved, key=lambda progress: str(progress.get("lastReadAt") or ""))
+    
+    def _progress_file(self, story_id: str, reader_id: str) -> str:
+        """Progress file of one reader (reader IDs come from clients, so they are escaped)"""
+        return os.path.join(self.reading_path, f"{story_id}_progress_{quote(reader_id, safe='')}.json")
     
     def record_reading_completion(self, story_id: str, completion_data: Dict[str, Any]):
         """Record reading completion"""
         completions_file = os.path.join(self.reading_path, f"{story_id}_completions.json")
         
-        completions = []
-        if os.path.exists(completions_file):
-            try:
-                with open(completions_file, 'r') as f:
-                    completions = json.load(f)
-            except (json.JSONDecodeError, KeyError):
-                completions = []
-        
+        completion_data = _as_dict(completion_data)
         completion_record = {
             "completionId": str(uuid.uuid4()),
             "storyId": story_id,
-            "endingNodeId": completion_data.endingNodeId,
-            "endingType": completion_data.endingType.value,
-            "totalNodesVisited": completion_data.totalNodesVisited,
-            "readingTimeSeconds": completion_data.readingTimeSeconds,
+            "readerId": completion_data.get("readerId"),
+            "endingNodeId": completion_data["endingNodeId"],
+            "endingType": completion_data["endingType"],
+            "totalNodesVisited": completion_data["totalNodesVisited"],
+            "readingTimeSeconds": completion_data["readingTimeSeconds"],
             "completedAt": datetime.now().isoformat()
         }
         
-        completions.append(completion_record)
+        completions = serialization.update_file(completions_file, lambda current: (current or []) + [completion_record])
+        
+        def count_read(summary: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if summary:
+                summary["readCount"] = len(completions)
+                summary["lastReadAt"] = completion_record["completedAt"]
+            return summary
         
-        with open(completions_file, 'w') as f:
-            json.dump(completions, f, indent=2)
+        self._update_library(story_id, count_read)
+        
+        self._update_stats_rollup(story_id, lambda rollup: rollup.add_completion(completion_data))
     
     # ========================================================================
     # Share Link Management
@@ -429,8 +725,7 @@ class StoryDataManager:
         }
         
         share_file = os.path.join(self.share_path, f"{short_code}.json")
-        with open(share_file, 'w') as f:
-            json.dump(share_data, f, indent=2)
+        serialization.dump_file(share_data, share_file)
     
     def get_share_link(self, short_code: str) -> Optional[Dict[str, Any]]:
         """Get share link by short code"""
@@ -439,67 +734,51 @@ class StoryDataManager:
             return None
         
         try:
-            with open(share_file, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, KeyError):
+            return serialization.load_file(share_file)
+        except (ValueError, KeyError):
             return None
     
     # ========================================================================
     # Statistics
     # ========================================================================
     
-    def get_story_statistics(self, story_id: str) -> Optional[Dict[str, Any]]:
-        """Get story statistics"""
-        # Get reading completions
-        completions_file = os.path.join(self.reading_path, f"{story_id}_completions.json")
-        completions = []
-        if os.path.exists(completions_file):
+    def get_story_statistics(self, story_id: str, ending_ids: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Get story statistics from the rollup file"""
+        return self._get_stats_rollup(story_id).statistics(story_id, ending_ids=ending_ids)
+    
+    def get_choice_counts(self, story_id: str) -> Dict[str, Dict[str, int]]:
+        """How often each choice was taken: node ID -> choice ID -> count"""
+        return self._get_stats_rollup(story_id).choice_counts
+    
+    def _get_stats_rollup(self, story_id: str) -> StoryStatsRollup:
+        """Load a story's statistics rollup (empty if it has never been read)"""
+        stats_file = os.path.join(self.reading_path, f"{story_id}_stats.json")
+        if os.path.exists(stats_file):
             try:
-                with open(completions_file, 'r') as f:
-                    completions = json.load(f)
-            except (json.JSONDecodeError, KeyError):
-                pass
-        
-        total_reads = len(completions)
-        unique_readers = len(set(completion.get('readerId', 'anonymous') for completion in completions))
-        
-        # Calculate average reading time
-        reading_times = [completion.get('readingTimeSeconds', 0) for completion in completions]
-        average_reading_time = sum(reading_times) / len(reading_times) if reading_times else 0
-        
-        # Mock choice distribution and most visited scenes
-        choice_distribution = [
-            {
-                "nodeId": "node_1",
-                "choices": [
-                    {
-                        "choiceId": "choice_1",
-                        "text": "Help a friend",
-                        "selectedCount": max(1, total_reads - 2)
-                    },
-                    {
-                        "choiceId": "choice_2",
-                        "text": "Ignore friend",
-                        "selectedCount": min(2, total_reads)
-                    }
-                ]
-            }
-        ]
-        
-        most_visited_scenes = [
-            {
-                "nodeId": "node_1",
-                "sceneNumber": 1,
-                "visitCount": total_reads
-            }
-        ]
-        
-        return {
-            "storyId": story_id,
-            "totalReads": total_reads,
-            "uniqueReaders": unique_readers,
-            "averageReadingTime": int(average_reading_time),
-            "completionRate": 75,  # Mock value
-            "choiceDistribution": choice_distribution,
-            "mostVisitedScenes": most_visited_scenes
-        }
+                return StoryStatsRollup(serialization.load_file(stats_file))
+            except ValueError as e:
+                print(f"Error loading statistics for story {story_id}: {e}")
+        return StoryStatsRollup()
+    
+    def _update_stats_rollup(self, story_id: str, apply: Callable[[StoryStatsRollup], None]):
+        """Apply a change to a story's statistics rollup (locked read-modify-write)"""
+        stats_file = os.path.join(self.reading_path, f"{story_id}_stats.json")
+        with file_store.locked(stats_file):
+            rollup = self._get_stats_rollup(story_id)
+            apply(rollup)
+            serialization.dump_file(rollup.to_dict(), stats_file)
+
+
+def _current_image(versions: Dict[str, Any]) -> Optional[str]:
+    """Image URL of the current version in a scene versions record"""
+    for version in versions.get("versions", []):
+        if version.get("versionId") == versions.get("currentVersionId"):
+            return version.get("imageUrl")
+    return None
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    """Request/progress model or dict as a plain dict"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return dict(value)
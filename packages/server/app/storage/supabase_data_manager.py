@@ -6,15 +6,58 @@ Handles data storage and retrieval using Supabase PostgreSQL database
 import os
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from dotenv import load_dotenv
+from pydantic import BaseModel
 from supabase import Client, create_client
 
 # Load environment variables from .env file
 load_dotenv('.env')
+import config
 from app.models.schemas import (CharacterRole, Choice, Location, Story,
                                 StoryEdge, StoryNode, StoryStatus, StoryTree)
+from app.pagination import (SORT_DIRECTIONS, decode_cursor, encode_cursor,
+                            normalize_sort)
+from app.services.story_stats import StoryStatsRollup
+from app.services.story_versions import StoryVersionConflict
+from app.services.tree_batch import TreeChanges
+
+# Story field -> stories column
+STORY_COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "lesson": "lesson",
+    "theme": "theme",
+    "storyFormat": "story_format",
+    "status": "status",
+    "createdAt": "created_at",
+    "updatedAt": "updated_at",
+    "version": "version",
+}
+
+# Columns every partial story load includes (cache headers, reading titles and If-Match need them)
+STORY_BASE_COLUMNS = {"id", "lesson", "status", "updated_at", "version"}
+
+# Keyset sort -> story_summaries column
+KEYSET_COLUMNS = {
+    "recent": "updated_at",
+    "title": "title",
+    "readCount": "read_count",
+}
+
+# Story list item field -> story_summaries columns it is built from
+SUMMARY_LIST_COLUMNS = {
+    "id": {"id"},
+    "title": {"title", "lesson"},
+    "lesson": {"lesson"},
+    "coverImage": {"cover_image"},
+    "status": {"status"},
+    "createdAt": {"created_at"},
+    "sceneCount": {"scene_count"},
+    "readCount": {"read_count"},
+    "lastReadAt": {"last_read_at"},
+}
 
 
 class SupabaseDataManager:
@@ -37,10 +80,20 @@ class SupabaseDataManager:
     # Story Management
     # ========================================================================
     
-    def save_story(self, story: Story):
-        """Save a story to Supabase"""
+    def save_story(self, story: Story, expected_version: Optional[int] = None):
+        """
+        Save a story to Supabase
+        
+        Args:
+            story: Story to save (its version is set to the new version)
+            expected_version: Only save if the stored story is at this version
+        
+        Raises:
+            StoryVersionConflict: If expected_version is outdated
+        """
+        base_version = self._check_version(story.id, expected_version)
         try:
-            # Save story
+            # Save story (an existing story keeps its version until the rows are written)
             story_data = {
                 "id": story.id,
                 "lesson": story.lesson,
@@ -51,6 +104,8 @@ class SupabaseDataManager:
                 "created_at": story.createdAt.isoformat(),
                 "updated_at": story.updatedAt.isoformat()
             }
+            if base_version is None:
+                story_data["version"] = 1
             
             result = self.supabase.table("stories").upsert(story_data).execute()
             
@@ -194,111 +249,313 @@ class SupabaseDataManager:
                     
                     self.supabase.table("background_scene_numbers").insert(bg_scene_data).execute()
             
+            # Keep the list summary in step (read_count and cover_image are left as they are)
+            self.supabase.table("story_summaries").upsert({
+                "id": story.id,
+                "title": story_data["title"],
+                "lesson": story.lesson,
+                "status": story.status.value,
+                "scene_count": len(story.tree.nodes),
+                "start_node_id": node_id_mapping.get(self._start_node_id(story)),
+                "created_at": story_data["created_at"],
+                "updated_at": story_data["updated_at"]
+            }).execute()
+            
         except Exception as e:
             raise Exception(f"Failed to save story to Supabase: {str(e)}")
+        
+        if base_version is None:
+            story.version = 1
+        else:
+            story.version = self._commit_version(story.id, base_version, expected_version, story.updatedAt.isoformat())
     
-    def get_story(self, story_id: str) -> Optional[Story]:
-        """Get a story by ID from Supabase"""
+    def save_story_tree_changes(self, story: Story, changes: TreeChanges, expected_version: Optional[int] = None) -> None:
+        """
+        Persist only the tree rows a batch edit touched
+        
+        Args:
+            story: Story after the edit (node and choice IDs are already UUIDs)
+            changes: TreeChanges from the batch (upserted nodes, deleted node
+                IDs, nodes whose choices changed)
+            expected_version: Only save if the stored story is at this version
+        
+        Raises:
+            StoryVersionConflict: If expected_version is outdated
+        """
+        base_version = self._check_version(story.id, expected_version)
+        if base_version is None:
+            raise StoryVersionConflict(story.id, expected_version, None)
         try:
+            now = datetime.now().isoformat()
+            relinked = set(changes.relinked_node_ids)
+            rewritten = list(relinked | set(changes.deleted_node_ids))
+            
+            # New rows go in before the rows they replace are deleted, so a
+            # failed request leaves stale extra rows, never nodes without choices
+            new_node_ids = set(changes.new_node_ids)
+            for is_new in (True, False):
+                node_rows = [
+                    {
+                        "id": node.id,
+                        "story_id": story.id,
+                        "scene_number": node.sceneNumber,
+                        "title": node.title,
+                        "text": node.text,
+                        "location": node.location,
+                        "type": node.type.value,
+                        "updated_at": now,
+                        **({"created_at": now} if is_new else {})
+                    }
+                    for node in changes.upserted_nodes if (node.id in new_node_ids) == is_new
+                ]
+                if node_rows:
+                    self.supabase.table("story_nodes").upsert(node_rows).execute()
+            
+            old_choice_ids, old_edge_ids = set(), set()
+            if rewritten:
+                old_choice_ids = {row["id"] for row in self.supabase.table("story_choices").select("id").in_("node_id", rewritten).execute().data}
+                old_edge_ids = {row["id"] for row in self.supabase.table("story_edges").select("id").eq("story_id", story.id).in_("from_node_id", rewritten).execute().data}
+            if changes.deleted_node_ids:
+                old_edge_ids |= {row["id"] for row in self.supabase.table("story_edges").select("id").eq("story_id", story.id).in_("to_node_id", changes.deleted_node_ids).execute().data}
+            
+            relinked_nodes = [node for node in story.tree.nodes if node.id in relinked]
+            new_choices = [(node, choice) for node in relinked_nodes for choice in node.choices]
+            for is_new in (True, False):
+                choice_rows = [
+                    {
+                        "id": choice.id,
+                        "node_id": node.id,
+                        "text": choice.text,
+                        "next_node_id": choice.nextNodeId,
+                        "is_correct": choice.isCorrect,
+                        **({"created_at": now} if is_new else {})
+                    }
+                    for node, choice in new_choices if (choice.id not in old_choice_ids) == is_new
+                ]
+                if choice_rows:
+                    self.supabase.table("story_choices").upsert(choice_rows).execute()
+            
+            edge_rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "story_id": story.id,
+                    "from_node_id": node.id,
+                    "to_node_id": choice.nextNodeId,
+                    "choice_id": choice.id,
+                    "created_at": now
+                }
+                for node, choice in new_choices if choice.nextNodeId
+            ]
+            if edge_rows:
+                self.supabase.table("story_edges").insert(edge_rows).execute()
+            
+            # Then drop what was replaced: edges before the choices they reference
+            stale_choice_ids = list(old_choice_ids - {choice.id for _, choice in new_choices})
+            if old_edge_ids:
+                self.supabase.table("story_edges").delete().in_("id", list(old_edge_ids)).execute()
+            if stale_choice_ids:
+                self.supabase.table("story_choices").delete().in_("id", stale_choice_ids).execute()
+            if changes.deleted_node_ids:
+                self.supabase.table("story_nodes").delete().in_("id", changes.deleted_node_ids).execute()
+            
+            self.supabase.table("story_summaries").update({
+                "scene_count": len(story.tree.nodes),
+                "start_node_id": self._start_node_id(story),
+                "updated_at": story.updatedAt.isoformat()
+            }).eq("id", story.id).execute()
+            
+        except Exception as e:
+            raise Exception(f"Failed to save story tree changes to Supabase: {str(e)}")
+        
+        story.version = self._commit_version(story.id, base_version, expected_version, story.updatedAt.isoformat())
+    
+    def get_story_version(self, story_id: str) -> Optional[int]:
+        """Current version of a story (None if it does not exist)"""
+        result = self.supabase.table("stories").select("version").eq("id", story_id).execute()
+        if not result.data:
+            return None
+        return result.data[0].get("version") or 0
+    
+    def _check_version(self, story_id: str, expected_version: Optional[int]) -> Optional[int]:
+        """
+        Read the version a save starts from, failing early on a stale edit
+        
+        Returns:
+            The stored version (0 for rows written before versions existed),
+            or None for a story that does not exist yet
+        
+        Raises:
+            StoryVersionConflict: If the story is not at expected_version
+        """
+        current = self.get_story_version(story_id)
+        if current is None:
+            if expected_version:
+                raise StoryVersionConflict(story_id, expected_version, None)
+            return None
+        if expected_version is not None and current != expected_version:
+            raise StoryVersionConflict(story_id, expected_version, current)
+        return current
+    
+    def _commit_version(self, story_id: str, base_version: int, expected_version: Optional[int], updated_at: str) -> int:
+        """
+        Move a story to its next version once its rows are written
+        
+        The compare-and-set on stories.version runs last, so readers never
+        see the new version before the rows behind it, and a save that fails
+        part way leaves the version where it was. A conditional save fails
+        if anyone committed since base_version; an unconditional save
+        retries on top of whatever version won.
+        
+        Returns:
+            The new version
+        
+        Raises:
+            StoryVersionConflict: If another save committed first
+        """
+        attempts = 1 if expected_version is not None else config.STORY_VERSION_CAS_ATTEMPTS
+        for _ in range(attempts):
+            query = self.supabase.table("stories").update({"version": base_version + 1, "updated_at": updated_at}).eq("id", story_id)
+            # Rows written before the version column existed hold NULL
+            query = query.eq("version", base_version) if base_version else query.or_("version.is.null,version.eq.0")
+            if query.execute().data:
+                return base_version + 1
+            
+            base_version = self.get_story_version(story_id)
+            if base_version is None:
+                break
+        
+        raise StoryVersionConflict(story_id, expected_version, self.get_story_version(story_id))
+    
+    def _start_node_id(self, story: Story) -> Optional[str]:
+        """ID of the story's start node (first node if none is marked)"""
+        for node in story.tree.nodes:
+            if node.type.value == "start":
+                return node.id
+        return story.tree.nodes[0].id if story.tree.nodes else None
+    
+    def get_story(self, story_id: str, fields: Optional[Set[str]] = None) -> Optional[Story]:
+        """
+        Get a story by ID from Supabase
+        
+        Args:
+            story_id: Story identifier
+            fields: Top-level Story fields the caller needs. Related tables
+                (tree, characters, locations) are only queried when requested,
+                and the result is an unvalidated partial Story. None loads everything.
+        """
+        try:
+            def wanted(name: str) -> bool:
+                return fields is None or name in fields
+            
             # Get story
-            story_result = self.supabase.table("stories").select("*").eq("id", story_id).execute()
+            if fields is None:
+                columns = "*"
+            else:
+                columns = ",".join(sorted(STORY_BASE_COLUMNS | {STORY_COLUMNS[name] for name in fields if name in STORY_COLUMNS}))
+            story_result = self.supabase.table("stories").select(columns).eq("id", story_id).execute()
             if not story_result.data:
                 return None
             
             story_data = story_result.data[0]
             
-            # Get story nodes
-            nodes_result = self.supabase.table("story_nodes").select("*").eq("story_id", story_id).order("scene_number").execute()
             nodes = []
-            
-            for node_data in nodes_result.data:
-                # Get choices for this node
-                choices_result = self.supabase.table("story_choices").select("*").eq("node_id", node_data["id"]).execute()
-                choices = []
-                
-                print(f"Loading node {node_data['id']}: Found {len(choices_result.data)} choices", flush=True)
+            edges = []
+            if wanted("tree"):
+                # Get story nodes
+                nodes_result = self.supabase.table("story_nodes").select("*").eq("story_id", story_id).order("scene_number").execute()
                 
-                for choice_data in choices_result.data:
-                    print(f"  Choice: {choice_data['text']} -> {choice_data['next_node_id']}", flush=True)
-                    choice = Choice(
-                        id=choice_data["id"],
-                        text=choice_data["text"],
-                        nextNodeId=choice_data["next_node_id"],
-                        isCorrect=choice_data["is_correct"]
+                for node_data in nodes_result.data:
+                    # Get choices for this node
+                    choices_result = self.supabase.table("story_choices").select("*").eq("node_id", node_data["id"]).execute()
+                    choices = []
+                    
+                    print(f"Loading node {node_data['id']}: Found {len(choices_result.data)} choices", flush=True)
+                    
+                    for choice_data in choices_result.data:
+                        print(f"  Choice: {choice_data['text']} -> {choice_data['next_node_id']}", flush=True)
+                        choice = Choice(
+                            id=choice_data["id"],
+                            text=choice_data["text"],
+                            nextNodeId=choice_data["next_node_id"],
+                            isCorrect=choice_data["is_correct"]
+                        )
+                        choices.append(choice)
+                    
+                    node = StoryNode(
+                        id=node_data["id"],
+                        sceneNumber=node_data["scene_number"],
+                        title=node_data["title"],
+                        text=node_data["text"],
+                        location=node_data["location"],
+                        type=node_data["type"],
+                        choices=choices
                     )
-                    choices.append(choice)
+                    nodes.append(node)
                 
-                node = StoryNode(
-                    id=node_data["id"],
-                    sceneNumber=node_data["scene_number"],
-                    title=node_data["title"],
-                    text=node_data["text"],
-                    location=node_data["location"],
-                    type=node_data["type"],
-                    choices=choices
-                )
-                nodes.append(node)
-            
-            # Get story edges
-            edges_result = self.supabase.table("story_edges").select("*").eq("story_id", story_id).execute()
-            edges = []
-            
-            for edge_data in edges_result.data:
-                edge = StoryEdge(
-                    **{"from": edge_data["from_node_id"]},
-                    to=edge_data["to_node_id"],
-                    choiceId=edge_data["choice_id"]
-                )
-                edges.append(edge)
+                # Get story edges
+                edges_result = self.supabase.table("story_edges").select("*").eq("story_id", story_id).execute()
+                
+                for edge_data in edges_result.data:
+                    edge = StoryEdge(
+                        **{"from": edge_data["from_node_id"]},
+                        to=edge_data["to_node_id"],
+                        choiceId=edge_data["choice_id"]
+                    )
+                    edges.append(edge)
             
-            # Get character roles
-            chars_result = self.supabase.table("character_roles").select("*").eq("story_id", story_id).execute()
             characters = []
+            if wanted("characters"):
+                # Get character roles
+                chars_result = self.supabase.table("character_roles").select("*").eq("story_id", story_id).execute()
+                
+                for char_data in chars_result.data:
+                    char = CharacterRole(
+                        id=char_data["id"],
+                        role=char_data["role"],
+                        description=char_data["description"]
+                    )
+                    characters.append(char)
             
-            for char_data in chars_result.data:
-                char = CharacterRole(
-                    id=char_data["id"],
-                    role=char_data["role"],
-                    description=char_data["description"]
-                )
-                characters.append(char)
-            
-            # Get locations
-            locs_result = self.supabase.table("locations").select("*").eq("story_id", story_id).execute()
             locations = []
-            
-            for loc_data in locs_result.data:
-                # Get scene numbers for this location
-                scene_nums_result = self.supabase.table("location_scene_numbers").select("scene_number").eq("location_id", loc_data["id"]).execute()
-                scene_numbers = [sn["scene_number"] for sn in scene_nums_result.data]
+            if wanted("locations"):
+                # Get locations
+                locs_result = self.supabase.table("locations").select("*").eq("story_id", story_id).execute()
                 
-                loc = Location(
-                    id=loc_data["id"],
-                    name=loc_data["name"],
-                    sceneNumbers=scene_numbers,
-                    description=loc_data["description"]
-                )
-                locations.append(loc)
-            
-            # Create story tree
-            tree = StoryTree(nodes=nodes, edges=edges)
-            
-            # Create story object
-            story = Story(
-                id=story_data["id"],
-                lesson=story_data["lesson"],
-                theme=story_data["theme"],
-                storyFormat=story_data["story_format"],
-                status=StoryStatus(story_data["status"]),
-                tree=tree,
-                characters=characters,
-                locations=locations,
-                createdAt=datetime.fromisoformat(story_data["created_at"].replace('Z', '+00:00')),
-                updatedAt=datetime.fromisoformat(story_data["updated_at"].replace('Z', '+00:00'))
-            )
-            
-            return story
+                for loc_data in locs_result.data:
+                    # Get scene numbers for this location
+                    scene_nums_result = self.supabase.table("location_scene_numbers").select("scene_number").eq("location_id", loc_data["id"]).execute()
+                    scene_numbers = [sn["scene_number"] for sn in scene_nums_result.data]
+                    
+                    loc = Location(
+                        id=loc_data["id"],
+                        name=loc_data["name"],
+                        sceneNumbers=scene_numbers,
+                        description=loc_data["description"]
+                    )
+                    locations.append(loc)
             
+            values = {
+                "id": story_data["id"],
+                "tree": StoryTree(nodes=nodes, edges=edges),
+                "characters": characters,
+                "locations": locations,
+            }
+            for name, column in STORY_COLUMNS.items():
+                if column not in story_data:
+                    continue
+                value = story_data[column]
+                if column == "status":
+                    value = StoryStatus(value)
+                elif column == "version":
+                    value = value or 0
+                elif column in ("created_at", "updated_at"):
+                    value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                values[name] = value
+            
+            if fields is None:
+                return Story(**values)
+            return Story.model_construct(**values)
+        
         except Exception as e:
             print(f"Error getting story from Supabase: {str(e)}")
             return None
@@ -364,74 +621,256 @@ class SupabaseDataManager:
             print(f"Error getting stories count from Supabase: {str(e)}")
             return 0
     
-    def get_all_stories(self, limit: int, offset: int, status: Optional[str] = None, sort_by: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get all stories with pagination and filtering from Supabase"""
+    def get_all_stories(
+        self,
+        limit: int,
+        offset: int,
+        status: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        fields: Optional[Set[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all stories with pagination and filtering from Supabase
+        
+        Reads the story_summaries table, so each page is a single query.
+        
+        Args:
+            fields: StoryListItem fields the caller needs. Only the matching
+                columns are selected. None returns every field.
+        """
         try:
-            query = self.supabase.table("stories").select("*")
+            sort = normalize_sort(sort_by)
+            column = KEYSET_COLUMNS[sort]
+            descending = SORT_DIRECTIONS[sort]
             
+            query = self.supabase.table("story_summaries").select(self._summary_columns(fields))
             if status:
                 query = query.eq("status", status)
             
-            # Apply sorting
-            if sort_by == "created_at":
-                query = query.order("created_at", desc=True)
-            elif sort_by == "updated_at":
-                query = query.order("updated_at", desc=True)
-            elif sort_by == "title":
-                query = query.order("title")
-            else:
-                # Default sorting by created_at desc
-                query = query.order("created_at", desc=True)
+            # Same order as the keyset pages
+            query = query.order(column, desc=descending, nullsfirst=not descending).order("id", desc=descending)
+            result = query.range(offset, offset + limit - 1).execute()
             
-            # Apply pagination
-            query = query.range(offset, offset + limit - 1)
-            result = query.execute()
-            
-            stories = []
-            for story_data in result.data:
-                # Get read count
-                read_count_result = self.supabase.table("reading_completions").select("id", count="exact").eq("story_id", story_data["id"]).execute()
-                read_count = read_count_result.count or 0
-                
-                # Get last read time
-                last_read_result = self.supabase.table("reading_completions").select("completed_at").eq("story_id", story_data["id"]).order("completed_at", desc=True).limit(1).execute()
-                last_read_at = None
-                if last_read_result.data:
-                    last_read_at = datetime.fromisoformat(last_read_result.data[0]["completed_at"].replace('Z', '+00:00'))
-                
-                # Get scene count
-                scene_count_result = self.supabase.table("story_nodes").select("id", count="exact").eq("story_id", story_data["id"]).execute()
-                scene_count = scene_count_result.count or 0
-                
-                story = {
-                    "id": story_data["id"],
-                    "title": story_data["title"] or f"{story_data['lesson']} Story",
-                    "lesson": story_data["lesson"],
-                    "coverImage": None,
-                    "status": story_data["status"],
-                    "createdAt": story_data["created_at"],
-                    "sceneCount": scene_count,
-                    "readCount": read_count,
-                    "lastReadAt": last_read_at
-                }
-                stories.append(story)
-            
-            return stories
+            return [self._story_list_item(row, fields) for row in result.data]
             
         except Exception as e:
             print(f"Error getting all stories from Supabase: {str(e)}")
             return []
     
+    def get_stories_page(
+        self,
+        limit: int,
+        status: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Set[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one keyset page of stories
+        
+        Rows of story_summaries are ordered by (sort column, id) and the page
+        starts after the cursor position, so every sort order and every page
+        depth is one indexed query.
+        
+        Args:
+            limit: Page size
+            status: Optional status filter
+            sort_by: "recent" (updated_at), "title" or "readCount"
+            cursor: Token from a previous page's nextCursor
+            fields: List item fields to return (None for all)
+            
+        Returns:
+            (stories, cursor for the next page or None on the last page)
+        
+        Raises:
+            ValueError: If the cursor is invalid for this sort/status
+        """
+        sort = normalize_sort(sort_by)
+        descending = SORT_DIRECTIONS[sort]
+        after = decode_cursor(cursor, sort, status) if cursor else None
+        column = KEYSET_COLUMNS[sort]
+        
+        query = self.supabase.table("story_summaries").select(self._summary_columns(fields, column))
+        if status:
+            query = query.eq("status", status)
+        if after:
+            query = query.or_(self._keyset_filter(column, descending, after))
+        
+        # Missing titles sort first ("" in the cursor)
+        query = query.order(column, desc=descending, nullsfirst=not descending).order("id", desc=descending)
+        rows = query.limit(limit + 1).execute().data
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_value = rows[-1][column]
+            next_cursor = encode_cursor(sort, status, ("" if last_value is None else last_value, rows[-1]["id"]))
+        
+        return [self._story_list_item(row, fields) for row in rows], next_cursor
+    
+    def _summary_columns(self, fields: Optional[Set[str]], *extra: str) -> str:
+        """story_summaries columns needed for the requested list item fields"""
+        if fields is None:
+            return "*"
+        return ",".join(sorted({"id", *extra}.union(*(SUMMARY_LIST_COLUMNS.get(name, set()) for name in fields))))
+    
+    def _story_list_item(self, row: Dict[str, Any], fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """
+        Build a story list item from a story_summaries row
+        
+        Args:
+            row: Row from the story_summaries table
+            fields: List item fields to fill (None for all)
+        """
+        def wanted(name: str) -> bool:
+            return fields is None or name in fields
+        
+        story = {"id": row["id"]}
+        if wanted("title"):
+            story["title"] = row["title"] or f"{row['lesson']} Story"
+        if wanted("lesson"):
+            story["lesson"] = row["lesson"]
+        if wanted("coverImage"):
+            story["coverImage"] = row.get("cover_image")
+        if wanted("status"):
+            story["status"] = StoryStatus(row["status"])
+        if wanted("createdAt"):
+            story["createdAt"] = _parse_timestamp(row["created_at"])
+        if wanted("sceneCount"):
+            story["sceneCount"] = row.get("scene_count") or 0
+        if wanted("readCount"):
+            story["readCount"] = row.get("read_count") or 0
+        if wanted("lastReadAt"):
+            story["lastReadAt"] = _parse_timestamp(row["last_read_at"]) if row.get("last_read_at") else None
+        
+        return story
+    
+    def _keyset_filter(self, column: str, descending: bool, after: Tuple[Any, str]) -> str:
+        """PostgREST or-filter selecting the rows after a (value, id) position"""
+        value, story_id = after
+        op = "lt" if descending else "gt"
+        if value == "":
+            # Inside the leading block of rows without a value
+            return f"and({column}.is.null,id.{op}.{_quote(story_id)}),{column}.not.is.null"
+        return f"{column}.{op}.{_quote(value)},and({column}.eq.{_quote(value)},id.{op}.{_quote(story_id)})"
+    
+    # ========================================================================
+    # Story Summaries
+    # ========================================================================
+    
+    def refresh_story_reads(self, story_id: str, last_read_at: Optional[str] = None):
+        """
+        Recount a story's completions into its summary row
+        
+        A recount (rather than an increment) stays correct when completions
+        are recorded concurrently.
+        """
+        result = self.supabase.table("reading_completions").select("id", count="exact").eq("story_id", story_id).execute()
+        update = {"read_count": result.count or 0}
+        if last_read_at:
+            update["last_read_at"] = last_read_at
+        self.supabase.table("story_summaries").update(update).eq("id", story_id).execute()
+    
+    def rebuild_story_summaries(self) -> int:
+        """
+        Rebuild every story_summaries row from the source tables
+        
+        Used to backfill the table (see migrate_story_summaries.py). Costs a
+        few queries per story, like the listing used to on every request.
+        
+        Returns:
+            Number of summaries written
+        """
+        stories = self.supabase.table("stories").select("*").execute().data
+        for story_data in stories:
+            story_id = story_data["id"]
+            nodes = self.supabase.table("story_nodes").select("id,type,scene_number").eq("story_id", story_id).execute().data
+            start_node = next((node for node in nodes if node["type"] == "start"), None)
+            if start_node is None and nodes:
+                start_node = min(nodes, key=lambda node: node["scene_number"])
+            
+            cover_image = None
+            if start_node:
+                current = self.supabase.table("scene_image_versions").select("image_url").eq("story_id", story_id).eq("scene_id", start_node["id"]).eq("is_current", True).execute().data
+                cover_image = current[0]["image_url"] if current else None
+            
+            last_read = self.supabase.table("reading_completions").select("completed_at").eq("story_id", story_id).order("completed_at", desc=True).limit(1).execute().data
+            self.supabase.table("story_summaries").upsert({
+                "id": story_id,
+                "title": story_data["title"],
+                "lesson": story_data["lesson"],
+                "status": story_data["status"],
+                "cover_image": cover_image,
+                "scene_count": len(nodes),
+                "start_node_id": start_node["id"] if start_node else None,
+                "created_at": story_data["created_at"],
+                "updated_at": story_data["updated_at"],
+                "last_read_at": last_read[0]["completed_at"] if last_read else None
+            }).execute()
+            self.refresh_story_reads(story_id)
+        
+        return len(stories)
+    
     def delete_story(self, story_id: str) -> bool:
         """Delete a story from Supabase"""
         try:
             result = self.supabase.table("stories").delete().eq("id", story_id).execute()
+            self.supabase.table("story_summaries").delete().eq("id", story_id).execute()
+            self.supabase.table("story_edits").delete().eq("story_id", story_id).execute()
             return len(result.data) > 0
             
         except Exception as e:
             print(f"Error deleting story from Supabase: {str(e)}")
             return False
     
+    # ========================================================================
+    # Edit Journal
+    # ========================================================================
+    
+    def append_story_edits(self, story_id: str, entries: List[Dict[str, Any]]):
+        """Append edit journal entries (deltas and snapshots, keyed by version and kind)"""
+        try:
+            self.supabase.table("story_edits").insert([
+                {
+                    "story_id": story_id,
+                    "version": entry["version"],
+                    "kind": entry["kind"],
+                    "payload": entry,
+                    "created_at": entry["createdAt"]
+                }
+                for entry in entries
+            ]).execute()
+            
+        except Exception as e:
+            raise Exception(f"Failed to append story edits to Supabase: {str(e)}")
+    
+    def get_story_edits(self, story_id: str, after_version: int = 0) -> List[Dict[str, Any]]:
+        """Journal entries after a version, oldest first (a version's delta before its snapshot)"""
+        try:
+            result = self.supabase.table("story_edits").select("payload").eq("story_id", story_id).gt("version", after_version).order("version").order("kind").execute()
+            return [row["payload"] for row in result.data]
+        except Exception as e:
+            print(f"Error getting story edits from Supabase: {str(e)}")
+            return []
+    
+    def get_story_edit_snapshot(self, story_id: str) -> Optional[Dict[str, Any]]:
+        """Latest journaled snapshot of a story"""
+        try:
+            result = self.supabase.table("story_edits").select("payload").eq("story_id", story_id).eq("kind", "snapshot").order("version", desc=True).limit(1).execute()
+            return result.data[0]["payload"] if result.data else None
+        except Exception as e:
+            print(f"Error getting story edit snapshot from Supabase: {str(e)}")
+            return None
+    
+    def get_story_edit(self, story_id: str, version: int) -> Optional[Dict[str, Any]]:
+        """Delta journaled for a story version"""
+        try:
+            result = self.supabase.table("story_edits").select("payload").eq("story_id", story_id).eq("version", version).eq("kind", "delta").execute()
+            return result.data[0]["payload"] if result.data else None
+        except Exception as e:
+            print(f"Error getting story edit from Supabase: {str(e)}")
+            return None
+    
     # ========================================================================
     # Character Management
     # ========================================================================
@@ -572,7 +1011,12 @@ class SupabaseDataManager:
                     version_data = {
                         "versionId": version["version_id"],
                         "url": version["image_url"],  # Map imageUrl to url
-                        "generatedAt": version["created_at"]  # Map createdAt to generatedAt
+                        "generatedAt": version["created_at"],  # Map createdAt to generatedAt
+                        "quality": version.get("quality") or "final",
+                        "prompt": version.get("prompt"),
+                        "seed": version.get("seed"),
+                        "upgradedFrom": version.get("upgraded_from"),
+                        "model": version.get("model")
                     }
                     image_versions.append(version_data)
                 
@@ -643,52 +1087,76 @@ class SupabaseDataManager:
     # Reading Progress Management
     # ========================================================================
     
-    def save_reading_progress(self, story_id: str, progress: Dict[str, Any]):
-        """Save reading progress to Supabase"""
+    def save_reading_progress(self, story_id: str, reader_id: str, progress: Dict[str, Any]):
+        """
+        Save a reader's progress to Supabase and roll up the visits and choices it adds
+        
+        Raises:
+            Exception: If the write fails (the progress buffer keeps the
+                progress and retries it)
+        """
         try:
+            progress = _as_dict(progress)
+            # Read errors must fail the save: rolling up against a missing
+            # previous row would count the whole session again
+            previous = self._fetch_reading_progress(story_id, reader_id)
             progress_data = {
-                "id": f"progress_{story_id}",
+                "id": f"progress_{story_id}_{reader_id}",
                 "story_id": story_id,
+                "reader_id": reader_id,
                 "current_node_id": progress.get("currentNodeId"),
                 "visited_node_ids": progress.get("visitedNodeIds", []),
                 "choices_made": progress.get("choicesMade", []),
+                "session_id": progress.get("sessionId"),
                 "last_read_at": datetime.now().isoformat(),
-                "created_at": datetime.now().isoformat(),
                 "updated_at": datetime.now().isoformat()
             }
+            if previous is None:
+                progress_data["created_at"] = progress_data["updated_at"]
             
             self.supabase.table("reading_progress").upsert(progress_data).execute()
             
+            rollup = self._get_stats_rollup(story_id)
+            rollup.add_progress(previous, progress)
+            self._save_stats_rollup(story_id, rollup)
+            
         except Exception as e:
-            print(f"Error saving reading progress to Supabase: {str(e)}")
+            raise Exception(f"Failed to save reading progress to Supabase: {str(e)}")
     
-    def get_reading_progress(self, story_id: str) -> Optional[Dict[str, Any]]:
-        """Get reading progress from Supabase"""
+    def get_reading_progress(self, story_id: str, reader_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get reading progress from Supabase
+        
+        Args:
+            story_id: Story ID
+            reader_id: Reader to get progress for, or None for the story's
+                most recently read progress
+        """
         try:
-            result = self.supabase.table("reading_progress").select("*").eq("story_id", story_id).execute()
-            
-            if not result.data:
-                return None
-            
-            progress_data = result.data[0]
-            return {
-                "storyId": progress_data["story_id"],
-                "currentNodeId": progress_data["current_node_id"],
-                "visitedNodeIds": progress_data["visited_node_ids"],
-                "choicesMade": progress_data["choices_made"],
-                "lastReadAt": progress_data["last_read_at"]
-            }
-            
+            return self._fetch_reading_progress(story_id, reader_id)
         except Exception as e:
             print(f"Error getting reading progress from Supabase: {str(e)}")
             return None
     
+    def _fetch_reading_progress(self, story_id: str, reader_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Latest progress row of a story or reader (raises on query errors)"""
+        query = self.supabase.table("reading_progress").select("*").eq("story_id", story_id)
+        if reader_id is not None:
+            query = query.eq("reader_id", reader_id)
+        result = query.order("last_read_at", desc=True).limit(1).execute()
+        
+        if not result.data:
+            return None
+        return _reading_progress(result.data[0])
+    
     def record_reading_completion(self, story_id: str, completion_data: Dict[str, Any]):
         """Record reading completion to Supabase"""
         try:
+            completion_data = _as_dict(completion_data)
             completion_record = {
                 "id": f"completion_{story_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
                 "story_id": story_id,
+                "reader_id": completion_data.get("readerId"),
                 "ending_node_id": completion_data.get("endingNodeId"),
                 "ending_type": completion_data.get("endingType"),
                 "total_nodes_visited": completion_data.get("totalNodesVisited"),
@@ -697,6 +1165,11 @@ class SupabaseDataManager:
             }
             
             self.supabase.table("reading_completions").insert(completion_record).execute()
+            self.refresh_story_reads(story_id, completion_record["completed_at"])
+            
+            rollup = self._get_stats_rollup(story_id)
+            rollup.add_completion(completion_data)
+            self._save_stats_rollup(story_id, rollup)
             
         except Exception as e:
             print(f"Error recording reading completion to Supabase: {str(e)}")
@@ -855,6 +1328,11 @@ class SupabaseDataManager:
                     result = self.supabase.table("scene_image_versions").insert(version_data).execute()
                 
                 print(f"   ✅ Save result: {len(result.data) if result.data else 0} rows affected", flush=True)
+            
+            # The start scene's current image is the story's cover
+            current = next((version for version in versions.get("versions", []) if version["versionId"] == versions.get("currentVersionId")), None)
+            if current:
+                self.supabase.table("story_summaries").update({"cover_image": current["imageUrl"]}).eq("id", story_id).eq("start_node_id", scene_id).execute()
                 
         except Exception as e:
             print(f"❌ Error saving scene image versions to Supabase: {str(e)}", flush=True)
@@ -946,63 +1424,63 @@ class SupabaseDataManager:
     # Statistics
     # ========================================================================
     
-    def get_story_statistics(self, story_id: str) -> Optional[Dict[str, Any]]:
-        """Get story statistics from Supabase"""
+    def get_story_statistics(self, story_id: str, ending_ids: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Get story statistics from the story_stats rollup (one row read)"""
         try:
-            # Get total reads
-            reads_result = self.supabase.table("reading_completions").select("id", count="exact").eq("story_id", story_id).execute()
-            total_reads = reads_result.count or 0
-            
-            # Get unique readers
-            unique_readers_result = self.supabase.table("reading_completions").select("reader_id").eq("story_id", story_id).execute()
-            unique_readers = len(set(completion.get("reader_id", "anonymous") for completion in unique_readers_result.data))
-            
-            # Get average reading time
-            reading_times_result = self.supabase.table("reading_completions").select("reading_time_seconds").eq("story_id", story_id).execute()
-            reading_times = [completion["reading_time_seconds"] for completion in reading_times_result.data if completion["reading_time_seconds"]]
-            average_reading_time = sum(reading_times) / len(reading_times) if reading_times else 0
-            
-            # Mock choice distribution and most visited scenes
-            choice_distribution = [
-                {
-                    "nodeId": "node_1",
-                    "choices": [
-                        {
-                            "choiceId": "choice_1",
-                            "text": "Help a friend",
-                            "selectedCount": max(1, total_reads - 2)
-                        },
-                        {
-                            "choiceId": "choice_2",
-                            "text": "Ignore friend",
-                            "selectedCount": min(2, total_reads)
-                        }
-                    ]
-                }
-            ]
-            
-            most_visited_scenes = [
-                {
-                    "nodeId": "node_1",
-                    "sceneNumber": 1,
-                    "visitCount": total_reads
-                }
-            ]
-            
-            return {
-                "storyId": story_id,
-                "totalReads": total_reads,
-                "uniqueReaders": unique_readers,
-                "averageReadingTime": int(average_reading_time),
-                "completionRate": 75,  # Mock value
-                "choiceDistribution": choice_distribution,
-                "mostVisitedScenes": most_visited_scenes
-            }
+            return self._get_stats_rollup(story_id).statistics(story_id, ending_ids=ending_ids)
             
         except Exception as e:
             print(f"Error getting story statistics from Supabase: {str(e)}")
             return None
     
+    def get_choice_counts(self, story_id: str) -> Dict[str, Dict[str, int]]:
+        """How often each choice was taken: node ID -> choice ID -> count"""
+        try:
+            return self._get_stats_rollup(story_id).choice_counts
+            
+        except Exception as e:
+            print(f"Error getting choice counts from Supabase: {str(e)}")
+            return {}
+    
+    def _get_stats_rollup(self, story_id: str) -> StoryStatsRollup:
+        """Load a story's statistics rollup (empty if it has never been read)"""
+        result = self.supabase.table("story_stats").select("rollup").eq("story_id", story_id).execute()
+        return StoryStatsRollup(result.data[0]["rollup"] if result.data else None)
+    
+    def _save_stats_rollup(self, story_id: str, rollup: StoryStatsRollup):
+        """Store a story's statistics rollup"""
+        self.supabase.table("story_stats").upsert({
+            "story_id": story_id,
+            "rollup": rollup.to_dict(),
+            "updated_at": datetime.now().isoformat()
+        }, on_conflict="story_id").execute()
+    
+    def rebuild_story_stats(self) -> int:
+        """
+        Rebuild every story_stats rollup from completions and saved progress
+        
+        Used to backfill the table (see migrate_story_stats.py).
+        
+        Returns:
+            Number of rollups written
+        """
+        stories = self.supabase.table("stories").select("id").execute().data
+        for story in stories:
+            rollup = StoryStatsRollup()
+            completions = self.supabase.table("reading_completions").select("*").eq("story_id", story["id"]).execute().data
+            for completion in completions:
+                rollup.add_completion({
+                    "readerId": completion.get("reader_id"),
+                    "endingType": completion.get("ending_type"),
+                    "readingTimeSeconds": completion.get("reading_time_seconds")
+                })
+            progress_rows = self.supabase.table("reading_progress").select("*").eq("story_id", story["id"]).execute().data
+            for row in progress_rows:
+                rollup.add_progress(None, _reading_progress(row))
+            self._save_stats_rollup(story["id"], rollup)
+        
+        return len(stories)
+    
     def get_completed_stories(self, limit: int, offset: int, sort_by: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get completed stories with pagination and sorting from Supabase"""
         try:
@@ -1085,6 +1563,43 @@ class SupabaseDataManager:
             print(f"❌ Error updating location image in Supabase: {str(e)}")
             raise e
     
+    def set_location_image(
+        self,
+        location_id: str,
+        version_id: str,
+        image_url: str,
+        expected_version_id: Optional[str] = None,
+        description: Optional[str] = None
+    ) -> bool:
+        """
+        Point a location at one of its image versions
+        
+        Args:
+            expected_version_id: Only switch if this version is still the
+                selected one (compare-and-set, e.g. for a background upgrade
+                that must not override a newer selection)
+            description: New description the image was generated from, if changed
+            
+        Returns:
+            True if the location was updated
+        """
+        try:
+            location_data = {
+                "image_url": image_url,
+                "selected_version_id": version_id,
+                "status": "completed",
+                "updated_at": datetime.now().isoformat()
+            }
+            if description:
+                location_data["description"] = description
+            query = self.supabase.table("backgrounds").update(location_data).eq("id", location_id)
+            if expected_version_id is not None:
+                query = query.eq("selected_version_id", expected_version_id)
+            return bool(query.execute().data)
+        except Exception as e:
+            print(f"❌ Error selecting location image in Supabase: {str(e)}")
+            raise e
+    
     def save_location(self, location_data: Dict[str, Any]):
         """Save a single location to Supabase"""
         try:
@@ -1217,4 +1732,34 @@ class SupabaseDataManager:
             if "row-level security policy" in str(e).lower():
                 print("💡 This appears to be a Row Level Security (RLS) policy issue.")
                 print("💡 You may need to configure RLS policies for the 'frame-fable' storage bucket.")
-            return None
\ No newline at end of file
+            return None
+
+
+def _quote(value: Any) -> str:
+    """Quote a value for a PostgREST logical filter"""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse a Supabase timestamp"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    """Request/progress model or dict as a plain dict"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return dict(value)
+
+
+def _reading_progress(row: Dict[str, Any]) -> Dict[str, Any]:
+    """reading_progress row as ReadingProgress fields"""
+    return {
+        "storyId": row["story_id"],
+        "currentNodeId": row["current_node_id"],
+        "visitedNodeIds": row["visited_node_ids"],
+        "choicesMade": row["choices_made"],
+        "lastReadAt": row["last_read_at"],
+        "sessionId": row.get("session_id")
+    }
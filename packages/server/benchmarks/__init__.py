@@ -0,0 +1,10 @@
+"""
+Micro-benchmarks
+Run from packages/server, e.g. python -m benchmarks.bench_story_graph
+"""
+
+import os
+
+# Importing the app package builds the route services; no requests are made
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark-anon-key")
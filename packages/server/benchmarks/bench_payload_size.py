@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Payload sizes of story responses: full vs compact encoding, identity vs gzip/brotli
+Run from packages/server: python -m benchmarks.bench_payload_size
+"""
+
+import time
+
+from app.api.compression import CompressionMiddleware, brotli
+from app.api.responses import api_response
+from app.api.views import compact_reading_story, compact_story
+from benchmarks.story_fixtures import build_reading_story, build_story
+
+
+def _sizes(label: str, body: bytes, middleware: CompressionMiddleware) -> None:
+    row = f"   {label:<16} {len(body):>9} B"
+    for encoding in middleware.available:
+        start = time.perf_counter()
+        compressed = middleware.compress(body, encoding)
+        elapsed = (time.perf_counter() - start) * 1000
+        row += f"   {encoding}: {len(compressed):>8} B ({elapsed:6.2f} ms)"
+    print(row)
+
+
+def run(sizes=(10, 100, 1_000)) -> None:
+    middleware = CompressionMiddleware(app=None)
+    if brotli is None:
+        print("(brotli not installed, gzip only)")
+    for size in sizes:
+        story = build_story(size)
+        reading_story = build_reading_story(size)
+        print(f"\n📊 {size} nodes")
+        _sizes("story full", api_response(True, data=story).body, middleware)
+        _sizes("story compact", api_response(True, data=compact_story(story)).body, middleware)
+        _sizes("read full", api_response(True, data=reading_story).body, middleware)
+        _sizes("read compact", api_response(True, data=compact_reading_story(reading_story)).body, middleware)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Storage writes from reading mode with and without the progress write buffer
+Run from packages/server: python -m benchmarks.bench_progress_writes
+"""
+
+import random
+
+from app.services.progress_buffer import ProgressWriteBuffer
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def simulate(readers: int, scenes: int, seed: int = 7) -> None:
+    """Readers tap through scenes 0.3-4s apart, re-reading pages now and then"""
+    rng = random.Random(seed)
+    clock = SimulatedClock()
+    writes = []
+    buffer = ProgressWriteBuffer(lambda story_id, progress: writes.append(story_id), clock=clock)
+
+    events = []
+    for reader in range(readers):
+        at = rng.uniform(0, 60)
+        visited = []
+        for scene in range(scenes):
+            visited.append(f"node_{scene}")
+            taps = 1 + (rng.random() < 0.3) * rng.randint(1, 4)
+            for _ in range(taps):
+                at += rng.uniform(0.3, 4.0)
+                events.append((at, reader, list(visited)))
+    events.sort(key=lambda event: event[0])
+
+    next_tick = 1.0
+    for at, reader, visited in events:
+        while next_tick <= at:
+            clock.now = next_tick
+            buffer.flush_due()
+            next_tick += 1.0
+        clock.now = at
+        buffer.put("story", f"reader-{reader}", {"visitedNodeIds": visited})
+    buffer.flush()
+
+    print(f"   {readers:>4} readers x {scenes:>3} scenes: {len(events):>6} saves -> {len(writes):>5} writes "
+          f"({len(events) / max(1, len(writes)):.1f}x fewer)")
+
+
+def run() -> None:
+    print("Reading progress writes (idle 5s, max delay 30s)")
+    for readers, scenes in ((10, 10), (100, 10), (100, 40)):
+        simulate(readers, scenes)
+
+
+if __name__ == "__main__":
+    run()
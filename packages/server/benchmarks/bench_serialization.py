@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark for JSON story storage and /read response encoding
+Run from packages/server: python -m benchmarks.bench_serialization
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app import serialization
+from app.api.responses import api_response
+from app.models.schemas import APIResponse
+from app.storage.story_data_manager import StoryDataManager
+from benchmarks.story_fixtures import build_reading_story, build_story
+
+
+def _timed(label: str, fn, repeat: int = 20) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"   {label:<34} {best * 1000:9.3f} ms")
+
+
+def bench_storage(manager: StoryDataManager, size: int) -> None:
+    story = build_story(size)
+    legacy_file = os.path.join(manager.stories_path, "legacy.json")
+
+    def legacy_save():
+        with open(legacy_file, "w") as f:
+            json.dump(story.model_dump(), f, indent=2, default=str)
+
+    def legacy_load():
+        with open(legacy_file, "r") as f:
+            return json.load(f)
+
+    legacy_save()
+    print(f"\n📦 Story save/load, {size} nodes")
+    _timed("save: json indent=2", legacy_save)
+    _timed("load: json (dict only)", legacy_load)
+    for name in serialization.SERIALIZERS:
+        serialization.set_serializer(name)
+        manager.save_story(story)
+        _timed(f"save: {name}", lambda: manager.save_story(story))
+        _timed(f"load + parse Story: {name}", lambda: manager.get_story(story.id))
+    size_legacy = os.path.getsize(legacy_file)
+    size_compact = os.path.getsize(os.path.join(manager.stories_path, f"{story.id}.json"))
+    print(f"   file size: {size_legacy} -> {size_compact} bytes")
+
+
+def bench_read_response(size: int) -> None:
+    reading_story = build_reading_story(size)
+
+    def legacy_encode():
+        response = APIResponse(success=True, data=reading_story.model_dump(by_alias=True))
+        return json.dumps(jsonable_encoder(response)).encode("utf-8")
+
+    print(f"\n📖 /read response encoding, {size} nodes")
+    _timed("APIResponse + jsonable_encoder", legacy_encode)
+    for name in serialization.SERIALIZERS:
+        serialization.set_serializer(name)
+        _timed(f"FastJSONResponse: {name}", lambda: api_response(success=True, data=reading_story).body)
+
+
+def run(sizes=(10, 100, 1_000)) -> None:
+    default = serialization.get_serializer().name
+    with tempfile.TemporaryDirectory() as data_path:
+        manager = StoryDataManager(data_path)
+        for size in sizes:
+            bench_storage(manager, size)
+            bench_read_response(size)
+    serialization.set_serializer(default)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark for converting a generated story payload into models and the API response
+Run from packages/server: python -m benchmarks.bench_story_generation
+"""
+
+import copy
+import json
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.responses import api_response
+from app.models.schemas import (STORY_ADAPTER, APIResponse, CharacterRole,
+                                Choice, Location, StoryEdge,
+                                StoryGenerateResponse, StoryNode, StoryTree)
+from benchmarks.story_fixtures import build_generated_payload
+
+
+def legacy_conversion(story_data: dict) -> bytes:
+    """Dict-walk into models, dump each piece, then encode the APIResponse like FastAPI does"""
+    nodes = []
+    for node_data in story_data["tree"]["nodes"]:
+        choices = [Choice(**choice) for choice in node_data["choices"]]
+        nodes.append(StoryNode(**{**node_data, "choices": choices}))
+    edges = [StoryEdge(**edge) for edge in story_data["tree"]["edges"]]
+    tree = StoryTree(nodes=nodes, edges=edges)
+    characters = [CharacterRole(**char) for char in story_data["characters"]]
+    locations = [Location(**loc) for loc in story_data["locations"]]
+
+    data = {
+        "storyId": "bench-story",
+        "tree": tree.model_dump(by_alias=True),
+        "characters": [char.model_dump(by_alias=True) for char in characters],
+        "locations": [loc.model_dump(by_alias=True) for loc in locations]
+    }
+    response = APIResponse(success=True, data=data)
+    return json.dumps(jsonable_encoder(response)).encode("utf-8")
+
+
+def fast_conversion(story_data: dict) -> bytes:
+    """Parse with the precompiled adapter and render the response in one serializer pass"""
+    now = datetime.now()
+    story = STORY_ADAPTER.validate_python({
+        "id": "bench-story",
+        "lesson": "Sharing is caring",
+        "theme": "Forest",
+        "storyFormat": "Fairy tale",
+        "tree": story_data["tree"],
+        "characters": story_data["characters"],
+        "locations": story_data["locations"],
+        "createdAt": now,
+        "updatedAt": now
+    })
+    response = api_response(success=True, data=StoryGenerateResponse(
+        storyId=story.id,
+        tree=story.tree,
+        characters=story.characters,
+        locations=story.locations
+    ))
+    return response.body
+
+
+def _timed(label: str, fn, payload: dict, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        data = copy.deepcopy(payload)
+        start = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - start)
+    print(f"   {label:<24} {best * 1000:9.3f} ms")
+    return best
+
+
+def run(sizes=(10, 100, 1_000)) -> None:
+    print("Generated story conversion (best of 20)")
+    for size in sizes:
+        payload = build_generated_payload(size)
+        assert json.loads(legacy_conversion(copy.deepcopy(payload))) == json.loads(fast_conversion(copy.deepcopy(payload)))
+
+        print(f"\n📊 {size} nodes")
+        legacy = _timed("dict-walk + dumps", legacy_conversion, payload)
+        fast = _timed("TypeAdapter + to_json", fast_conversion, payload)
+        print(f"   speedup                  {legacy / fast:9.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the StoryGraph index
+Run from packages/server: python -m benchmarks.bench_story_graph
+"""
+
+import time
+import uuid
+
+from app.services.story_graph import StoryGraph
+from benchmarks.story_fixtures import build_tree
+
+
+def _timed(label: str, fn, repeat: int = 5) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"   {label:<28} {best * 1000:9.2f} ms")
+
+
+def run(sizes=(1_000, 5_000, 20_000)) -> None:
+    print("StoryGraph micro-benchmark (best of 5)")
+    for size in sizes:
+        print(f"\n📊 {size} nodes")
+        tree = build_tree(size)
+
+        _timed("build index", lambda: StoryGraph(tree))
+        graph = StoryGraph(tree)
+        _timed("validate", lambda: graph.validation_errors(node_range=None))
+        _timed("parent links / reachability", lambda: StoryGraph(tree).reachable)
+        remap_graph = StoryGraph(build_tree(size))
+        _timed("remap IDs to UUIDs", lambda: remap_graph.remap_ids(
+            lambda _: str(uuid.uuid4()), lambda _: str(uuid.uuid4())
+        ), repeat=1)
+        delete_graph = StoryGraph(build_tree(size))
+        _timed("delete 100 nodes", lambda: [
+            delete_graph.delete_node(f"node_{i}") for i in range(2, 102)
+        ], repeat=1)
+
+if __name__ == "__main__":
+    run()
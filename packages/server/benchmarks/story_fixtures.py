@@ -0,0 +1,121 @@
+"""
+Synthetic story trees for benchmarks
+"""
+
+import random
+from datetime import datetime
+
+from app.models.schemas import (Choice, NodeType, ReadingNode, Story,
+                                StoryEdge, StoryForReading, StoryNode,
+                                StoryStatus, StoryTree)
+
+
+def build_tree(node_count: int, branching: int = 2, seed: int = 7) -> StoryTree:
+    """
+    Build a random branching tree with one start, one good ending and bad endings
+
+    Args:
+        node_count: Number of nodes
+        branching: Maximum choices per non-ending node
+        seed: Random seed for reproducible shapes
+    """
+    rng = random.Random(seed)
+    nodes = []
+    for index in range(node_count):
+        if index == 0:
+            node_type = NodeType.START
+        elif index == node_count - 1:
+            node_type = NodeType.GOOD_ENDING
+        elif index > node_count // 2 and rng.random() < 0.3:
+            node_type = NodeType.BAD_ENDING
+        else:
+            node_type = NodeType.CHOICE
+        nodes.append(StoryNode(
+            id=f"node_{index + 1}",
+            sceneNumber=index + 1,
+            title=f"Scene {index + 1}",
+            text="The children walked through the forest and found a river. " * 3,
+            location=f"Location {index % 12}",
+            type=node_type,
+            choices=[]
+        ))
+
+    for index, node in enumerate(nodes):
+        if node.type in (NodeType.GOOD_ENDING, NodeType.BAD_ENDING):
+            continue
+        targets = {min(index + 1, node_count - 1)}
+        while len(targets) < branching and index + 2 < node_count:
+            targets.add(rng.randint(index + 1, node_count - 1))
+        node.choices = [
+            Choice(id=f"choice_{index + 1}_{n}", text=f"Option {n}", nextNodeId=nodes[target].id, isCorrect=n == 0)
+            for n, target in enumerate(sorted(targets))
+        ]
+
+    edges = [
+        StoryEdge(**{"from": node.id, "to": choice.nextNodeId, "choiceId": choice.id})
+        for node in nodes for choice in node.choices
+    ]
+    return StoryTree(nodes=nodes, edges=edges)
+
+
+def build_story(node_count: int) -> Story:
+    """Wrap a synthetic tree in a Story"""
+    return Story(
+        id="bench-story",
+        title="Benchmark Story",
+        lesson="Sharing is caring",
+        theme="Forest",
+        storyFormat="Fairy tale",
+        status=StoryStatus.COMPLETED,
+        tree=build_tree(node_count),
+        characters=[],
+        locations=[],
+        createdAt=datetime.now(),
+        updatedAt=datetime.now()
+    )
+
+
+def build_generated_payload(node_count: int) -> dict:
+    """Raw payload shaped like the LLM story generation output"""
+    tree = build_tree(node_count).model_dump(by_alias=True, mode="json")
+    return {
+        "tree": tree,
+        "characters": [
+            {"id": f"char_{n}", "role": role, "description": f"{role} of the story"}
+            for n, role in enumerate(("Protagonist", "Friend", "Helper", "Antagonist"), 1)
+        ],
+        "locations": [
+            {
+                "id": f"loc_{n}",
+                "name": f"Location {n}",
+                "sceneNumbers": [node["sceneNumber"] for node in tree["nodes"] if node["location"] == f"Location {n}"],
+                "description": "A sunny clearing beside the river"
+            }
+            for n in range(12)
+        ]
+    }
+
+
+def build_reading_story(node_count: int) -> StoryForReading:
+    """Reading view of a synthetic story, as returned by /read"""
+    story = build_story(node_count)
+    return StoryForReading(
+        id=story.id,
+        title=story.title,
+        lesson=story.lesson,
+        nodes=[
+            ReadingNode(
+                id=node.id,
+                sceneNumber=node.sceneNumber,
+                title=node.title,
+                text=node.text,
+                imageUrl=f"https://cdn.example.com/scene_{node.id}_final.png",
+                audioUrl=f"https://cdn.example.com/scene_{node.id}.mp3",
+                type=node.type,
+                choices=node.choices,
+                previousNodeId=None
+            )
+            for node in story.tree.nodes
+        ],
+        startNodeId=story.tree.nodes[0].id
+    )
@@ -45,6 +45,17 @@ MAX_REFINEMENTS = 5
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "placeholder_openai_key")
 OPENAI_MODEL = "gpt-4"
 
+# ============================================================================
+# LLM Response Cache
+# ============================================================================
+
+# Completions for identical requests (model, prompts, parameters) are reused
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite3")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+# Least recently used responses are evicted beyond this many
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))
+
 # ============================================================================
 # FAL.ai Configuration
 # ============================================================================
@@ -55,6 +66,33 @@ FAL_AI_MODEL = "flux-pro"
 IMAGE_WIDTH = 768
 IMAGE_HEIGHT = 512
 
+# Batches submit every prompt up front and await at most this many results at once
+FAL_BATCH_CONCURRENCY = int(os.getenv("FAL_BATCH_CONCURRENCY", 4))
+
+# ============================================================================
+# Image Provider Routing
+# ============================================================================
+
+# Provider latency and errors are judged over this sliding window
+IMAGE_ROUTER_WINDOW_SECONDS = int(os.getenv("IMAGE_ROUTER_WINDOW_SECONDS", 300))
+# Calls in the window before a provider can be judged degraded
+IMAGE_ROUTER_MIN_SAMPLES = int(os.getenv("IMAGE_ROUTER_MIN_SAMPLES", 4))
+# A provider is skipped while its error rate is above this...
+IMAGE_ROUTER_MAX_ERROR_RATE = float(os.getenv("IMAGE_ROUTER_MAX_ERROR_RATE", 0.5))
+# ...or its p95 latency is above the budget of the requested quality tier
+IMAGE_DRAFT_LATENCY_BUDGET_SECONDS = float(os.getenv("IMAGE_DRAFT_LATENCY_BUDGET_SECONDS", 20))
+IMAGE_FINAL_LATENCY_BUDGET_SECONDS = float(os.getenv("IMAGE_FINAL_LATENCY_BUDGET_SECONDS", 90))
+# Scene drafts are rendered at this fraction of the final width and height
+# (background drafts stay full size so their seed re-renders the same composition)
+IMAGE_DRAFT_SCALE = float(os.getenv("IMAGE_DRAFT_SCALE", 0.5))
+
+# ============================================================================
+# Comic Generation
+# ============================================================================
+
+# Batches per run for panels whose image failed (later runs resume the rest)
+COMIC_PANEL_ATTEMPTS = int(os.getenv("COMIC_PANEL_ATTEMPTS", 2))
+
 # ============================================================================
 # Database Configuration (for future use)
 # ============================================================================
@@ -76,3 +114,123 @@ ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
 DEFAULT_AGE_GROUP = "5-12"
 DEFAULT_TEMPERATURE = 0.7
 DEFAULT_MAX_TOKENS = 2000
+
+# ============================================================================
+# Story Generation
+# ============================================================================
+
+# Targeted LLM "fix this JSON" attempts after local tree repair, before giving up
+STORY_REPAIR_MAX_LLM_ATTEMPTS = int(os.getenv("STORY_REPAIR_MAX_LLM_ATTEMPTS", 1))
+
+# ============================================================================
+# Story Library
+# ============================================================================
+
+# Seconds a story list total is reused before counting again
+STORY_LIST_TOTAL_TTL = int(os.getenv("STORY_LIST_TOTAL_TTL", 30))
+
+# Reading time histogram bucket edges in seconds (last bucket is open-ended)
+READING_TIME_HISTOGRAM_BUCKETS = [60, 180, 300, 600, 900, 1800]
+
+# ============================================================================
+# Reading Progress
+# ============================================================================
+
+# Progress is buffered in the worker process that received it. Step saves
+# (POST /reading-progress/steps) are sequenced against that buffer, so with
+# several workers a reader's requests must reach the same worker (sticky
+# sessions, e.g. by readerId); otherwise a step can be checked against stored
+# progress up to READING_PROGRESS_MAX_DELAY_SECONDS old and be reported as a
+# gap or conflict.
+# Buffered progress is written once a reader is idle this long...
+READING_PROGRESS_IDLE_SECONDS = float(os.getenv("READING_PROGRESS_IDLE_SECONDS", 5))
+# ...and never stays unwritten longer than this
+READING_PROGRESS_MAX_DELAY_SECONDS = float(os.getenv("READING_PROGRESS_MAX_DELAY_SECONDS", 30))
+
+# ============================================================================
+# Generation Deduplication
+# ============================================================================
+
+# Identical generation requests (same story, operation and input) share one
+# in-flight provider call; its result is also reused for this many seconds
+GENERATION_RESULT_REUSE_SECONDS = float(os.getenv("GENERATION_RESULT_REUSE_SECONDS", 10))
+
+# ============================================================================
+# Story Versions
+# ============================================================================
+
+# Tree snapshots kept per story so conflict responses can include a diff
+STORY_VERSION_HISTORY_SIZE = int(os.getenv("STORY_VERSION_HISTORY_SIZE", 20))
+# Retries when an unconditional save races another writer for the next version
+STORY_VERSION_CAS_ATTEMPTS = int(os.getenv("STORY_VERSION_CAS_ATTEMPTS", 5))
+
+# ============================================================================
+# Edit Journal
+# ============================================================================
+
+# A full tree snapshot is journaled after this many deltas
+EDIT_JOURNAL_SNAPSHOT_INTERVAL = int(os.getenv("EDIT_JOURNAL_SNAPSHOT_INTERVAL", 25))
+# Edits that can be undone in a row
+EDIT_JOURNAL_UNDO_DEPTH = int(os.getenv("EDIT_JOURNAL_UNDO_DEPTH", 50))
+# Replayed journal heads kept in memory
+EDIT_JOURNAL_CACHE_SIZE = int(os.getenv("EDIT_JOURNAL_CACHE_SIZE", 256))
+
+# ============================================================================
+# Story Analysis
+# ============================================================================
+
+# Root-to-ending paths enumerated per story before giving up
+STORY_ANALYSIS_MAX_PATHS = int(os.getenv("STORY_ANALYSIS_MAX_PATHS", 1000))
+# Story versions whose analysis is kept in memory
+STORY_ANALYSIS_CACHE_SIZE = int(os.getenv("STORY_ANALYSIS_CACHE_SIZE", 256))
+
+# ============================================================================
+# Reading Prefetch
+# ============================================================================
+
+# Remembered asset sizes (URLs are immutable per image/audio version)
+ASSET_SIZE_CACHE_SIZE = int(os.getenv("ASSET_SIZE_CACHE_SIZE", 10000))
+ASSET_SIZE_TIMEOUT_SECONDS = float(os.getenv("ASSET_SIZE_TIMEOUT_SECONDS", 5))
+
+# ============================================================================
+# Offline Story Packages
+# ============================================================================
+
+STORY_PACKAGE_PATH = os.getenv("STORY_PACKAGE_PATH", "data/packages")
+# Longest side and JPEG quality of scene images inside a package
+STORY_PACKAGE_IMAGE_MAX_SIZE = int(os.getenv("STORY_PACKAGE_IMAGE_MAX_SIZE", 1024))
+STORY_PACKAGE_IMAGE_QUALITY = int(os.getenv("STORY_PACKAGE_IMAGE_QUALITY", 80))
+
+# ============================================================================
+# Serialization
+# ============================================================================
+
+# JSON backend for API responses and JSON file storage: "pydantic", "orjson" or "json"
+JSON_SERIALIZER = os.getenv("JSON_SERIALIZER", "pydantic")
+# fsync JSON storage writes before the atomic rename (off trades durability on power loss for speed)
+JSON_STORAGE_FSYNC = os.getenv("JSON_STORAGE_FSYNC", "true").lower() == "true"
+
+# ============================================================================
+# HTTP Caching
+# ============================================================================
+
+# How long (seconds) a response validator (ETag/Last-Modified) may answer
+# conditional GETs without rebuilding the response. Writes through the API
+# invalidate it immediately, but only in the worker that handled them; story
+# views also compare the stored story version, other views (locations, preset
+# characters) are stale in other workers for up to this long
+HTTP_CACHE_VALIDATOR_TTL = int(os.getenv("HTTP_CACHE_VALIDATOR_TTL", 30))
+
+# Cache-Control policies
+COMPLETED_STORY_CACHE_CONTROL = os.getenv("COMPLETED_STORY_CACHE_CONTROL", "public, max-age=300, stale-while-revalidate=86400")
+DRAFT_STORY_CACHE_CONTROL = "no-cache"
+PRESET_CHARACTERS_CACHE_CONTROL = os.getenv("PRESET_CHARACTERS_CACHE_CONTROL", "public, max-age=86400")
+
+# ============================================================================
+# Response Compression
+# ============================================================================
+
+# Responses smaller than this (bytes) are sent uncompressed
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", 1024))
+GZIP_COMPRESSION_LEVEL = int(os.getenv("GZIP_COMPRESSION_LEVEL", 6))
+BROTLI_COMPRESSION_QUALITY = int(os.getenv("BROTLI_COMPRESSION_QUALITY", 5))
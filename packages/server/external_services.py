@@ -4,11 +4,15 @@ External API service layer for OpenAI and FAL.ai integration
 
 import json
 import os
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 import openai
 from dotenv import load_dotenv
 
+import config
+from llm_cache import LLMResponseCache
+
 load_dotenv()
 
 
@@ -19,6 +23,7 @@ class OpenAIService:
         """Initialize OpenAI service with API key from environment"""
         self.api_key = os.getenv("OPENAI_API_KEY", "placeholder_openai_key")
         self.model = "gpt-5"
+        self.response_cache = LLMResponseCache()
         
         # Initialize OpenAI client if API key is available
         if self.api_key != "placeholder_openai_key":
@@ -78,11 +83,71 @@ class OpenAIService:
             print(f"Error in generate_branched_story: {str(e)}")
             raise Exception(f"OpenAI API call failed: {str(e)}")
 
+    def repair_story_tree(
+        self,
+        tree_data: Dict[str, Any],
+        validation_errors: List[str],
+        system_prompt: str,
+        user_prompt_template: str
+    ) -> Dict[str, Any]:
+        """
+        Ask the model to fix a story tree that failed validation
+
+        Only the tree and the validation errors are sent, so the call is much
+        cheaper than regenerating the whole story.
+
+        Args:
+            tree_data: Story tree with "nodes" and "edges"
+            validation_errors: Errors reported by tree validation
+            system_prompt: System prompt for the repair
+            user_prompt_template: User prompt template with {validation_errors} and {tree_json}
+
+        Returns:
+            Corrected tree dictionary with "nodes" and "edges"
+
+        Raises:
+            Exception: If OpenAI API key is not configured or the response is invalid
+        """
+        # Check if OpenAI API key is configured
+        if self.api_key == "placeholder_openai_key" or not self.api_key:
+            raise Exception("OpenAI API key is not configured. Please set OPENAI_API_KEY environment variable.")
+
+        try:
+            user_prompt = user_prompt_template.format(
+                validation_errors="\n".join(f"- {error}" for error in validation_errors),
+                tree_json=json.dumps(tree_data, separators=(",", ":"))
+            )
+
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                response_format={"type": "json_object"},
+            )
+
+            repaired = json.loads(response.choices[0].message.content)
+            # Accept both {"nodes", "edges"} and {"tree": {...}}
+            if "tree" in repaired and "nodes" not in repaired:
+                repaired = repaired["tree"]
+            if not isinstance(repaired.get("nodes"), list):
+                raise Exception("Repaired tree has no node list")
+            return repaired
+
+        except json.JSONDecodeError as e:
+            print(f"Error parsing JSON response: {str(e)}")
+            raise Exception(f"Failed to parse OpenAI response: {str(e)}")
+        except Exception as e:
+            print(f"Error in repair_story_tree: {str(e)}")
+            raise Exception(f"OpenAI API call failed: {str(e)}")
+
     def generate_scenes(
         self,
         topic: str,
         system_prompt: str,
-        user_prompt: str
+        user_prompt: str,
+        use_cache: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Generate educational scenes using OpenAI API
@@ -91,6 +156,7 @@ class OpenAIService:
             topic: Educational topic
             system_prompt: System prompt for the AI
             user_prompt: User prompt template
+            use_cache: Reuse the response to an identical earlier request
             
         Returns:
             List of scene dictionaries
@@ -103,19 +169,14 @@ class OpenAIService:
             raise Exception("OpenAI API key is not configured. Please set OPENAI_API_KEY environment variable.")
         
         try:
-            # Make actual API call to OpenAI
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+            # Make actual API call to OpenAI (or reuse the cached response)
+            scenes_data = self._create_json_completion(
+                system_prompt,
+                user_prompt,
+                use_cache=use_cache,
                 temperature=0.7,
                 max_tokens=2000
             )
-            
-            # Parse the JSON response
-            scenes_data = json.loads(response.choices[0].message.content)
             return scenes_data
             
         except json.JSONDecodeError as e:
@@ -130,7 +191,8 @@ class OpenAIService:
         original_scenes: List[Dict[str, Any]],
         feedback: List[Dict[str, str]],
         system_prompt: str,
-        user_prompt: str
+        user_prompt: str,
+        use_cache: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Refine scenes based on parent feedback
@@ -140,6 +202,7 @@ class OpenAIService:
             feedback: List of parent feedback
             system_prompt: System prompt for refinement
             user_prompt: User prompt template
+            use_cache: Reuse the response to an identical earlier request
             
         Returns:
             Refined list of scenes
@@ -159,18 +222,13 @@ class OpenAIService:
                 feedback=feedback_text
             )
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": formatted_user_prompt}
-                ],
+            refined_scenes = self._create_json_completion(
+                system_prompt,
+                formatted_user_prompt,
+                use_cache=use_cache,
                 temperature=0.7,
                 max_tokens=2000
             )
-            
-            # Parse the JSON response
-            refined_scenes = json.loads(response.choices[0].message.content)
             return refined_scenes
             
         except json.JSONDecodeError as e:
@@ -180,12 +238,14 @@ class OpenAIService:
             print(f"Error in refine_scenes: {str(e)}")
             raise Exception(f"OpenAI API call failed: {str(e)}")
 
-    def generate_background_descriptions(self, story_nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def generate_background_descriptions(self, story_nodes: List[Dict[str, Any]], use_cache: bool = True) -> List[Dict[str, Any]]:
         """
         Generate background descriptions for story nodes using OpenAI
         
         Args:
             story_nodes: List of story nodes with location information
+            use_cache: Reuse the response to an identical earlier request
+              (e.g. when the background setup page is reloaded)
             
         Returns:
             List of background descriptions with location mapping
@@ -217,28 +277,26 @@ class OpenAIService:
                 story_info=json.dumps(story_info, indent=2)
             )
             
-            # Make API call to OpenAI
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": BACKGROUND_DESCRIPTION_SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt}
-                ],
+            def parse(content: str) -> List[Dict[str, Any]]:
+                content = content.strip()
+                print(f"OpenAI Response: {content}")  # Debug output
+                
+                # Try to extract JSON from the response if it's wrapped in markdown
+                if content.startswith("```json"):
+                    content = content[7:]  # Remove ```json
+                if content.endswith("```"):
+                    content = content[:-3]  # Remove ```
+                return json.loads(content)
+            
+            # Make API call to OpenAI (or reuse the cached response)
+            background_descriptions = self._create_json_completion(
+                BACKGROUND_DESCRIPTION_SYSTEM_PROMPT,
+                user_prompt,
+                parse=parse,
+                use_cache=use_cache,
                 temperature=0.7,
                 max_tokens=2000
             )
-            
-            # Parse the JSON response
-            content = response.choices[0].message.content.strip()
-            print(f"OpenAI Response: {content}")  # Debug output
-            
-            # Try to extract JSON from the response if it's wrapped in markdown
-            if content.startswith("```json"):
-                content = content[7:]  # Remove ```json
-            if content.endswith("```"):
-                content = content[:-3]  # Remove ```
-            
-            background_descriptions = json.loads(content)
             return background_descriptions
             
         except json.JSONDecodeError as e:
@@ -290,6 +348,34 @@ class OpenAIService:
     # Helper Methods
     # ========================================================================
 
+    def _create_json_completion(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        parse: Callable[[str], Any] = json.loads,
+        use_cache: bool = True,
+        **params: Any
+    ) -> Any:
+        """
+        Chat completion parsed with `parse`, served from the response cache when possible
+        
+        The cache key covers the model, both prompts and params; only
+        responses that parse are cached.
+        """
+        def create() -> Any:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                **params
+            )
+            return parse(response.choices[0].message.content)
+        
+        key = self.response_cache.key(self.model, system_prompt, user_prompt, **params)
+        return self.response_cache.get_or_create(key, create, use_cache)
+
     def _format_feedback(self, original_scenes: List[Dict[str, Any]], feedback: List[Dict[str, str]]) -> str:
         """Format feedback for API call"""
         feedback_text = ""
@@ -720,6 +806,20 @@ class ElevenLabsService:
             raise Exception(f"Eleven Labs audio generation failed: {str(e)}")
 
 
+class BatchImageResult:
+    """Outcome of one prompt in a FAL.ai batch"""
+
+    def __init__(self, index: int, prompt: str):
+        self.index = index      # Position of the prompt in the batch
+        self.prompt = prompt
+        self.url: Optional[str] = None
+        self.error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.url is not None
+
+
 class FALAIService:
     """Service for FAL.ai image generation API"""
 
@@ -736,7 +836,15 @@ class FALAIService:
         else:
             self.client = None
 
-    def generate_image(self, prompt: str, width: int = 768, height: int = 512) -> Optional[str]:
+    def generate_image(
+        self,
+        prompt: str,
+        width: int = 768,
+        height: int = 512,
+        model: Optional[str] = None,
+        steps: Optional[int] = None,
+        seed: Optional[int] = None
+    ) -> Optional[str]:
         """
         Generate background image using FAL.ai
         
@@ -744,6 +852,9 @@ class FALAIService:
             prompt: Detailed image generation prompt
             width: Image width (default 768)
             height: Image height (default 512)
+            model: FAL.ai model (default fal-ai/flux/dev)
+            steps: Inference steps (default 28; fewer is faster and cheaper)
+            seed: Noise seed (the same seed and prompt give a similar composition)
             
         Returns:
             URL to generated image or None if failed
@@ -755,44 +866,112 @@ class FALAIService:
             
             # Make actual API call to FAL.ai using the correct format
             handler = self.client.submit(
-                "fal-ai/flux/dev",  # Use the correct model name
-                arguments={
-                    "prompt": prompt,
-                    "image_size": {"width": width, "height": height},
-                    "num_inference_steps": 28,
-                    "guidance_scale": 3.5
-                }
+                model or self.model,
+                arguments=self._arguments(prompt, width, height, steps, seed)
             )
             
             # Wait for the result and get the image URL
-            result = handler.get()
-            if result and "images" in result and len(result["images"]) > 0:
-                return result["images"][0]["url"]
-            else:
-                raise Exception("No image generated from FAL.ai")
+            return self._image_url(handler.get())
             
         except Exception as e:
             print(f"Error in generate_image: {str(e)}")
             raise Exception(f"FAL.ai image generation failed: {str(e)}")
 
+    def _arguments(
+        self,
+        prompt: str,
+        width: int,
+        height: int,
+        steps: Optional[int] = None,
+        seed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """FAL.ai request arguments for one image"""
+        arguments = {
+            "prompt": prompt,
+            "image_size": {"width": width, "height": height},
+            "num_inference_steps": steps or 28,
+            "guidance_scale": 3.5
+        }
+        if seed is not None:
+            arguments["seed"] = seed
+        return arguments
+    
+    @staticmethod
+    def _image_url(result: Any) -> str:
+        """Image URL from a FAL.ai result"""
+        if result and "images" in result and len(result["images"]) > 0:
+            return result["images"][0]["url"]
+        raise Exception("No image generated from FAL.ai")
+
     def generate_batch_images(
         self,
         prompts: List[str],
         width: int = 768,
-        height: int = 512
-    ) -> List[Optional[str]]:
+        height: int = 512,
+        max_concurrency: int = config.FAL_BATCH_CONCURRENCY
+    ) -> List[BatchImageResult]:
         """
-        Generate multiple comic panel images
+        Generate multiple comic panel images as one batch
         
         Args:
             prompts: List of image generation prompts
             width: Image width
             height: Image height
+            max_concurrency: Most results awaited at once
             
         Returns:
-            List of image URLs
+            One result per prompt, in input order; failed prompts carry an
+            error instead of a URL
         """
-        return [self.generate_image(prompt, width, height) for prompt in prompts]
+        return sorted(self.iter_batch_images(prompts, width, height, max_concurrency), key=lambda result: result.index)
+
+    def iter_batch_images(
+        self,
+        prompts: List[str],
+        width: int = 768,
+        height: int = 512,
+        max_concurrency: int = config.FAL_BATCH_CONCURRENCY
+    ) -> Iterator[BatchImageResult]:
+        """
+        Generate a batch of images, yielding each result as it completes
+        
+        Every prompt is submitted to the FAL.ai queue up front, so the whole
+        batch renders in parallel on FAL's side; the handles are then awaited
+        on up to max_concurrency threads. A prompt that fails to submit or
+        render is yielded with its error and does not affect the others.
+        
+        Raises:
+            Exception: If the FAL.ai API key is not configured
+        """
+        if self.api_key == "placeholder_fal_ai_key" or not self.api_key:
+            raise Exception("FAL.ai API key is not configured. Please set FAL_KEY environment variable.")
+        
+        results = [BatchImageResult(index, prompt) for index, prompt in enumerate(prompts)]
+        handles = {}
+        for result in results:
+            try:
+                handles[result.index] = self.client.submit(self.model, arguments=self._arguments(result.prompt, width, height))
+            except Exception as e:
+                result.error = f"FAL.ai submission failed: {str(e)}"
+                yield result
+        if not handles:
+            return
+        
+        print(f"🎨 Submitted {len(handles)} FAL.ai image(s), awaiting results", flush=True)
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(handles))), thread_name_prefix="fal-batch")
+        try:
+            futures = {executor.submit(handle.get): results[index] for index, handle in handles.items()}
+            for future in as_completed(futures):
+                result = futures[future]
+                try:
+                    result.url = self._image_url(future.result())
+                except Exception as e:
+                    print(f"Error in batch image {result.index}: {str(e)}")
+                    result.error = f"FAL.ai image generation failed: {str(e)}"
+                yield result
+        finally:
+            # A caller that stops iterating early does not wait for the rest
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def check_image_status(self, image_url: str) -> Dict[str, Any]:
         """
@@ -25,12 +25,13 @@ class GeminiService:
             self.client = genai.Client(api_key=self.api_key)
             self.model = "gemini-2.5-flash-image"
     
-    def generate_image(self, prompt: str) -> Optional[str]:
+    def generate_image(self, prompt: str, model: Optional[str] = None) -> Optional[str]:
         """
         Generate an image using Gemini
         
         Args:
             prompt: Text prompt for image generation
+            model: Gemini image model (default gemini-2.5-flash-image)
             
         Returns:
             Base64 encoded image data or None if failed
@@ -42,7 +43,7 @@ class GeminiService:
             print(f"🎨 Generating image with Gemini: {prompt[:100]}...")
             
             response = self.client.models.generate_content(
-                model=self.model,
+                model=model or self.model,
                 contents=[prompt],
             )
             
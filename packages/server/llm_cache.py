@@ -0,0 +1,154 @@
+"""
+LLM Response Cache
+SQLite cache of parsed chat completion results, keyed by a hash of the whole request
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import config
+
+_MISSING = object()
+
+
+class LLMResponseCache:
+    """
+    Content-hash keyed cache of LLM responses
+
+    The key covers the model, both prompts and every sampling parameter, so
+    any change to a master prompt template or to the story data in the user
+    prompt is a different entry. Entries expire after ttl_seconds and the
+    least recently used ones are evicted beyond max_entries. The database is
+    opened on first use.
+    """
+
+    def __init__(
+        self,
+        path: str = config.LLM_CACHE_PATH,
+        ttl_seconds: int = config.LLM_CACHE_TTL_SECONDS,
+        max_entries: int = config.LLM_CACHE_MAX_ENTRIES,
+        enabled: bool = config.LLM_CACHE_ENABLED
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, system_prompt: str, user_prompt: str, **params: Any) -> str:
+        """Hash of a completion request"""
+        request = json.dumps(
+            {"model": model, "system": system_prompt, "user": user_prompt, "params": params},
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "create table if not exists responses ("
+                "key text primary key, value text not null, created_at real not null, "
+                "last_used_at real not null, hits integer not null default 0)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def get(self, key: str) -> Any:
+        """
+        Cached response for a key
+
+        Returns:
+            The response, or None on a miss (including expired entries)
+        """
+        value = self._get(key)
+        return None if value is _MISSING else value
+
+    def _get(self, key: str) -> Any:
+        with self._lock:
+            db = self._db()
+            row = db.execute("select value, created_at from responses where key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    db.execute("delete from responses where key = ?", (key,))
+                    db.commit()
+                self.misses += 1
+                return _MISSING
+
+            db.execute("update responses set last_used_at = ?, hits = hits + 1 where key = ?", (now, key))
+            db.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a response, evicting the least recently used beyond max_entries"""
+        with self._lock:
+            db = self._db()
+            now = time.time()
+            db.execute(
+                "insert or replace into responses (key, value, created_at, last_used_at) values (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            excess = db.execute("select count(*) from responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                db.execute(
+                    "delete from responses where key in (select key from responses order by last_used_at limit ?)",
+                    (excess,)
+                )
+                self.evictions += excess
+            db.commit()
+
+    def get_or_create(self, key: str, create, use_cache: bool = True) -> Any:
+        """
+        Cached response, or create() stored for next time
+
+        Args:
+            create: Makes the LLM call and returns the parsed response;
+                exceptions propagate and nothing is cached
+            use_cache: False skips the lookup and the store for this call
+        """
+        if not (self.enabled and use_cache):
+            return create()
+
+        value = self._get(key)
+        if value is not _MISSING:
+            return value
+        value = create()
+        self.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss accounting since startup plus the stored entry count"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "entries": None
+            }
+            if self._connection is not None:
+                stats["entries"] = self._connection.execute("select count(*) from responses").fetchone()[0]
+        return stats
+
+    def clear(self) -> None:
+        """Drop every cached response"""
+        with self._lock:
+            self._db().execute("delete from responses")
+            self._db().commit()
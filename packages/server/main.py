@@ -15,6 +15,8 @@ load_dotenv('.env')
 
 # Import routes from organized structure
 from app.api import router
+from app.api.compression import CompressionMiddleware
+from app.api.story_routes import story_service
 
 # Create FastAPI app
 app = FastAPI(
@@ -34,6 +36,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses (brotli when available, otherwise gzip)
+app.add_middleware(CompressionMiddleware)
+
 # Include routes
 app.include_router(router)
 
@@ -85,12 +90,18 @@ async def startup_event():
     print(f"OpenAI API Key: {'configured' if os.getenv('OPENAI_API_KEY') and os.getenv('OPENAI_API_KEY') != 'placeholder_openai_key' else 'not configured'}")
     print(f"FAL.ai API Key: {'configured' if os.getenv('FAL_KEY') != 'placeholder_fal_ai_key' else 'placeholder'}")
     print("=" * 60)
+    
+    # Background writer for buffered reading progress
+    story_service.progress_buffer.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     print("Fable Tales Story API shutting down...")
+    
+    # Write any reading progress still buffered
+    story_service.progress_buffer.stop()
 
 
 # ============================================================================
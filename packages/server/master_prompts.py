@@ -179,6 +179,34 @@ Guidelines:
 
 Return ONLY the JSON object with 5-10 nodes, appropriate edges, characters, and locations. No additional text."""
 
+STORY_REPAIR_SYSTEM_PROMPT = """You are fixing the JSON structure of an interactive branching Fable tale.
+
+You will receive a story tree and a list of validation errors. Return the corrected tree.
+
+RULES:
+- Fix ONLY what the validation errors require; keep all titles, texts, locations and scene numbers unchanged
+- Keep existing node and choice IDs wherever possible
+- Must have EXACTLY 1 "start" node and EXACTLY 1 "good_ending" node
+- "good_ending" and "bad_ending" nodes have NO choices
+- Every choice has a unique "id" and a "nextNodeId" that references an existing node
+- Create exactly one edge per choice: {"from": "source_node_id", "to": "target_node_id", "choiceId": "choice_id"}
+
+Return ONLY a JSON object with this exact structure:
+{
+    "nodes": [...],
+    "edges": [...]
+}"""
+
+STORY_REPAIR_USER_PROMPT_TEMPLATE = """The following story tree failed validation.
+
+Validation errors:
+{validation_errors}
+
+Story tree:
+{tree_json}
+
+Return ONLY the corrected tree JSON object. No additional text."""
+
 # ========================================================================
 # Background Generation Prompts
 # ========================================================================
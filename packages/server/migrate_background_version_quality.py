@@ -0,0 +1,42 @@
+"""
+Migration script to add draft/final metadata to 'background_versions'.
+
+Add the columns in the Supabase SQL editor first:
+
+    alter table background_versions add column if not exists quality text not null default 'final';
+    alter table background_versions add column if not exists prompt text;
+    alter table background_versions add column if not exists seed bigint;
+    alter table background_versions add column if not exists model text;
+    alter table background_versions add column if not exists upgraded_from text;
+
+Existing versions were all rendered at full quality, so the 'final' default
+is correct for them and there is nothing to backfill. Draft previews record
+their prompt, seed and model so that selecting one can re-render it at
+final quality on the same model (a seed only reproduces a composition on the
+model that rendered it); drafts without a seed (Gemini) are not upgraded.
+The final render points back at its draft through upgraded_from.
+This script checks that the columns are readable.
+"""
+
+from app.storage.supabase_data_manager import SupabaseDataManager
+
+
+def migrate_background_version_quality():
+    """Verify the background_versions quality columns"""
+    data_manager = SupabaseDataManager()
+
+    try:
+        result = data_manager.supabase.table("background_versions").select(
+            "version_id,quality,prompt,seed,model,upgraded_from"
+        ).execute()
+        drafts = sum(1 for row in result.data if row.get("quality") == "draft")
+        print(f"\n✅ Migration completed successfully! ({len(result.data)} versions, {drafts} drafts)")
+
+    except Exception as e:
+        print(f"❌ Error during migration: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    print("Checking background_versions columns...")
+    migrate_background_version_quality()
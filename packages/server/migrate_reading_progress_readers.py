@@ -0,0 +1,36 @@
+"""
+Migration script to key 'reading_progress' by reader.
+
+Add the column in the Supabase SQL editor first:
+
+    alter table reading_progress add column if not exists reader_id text;
+    create index if not exists reading_progress_story_reader
+        on reading_progress (story_id, reader_id, last_read_at desc);
+
+Progress rows are now saved per (story, reader) with the ID
+progress_{story_id}_{reader_id}, so readers no longer overwrite each other.
+Rows saved before this change have no reader; they are still returned as a
+story's latest progress until that story's readers save again, so there is
+nothing to backfill. This script checks that the column is readable.
+"""
+
+from app.storage.supabase_data_manager import SupabaseDataManager
+
+
+def migrate_reading_progress_readers():
+    """Verify the reading_progress reader_id column"""
+    data_manager = SupabaseDataManager()
+
+    try:
+        result = data_manager.supabase.table("reading_progress").select("id,reader_id").execute()
+        legacy = sum(1 for row in result.data if row.get("reader_id") is None)
+        print(f"\n✅ Migration completed successfully! ({len(result.data)} progress rows, {legacy} without a reader)")
+
+    except Exception as e:
+        print(f"❌ Error during migration: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    print("Checking reading_progress columns...")
+    migrate_reading_progress_readers()
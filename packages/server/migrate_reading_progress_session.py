@@ -0,0 +1,34 @@
+"""
+Migration script to add the reading session to 'reading_progress'.
+
+Add the column in the Supabase SQL editor first:
+
+    alter table reading_progress add column if not exists session_id text;
+
+Step-based progress saves (POST /reading-progress/steps) record the client's
+sessionId so that a resent step of the current session is recognised as a
+replay and a new session starts over at step 1. Whole-progress saves carry
+no session and store null, so there is nothing to backfill. This script
+checks that the column is readable.
+"""
+
+from app.storage.supabase_data_manager import SupabaseDataManager
+
+
+def migrate_reading_progress_session():
+    """Verify the reading_progress session_id column"""
+    data_manager = SupabaseDataManager()
+
+    try:
+        result = data_manager.supabase.table("reading_progress").select("id,session_id").execute()
+        sessions = sum(1 for row in result.data if row.get("session_id"))
+        print(f"\n✅ Migration completed successfully! ({len(result.data)} progress rows, {sessions} with a session)")
+
+    except Exception as e:
+        print(f"❌ Error during migration: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    print("Checking reading_progress columns...")
+    migrate_reading_progress_session()
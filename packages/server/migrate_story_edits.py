@@ -0,0 +1,40 @@
+"""
+Migration script to create the 'story_edits' journal table.
+
+Create the table in the Supabase SQL editor first:
+
+    create table if not exists story_edits (
+        story_id uuid not null references stories(id) on delete cascade,
+        version integer not null,
+        kind text not null check (kind in ('delta', 'snapshot')),
+        payload jsonb not null,
+        created_at timestamptz not null,
+        primary key (story_id, version, kind)
+    );
+
+Rows are only ever inserted. Each journaled tree edit adds the delta for the
+version it created, plus a snapshot every EDIT_JOURNAL_SNAPSHOT_INTERVAL
+deltas. Stories edited before this table existed start their journal with a
+snapshot on their next edit, so there is nothing to backfill; this script
+checks that the table is readable.
+"""
+
+from app.storage.supabase_data_manager import SupabaseDataManager
+
+
+def migrate_story_edits():
+    """Verify the story_edits table"""
+    data_manager = SupabaseDataManager()
+
+    try:
+        result = data_manager.supabase.table("story_edits").select("story_id").limit(1).execute()
+        print(f"\n✅ Migration completed successfully! (story_edits readable, {len(result.data)} sample rows)")
+
+    except Exception as e:
+        print(f"❌ Error during migration: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    print("Checking story_edits table...")
+    migrate_story_edits()
@@ -0,0 +1,35 @@
+"""
+Migration script to create and backfill the 'story_stats' rollup table.
+
+Create the table in the Supabase SQL editor first:
+
+    create table if not exists story_stats (
+        story_id uuid primary key references stories(id) on delete cascade,
+        rollup jsonb not null,
+        updated_at timestamptz not null
+    );
+    alter table reading_completions add column if not exists reader_id text;
+
+The application updates a story's rollup on every reading completion and
+progress save; this script builds rollups for reads recorded before that.
+"""
+
+from app.storage.supabase_data_manager import SupabaseDataManager
+
+
+def migrate_story_stats():
+    """Rebuild the statistics rollup of every story"""
+    data_manager = SupabaseDataManager()
+    
+    try:
+        count = data_manager.rebuild_story_stats()
+        print(f"\n✅ Migration completed successfully! ({count} story rollups written)")
+        
+    except Exception as e:
+        print(f"❌ Error during migration: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    print("Starting backfill of story_stats table...")
+    migrate_story_stats()
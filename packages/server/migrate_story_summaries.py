@@ -0,0 +1,45 @@
+"""
+Migration script to create and backfill the 'story_summaries' table.
+
+Create the table in the Supabase SQL editor first:
+
+    create table if not exists story_summaries (
+        id uuid primary key references stories(id) on delete cascade,
+        title text,
+        lesson text not null,
+        status text not null,
+        cover_image text,
+        scene_count integer not null default 0,
+        read_count integer not null default 0,
+        last_read_at timestamptz,
+        start_node_id uuid,
+        created_at timestamptz not null,
+        updated_at timestamptz not null
+    );
+    create index if not exists story_summaries_recent on story_summaries (status, updated_at desc, id desc);
+    create index if not exists story_summaries_title on story_summaries (status, title nulls first, id);
+    create index if not exists story_summaries_reads on story_summaries (status, read_count desc, id desc);
+
+The application keeps the rows current on save, complete, delete and reading
+completion; this script only fills in rows for stories that already exist.
+"""
+
+from app.storage.supabase_data_manager import SupabaseDataManager
+
+
+def migrate_story_summaries():
+    """Rebuild the summary row of every story"""
+    data_manager = SupabaseDataManager()
+    
+    try:
+        count = data_manager.rebuild_story_summaries()
+        print(f"\n✅ Migration completed successfully! ({count} story summaries written)")
+        
+    except Exception as e:
+        print(f"❌ Error during migration: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    print("Starting backfill of story_summaries table...")
+    migrate_story_summaries()
@@ -0,0 +1,34 @@
+"""
+Migration script to add the 'version' column used for optimistic concurrency.
+
+Add the column in the Supabase SQL editor first:
+
+    alter table stories add column if not exists version integer not null default 0;
+
+Existing stories start at version 0; every save moves a story to its next
+version with a compare-and-set on this column. This script checks that the
+column is readable and reports the stories it covers.
+"""
+
+from app.storage.supabase_data_manager import SupabaseDataManager
+
+
+def migrate_story_versions():
+    """Verify the stories.version column"""
+    data_manager = SupabaseDataManager()
+    
+    try:
+        result = data_manager.supabase.table("stories").select("id,version").execute()
+        unversioned = sum(1 for row in result.data if row.get("version") is None)
+        if unversioned:
+            raise Exception(f"{unversioned} stories have no version; run the ALTER TABLE above")
+        print(f"\n✅ Migration completed successfully! ({len(result.data)} stories versioned)")
+    
+    except Exception as e:
+        print(f"❌ Error during migration: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    print("Checking stories.version column...")
+    migrate_story_versions()
@@ -0,0 +1,59 @@
+"""
+Shared pytest configuration
+"""
+
+import os
+import sys
+
+# Allow `import app`, `import config`, ... when running pytest from any directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The API router builds a StoryService on import, which needs Supabase settings
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+
+import pytest
+
+from app.services.edit_journal import EditJournal
+from app.services.image_router import ImageRouter
+from app.services.image_upgrades import ImageUpgradeQueue
+from app.services.prefetch import AssetSizeCache
+from app.services.progress_buffer import ProgressWriteBuffer
+from app.services.story_package import StoryPackager
+from app.services.story_service import StoryService
+from app.services.story_versions import StoryVersionHistory
+
+
+@pytest.fixture
+def story_service():
+    """
+    Factory for a StoryService around a test data manager
+
+    story_service(data_manager, **attributes) sets every attribute
+    StoryService.__init__ sets, without creating a Supabase client or API
+    clients: the external services are None unless passed in, and any other
+    attribute given replaces the default. Keep in step with __init__.
+    """
+    def build(data_manager, **attributes):
+        service = StoryService.__new__(StoryService)
+        service.data_manager = data_manager
+        # Looked up on each write so tests can swap the data manager's method
+        service.progress_buffer = ProgressWriteBuffer(lambda *args: service.data_manager.save_reading_progress(*args))
+        service.story_packager = StoryPackager()
+        service.asset_sizes = AssetSizeCache()
+        service.version_history = StoryVersionHistory()
+        service.edit_journal = EditJournal(data_manager)
+        service.openai_service = attributes.pop("openai_service", None)
+        service.fal_ai_service = attributes.pop("fal_ai_service", None)
+        service.gemini_service = attributes.pop("gemini_service", None)
+        service.elevenlabs_service = attributes.pop("elevenlabs_service", None)
+        service.image_router = ImageRouter({"fal": service.fal_ai_service, "gemini": service.gemini_service})
+        service.image_upgrades = ImageUpgradeQueue(service._upgrade_location_image)
+        service._listeners = []
+        service._list_totals = {}
+        service.frontend_url = "http://localhost:3000"
+        for name, value in attributes.items():
+            setattr(service, name, value)
+        return service
+
+    return build
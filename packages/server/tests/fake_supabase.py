@@ -0,0 +1,195 @@
+"""
+In-memory stand-in for the Supabase client query builder used by SupabaseDataManager
+"""
+
+from types import SimpleNamespace
+
+from app.storage.supabase_data_manager import SupabaseDataManager
+
+
+def _split_terms(text):
+    """Split a PostgREST logical filter on top-level commas"""
+    terms, depth, quoted, current = [], 0, False, ""
+    for index, char in enumerate(text):
+        if char == '"' and (index == 0 or text[index - 1] != "\\"):
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            terms.append(current)
+            current = ""
+            continue
+        current += char
+    terms.append(current)
+    return terms
+
+
+def _parse_condition(term):
+    """Parse one or_() term into a row predicate"""
+    if term.startswith("and(") and term.endswith(")"):
+        parts = [_parse_condition(part) for part in _split_terms(term[4:-1])]
+        return lambda row: all(part(row) for part in parts)
+
+    column, rest = term.split(".", 1)
+    if rest == "is.null":
+        return lambda row: row.get(column) is None
+    if rest == "not.is.null":
+        return lambda row: row.get(column) is not None
+
+    op, value = rest.split(".", 1)
+    if value.startswith('"'):
+        value = value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+
+    def compare(row):
+        current = row.get(column)
+        if current is None:
+            return False
+        target = type(current)(value) if isinstance(current, (int, float)) else value
+        current = current if isinstance(current, (int, float)) else str(current)
+        return {"eq": current == target, "lt": current < target, "gt": current > target}[op]
+    return compare
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = []
+        self.columns = "*"
+        self.count = None
+        self.order_by = []
+        self.bounds = None
+        self.max_rows = None
+        self.action = "select"
+        self.values = None
+
+    def select(self, columns="*", count=None):
+        self.columns = columns
+        self.count = count
+        return self
+
+    def insert(self, values):
+        self.action, self.values = "insert", values
+        return self
+
+    def upsert(self, values, on_conflict="id"):
+        self.action, self.values, self.key = "upsert", values, on_conflict
+        return self
+
+    def update(self, values):
+        self.action, self.values = "update", values
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] > value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def or_(self, filters):
+        conditions = [_parse_condition(term) for term in _split_terms(filters)]
+        self.filters.append(lambda row: any(condition(row) for condition in conditions))
+        return self
+
+    def order(self, column, desc=False, nullsfirst=False):
+        self.order_by.append((column, desc, nullsfirst))
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def limit(self, count):
+        self.max_rows = count
+        return self
+
+    def execute(self):
+        self.client.queries.append(self)
+        table = self.client.tables.setdefault(self.table, [])
+        if self.action != "select":
+            return SimpleNamespace(data=self._write(table), count=None)
+
+        rows = [row for row in table if all(condition(row) for condition in self.filters)]
+        for column, desc, nullsfirst in reversed(self.order_by):
+            present = sorted((row for row in rows if row.get(column) is not None),
+                             key=lambda row: row[column], reverse=desc)
+            missing = [row for row in rows if row.get(column) is None]
+            rows = missing + present if nullsfirst else present + missing
+        total = len(rows)
+        if self.bounds:
+            rows = rows[self.bounds[0]:self.bounds[1] + 1]
+        if self.max_rows is not None:
+            rows = rows[:self.max_rows]
+        return SimpleNamespace(data=[self._project(row) for row in rows], count=total if self.count else None)
+
+    def _project(self, row):
+        """Selected columns of a row, with "child(columns)" embeds resolved one level deep"""
+        columns = [column.strip() for column in _split_terms(self.columns)]
+        projected = dict(row) if "*" in columns else {}
+        for column in columns:
+            if column.endswith(")"):
+                # Child rows reference the parent as <parent table without the "s">_id
+                child, child_columns = column[:-1].split("(", 1)
+                foreign_key = f"{self.table[:-1]}_id"
+                children = [dict(child_row) for child_row in self.client.tables.get(child, [])
+                            if child_row.get(foreign_key) == row.get("id")]
+                if child_columns != "*":
+                    children = [{key: child_row.get(key) for key in child_columns.split(",")} for child_row in children]
+                projected[child] = children
+            elif column != "*":
+                projected[column] = row.get(column)
+        return projected
+
+
+    def _write(self, table):
+        if self.action in ("insert", "upsert"):
+            values = self.values if isinstance(self.values, list) else [self.values]
+            return [self._write_row(table, row) for row in values]
+
+        matched = [row for row in table if all(condition(row) for condition in self.filters)]
+        if self.action == "update":
+            for row in matched:
+                row.update(self.values)
+        else:
+            table[:] = [row for row in table if row not in matched]
+        return matched
+
+    def _write_row(self, table, values):
+        if self.action == "upsert":
+            for row in table:
+                if row.get(self.key) == values.get(self.key):
+                    row.update(values)
+                    return row
+        table.append(dict(values))
+        return values
+
+
+class FakeSupabase:
+    def __init__(self, tables=None):
+        self.tables = tables or {}
+        self.queries = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def tables_queried(self):
+        return [query.table for query in self.queries]
+
+
+def fake_data_manager(tables=None) -> SupabaseDataManager:
+    """SupabaseDataManager backed by FakeSupabase"""
+    manager = SupabaseDataManager.__new__(SupabaseDataManager)
+    manager.supabase = FakeSupabase(tables)
+    return manager
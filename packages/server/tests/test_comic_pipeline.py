@@ -0,0 +1,89 @@
+"""
+Tests for the checkpointed comic panel pipeline
+"""
+
+from app.services.comic_service import ComicService
+from app.storage.data_manager import DataManager
+from external_services import BatchImageResult
+
+
+class FakeOpenAI:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_image_prompt(self, scene_description, dialogue, characters, visual_elements):
+        self.prompts.append(scene_description)
+        return f"prompt for {scene_description}"
+
+
+class FakeFal:
+    """Fails the prompts in `failing` the given number of times each"""
+
+    def __init__(self, failing=None):
+        self.failing = dict(failing or {})
+        self.batches = []
+
+    def iter_batch_images(self, prompts):
+        self.batches.append(list(prompts))
+        for index, prompt in enumerate(prompts):
+            result = BatchImageResult(index, prompt)
+            if self.failing.get(prompt, 0) > 0:
+                self.failing[prompt] -= 1
+                result.error = "FAL.ai image generation failed: timeout"
+            else:
+                result.url = f"https://fal/{prompt.split()[-1]}.jpg"
+            yield result
+
+
+def _service(tmp_path, fal):
+    service = ComicService.__new__(ComicService)
+    service.data_manager = DataManager(str(tmp_path))
+    service.openai_service = FakeOpenAI()
+    service.fal_ai_service = fal
+
+    service.data_manager.create_job("job1", "sharing")
+    service.data_manager.update_job_status("job1", status="requires_action", step="comic_generation", progress=70,
+                                           data_update={"scenes": [{"description": f"s{n}"} for n in range(1, 7)],
+                                                        "characters": [{"name": "Mia"}]})
+    return service
+
+
+def test_failed_panels_are_retried_and_resumed_without_redoing_others(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.COMIC_PANEL_ATTEMPTS", 2)
+    fal = FakeFal(failing={"prompt for s5": 2})
+    service = _service(tmp_path, fal)
+
+    failed = service.generate_comic_panels("job1")
+
+    assert failed["status"] == "failed" and "panels 5" in failed["error"]
+    assert fal.batches[1] == ["prompt for s5"]
+    checkpoint = service.data_manager.get_job("job1")["data"]["panel_checkpoint"]
+    assert sorted(checkpoint["images"]) == ["1", "2", "3", "4", "6"]
+    assert "timeout" in checkpoint["errors"]["5"]
+
+    done = service.generate_comic_panels("job1")
+
+    assert done["status"] == "completed"
+    assert fal.batches[2] == ["prompt for s5"]
+    assert len(service.openai_service.prompts) == 6
+    assert [panel["image_url"] for panel in done["comic_panels"]] == [f"https://fal/s{n}.jpg" for n in range(1, 7)]
+    assert service.data_manager.get_comic(done["comic_id"])["panels"] == done["comic_panels"]
+
+    # A completed job returns its comic without generating anything
+    assert service.generate_comic_panels("job1")["comic_id"] == done["comic_id"]
+    assert len(fal.batches) == 3
+
+
+def test_changed_scenes_discard_the_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr("config.COMIC_PANEL_ATTEMPTS", 1)
+    fal = FakeFal(failing={"prompt for s6": 1})
+    service = _service(tmp_path, fal)
+    service.generate_comic_panels("job1")
+
+    service.data_manager.update_job_status("job1", status="requires_action", step="comic_generation",
+                                           data_update={"scenes": [{"description": "new"}]})
+    result = service.generate_comic_panels("job1")
+
+    assert result["status"] == "completed"
+    assert fal.batches[-1] == ["prompt for new"]
+
@@ -0,0 +1,63 @@
+"""
+Tests for response compression and compact story encodings
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.api import story_routes
+from app.api.compression import choose_encoding
+from app.api.http_cache import validator_cache
+from app.api.views import compact_reading_story, compact_story
+from benchmarks.story_fixtures import build_reading_story, build_story
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(story_routes.story_service, "get_story_for_reading", lambda story_id, fields=None: build_reading_story(40))
+    monkeypatch.setattr(story_routes.story_service, "get_story_version", lambda story_id: 1)
+    validator_cache.clear()
+    yield TestClient(main.app)
+    validator_cache.clear()
+
+
+def test_choose_encoding_respects_q_values():
+    assert choose_encoding("gzip, deflate", ["br", "gzip"]) == "gzip"
+    assert choose_encoding("br;q=0.5, gzip;q=0.8", ["br", "gzip"]) == "gzip"
+    assert choose_encoding("gzip;q=0, identity", ["br", "gzip"]) is None
+    assert choose_encoding("*", ["br", "gzip"]) == "br"
+    assert choose_encoding("", ["gzip"]) is None
+
+
+def test_large_json_is_gzipped_and_small_is_not(client):
+    large = client.get("/api/v1/stories/s1/read", headers={"Accept-Encoding": "gzip"})
+    small = client.get("/api/v1/health", headers={"Accept-Encoding": "gzip"})
+    raw = client.get("/api/v1/stories/s1/read", headers={"Accept-Encoding": "identity"})
+
+    assert large.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in large.headers["vary"].lower()
+    assert int(large.headers["content-length"]) < len(raw.content) / 3
+    assert large.json() == raw.json()
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in raw.headers
+
+
+def test_compact_reading_view_keeps_reader_fields(client):
+    full = client.get("/api/v1/stories/s1/read").json()["data"]
+    compact = client.get("/api/v1/stories/s1/read?format=compact").json()["data"]
+
+    node = compact["nodes"][0]
+    assert "sceneNumber" not in node and "lessonMessage" not in node
+    assert set(node["choices"][0]) == {"id", "text", "nextNodeId"}
+    assert [n["id"] for n in compact["nodes"]] == [n["id"] for n in full["nodes"]]
+    assert compact["startNodeId"] == full["startNodeId"]
+
+
+def test_compact_story_drops_edges_only():
+    story = build_story(10)
+    data = compact_story(story)
+
+    assert "edges" not in data["tree"]
+    assert len(data["tree"]["nodes"]) == 10
+    assert compact_reading_story(build_reading_story(3))["nodes"][0]["audioUrl"]
@@ -0,0 +1,140 @@
+"""
+Tests for the story edit journal (undo/redo and change feed)
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.api import story_routes
+from app.models.schemas import NodeCreateRequest, NodeUpdateRequest, TreeBatchRequest
+from app.services.edit_journal import EditJournal, EditJournalError, node_changes
+from app.services.tree_batch import TreeChanges
+from app.storage.story_data_manager import StoryDataManager
+from benchmarks.story_fixtures import build_story
+from tests.fake_supabase import fake_data_manager
+
+NOW = "2024-05-01T10:00:00+00:00"
+
+
+def _service(story_service, data_manager=None, snapshot_interval=25):
+    if data_manager is None:
+        data_manager = fake_data_manager({
+            "stories": [{"id": "s1", "title": "Sharing", "lesson": "Sharing", "theme": "Forest",
+                         "story_format": "Fairy tale", "status": "draft", "created_at": NOW, "updated_at": NOW}],
+            "story_nodes": [
+                {"id": node_id, "story_id": "s1", "scene_number": number, "title": node_id, "text": "...",
+                 "location": "Park", "type": node_type}
+                for number, (node_id, node_type) in enumerate([("n1", "start"), ("n2", "good_ending")], 1)
+            ],
+            "story_choices": [{"id": "c1", "node_id": "n1", "text": "Go", "next_node_id": "n2", "is_correct": True}],
+        })
+    return story_service(data_manager, edit_journal=EditJournal(data_manager, snapshot_interval=snapshot_interval))
+
+
+def _titles(service, story_id="s1"):
+    return [node.title for node in service.data_manager.get_story(story_id).tree.nodes]
+
+
+def test_node_changes_keep_only_changed_fields():
+    before = {"n1": {"id": "n1", "title": "A", "text": "same", "choices": []}}
+    after = {
+        "n1": {"id": "n1", "title": "B", "text": "same", "choices": []},
+        "n2": {"id": "n2", "title": "New", "text": "", "choices": []}
+    }
+
+    assert node_changes(before, after) == {
+        "n1": {"before": {"title": "A"}, "after": {"title": "B"}},
+        "n2": {"before": None, "after": after["n2"]}
+    }
+    assert node_changes(after, before)["n2"] == {"before": after["n2"], "after": None}
+
+
+def test_undo_and_redo_replay_the_journal_without_loading_the_story(story_service):
+    service = _service(story_service)
+    service.update_node("s1", "n1", NodeUpdateRequest(title="Morning"))
+    added = service.add_node("s1", NodeCreateRequest(
+        title="Hint", text="Share?", location="Park", type="choice", parentNodeId="n1", choiceId="c1", choices=[]
+    ))["node"]
+    assert _titles(service) == ["Morning", "n2", "Hint"]
+
+    service.data_manager.supabase.queries.clear()
+    undone = service.undo_edit("s1")
+    assert "story_nodes" not in [query.table for query in service.data_manager.supabase.queries
+                                 if query.action == "select"]
+    assert undone["deletedNodeIds"] == [added.id]
+    assert [choice.nextNodeId for choice in service.data_manager.get_story("s1").tree.nodes[0].choices] == ["n2"]
+
+    service.undo_edit("s1")
+    assert _titles(service) == ["n1", "n2"]
+    with pytest.raises(EditJournalError, match="Nothing to undo"):
+        service.undo_edit("s1")
+
+    redone = service.redo_edit("s1")
+    assert (redone["version"], redone["canUndo"], redone["canRedo"]) == (5, True, True)
+    assert _titles(service) == ["Morning", "n2"]
+
+    # A new edit clears the redo stack
+    service.update_node("s1", "n2", NodeUpdateRequest(text="The end"))
+    with pytest.raises(EditJournalError, match="Nothing to redo"):
+        service.redo_edit("s1")
+
+
+def test_undo_refuses_nodes_changed_outside_the_journal(story_service):
+    service = _service(story_service)
+    service.update_node("s1", "n1", NodeUpdateRequest(title="Morning"))
+
+    story = service.data_manager.get_story("s1")
+    story.tree.nodes[0].title = "Evening"
+    service.data_manager.save_story_tree_changes(story, TreeChanges([story.tree.nodes[0]], [], []))
+
+    with pytest.raises(EditJournalError, match="Node 'n1' was changed"):
+        service.undo_edit("s1")
+
+
+def test_change_feed_collapses_deltas_and_detects_gaps(story_service):
+    service = _service(story_service, snapshot_interval=2)
+    service.update_node("s1", "n1", NodeUpdateRequest(title="Morning"))
+    service.apply_tree_batch("s1", TreeBatchRequest(operations=[
+        {"op": "update", "nodeId": "n1", "text": "Sunny"},
+        {"op": "delete", "nodeId": "n2"},
+    ]))
+    service.update_node("s1", "n1", NodeUpdateRequest(location="Garden"))
+
+    feed = service.get_story_changes("s1", 1)
+    assert feed["complete"] and feed["version"] == 3
+    assert [edit["version"] for edit in feed["edits"]] == [2, 3]
+    assert [(node["id"], node["text"], node["location"]) for node in feed["upsertedNodes"]] == [("n1", "Sunny", "Garden")]
+    assert feed["deletedNodeIds"] == ["n2"]
+
+    # A fresh process rebuilds the head from the latest snapshot plus later deltas
+    head = EditJournal(service.data_manager).head("s1")
+    assert head.version == 3 and head.undo == [1, 2, 3]
+    assert head.nodes["n1"]["location"] == "Garden"
+
+    service.complete_story("s1", "Sunny Morning")
+    assert not service.get_story_changes("s1", 3)["complete"]
+    assert service.get_story_changes("s1", 4)["complete"]
+
+
+def test_json_backend_journal_and_endpoints(tmp_path, monkeypatch, story_service):
+    data_manager = StoryDataManager(str(tmp_path))
+    story = build_story(6)
+    data_manager.save_story(story)
+    service = _service(story_service, data_manager)
+    monkeypatch.setattr(story_routes, "story_service", service)
+    http = TestClient(main.app)
+    node_id = story.tree.nodes[1].id
+
+    edited = http.patch(f"/api/v1/stories/{story.id}/nodes/{node_id}", json={"title": "Renamed"}).json()["data"]
+    undone = http.post(f"/api/v1/stories/{story.id}/undo").json()
+    stale = http.post(f"/api/v1/stories/{story.id}/redo", headers={"If-Match": '"v2"'})
+    nothing = http.post(f"/api/v1/stories/{story.id}/undo").json()
+    feed = http.get(f"/api/v1/stories/{story.id}/changes", params={"since": 2}).json()["data"]
+
+    assert edited["version"] == 2
+    assert undone["success"] and undone["data"]["nodes"][0]["title"] == story.tree.nodes[1].title
+    assert stale.status_code == 409
+    assert nothing["error"]["code"] == "UNDO_UNAVAILABLE"
+    assert feed["complete"] and [node["id"] for node in feed["upsertedNodes"]] == [node_id]
+    assert data_manager.get_story(story.id).tree.nodes[1].title == story.tree.nodes[1].title
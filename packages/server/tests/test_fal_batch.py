@@ -0,0 +1,80 @@
+"""
+Tests for FAL.ai batch image generation
+"""
+
+import threading
+import time
+
+from external_services import FALAIService
+
+
+class FakeHandle:
+    def __init__(self, client, prompt):
+        self.client = client
+        self.prompt = prompt
+
+    def get(self):
+        with self.client.lock:
+            self.client.waiting += 1
+            self.client.peak = max(self.client.peak, self.client.waiting)
+            self.client.events.append(("get", self.prompt))
+        time.sleep(self.client.delays.get(self.prompt, 0.02))
+        with self.client.lock:
+            self.client.waiting -= 1
+        if self.prompt == "broken":
+            raise Exception("render failed")
+        return {"images": [{"url": f"https://fal/{self.prompt}.jpg"}]}
+
+
+class FakeFalClient:
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.events = []
+        self.waiting = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def submit(self, model, arguments):
+        prompt = arguments["prompt"]
+        self.events.append(("submit", prompt))
+        if prompt == "rejected":
+            raise Exception("422 invalid prompt")
+        return FakeHandle(self, prompt)
+
+
+def _service(client):
+    service = FALAIService.__new__(FALAIService)
+    service.api_key = "test-key"
+    service.model = "fal-ai/flux/dev"
+    service.client = client
+    return service
+
+
+def test_batch_submits_up_front_and_keeps_input_order():
+    client = FakeFalClient(delays={"p0": 0.1})
+    prompts = ["p0", "p1", "broken", "p3", "rejected", "p5"]
+
+    results = _service(client).generate_batch_images(prompts, max_concurrency=2)
+
+    assert [action for action, _ in client.events[:6]] == ["submit"] * 6
+    assert [result.prompt for result in results] == prompts
+    assert [result.url for result in results] == [
+        "https://fal/p0.jpg", "https://fal/p1.jpg", None, "https://fal/p3.jpg", None, "https://fal/p5.jpg"
+    ]
+    assert "render failed" in results[2].error and "422" in results[4].error
+    assert client.peak <= 2
+
+
+def test_as_completed_yields_fast_results_first():
+    client = FakeFalClient(delays={"slow": 0.3})
+
+    started = time.monotonic()
+    stream = _service(client).iter_batch_images(["slow", "fast-1", "fast-2"], max_concurrency=3)
+    first = next(stream)
+    first_at = time.monotonic() - started
+    rest = list(stream)
+
+    assert first.prompt.startswith("fast") and first.ok
+    assert first_at < 0.25
+    assert [result.prompt for result in rest][-1] == "slow"
+    assert client.peak == 3
@@ -0,0 +1,98 @@
+"""
+Tests for ?fields= projections and their push-down into SupabaseDataManager
+"""
+
+import pytest
+
+from app.api.views import STORY_FIELDS, parse_fields, project
+from app.storage.story_data_manager import StoryDataManager
+from benchmarks.story_fixtures import build_story
+from tests.fake_supabase import fake_data_manager
+
+NOW = "2024-05-01T10:00:00+00:00"
+
+
+def _tables():
+    stories = [
+        {"id": f"s{i}", "title": None, "lesson": f"Lesson {i}", "theme": "Forest", "story_format": "Fairy tale",
+         "status": "completed", "created_at": f"2024-05-0{i}T10:00:00+00:00", "updated_at": NOW}
+        for i in range(1, 4)
+    ]
+    nodes = [
+        {"id": "n1", "story_id": "s1", "scene_number": 1, "title": "Start", "text": "...", "location": "Park", "type": "start"},
+        {"id": "n2", "story_id": "s1", "scene_number": 2, "title": "End", "text": "...", "location": "Park", "type": "good_ending"},
+    ]
+    choices = [{"id": "c1", "node_id": "n1", "text": "Go", "next_node_id": "n2", "is_correct": True}]
+    completions = [{"id": "r1", "story_id": "s1", "completed_at": NOW}]
+    return {"stories": stories, "story_nodes": nodes, "story_choices": choices, "reading_completions": completions}
+
+
+def _service(story_service):
+    data_manager = fake_data_manager(_tables())
+    data_manager.rebuild_story_summaries()
+    data_manager.supabase.queries.clear()
+    return story_service(data_manager)
+
+
+def test_parse_fields_merges_aliases_and_rejects_unknown():
+    assert parse_fields("title", "status", STORY_FIELDS) == {"id", "title", "status"}
+    assert parse_fields(None, "", STORY_FIELDS) is None
+    with pytest.raises(ValueError, match="Unknown field"):
+        parse_fields("title,secret", None, STORY_FIELDS)
+
+
+def test_list_selects_only_requested_summary_columns(story_service):
+    service = _service(story_service)
+
+    result = service.get_all_stories(10, 0, fields={"id", "title", "status"})
+
+    queries = service.data_manager.supabase.queries
+    assert [query.table for query in queries] == ["story_summaries", "stories"]
+    assert queries[0].columns == "id,lesson,status,title,updated_at"
+    assert result.stories[0].model_dump(include={"id", "title", "status"}) == {"id": "s3", "title": "Lesson 3 Story", "status": "completed"}
+
+
+def test_list_read_count_comes_from_summaries(story_service):
+    service = _service(story_service)
+
+    result = service.get_all_stories(10, 0, fields={"id", "readCount"})
+
+    assert service.data_manager.supabase.tables_queried() == ["story_summaries", "stories"]
+    assert {item.id: item.readCount for item in result.stories} == {"s1": 1, "s2": 0, "s3": 0}
+
+
+def test_story_title_only_does_not_load_tree(story_service):
+    service = _service(story_service)
+
+    story = service.get_story("s1", fields={"id", "title", "status"})
+
+    assert service.data_manager.supabase.tables_queried() == ["stories"]
+    assert project(story, {"id", "title", "status"}) == {"id": "s1", "title": None, "status": "completed"}
+
+
+def test_full_story_still_loads_everything(story_service):
+    service = _service(story_service)
+
+    story = service.get_story("s1")
+
+    assert [node.id for node in story.tree.nodes] == ["n1", "n2"]
+    assert story.tree.nodes[0].choices[0].nextNodeId == "n2"
+
+
+def test_reading_metadata_skips_tree_and_scene_images(story_service):
+    service = _service(story_service)
+
+    reading = service.get_story_for_reading("s1", fields={"id", "title", "lesson"})
+
+    assert service.data_manager.supabase.tables_queried() == ["stories"]
+    assert project(reading, {"id", "title", "lesson"}) == {"id": "s1", "title": "Lesson 1 Story", "lesson": "Lesson 1"}
+
+
+def test_json_backend_accepts_field_selections(tmp_path, story_service):
+    service = story_service(StoryDataManager(str(tmp_path)))
+    story = build_story(4)
+    service.data_manager.save_story(story)
+
+    assert service.get_story(story.id, fields={"id", "title"}).id == story.id
+    listed = service.get_all_stories(10, 0, fields={"id", "status"})
+    assert [item.id for item in listed.stories] == [story.id]
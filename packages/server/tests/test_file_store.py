@@ -0,0 +1,122 @@
+"""
+Stress tests for atomic, locked JSON file writes
+"""
+
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from app import file_store, serialization
+from app.storage.json_storage import JSONStorage
+from app.storage.story_data_manager import StoryDataManager
+from benchmarks.story_fixtures import build_story
+
+
+def _increment(path, times):
+    for _ in range(times):
+        serialization.update_file(path, lambda current: {"count": (current or {"count": 0})["count"] + 1})
+
+
+def _run_threads(count, target):
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+
+def test_concurrent_job_updates_are_not_lost(tmp_path):
+    storage = JSONStorage(str(tmp_path))
+    storage.create_job("job1", {"topic": "sharing"})
+
+    def writer(index):
+        for step in range(20):
+            storage.update_job("job1", data={f"w{index}-{step}": step}, progress=step)
+
+    _run_threads(12, writer)
+
+    data = storage.get_job("job1")["data"]
+    assert sum(1 for key in data if key.startswith("w")) == 12 * 20
+    assert [name for name in os.listdir(tmp_path / "jobs") if name.endswith(".tmp")] == []
+
+
+@pytest.mark.skipif(file_store.fcntl is None, reason="cross-process locks need fcntl")
+def test_worker_processes_serialize_read_modify_write(tmp_path):
+    path = str(tmp_path / "counter.json")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_increment, args=(path, 25)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    _increment(path, 25)
+    for worker in workers:
+        worker.join(60)
+
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    assert serialization.load_file(path) == {"count": 125}
+
+
+def test_readers_never_see_partial_files(tmp_path):
+    path = tmp_path / "story.json"
+    payloads = [{"nodes": [{"id": f"n{n}", "text": "x" * size} for n in range(200)]} for size in (10, 500)]
+    serialization.dump_file(payloads[0], path)
+    stop = threading.Event()
+    errors = []
+
+    def writer():
+        index = 0
+        while not stop.is_set():
+            index += 1
+            serialization.dump_file(payloads[index % 2], path)
+
+    def reader(_):
+        for _ in range(300):
+            try:
+                assert serialization.load_file(path) in payloads
+            except Exception as e:
+                errors.append(e)
+
+    writing = threading.Thread(target=writer)
+    writing.start()
+    _run_threads(4, reader)
+    stop.set()
+    writing.join(10)
+
+    assert errors == []
+
+
+def test_failed_write_keeps_the_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "job.json"
+    serialization.dump_file({"status": "pending"}, path)
+
+    def crash(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(file_store.os, "fsync", crash)
+    with pytest.raises(OSError):
+        file_store.write_bytes(path, serialization.dumps({"status": "completed"}), fsync=True)
+
+    assert serialization.load_file(path) == {"status": "pending"}
+    assert sorted(os.listdir(tmp_path)) == [file_store.LOCK_DIR, "job.json"]
+
+
+def test_story_managers_in_two_workers_share_summaries(tmp_path):
+    first, second = StoryDataManager(str(tmp_path)), StoryDataManager(str(tmp_path))
+    story = build_story(4)
+    first.save_story(story)
+    assert second.get_stories_count() == 1
+
+    completion = {"endingNodeId": story.tree.nodes[-1].id, "endingType": "good",
+                  "totalNodesVisited": 3, "readingTimeSeconds": 60}
+
+    def read(index):
+        manager = (first, second)[index % 2]
+        for _ in range(10):
+            manager.record_reading_completion(story.id, completion)
+
+    _run_threads(4, read)
+
+    assert first.get_story_read_count(story.id) == 40
+    assert StoryDataManager(str(tmp_path))._get_library()[story.id]["readCount"] == 40
+    assert second._get_library()[story.id]["readCount"] == 40
@@ -0,0 +1,109 @@
+"""
+Tests for ETag / Last-Modified handling on the story read endpoints
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.api import story_routes
+from app.api.http_cache import validator_cache
+from app.models.schemas import StoryStatus
+from benchmarks.story_fixtures import build_reading_story, build_story
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = {"read": 0, "story": 0}
+    story = build_story(6)
+    story.version = 1
+
+    def get_story_for_reading(story_id, fields=None):
+        calls["read"] += 1
+        reading_story = build_reading_story(6)
+        reading_story.status = story.status
+        reading_story.updatedAt = story.updatedAt
+        return reading_story
+
+    def get_story(story_id, fields=None):
+        calls["story"] += 1
+        return story
+
+    monkeypatch.setattr(story_routes.story_service, "get_story_for_reading", get_story_for_reading)
+    monkeypatch.setattr(story_routes.story_service, "get_story", get_story)
+    monkeypatch.setattr(story_routes.story_service, "delete_story", lambda story_id: {"deleted": True})
+    monkeypatch.setattr(story_routes.story_service, "get_story_version", lambda story_id: story.version)
+    validator_cache.clear()
+    yield TestClient(main.app), calls, story
+    validator_cache.clear()
+
+
+def test_conditional_get_returns_304_without_storage(client):
+    http, calls, _ = client
+
+    first = http.get("/api/v1/stories/s1/read")
+    etag = first.headers["etag"]
+    second = http.get("/api/v1/stories/s1/read", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200 and second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert calls["read"] == 1
+    assert first.headers["cache-control"].startswith("public")
+    assert "last-modified" in first.headers
+
+
+def test_write_invalidates_validator(client):
+    http, calls, _ = client
+    etag = http.get("/api/v1/stories/s1/read").headers["etag"]
+
+    http.delete("/api/v1/stories/s1")
+    response = http.get("/api/v1/stories/s1/read", headers={"If-None-Match": etag})
+
+    # Rebuilt from storage; content is unchanged so the client still gets a 304
+    assert response.status_code == 304
+    assert calls["read"] == 2
+
+
+def test_status_polls_keep_validators_until_a_job_writes_images(client, monkeypatch):
+    http, calls, _ = client
+    monkeypatch.setattr(story_routes.story_service, "check_scene_image_generation_status",
+                        lambda story_id, job_id=None: {"status": "processing"})
+    etag = http.get("/api/v1/stories/s1/read").headers["etag"]
+
+    for _ in range(3):
+        http.get("/api/v1/stories/s1/scenes/generation-status")
+    assert http.get("/api/v1/stories/s1/read", headers={"If-None-Match": etag}).status_code == 304
+    assert calls["read"] == 1
+
+    # The scene generation job notifies once it has written the image versions
+    story_routes.story_service._notify("s1")
+    http.get("/api/v1/stories/s1/read", headers={"If-None-Match": etag})
+    assert calls["read"] == 2
+
+
+def test_write_by_another_worker_is_seen_through_the_stored_version(client):
+    http, calls, story = client
+    etag = http.get("/api/v1/stories/s1/read").headers["etag"]
+    assert http.get("/api/v1/stories/s1/read", headers={"If-None-Match": etag}).status_code == 304
+
+    # Saved by another worker: this worker's validator was never invalidated
+    story.version = 2
+    response = http.get("/api/v1/stories/s1/read", headers={"If-None-Match": etag})
+
+    # Rebuilt from storage rather than trusted blindly
+    assert calls["read"] == 2
+    assert response.status_code == 304
+
+
+def test_draft_story_must_revalidate_and_honours_if_modified_since(client):
+    http, calls, story = client
+    story.status = StoryStatus.DRAFT
+
+    first = http.get("/api/v1/stories/s1")
+    second = http.get("/api/v1/stories/s1", headers={"If-Modified-Since": first.headers["last-modified"]})
+    stale = http.get("/api/v1/stories/s1", headers={"If-None-Match": 'W/"other"'})
+
+    assert first.headers["cache-control"] == "no-cache"
+    assert second.status_code == 304
+    assert stale.status_code == 200
+    assert calls["story"] == 2
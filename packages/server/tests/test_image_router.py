@@ -0,0 +1,127 @@
+"""
+Tests for quality-tiered image provider routing
+"""
+
+import pytest
+
+from app.services.image_router import ImageRouter, LatencyHistogram
+
+
+class FakeProvider:
+    """Image service double recording its calls"""
+
+    def __init__(self, result, fail=False, configured=True):
+        self.client = object() if configured else None
+        self.result = result
+        self.fail = fail
+        self.calls = []
+
+    def generate_image(self, prompt, **kwargs):
+        self.calls.append(kwargs)
+        if self.fail:
+            raise Exception("provider down")
+        return self.result
+
+
+def _router(fal=None, gemini=None, **kwargs):
+    providers = {
+        "fal": fal or FakeProvider("https://fal/img.jpg"),
+        "gemini": gemini or FakeProvider("aW1hZ2U=")
+    }
+    return ImageRouter(providers, window_seconds=60, min_samples=2, max_error_rate=0.5, **kwargs)
+
+
+def test_tiers_pick_model_and_size():
+    router = _router()
+
+    final = router.generate("background", "A forest", seed=7)
+    draft = router.generate("background", "A forest", quality="draft")
+    scene = router.generate("scene", "Two friends")
+
+    fal_calls = router.providers["fal"].calls
+    assert (final.provider, final.url) == ("fal", "https://fal/img.jpg")
+    assert fal_calls[0] == {"width": 1024, "height": 768, "model": "fal-ai/flux/dev", "steps": 28, "seed": 7}
+    assert draft.quality == "draft" and draft.seed == fal_calls[1].pop("seed")
+    assert fal_calls[1] == {"width": 1024, "height": 768, "model": "fal-ai/flux/dev", "steps": 8}
+    assert (scene.provider, scene.data) == ("gemini", "aW1hZ2U=")
+    router.generate("scene", "Two friends", quality="draft", seed=3)
+    assert fal_calls[2] == {"width": 512, "height": 384, "model": "fal-ai/flux/schnell", "steps": 4, "seed": 3}
+    with pytest.raises(ValueError):
+        router.generate("background", "A forest", quality="poster")
+
+
+def test_failures_fail_over_and_mark_the_provider_degraded():
+    router = _router(fal=FakeProvider(None, fail=True))
+
+    for _ in range(2):
+        image = router.generate("background", "A forest")
+        assert image.provider == "gemini"
+
+    # Two failures in the window: FAL is skipped while a healthy route exists
+    assert router.degraded("fal")
+    calls = len(router.providers["fal"].calls)
+    assert router.generate("background", "A forest", quality="draft").provider == "gemini"
+    assert len(router.providers["fal"].calls) == calls
+    assert router.stats()["fal"]["errorRate"] == 1.0
+
+
+def test_slow_provider_is_degraded_for_drafts_only():
+    router = _router()
+    for _ in range(3):
+        router.histograms["fal"].record(30.0, ok=True)
+
+    assert router.degraded("fal", "draft")
+    assert not router.degraded("fal", "final")
+    assert router.histograms["fal"].percentile(0.95) == 40.0
+    assert router.generate("background", "A forest", quality="draft").provider == "gemini"
+
+
+def test_degraded_providers_are_still_tried_last_and_unconfigured_skipped():
+    router = _router(gemini=FakeProvider(None, configured=False))
+    for _ in range(3):
+        router.histograms["fal"].record(1.0, ok=False)
+
+    assert router.generate("scene", "Two friends").provider == "fal"
+    assert router.providers["gemini"].calls == []
+
+    router.providers["fal"].client = None
+    with pytest.raises(Exception, match="No image provider is configured"):
+        router.generate("scene", "Two friends")
+
+
+def test_histogram_window_expires_samples():
+    histogram = LatencyHistogram(window_seconds=10)
+    histogram.record(0.5, ok=True, now=0)
+    histogram.record(3.0, ok=False, now=5)
+
+    assert histogram.counts(now=6)[:3] == [1, 0, 1]
+    assert histogram.error_rate(now=6) == 0.5
+    assert histogram.samples(now=12) == 1
+    assert histogram.error_rate(now=20) is None
+
+
+class FakeStorage:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.uploads = []
+
+    def upload_image_to_storage(self, url, filename):
+        self.uploads.append(filename)
+        return None if self.fail else f"https://storage/{filename}"
+
+    def upload_base64_image_to_storage(self, data, filename):
+        self.uploads.append(filename)
+        return None if self.fail else f"https://storage/{filename}"
+
+
+def test_service_stores_url_and_base64_images(story_service):
+    service = story_service(FakeStorage())
+    router = _router()
+
+    background = router.generate("background", "A forest")
+    scene = router.generate("scene", "Two friends")
+
+    assert service._store_generated_image(background, "locations/l1") == "https://storage/locations/l1.jpg"
+    assert service._store_generated_image(scene, "scene/n1") == "https://storage/scene/n1.png"
+    service.data_manager = FakeStorage(fail=True)
+    assert service._store_generated_image(background, "locations/l1") is None
@@ -0,0 +1,136 @@
+"""
+Tests for draft location previews and their background upgrade to final quality
+"""
+
+import threading
+
+from app.services.image_upgrades import ImageUpgradeQueue
+from tests.fake_supabase import fake_data_manager
+
+NOW = "2024-05-01T10:00:00+00:00"
+
+
+class FakeFal:
+    def __init__(self, release=None):
+        self.client = object()
+        self.release = release
+        self.calls = []
+
+    def generate_image(self, prompt, **kwargs):
+        self.calls.append(dict(kwargs, prompt=prompt))
+        if self.release:
+            self.release.wait(5)
+        return f"https://fal/{len(self.calls)}.jpg"
+
+
+def _version(version_id, quality, url, **extra):
+    return dict({"id": f"row-{version_id}", "background_id": "l1", "version_id": version_id,
+                 "image_url": url, "created_at": NOW, "quality": quality}, **extra)
+
+
+def _service(story_service, fal):
+    data_manager = fake_data_manager({
+        "backgrounds": [{"id": "l1", "story_id": "s1", "name": "Forest", "description": "A forest",
+                         "image_url": "https://fal/final-0.jpg", "status": "completed", "selected_version_id": "f0"}],
+        "background_versions": [
+            _version("f0", "final", "https://fal/final-0.jpg"),
+            _version("d1", "draft", "https://fal/draft-1.jpg", prompt="A misty forest", seed=42, model="fal-ai/flux/dev"),
+            _version("g1", "draft", "https://gemini/draft-1.png", prompt="A misty forest", model="gemini-2.5-flash-image"),
+        ],
+        "background_scene_numbers": [],
+    })
+    data_manager.upload_image_to_storage = lambda url, filename: f"https://storage/{filename}"
+    return story_service(data_manager, fal_ai_service=fal, gemini_service=FakeFal())
+
+
+def _location(service):
+    return service.data_manager.supabase.tables["backgrounds"][0]
+
+
+def test_selecting_a_draft_queues_a_final_render_that_swaps_in(story_service):
+    fal = FakeFal()
+    service = _service(story_service, fal)
+    changed = []
+    service.image_upgrades.add_listener(changed.append)
+
+    selected = service.select_location_image_version("s1", "l1", "d1")
+    assert (selected["selectedVersionId"], selected["upgrade"]) == ("d1", "queued")
+    service.image_upgrades.join()
+
+    # Same prompt, seed, model and size as the draft, at final steps
+    assert fal.calls == [{"prompt": "A misty forest", "width": 1024, "height": 768,
+                          "model": "fal-ai/flux/dev", "steps": 28, "seed": 42}]
+    final = service.data_manager.supabase.tables["background_versions"][-1]
+    assert (final["quality"], final["upgraded_from"], final["seed"], final["model"]) == ("final", "d1", 42, "fal-ai/flux/dev")
+    assert _location(service)["selected_version_id"] == final["version_id"]
+    assert _location(service)["image_url"] == final["image_url"]
+    assert changed == ["s1"]
+
+    # Re-selecting the draft picks the existing final render without a new one
+    again = service.select_location_image_version("s1", "l1", "d1")
+    assert (again["selectedVersionId"], again["upgrade"]) == (final["version_id"], "completed")
+    service.image_upgrades.join()
+    assert len(fal.calls) == 1
+
+
+def test_upgrade_does_not_override_a_newer_selection(story_service):
+    release = threading.Event()
+    fal = FakeFal(release)
+    service = _service(story_service, fal)
+
+    service.select_location_image_version("s1", "l1", "d1")
+    # Selecting the draft again while it renders does not queue a second job
+    assert service.select_location_image_version("s1", "l1", "d1")["upgrade"] == "queued"
+    assert service.select_location_image_version("s1", "l1", "f0")["upgrade"] is None
+    release.set()
+    service.image_upgrades.join()
+
+    assert len(fal.calls) == 1
+    assert _location(service)["selected_version_id"] == "f0"
+    assert service.data_manager.supabase.tables["background_versions"][-1]["upgraded_from"] == "d1"
+    assert service.image_upgrades.stats() == {"queued": 0, "running": 0, "completed": 1, "failed": 0}
+
+
+def test_draft_generation_records_prompt_and_seed(story_service):
+    fal = FakeFal()
+    service = _service(story_service, fal)
+
+    result = service.regenerate_individual_location_image("s1", "l1", "A sunny forest", quality="draft")
+
+    row = service.data_manager.supabase.tables["background_versions"][-1]
+    assert result["quality"] == "draft" and row["version_id"] == result["versionId"]
+    assert (row["quality"], row["prompt"], row["seed"]) == ("draft", "A sunny forest", fal.calls[0]["seed"])
+    assert row["model"] == fal.calls[0]["model"] == "fal-ai/flux/dev"
+    assert _location(service)["selected_version_id"] == result["versionId"]
+    assert _location(service)["description"] == "A sunny forest"
+
+
+def test_drafts_without_a_seed_are_not_upgraded(story_service):
+    fal = FakeFal()
+    service = _service(story_service, fal)
+
+    selected = service.select_location_image_version("s1", "l1", "g1")
+    service.image_upgrades.join()
+
+    assert (selected["selectedVersionId"], selected["upgrade"]) == ("g1", "unavailable")
+    assert fal.calls == []
+    assert _location(service)["selected_version_id"] == "g1"
+
+
+def test_failed_upgrades_are_counted_and_can_be_retried():
+    attempts = []
+
+    def upgrade(name):
+        attempts.append(name)
+        if len(attempts) == 1:
+            raise Exception("provider down")
+
+    upgrades = ImageUpgradeQueue(upgrade)
+    upgrades.submit(("s1", "l1", "d1"), "first")
+    upgrades.join()
+    assert upgrades.status(("s1", "l1", "d1")) is None
+    assert upgrades.submit(("s1", "l1", "d1"), "retry")
+    upgrades.join()
+
+    assert attempts == ["first", "retry"]
+    assert upgrades.stats() == {"queued": 0, "running": 0, "completed": 1, "failed": 1}
@@ -0,0 +1,93 @@
+"""
+Tests for the LLM response cache
+"""
+
+from types import SimpleNamespace
+
+import llm_cache
+from external_services import OpenAIService
+from llm_cache import LLMResponseCache
+
+
+class FakeCompletions:
+    def __init__(self, content):
+        self.content = content
+        self.calls = []
+
+    def create(self, **request):
+        self.calls.append(request)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))])
+
+
+def _service(tmp_path, content='[{"scene": 1}]'):
+    service = OpenAIService()
+    service.api_key = "test-key"
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(content)))
+    service.response_cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"))
+    return service
+
+
+def test_identical_requests_are_served_from_the_cache(tmp_path):
+    service = _service(tmp_path)
+    calls = service.client.chat.completions.calls
+
+    first = service.generate_scenes("Sharing", "system", "user")
+    second = service.generate_scenes("Sharing", "system", "user")
+    service.generate_scenes("Sharing", "system", "other user prompt")
+    service.generate_scenes("Sharing", "system", "user", use_cache=False)
+
+    assert first == second == [{"scene": 1}]
+    assert len(calls) == 3
+    stats = service.response_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+
+def test_key_covers_model_prompts_and_params():
+    key = LLMResponseCache.key("gpt", "system", "user", temperature=0.7, max_tokens=2000)
+
+    assert key == LLMResponseCache.key("gpt", "system", "user", max_tokens=2000, temperature=0.7)
+    assert key != LLMResponseCache.key("gpt", "system", "user", temperature=0.2, max_tokens=2000)
+    assert key != LLMResponseCache.key("other", "system", "user", temperature=0.7, max_tokens=2000)
+
+
+def test_background_descriptions_cache_parsed_markdown_json(tmp_path):
+    service = _service(tmp_path, content='```json\n[{"location": "Park"}]\n```')
+    nodes = [{"sceneNumber": 1, "title": "Start", "location": "Park", "text": "..."}]
+
+    assert service.generate_background_descriptions(nodes) == [{"location": "Park"}]
+    assert service.generate_background_descriptions(nodes) == [{"location": "Park"}]
+    assert len(service.client.chat.completions.calls) == 1
+
+
+def test_unparseable_responses_are_not_cached(tmp_path):
+    service = _service(tmp_path, content="not json")
+
+    for _ in range(2):
+        try:
+            service.generate_scenes("Sharing", "system", "user")
+        except Exception:
+            pass
+
+    assert len(service.client.chat.completions.calls) == 2
+    assert service.response_cache.stats()["entries"] == 0
+
+
+def test_entries_expire_and_least_recently_used_are_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=60, max_entries=2)
+
+    cache.set("a", {"value": 1})
+    now[0] += 1
+    cache.set("b", [2])
+    now[0] += 1
+    assert cache.get("a") == {"value": 1}
+    now[0] += 1
+    cache.set("c", "three")
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "three"
+    now[0] += 61
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,136 @@
+"""
+Tests for keyset cursor pagination of the story library
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.schemas import Story, StoryStatus, StoryTree
+from app.pagination import KeysetIndex, decode_cursor, encode_cursor
+from app.storage.story_data_manager import StoryDataManager
+from tests.fake_supabase import fake_data_manager
+
+
+def _stories(count):
+    base = datetime(2024, 5, 1, 10, 0, 0)
+    return [
+        {"id": f"s{i:03d}", "title": None if i % 7 == 0 else f"Title {i % 5}", "lesson": f"Lesson {i}",
+         "theme": "Forest", "story_format": "Fairy tale", "status": "draft" if i % 3 else "completed",
+         "created_at": base.isoformat(),
+         # Repeated timestamps exercise the id tie-breaker
+         "updated_at": (base + timedelta(minutes=i // 4)).isoformat()}
+        for i in range(count)
+    ]
+
+
+def _service(story_service, count=40, completions=None):
+    data_manager = fake_data_manager({
+        "stories": _stories(count),
+        "reading_completions": completions or [],
+    })
+    data_manager.rebuild_story_summaries()
+    data_manager.supabase.queries.clear()
+    return story_service(data_manager)
+
+
+def _walk(service, limit, **kwargs):
+    ids, cursor = [], None
+    while True:
+        page = service.get_all_stories(limit, 0, cursor=cursor, fields={"id"}, **kwargs)
+        ids += [story.id for story in page.stories]
+        if not page.hasMore:
+            assert page.nextCursor is None
+            return ids
+        cursor = page.nextCursor
+
+
+def test_cursor_round_trip_and_mismatch():
+    token = encode_cursor("title", "draft", ("Title 1", "s001"))
+
+    assert decode_cursor(token, "title", "draft") == ("Title 1", "s001")
+    with pytest.raises(ValueError, match="does not match"):
+        decode_cursor(token, "recent", "draft")
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor("not-a-cursor", "title", "draft")
+
+
+def test_keyset_index_pages_in_both_directions():
+    index = KeysetIndex([(2, "b"), (1, "a"), (2, "c"), (3, "d")])
+
+    assert index.page(None, 2, descending=True) == (["d", "c"], True)
+    assert index.page((2, "c"), 2, descending=True) == (["b", "a"], False)
+    assert index.page(None, 3, descending=False) == (["a", "b", "c"], True)
+    assert index.page((2, "c"), 3, descending=False) == (["d"], False)
+
+
+@pytest.mark.parametrize("sort_by", ["recent", "title"])
+def test_supabase_pages_match_full_ordering(sort_by, story_service):
+    service = _service(story_service)
+    expected = [story.id for story in service.get_all_stories(100, 0, sort_by=sort_by, fields={"id"}).stories]
+
+    assert _walk(service, 7, sort_by=sort_by) == expected
+    assert len(expected) == 40
+
+
+def test_supabase_keyset_query_filters_instead_of_offsetting(story_service):
+    service = _service(story_service)
+    first = service.get_all_stories(5, 0, status="draft", fields={"id"}, include_total=False)
+
+    service.data_manager.supabase.queries.clear()
+    service.get_all_stories(5, 0, status="draft", cursor=first.nextCursor, fields={"id"}, include_total=False)
+
+    query = service.data_manager.supabase.queries[0]
+    assert query.bounds is None and query.max_rows == 6
+    assert first.total is None
+
+
+def test_read_count_pages_follow_completions(story_service):
+    completions = [{"id": f"r{i}", "story_id": story_id}
+                   for i, story_id in enumerate(["s005"] * 3 + ["s002"] * 2 + ["s009"])]
+    service = _service(story_service, completions=completions)
+
+    ids = _walk(service, 4, sort_by="readCount")
+
+    assert ids[:3] == ["s005", "s002", "s009"]
+    assert sorted(ids) == [f"s{i:03d}" for i in range(40)]
+
+
+def test_cursor_for_another_filter_is_rejected(story_service):
+    service = _service(story_service)
+    page = service.get_all_stories(5, 0, status="draft", fields={"id"})
+
+    with pytest.raises(ValueError):
+        service.get_all_stories(5, 0, status="completed", cursor=page.nextCursor)
+
+
+def test_total_is_cached_until_the_library_changes(story_service):
+    service = _service(story_service)
+    assert service.get_all_stories(5, 0, fields={"id"}).total == 40
+    service.data_manager.supabase.tables["stories"].pop()
+    assert service.get_all_stories(5, 0, fields={"id"}).total == 40
+    service.data_manager.supabase.tables["stories"].append({"id": "s039"})
+
+    service.delete_story("s039")
+    assert service.get_all_stories(5, 0, fields={"id"}).total == 39
+
+
+def test_json_backend_pages_and_tracks_writes(tmp_path):
+    manager = StoryDataManager(str(tmp_path))
+    base = datetime(2024, 5, 1, 10, 0, 0)
+    for i in range(9):
+        manager.save_story(Story(
+            id=f"s{i}", title=f"Story {8 - i}", lesson="Sharing", theme="Forest", storyFormat="Fairy tale",
+            status=StoryStatus.COMPLETED, tree=StoryTree(nodes=[], edges=[]), characters=[], locations=[],
+            createdAt=base, updatedAt=base + timedelta(minutes=i)
+        ))
+
+    first, cursor = manager.get_stories_page(4, sort_by="title", fields={"id"})
+    second, _ = manager.get_stories_page(4, sort_by="title", cursor=cursor)
+    assert [story["id"] for story in first + second] == ["s8", "s7", "s6", "s5", "s4", "s3", "s2", "s1"]
+    assert first[0] == {"id": "s8"}
+
+    manager.delete_story("s8")
+    recent, _ = manager.get_stories_page(3)
+    assert [story["id"] for story in recent] == ["s7", "s6", "s5"]
+    assert manager.get_stories_count("completed") == 8
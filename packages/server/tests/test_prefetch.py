@@ -0,0 +1,86 @@
+"""
+Tests for the reading view prefetch plan
+"""
+
+from app.models.schemas import ChoiceMade, ReadingProgressRequest
+from app.services.prefetch import AssetSizeCache, build_prefetch_plan
+from benchmarks.story_fixtures import build_reading_story
+from tests.fake_supabase import fake_data_manager
+
+
+def test_targets_are_ordered_by_choice_likelihood_with_sizes():
+    story = build_reading_story(6)
+    start = story.nodes[0]
+    first, second = start.choices
+    story.nodes[[node.id for node in story.nodes].index(second.nextNodeId)].audioUrl = "https://cdn/audio.mp3"
+
+    plan = build_prefetch_plan(
+        story.nodes,
+        {start.id: {second.id: 3}},
+        {"https://cdn/audio.mp3": 2048}
+    )
+
+    targets = plan[start.id]
+    assert [target.choiceId for target in targets] == [second.id, first.id]
+    assert [target.likelihood for target in targets] == [0.8, 0.2]
+    assert [(asset.type, asset.bytes) for asset in targets[0].assets] == [("image", None), ("audio", 2048)]
+    assert all(node.id not in plan for node in story.nodes if not node.choices)
+
+
+def test_unread_story_splits_evenly_in_authored_order():
+    story = build_reading_story(6)
+    start = story.nodes[0]
+
+    targets = build_prefetch_plan(story.nodes, {}, {})[start.id]
+
+    assert [target.choiceId for target in targets] == [choice.id for choice in start.choices]
+    assert {target.likelihood for target in targets} == {0.5}
+
+
+def test_size_cache_measures_each_url_once_and_evicts():
+    measured = []
+
+    def measure(url):
+        measured.append(url)
+        if "broken" in url:
+            raise Exception("timeout")
+        return len(url)
+
+    cache = AssetSizeCache(measure, max_entries=2, background=False)
+
+    assert cache.sizes(["https://a", "https://broken"]) == {"https://a": 9, "https://broken": None}
+    assert cache.sizes(["https://a", "https://broken"]) == {"https://a": 9, "https://broken": None}
+    assert measured == ["https://a", "https://broken"]
+
+    cache.sizes(["https://c"])
+    cache.sizes(["https://a"])
+    assert measured == ["https://a", "https://broken", "https://c", "https://a"]
+
+
+def test_reading_bundle_prefetch_follows_recorded_choices(story_service):
+    now = "2024-05-01T10:00:00+00:00"
+    data_manager = fake_data_manager({
+        "stories": [{"id": "s1", "title": None, "lesson": "Sharing", "theme": "Forest", "story_format": "Fairy tale",
+                     "status": "completed", "created_at": now, "updated_at": now}],
+        "story_nodes": [
+            {"id": node_id, "story_id": "s1", "scene_number": number, "title": node_id, "text": "...",
+             "location": "Park", "type": node_type}
+            for number, (node_id, node_type) in enumerate([("n1", "start"), ("n2", "good_ending"), ("n3", "bad_ending")], 1)
+        ],
+        "story_choices": [
+            {"id": "c1", "node_id": "n1", "text": "Share", "next_node_id": "n2", "is_correct": True},
+            {"id": "c2", "node_id": "n1", "text": "Keep", "next_node_id": "n3", "is_correct": False},
+        ],
+    })
+    service = story_service(data_manager, asset_sizes=AssetSizeCache(lambda url: 1000, background=False))
+    service.data_manager.save_reading_progress("s1", "kid-1", ReadingProgressRequest(
+        currentNodeId="n3", visitedNodeIds=["n1", "n3"], choicesMade=[ChoiceMade(nodeId="n1", choiceId="c2")]
+    ))
+
+    reading = service.get_story_for_reading("s1")
+    metadata = service.get_story_for_reading("s1", fields={"id", "prefetch"})
+
+    targets = reading.prefetch["n1"]
+    assert [(target.nodeId, target.likelihood) for target in targets] == [("n3", 0.667), ("n2", 0.333)]
+    assert targets[0].assets[0].bytes == 1000
+    assert metadata.prefetch == reading.prefetch
@@ -0,0 +1,139 @@
+"""
+Tests for the reading progress write-behind buffer
+"""
+
+import pytest
+
+from app.models.schemas import ChoiceMade, ReadingProgressRequest
+from app.services.progress_buffer import ProgressWriteBuffer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _buffer(write=None):
+    clock = Clock()
+    writes = []
+    buffer = ProgressWriteBuffer(write or (lambda story_id, reader_id, progress: writes.append((story_id, reader_id, progress))),
+                                 idle_seconds=5, max_delay_seconds=30, clock=clock)
+    return buffer, clock, writes
+
+
+def test_burst_is_coalesced_into_one_write_after_idle():
+    buffer, clock, writes = _buffer()
+    for step in range(20):
+        clock.now = step * 0.5
+        buffer.put("s1", "kid", {"visitedNodeIds": list(range(step + 1))})
+
+    assert buffer.flush_due() == 0
+    assert buffer.get("s1") == {"visitedNodeIds": list(range(20))}
+
+    clock.now = 15
+    assert buffer.flush_due() == 1
+    assert writes == [("s1", "kid", {"visitedNodeIds": list(range(20))})]
+    assert buffer.get("s1") is None
+
+
+def test_durability_bound_writes_during_continuous_reading():
+    buffer, clock, writes = _buffer()
+    for second in range(62):
+        clock.now = second
+        buffer.put("s1", "kid", {"step": second})
+
+    assert [progress["step"] for _, _, progress in writes] == [30, 61]
+
+
+def test_readers_are_buffered_separately_and_flush_by_story():
+    buffer, clock, writes = _buffer()
+    buffer.put("s1", "a", {"step": 1})
+    clock.now = 1
+    buffer.put("s1", "b", {"step": 2})
+    buffer.put("s2", "a", {"step": 3})
+
+    assert buffer.get("s1") == {"step": 2}
+    assert buffer.get("s1", "a") == {"step": 1}
+    assert buffer.flush("s1") == 2
+    assert sorted((reader_id, progress["step"]) for _, reader_id, progress in writes) == [("a", 1), ("b", 2)]
+    assert list(buffer.pending) == [("s2", "a")]
+
+
+def test_failed_write_stays_buffered():
+    calls = []
+
+    def flaky(story_id, reader_id, progress):
+        calls.append((reader_id, progress))
+        if len(calls) == 1:
+            raise Exception("database unavailable")
+
+    buffer, _, _ = _buffer(flaky)
+    buffer.put("s1", None, {"step": 1})
+
+    assert buffer.flush() == 0
+    assert buffer.get("s1", "anonymous") == {"step": 1}
+    assert buffer.flush() == 1
+    assert calls[-1] == ("anonymous", {"step": 1})
+    assert buffer.writes == 1 and not buffer.pending
+
+
+def test_entry_stays_readable_during_write_and_newer_save_survives():
+    seen = []
+
+    def write(story_id, reader_id, progress):
+        # Still served from memory while the write is in flight
+        seen.append(buffer.get(story_id, reader_id))
+        if progress == {"step": 1}:
+            buffer.put("s1", "kid", {"step": 2})
+
+    buffer, _, _ = _buffer(write)
+    buffer.put("s1", "kid", {"step": 1})
+
+    assert buffer.flush() == 1
+    assert seen == [{"step": 1}]
+    assert buffer.get("s1", "kid") == {"step": 2}
+    assert buffer.flush() == 1
+    assert not buffer.pending
+
+
+def test_stop_writes_everything_still_buffered():
+    buffer, _, writes = _buffer()
+    buffer.start(interval_seconds=60)
+    buffer.put("s1", "kid", {"step": 1})
+
+    buffer.stop()
+
+    assert writes == [("s1", "kid", {"step": 1})]
+
+
+def test_service_reads_through_and_flushes_before_completion(story_service):
+    written = []
+
+    class FakeDataManager:
+        def save_reading_progress(self, story_id, reader_id, progress):
+            written.append(("progress", progress.visitedNodeIds))
+
+        def get_reading_progress(self, story_id, reader_id=None):
+            pytest.fail("buffered progress should be served from memory")
+
+        def record_reading_completion(self, story_id, request):
+            written.append(("completion", story_id))
+
+        def get_story_read_count(self, story_id):
+            return 1
+
+    service = story_service(FakeDataManager())
+
+    for visited in (["a"], ["a", "b"], ["a", "b", "c"]):
+        service.save_reading_progress("s1", ReadingProgressRequest(
+            currentNodeId=visited[-1], visitedNodeIds=visited, choicesMade=[ChoiceMade(nodeId="a", choiceId="a1")]
+        ))
+
+    assert service.get_reading_progress("s1").currentNodeId == "c"
+    assert written == []
+
+    service.record_reading_completion("s1", None)
+    assert written == [("progress", ["a", "b", "c"]), ("completion", "s1")]
@@ -0,0 +1,100 @@
+"""
+Tests for the delta (single step) reading progress protocol
+"""
+
+from fastapi.testclient import TestClient
+
+import main
+from app.api import story_routes
+from app.models.schemas import ChoiceMade, ReadingStepRequest
+
+
+class FakeDataManager:
+    def __init__(self):
+        self.saved = {}
+        self.writes = 0
+
+    def save_reading_progress(self, story_id, reader_id, progress):
+        self.writes += 1
+        self.saved[(story_id, reader_id)] = progress.model_dump(mode="json")
+
+    def get_reading_progress(self, story_id, reader_id=None):
+        if reader_id is None:
+            # Latest saved progress of any reader
+            saved = [progress for (saved_story, _), progress in self.saved.items() if saved_story == story_id]
+            return saved[-1] if saved else None
+        return self.saved.get((story_id, reader_id))
+
+
+def _service(story_service):
+    return story_service(FakeDataManager())
+
+
+def _step(seq, node_id, choice_id=None, session_id="session-1", reader_id=None):
+    choice = ChoiceMade(nodeId=f"n{seq - 1}", choiceId=choice_id) if choice_id else None
+    return ReadingStepRequest(seq=seq, nodeId=node_id, choice=choice, sessionId=session_id, readerId=reader_id)
+
+
+def test_steps_append_and_replays_are_idempotent(story_service):
+    service = _service(story_service)
+
+    assert service.append_reading_step("s1", _step(1, "n1"))["status"] == "applied"
+    assert service.append_reading_step("s1", _step(2, "n2", "c1"))["status"] == "applied"
+    replay = service.append_reading_step("s1", _step(2, "n2", "c1"))
+    assert (replay["status"], replay["expectedSeq"]) == ("duplicate", 3)
+
+    progress = service.get_reading_progress("s1")
+    assert progress.visitedNodeIds == ["n1", "n2"]
+    assert [choice.choiceId for choice in progress.choicesMade] == ["c1"]
+
+
+def test_gap_and_conflict_are_reported_without_changes(story_service):
+    service = _service(story_service)
+    service.append_reading_step("s1", _step(1, "n1"))
+
+    assert service.append_reading_step("s1", _step(3, "n3", "c2"))["status"] == "gap"
+    assert service.append_reading_step("s1", _step(1, "other"))["status"] == "conflict"
+    assert service.get_reading_progress("s1").visitedNodeIds == ["n1"]
+
+
+def test_new_session_restarts_and_survives_flush(story_service):
+    service = _service(story_service)
+    service.append_reading_step("s1", _step(1, "n1"))
+    service.append_reading_step("s1", _step(2, "n2", "c1"))
+    service.progress_buffer.flush()
+
+    # Resent step from the flushed session is still recognised
+    assert service.append_reading_step("s1", _step(2, "n2", "c1"))["status"] == "duplicate"
+
+    assert service.append_reading_step("s1", _step(1, "n1", session_id="session-2"))["status"] == "applied"
+    service.progress_buffer.flush()
+    assert service.data_manager.saved[("s1", "anonymous")]["visitedNodeIds"] == ["n1"]
+    assert service.data_manager.saved[("s1", "anonymous")]["sessionId"] == "session-2"
+    assert service.data_manager.writes == 2
+
+
+def test_readers_are_sequenced_against_their_own_progress(story_service):
+    service = _service(story_service)
+    service.append_reading_step("s1", _step(1, "n1", reader_id="kid-1"))
+    service.append_reading_step("s1", _step(2, "n2", "c1", reader_id="kid-1"))
+    service.progress_buffer.flush()
+
+    # Another reader's later save neither hides kid-1's progress nor shifts its sequence
+    assert service.append_reading_step("s1", _step(1, "n1", session_id="other", reader_id="kid-2"))["status"] == "applied"
+    service.progress_buffer.flush()
+    assert service.append_reading_step("s1", _step(3, "n3", "c2", reader_id="kid-1"))["status"] == "applied"
+
+    assert service.get_reading_progress("s1", "kid-1").visitedNodeIds == ["n1", "n2", "n3"]
+    assert service.get_reading_progress("s1", "kid-2").visitedNodeIds == ["n1"]
+
+
+def test_steps_endpoint_reports_gap(monkeypatch, story_service):
+    service = _service(story_service)
+    monkeypatch.setattr(story_routes, "story_service", service)
+    http = TestClient(main.app)
+
+    first = http.post("/api/v1/stories/s1/reading-progress/steps", json={"seq": 1, "nodeId": "n1"}).json()
+    gap = http.post("/api/v1/stories/s1/reading-progress/steps", json={"seq": 4, "nodeId": "n4"}).json()
+
+    assert first["success"] and first["data"]["expectedSeq"] == 2
+    assert gap["error"]["code"] == "SEQUENCE_GAP" and gap["error"]["expectedSeq"] == 2
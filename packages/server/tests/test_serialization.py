@@ -0,0 +1,55 @@
+"""
+Tests for the pluggable JSON serializer, compact storage and the API response class
+"""
+
+import json
+
+import pytest
+
+from app import serialization
+from app.api.responses import api_response
+from app.storage.json_storage import JSONStorage
+from app.storage.story_data_manager import StoryDataManager
+from benchmarks.story_fixtures import build_reading_story, build_story
+
+
+@pytest.fixture(params=sorted(serialization.SERIALIZERS))
+def serializer(request):
+    previous = serialization.get_serializer().name
+    yield serialization.set_serializer(request.param)
+    serialization.set_serializer(previous)
+
+
+def test_story_round_trips_through_compact_file(serializer, tmp_path):
+    manager = StoryDataManager(str(tmp_path))
+    story = build_story(12)
+
+    manager.save_story(story)
+
+    raw = (tmp_path / "stories" / f"{story.id}.json").read_bytes()
+    assert b"\n" not in raw and b'": ' not in raw
+    assert manager.get_story(story.id) == story
+
+
+def test_job_storage_round_trip(serializer, tmp_path):
+    storage = JSONStorage(str(tmp_path))
+    storage.create_job("job-1", {"topic": "Sharing", "scenes": [{"id": 1, "title": "Café"}]})
+
+    storage.update_job("job-1", status="completed")
+
+    job = storage.get_job("job-1")
+    assert job["status"] == "completed"
+    assert job["data"]["scenes"][0]["title"] == "Café"
+
+
+def test_api_response_matches_legacy_encoding(serializer):
+    reading_story = build_reading_story(6)
+
+    body = json.loads(api_response(success=True, data=reading_story).body)
+
+    assert body == {"success": True, "data": reading_story.model_dump(mode="json", by_alias=True), "error": None}
+
+
+def test_unknown_serializer_is_rejected():
+    with pytest.raises(Exception, match="Unknown JSON serializer"):
+        serialization.set_serializer("yaml")
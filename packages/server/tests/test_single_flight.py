@@ -0,0 +1,82 @@
+"""
+Tests for single-flight deduplication of generation requests
+"""
+
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.api import story_routes
+from app.services import single_flight
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flights = SingleFlight(reuse_seconds=0)
+    release = threading.Event()
+    calls = []
+
+    def generate():
+        calls.append(1)
+        release.wait(5)
+        return {"url": "https://img/1.png"}
+
+    key = SingleFlight.key("s1", "locations/generate-all", {"locations": [{"locationId": "l1"}]})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do(key, generate))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while flights.stats()["joined"] < 3:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"url": "https://img/1.png"}] * 4
+    assert results[0] is results[3]
+    assert flights.stats() == {"calls": 1, "joined": 3, "reused": 0, "inFlight": 0}
+
+
+def test_results_are_reused_within_the_window_but_failures_are_not(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(single_flight.time, "monotonic", lambda: now[0])
+    flights = SingleFlight(reuse_seconds=10)
+    key = SingleFlight.key("s1", "scenes/generate-all-images", None)
+    calls = []
+
+    def fail():
+        calls.append("fail")
+        raise Exception("provider down")
+
+    with pytest.raises(Exception, match="provider down"):
+        flights.do(key, fail)
+    assert flights.do(key, lambda: calls.append("ok") or "job") == "job"
+    now[0] += 5
+    assert flights.do(key, lambda: calls.append("again") or "other") == "job"
+    now[0] += 6
+    assert flights.do(key, lambda: calls.append("again") or "other") == "other"
+    assert flights.do(SingleFlight.key("s2", "scenes/generate-all-images", None), lambda: "s2") == "s2"
+
+    assert calls == ["fail", "ok", "again"]
+
+def test_regenerate_endpoint_reuses_results_but_not_failures(monkeypatch):
+    calls = []
+
+    class Service:
+        def regenerate_individual_location_image(self, story_id, location_id, description=None, quality="final"):
+            calls.append((location_id, description))
+            status = "failed" if description == "broken" else "completed"
+            return {"locationId": location_id, "status": status}
+
+    monkeypatch.setattr(story_routes, "story_service", Service())
+    monkeypatch.setattr(story_routes, "generation_flights", SingleFlight(reuse_seconds=60))
+    http = TestClient(main.app)
+
+    for description in ["Forest", "Forest", "Lake", "broken", "broken"]:
+        body = http.post("/api/v1/stories/s1/locations/l1/regenerate", json={"description": description}).json()
+        assert body["success"]
+
+    assert calls == [("l1", "Forest"), ("l1", "Lake"), ("l1", "broken"), ("l1", "broken")]
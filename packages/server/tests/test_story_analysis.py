@@ -0,0 +1,75 @@
+"""
+Tests for cached story path and ending analysis
+"""
+
+from app.models.schemas import Choice, NodeType, StoryNode, StoryTree
+from app.services.story_analysis import StoryAnalysis, StoryAnalysisCache
+from app.services.story_stats import StoryStatsRollup
+
+
+def _node(node_id, node_type, *targets):
+    return StoryNode(
+        id=node_id, sceneNumber=int(node_id[1:]), title=node_id, text="...", location="Park", type=node_type,
+        choices=[Choice(id=f"{node_id}_{target}", text=target, nextNodeId=target) for target in targets]
+    )
+
+
+def _tree():
+    # n1 -> n2 -> n4 (good), n1 -> n3 -> n5 (bad), n3 -> n2, n6 loops on itself, n7 is orphaned
+    return StoryTree(nodes=[
+        _node("n1", NodeType.START, "n2", "n3"),
+        _node("n2", NodeType.CHOICE, "n4"),
+        _node("n3", NodeType.CHOICE, "n5", "n2", "n6"),
+        _node("n4", NodeType.GOOD_ENDING),
+        _node("n5", NodeType.BAD_ENDING),
+        _node("n6", NodeType.CHOICE, "n6"),
+        _node("n7", NodeType.NORMAL, "n4"),
+    ], edges=[])
+
+
+def test_paths_distances_and_problem_nodes():
+    analysis = StoryAnalysis(_tree())
+
+    assert analysis.paths == [["n1", "n2", "n4"], ["n1", "n3", "n5"], ["n1", "n3", "n2", "n4"]]
+    assert analysis.ending_distances["n1"] == {"n4": 2, "n5": 2}
+    assert analysis.ending_distances["n3"] == {"n4": 2, "n5": 1}
+    assert analysis.scenes_to_end("n3") == 1
+    assert analysis.scenes_to_end("n6") is None
+    assert analysis.dead_ends == ["n6"]
+    assert analysis.unreachable == ["n7"]
+    assert analysis.parent_links["n2"] == "n1"
+    assert analysis.validation_errors() == [
+        "Node 'n7' is not reachable from the start node",
+        "Node 'n6' cannot reach any ending",
+    ]
+
+
+def test_path_enumeration_is_capped():
+    analysis = StoryAnalysis(_tree(), max_paths=2)
+
+    assert len(analysis.paths) == 2
+    assert analysis.paths_truncated
+
+
+def test_cache_reanalyzes_only_when_structure_changes():
+    cache = StoryAnalysisCache(max_entries=4)
+    tree = _tree()
+
+    first = cache.get(tree)
+    tree.nodes[1].text = "Edited text"
+    assert cache.get(tree) is first
+
+    tree.nodes[5].choices[0].nextNodeId = "n4"
+    second = cache.get(tree)
+    assert second is not first
+    assert second.dead_ends == []
+    assert cache.builds == 2
+
+
+def test_sessions_reaching_an_ending_count_as_completed():
+    rollup = StoryStatsRollup()
+    rollup.add_progress(None, {"visitedNodeIds": ["n1", "n2", "n4"], "choicesMade": []})
+    rollup.add_progress(None, {"visitedNodeIds": ["n1", "n3"], "choicesMade": []})
+
+    assert rollup.statistics("s1")["completionRate"] == 0
+    assert rollup.statistics("s1", ending_ids=["n4", "n5"])["completionRate"] == 50
@@ -0,0 +1,51 @@
+"""
+Tests for parsing generated stories straight into models
+"""
+
+import json
+import uuid
+
+from app.api.responses import api_response
+from app.models.schemas import StoryGenerateResponse
+from benchmarks.story_fixtures import build_generated_payload
+
+
+def _service(story_service, payload):
+    """StoryService with fake OpenAI and storage backends"""
+    class FakeOpenAI:
+        def generate_branched_story(self, **kwargs):
+            return payload
+
+    class FakeDataManager:
+        saved = []
+
+        def save_story(self, story):
+            FakeDataManager.saved.append(story)
+            return True
+
+    return story_service(FakeDataManager(), openai_service=FakeOpenAI())
+
+
+def test_generate_story_returns_typed_response_with_uuids(story_service):
+    service = _service(story_service, build_generated_payload(8))
+
+    result = service.generate_story("Sharing is caring", "Forest", "Fairy tale")
+
+    assert isinstance(result, StoryGenerateResponse)
+    saved = service.data_manager.saved[-1]
+    assert saved.id == result.storyId
+    for node in result.tree.nodes:
+        uuid.UUID(node.id)
+    assert {edge.to for edge in result.tree.edges} <= {node.id for node in result.tree.nodes}
+    assert all(uuid.UUID(location.id) for location in result.locations)
+
+
+def test_generate_response_serializes_with_api_aliases(story_service):
+    result = _service(story_service, build_generated_payload(8)).generate_story("Sharing", "Forest", "Fairy tale")
+
+    body = json.loads(api_response(success=True, data=result).body)
+
+    assert body["success"] is True and body["error"] is None
+    assert set(body["data"]) == {"storyId", "tree", "characters", "locations"}
+    assert "from" in body["data"]["tree"]["edges"][0]
+    assert "status" in body["data"]["locations"][0]
@@ -0,0 +1,59 @@
+"""
+Tests for the StoryGraph index
+"""
+
+import uuid
+
+from app.models.schemas import NodeType, StoryNode
+from app.services.story_graph import StoryGraph
+from benchmarks.story_fixtures import build_tree
+
+
+def test_synthetic_tree_is_valid_and_fully_indexed():
+    tree = build_tree(200)
+    graph = StoryGraph(tree)
+
+    assert graph.validation_errors(node_range=None) == []
+    assert graph.start_node_id == "node_1"
+    assert graph.is_reachable("node_200")
+    assert graph.parent_links()["node_1"] is None
+
+
+def test_remap_ids_updates_every_reference():
+    graph = StoryGraph(build_tree(50))
+
+    node_map, choice_map = graph.remap_ids(lambda _: str(uuid.uuid4()), lambda _: str(uuid.uuid4()))
+
+    assert len(node_map) == 50
+    assert graph.validation_errors(node_range=None) == []
+    assert set(graph.nodes_by_id) == set(node_map.values())
+    assert {edge.choiceId for edge in graph.tree.edges} == set(choice_map.values())
+
+
+def test_delete_node_unlinks_parents_and_edges():
+    tree = build_tree(30)
+    graph = StoryGraph(tree)
+    parents = set(graph.parents["node_5"])
+
+    affected = graph.delete_node("node_5")
+
+    assert set(affected) == parents
+    assert graph.node("node_5") is None
+    assert all(edge.to != "node_5" and edge.from_ != "node_5" for edge in tree.edges)
+    assert all(choice.nextNodeId != "node_5" for node in tree.nodes for choice in node.choices)
+    assert graph.delete_node("node_5") is None
+
+
+def test_add_node_links_parent_choice_and_edge():
+    tree = build_tree(10)
+    graph = StoryGraph(tree)
+    parent = graph.node("node_2")
+    choice_id = parent.choices[0].id
+    new_node = StoryNode(id="new", sceneNumber=11, title="New", text="...", location="Park",
+                         type=NodeType.BAD_ENDING, choices=[])
+
+    graph.add_node(new_node, parent_node_id="node_2", choice_id=choice_id)
+
+    assert graph.parents["new"] == ["node_2"]
+    assert any(edge.to == "new" and edge.choiceId == choice_id for edge in tree.edges)
+    assert graph.validation_errors(node_range=None) == []
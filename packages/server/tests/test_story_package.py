@@ -0,0 +1,94 @@
+"""
+Tests for offline story packages
+"""
+
+import io
+import json
+import zipfile
+from datetime import datetime
+
+from PIL import Image
+
+from app.models.schemas import NodeType, ReadingNode, StoryForReading
+from app.services.story_package import StoryPackager
+
+
+def _png(size=2000):
+    output = io.BytesIO()
+    Image.new("RGB", (size, size // 2), (200, 120, 40)).save(output, "PNG")
+    return output.getvalue()
+
+
+def _story(audio_url=None):
+    return StoryForReading(
+        id="s1",
+        title="Sharing Story",
+        lesson="sharing",
+        startNodeId="n1",
+        updatedAt=datetime(2024, 1, 2, 3, 4, 5),
+        nodes=[
+            ReadingNode(id="n1", sceneNumber=1, title="Start", text="Once", imageUrl="https://cdn/n1.png",
+                        audioUrl=audio_url, type=NodeType.START, choices=[]),
+            ReadingNode(id="n2", sceneNumber=2, title="End", text="The end", imageUrl="https://cdn/missing.png",
+                        type=NodeType.GOOD_ENDING, choices=[]),
+        ]
+    )
+
+
+def _fetch(url):
+    if "missing" in url:
+        raise Exception("404 Not Found")
+    if url.endswith(".mp3"):
+        return b"ID3-audio"
+    return _png()
+
+
+def test_package_contains_optimized_assets_bundle_and_manifest(tmp_path):
+    packager = StoryPackager(str(tmp_path), fetch=_fetch, image_max_size=512)
+
+    path = packager.build(_story(audio_url="https://cdn/n1.mp3"))
+
+    with zipfile.ZipFile(path) as package:
+        manifest = json.loads(package.read("manifest.json"))
+        bundle = json.loads(package.read("story.json"))
+        image = Image.open(io.BytesIO(package.read("images/n1.jpg")))
+        assert max(image.size) == 512
+        assert package.read("audio/n1.mp3") == b"ID3-audio"
+
+    assert manifest["storyId"] == "s1"
+    assert manifest["storyUpdatedAt"] == "2024-01-02T03:04:05"
+    assert [entry["path"] for entry in manifest["files"]] == ["story.json", "images/n1.jpg", "audio/n1.mp3"]
+    assert manifest["totalBytes"] == sum(entry["bytes"] for entry in manifest["files"])
+    assert manifest["missing"] == [{"url": "https://cdn/missing.png", "error": "404 Not Found"}]
+
+    nodes = {node["id"]: node for node in bundle["nodes"]}
+    assert nodes["n1"]["imageUrl"] == "images/n1.jpg"
+    assert nodes["n1"]["audioUrl"] == "audio/n1.mp3"
+    assert nodes["n2"]["imageUrl"] == "https://cdn/missing.png"
+
+
+def test_cached_package_is_reused_until_invalidated(tmp_path):
+    fetched = []
+    packager = StoryPackager(str(tmp_path), fetch=lambda url: fetched.append(url) or _png(64))
+
+    path = packager.build(_story())
+    assert packager.build(_story()) == path
+    assert len(fetched) == 2
+
+    packager.invalidate("s1")
+    assert packager.get_cached("s1") is None
+    assert packager.build(_story()) == path
+    assert len(fetched) == 4
+
+
+def test_build_is_discarded_when_story_changes_meanwhile(tmp_path):
+    packager = StoryPackager(str(tmp_path))
+
+    def fetch(url):
+        packager.invalidate("s1")
+        return _png(64)
+
+    packager.fetch = fetch
+    assert packager.build(_story()) is None
+    assert packager.get_cached("s1") is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,15 @@
+"""
+Tests for the StoryService test factory
+"""
+
+from app.services import story_service as story_service_module
+from tests.fake_supabase import fake_data_manager
+
+
+def test_factory_sets_every_attribute_init_sets(monkeypatch, story_service):
+    data_manager = fake_data_manager({})
+    monkeypatch.setattr(story_service_module, "SupabaseDataManager", lambda: data_manager)
+
+    initialized = story_service_module.StoryService()
+
+    assert set(vars(story_service(data_manager))) == set(vars(initialized))
@@ -0,0 +1,134 @@
+"""
+Tests for incremental story statistics rollups
+"""
+
+from app.models.schemas import (ChoiceMade, EndingType, ReadingCompletionRequest,
+                                ReadingProgressRequest)
+from app.services.progress_buffer import ProgressWriteBuffer
+from app.services.story_stats import HyperLogLog, StoryStatsRollup
+from app.storage.story_data_manager import StoryDataManager
+from benchmarks.story_fixtures import build_story
+from tests.fake_supabase import fake_data_manager
+
+
+def _completion(seconds, reader_id=None, ending=EndingType.GOOD_ENDING):
+    return ReadingCompletionRequest(
+        endingNodeId="end", endingType=ending, totalNodesVisited=3,
+        readingTimeSeconds=seconds, readerId=reader_id
+    )
+
+
+def test_hyperloglog_estimates_distinct_readers():
+    sketch = HyperLogLog()
+    for index in range(20000):
+        sketch.add(f"reader-{index % 5000}")
+
+    restored = HyperLogLog.from_string(sketch.to_string())
+    assert abs(restored.count() - 5000) < 5000 * 0.08
+    assert HyperLogLog().count() == 0
+
+
+def test_progress_saves_count_only_new_visits_and_choices():
+    rollup = StoryStatsRollup()
+    first = {"visitedNodeIds": ["a", "b"], "choicesMade": [{"nodeId": "a", "choiceId": "a1"}]}
+    second = {"visitedNodeIds": ["a", "b", "c"], "choicesMade": [{"nodeId": "a", "choiceId": "a1"}, {"nodeId": "b", "choiceId": "b2"}]}
+    restart = {"visitedNodeIds": ["a"], "choicesMade": []}
+
+    rollup.add_progress(None, first)
+    rollup.add_progress(first, second)
+    rollup.add_progress(second, restart)
+
+    assert rollup.node_visits == {"a": 2, "b": 1, "c": 1}
+    assert rollup.choice_counts == {"a": {"a1": 1}, "b": {"b2": 1}}
+    assert rollup.sessions_started == 2
+
+
+def test_completions_fill_histogram_and_endings():
+    rollup = StoryStatsRollup()
+    for seconds in (30, 90, 120, 4000):
+        rollup.add_completion({"readingTimeSeconds": seconds, "endingType": "good_ending"})
+
+    statistics = StoryStatsRollup(rollup.to_dict()).statistics("s1")
+
+    assert statistics["totalReads"] == 4
+    assert statistics["averageReadingTime"] == 1060
+    assert [bucket["count"] for bucket in statistics["readingTimeHistogram"]] == [1, 2, 0, 0, 0, 0, 1]
+    assert statistics["readingTimeHistogram"][-1] == {"minSeconds": 1800, "maxSeconds": None, "count": 1}
+    assert statistics["endingCounts"] == {"good_ending": 4}
+
+
+def test_json_backend_statistics_come_from_rollup(tmp_path):
+    manager = StoryDataManager(str(tmp_path))
+    manager.save_reading_progress("s1", "kid-1", ReadingProgressRequest(
+        currentNodeId="b", visitedNodeIds=["a", "b"], choicesMade=[ChoiceMade(nodeId="a", choiceId="a1")]
+    ))
+    manager.record_reading_completion("s1", _completion(100, "kid-1"))
+    manager.record_reading_completion("s1", _completion(200, "kid-2", EndingType.BAD_ENDING))
+    manager.record_reading_completion("s1", _completion(300, "kid-1"))
+
+    statistics = manager.get_story_statistics("s1")
+
+    assert (statistics["totalReads"], statistics["uniqueReaders"], statistics["averageReadingTime"]) == (3, 2, 200)
+    assert statistics["choiceDistribution"] == [{"nodeId": "a", "choices": [{"choiceId": "a1", "selectedCount": 1}]}]
+    assert statistics["completionRate"] == 100
+
+
+def test_supabase_statistics_accept_request_models_and_add_choice_text(story_service):
+    service = story_service(fake_data_manager({"stories": [], "reading_completions": []}))
+    story = build_story(6)
+    service.data_manager.get_story = lambda story_id, fields=None: story
+
+    start = story.tree.nodes[0]
+    service.save_reading_progress(story.id, ReadingProgressRequest(
+        currentNodeId=start.id, visitedNodeIds=[start.id],
+        choicesMade=[ChoiceMade(nodeId=start.id, choiceId=start.choices[0].id)]
+    ))
+    service.record_reading_completion(story.id, _completion(90, "kid-1"))
+
+    statistics = service.get_story_statistics(story.id)
+
+    assert statistics.totalReads == 1 and statistics.uniqueReaders == 1
+    assert statistics.choiceDistribution[0].choices[0]["text"] == start.choices[0].text
+    assert statistics.mostVisitedScenes == [{"nodeId": start.id, "visitCount": 1, "sceneNumber": start.sceneNumber}]
+    assert service.data_manager.supabase.tables["story_stats"][0]["story_id"] == story.id
+
+
+def test_interleaved_readers_keep_their_own_previous_progress():
+    data_manager = fake_data_manager({"stories": [], "reading_completions": [], "reading_progress": []})
+    saves = [("kid-1", ["a", "b"]), ("kid-2", ["a"]), ("kid-1", ["a", "b", "c"]), ("kid-2", ["a", "d"])]
+    for reader_id, visited in saves:
+        data_manager.save_reading_progress("s1", reader_id, ReadingProgressRequest(
+            currentNodeId=visited[-1], visitedNodeIds=visited, choicesMade=[]
+        ))
+
+    rollup = data_manager._get_stats_rollup("s1")
+
+    assert rollup.sessions_started == 2
+    assert rollup.node_visits == {"a": 2, "b": 1, "c": 1, "d": 1}
+    assert len(data_manager.supabase.tables["reading_progress"]) == 2
+    assert data_manager.get_reading_progress("s1", "kid-1")["visitedNodeIds"] == ["a", "b", "c"]
+
+
+def test_failed_previous_progress_read_fails_the_save_instead_of_recounting():
+    data_manager = fake_data_manager({"stories": [], "reading_completions": [], "reading_progress": []})
+    buffer = ProgressWriteBuffer(data_manager.save_reading_progress)
+    buffer.put("s1", "kid-1", ReadingProgressRequest(currentNodeId="b", visitedNodeIds=["a", "b"], choicesMade=[]))
+    buffer.flush()
+    created_at = data_manager.supabase.tables["reading_progress"][0]["created_at"]
+
+    table = data_manager.supabase.table
+    failures = ["reading_progress"]
+
+    def flaky_table(name):
+        if name in failures:
+            failures.remove(name)
+            raise Exception("connection reset")
+        return table(name)
+
+    data_manager.supabase.table = flaky_table
+    buffer.put("s1", "kid-1", ReadingProgressRequest(currentNodeId="c", visitedNodeIds=["a", "b", "c"], choicesMade=[]))
+    assert buffer.flush() == 0
+    assert buffer.flush() == 1
+
+    assert data_manager._get_stats_rollup("s1").node_visits == {"a": 1, "b": 1, "c": 1}
+    assert data_manager.supabase.tables["reading_progress"][0]["created_at"] == created_at
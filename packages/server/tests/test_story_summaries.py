@@ -0,0 +1,67 @@
+"""
+Tests for the story_summaries table and its JSON equivalent
+"""
+
+from datetime import datetime
+
+from app.models.schemas import EndingType, ReadingCompletionRequest, StoryStatus
+from app.storage.story_data_manager import StoryDataManager
+from benchmarks.story_fixtures import build_story
+from tests.fake_supabase import fake_data_manager
+
+
+def _versions(image_url):
+    return {
+        "currentVersionId": "v2",
+        "versions": [
+            {"versionId": "v1", "imageUrl": "old.png", "createdAt": "2024-05-01T10:00:00"},
+            {"versionId": "v2", "imageUrl": image_url, "createdAt": "2024-05-01T11:00:00"},
+        ],
+    }
+
+
+def test_supabase_summary_follows_story_events():
+    manager = fake_data_manager()
+    story = build_story(8)
+    story.status = StoryStatus.DRAFT
+    manager.save_story(story)
+
+    summary = manager.supabase.tables["story_summaries"][0]
+    assert (summary["scene_count"], summary["status"], summary["title"]) == (8, "draft", "Benchmark Story")
+
+    manager.record_reading_completion(story.id, {"endingNodeId": "n", "endingType": "good_ending", "totalNodesVisited": 3, "readingTimeSeconds": 60})
+    manager.record_reading_completion(story.id, {"endingNodeId": "n", "endingType": "good_ending", "totalNodesVisited": 3, "readingTimeSeconds": 60})
+    manager.save_scene_image_versions(story.id, summary["start_node_id"], _versions("cover.png"))
+
+    # Completing the story rewrites the metadata but keeps reads and cover
+    story.status = StoryStatus.COMPLETED
+    manager.save_story(story)
+    stories, _ = manager.get_stories_page(10, status="completed")
+    assert stories[0]["readCount"] == 2 and stories[0]["coverImage"] == "cover.png"
+    assert stories[0]["lastReadAt"] is not None
+
+    manager.supabase.tables["stories"].append({"id": story.id})
+    manager.delete_story(story.id)
+    assert manager.supabase.tables["story_summaries"] == []
+
+
+def test_json_summaries_persist_and_track_reads(tmp_path):
+    manager = StoryDataManager(str(tmp_path))
+    story = build_story(6)
+    manager.save_story(story)
+    start_node_id = next(node.id for node in story.tree.nodes if node.type.value == "start")
+
+    manager.record_reading_completion(story.id, ReadingCompletionRequest(
+        endingNodeId="n", endingType=EndingType.GOOD_ENDING, totalNodesVisited=4, readingTimeSeconds=30
+    ))
+    manager.save_scene_image_versions(story.id, start_node_id, _versions("cover.png"))
+
+    # A fresh manager reads the summaries file instead of every story file
+    reloaded = StoryDataManager(str(tmp_path))
+    reloaded.get_story = None
+    stories, _ = reloaded.get_stories_page(5, sort_by="readCount")
+
+    assert stories[0]["readCount"] == 1
+    assert stories[0]["coverImage"] == "cover.png"
+    assert stories[0]["sceneCount"] == 6
+    assert datetime.fromisoformat(stories[0]["lastReadAt"])
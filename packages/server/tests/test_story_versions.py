@@ -0,0 +1,128 @@
+"""
+Tests for story versions and conditional writes
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.api import story_routes
+from app.models.schemas import NodeUpdateRequest
+from app.services.story_versions import StoryVersionConflict, parse_if_match
+from app.storage.story_data_manager import StoryDataManager
+from benchmarks.story_fixtures import build_story
+from tests.fake_supabase import fake_data_manager
+
+NOW = "2024-05-01T10:00:00+00:00"
+# save_story keeps node and choice IDs only when they are UUIDs
+START, END = "00000000-0000-4000-8000-000000000001", "00000000-0000-4000-8000-000000000002"
+
+
+def _service(story_service, version=None):
+    story = {"id": "s1", "title": "Sharing", "lesson": "Sharing", "theme": "Forest", "story_format": "Fairy tale",
+             "status": "draft", "created_at": NOW, "updated_at": NOW}
+    if version is not None:
+        story["version"] = version
+    return story_service(fake_data_manager({
+        "stories": [story],
+        "story_nodes": [
+            {"id": node_id, "story_id": "s1", "scene_number": number, "title": node_type, "text": "...",
+             "location": "Park", "type": node_type}
+            for number, (node_id, node_type) in enumerate([(START, "start"), (END, "good_ending")], 1)
+        ],
+        "story_choices": [{"id": "00000000-0000-4000-8000-0000000000c1", "node_id": START, "text": "Go", "next_node_id": END, "is_correct": True}],
+    }))
+
+
+def test_parse_if_match():
+    assert parse_if_match('"v7"') == 7
+    assert parse_if_match('W/"v7"') == 7
+    assert parse_if_match("12") == 12
+    assert parse_if_match("*") is None
+    assert parse_if_match(None) is None
+    with pytest.raises(ValueError):
+        parse_if_match('"abc123"')
+
+
+def test_supabase_saves_bump_version_with_compare_and_set(story_service):
+    service = _service(story_service)
+    story = service.get_story("s1")
+    assert story.version == 0
+
+    service.data_manager.save_story(story)
+    assert story.version == 1
+    service.data_manager.save_story(story, expected_version=1)
+    assert service.data_manager.get_story_version("s1") == 2
+
+    with pytest.raises(StoryVersionConflict) as conflict:
+        service.data_manager.save_story(story, expected_version=1)
+    assert conflict.value.current_version == 2
+
+
+def test_json_backend_rejects_stale_version(tmp_path):
+    manager = StoryDataManager(str(tmp_path))
+    story = build_story(6)
+    manager.save_story(story)
+    manager.save_story(story)
+
+    assert manager.get_story(story.id).version == 2
+    with pytest.raises(StoryVersionConflict):
+        manager.save_story(story, expected_version=1)
+
+
+def test_stale_edit_gets_409_with_server_diff(monkeypatch, story_service):
+    service = _service(story_service, version=3)
+    monkeypatch.setattr(story_routes, "story_service", service)
+    http = TestClient(main.app)
+
+    loaded = http.get("/api/v1/stories/s1").json()["data"]
+    assert loaded["version"] == 3
+
+    first = http.patch(f"/api/v1/stories/s1/nodes/{END}", json={"title": "Happy end"}, headers={"If-Match": '"v3"'})
+    second = http.patch(f"/api/v1/stories/s1/nodes/{START}", json={"title": "Morning"}, headers={"If-Match": '"v3"'})
+    malformed = http.patch(f"/api/v1/stories/s1/nodes/{START}", json={"title": "Morning"}, headers={"If-Match": '"abc"'})
+
+    assert first.json()["data"]["version"] == 4
+    assert second.status_code == 409
+    error = second.json()["error"]
+    assert (error["code"], error["expectedVersion"], error["currentVersion"]) == ("VERSION_CONFLICT", 3, 4)
+    assert error["diff"]["complete"]
+    assert [node["title"] for node in error["diff"]["updatedNodes"]] == ["Happy end"]
+    assert service.get_story("s1").tree.nodes[0].title == "start"
+    assert malformed.json()["error"]["code"] == "VALIDATION_ERROR"
+
+
+def test_unconditional_edit_still_succeeds(story_service):
+    service = _service(story_service)
+
+    result = service.update_node("s1", START, NodeUpdateRequest(text="Once upon a time"))
+
+    assert result["version"] == 1
+    assert result["node"].text == "Once upon a time"
+
+
+def test_version_moves_only_after_the_rows_are_written(story_service):
+    service = _service(story_service, version=3)
+    supabase = service.data_manager.supabase
+    table = supabase.table
+    versions_seen = []
+
+    def recording_table(name):
+        if name == "story_nodes":
+            versions_seen.append(supabase.tables["stories"][0]["version"])
+        return table(name)
+
+    supabase.table = recording_table
+    service.update_node("s1", START, NodeUpdateRequest(title="Morning"), expected_version=3)
+    assert set(versions_seen) == {3}
+    assert service.data_manager.get_story_version("s1") == 4
+
+    def failing_table(name):
+        if name == "story_summaries":
+            raise Exception("connection reset")
+        return table(name)
+
+    supabase.table = failing_table
+    with pytest.raises(Exception, match="connection reset"):
+        service.update_node("s1", START, NodeUpdateRequest(title="Noon"), expected_version=4)
+    assert service.data_manager.get_story_version("s1") == 4
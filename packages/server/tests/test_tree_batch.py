@@ -0,0 +1,141 @@
+"""
+Tests for atomic batch edits of the story tree
+"""
+
+import copy
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.api import story_routes
+from app.models.schemas import TreeBatchRequest
+from app.services.tree_batch import TreeBatchError
+from tests.fake_supabase import fake_data_manager
+
+NOW = "2024-05-01T10:00:00+00:00"
+
+
+def _tables():
+    nodes = [("n1", "start"), ("n2", "choice"), ("n3", "good_ending"), ("n4", "bad_ending")]
+    return {
+        "stories": [{"id": "s1", "title": "Sharing", "lesson": "Sharing", "theme": "Forest", "story_format": "Fairy tale",
+                     "status": "draft", "created_at": NOW, "updated_at": NOW}],
+        "story_summaries": [{"id": "s1", "title": "Sharing", "scene_count": 4, "updated_at": NOW}],
+        "story_nodes": [
+            {"id": node_id, "story_id": "s1", "scene_number": number, "title": node_id, "text": "...",
+             "location": "Park", "type": node_type}
+            for number, (node_id, node_type) in enumerate(nodes, 1)
+        ],
+        "story_choices": [
+            {"id": "c1", "node_id": "n1", "text": "Go", "next_node_id": "n2", "is_correct": True},
+            {"id": "c2", "node_id": "n2", "text": "Share", "next_node_id": "n3", "is_correct": True},
+            {"id": "c3", "node_id": "n2", "text": "Keep", "next_node_id": "n4", "is_correct": False},
+        ],
+        "story_edges": [
+            {"id": f"e{n}", "story_id": "s1", "from_node_id": source, "to_node_id": target, "choice_id": f"c{n}"}
+            for n, (source, target) in enumerate([("n1", "n2"), ("n2", "n3"), ("n2", "n4")], 1)
+        ],
+    }
+
+
+def _service(story_service):
+    return story_service(fake_data_manager(_tables()))
+
+
+def _batch(*operations):
+    return TreeBatchRequest(operations=list(operations))
+
+
+def test_batch_applies_in_order_and_saves_only_touched_rows(story_service):
+    service = _service(story_service)
+
+    result = service.apply_tree_batch("s1", _batch(
+        {"op": "add", "ref": "hint", "parentNodeId": "n2", "choiceId": "c3",
+         "title": "Hint", "text": "Maybe share?", "location": "Park", "type": "choice",
+         "choices": [{"id": "c4", "text": "Share now", "nextNodeId": "n3"}]},
+        {"op": "update", "nodeId": "n1", "title": "Morning"},
+        {"op": "delete", "nodeId": "n4"},
+        {"op": "link", "nodeId": "hint", "choiceId": "c4", "nextNodeId": "n3"},
+    ))
+
+    hint_id = result["results"][0]["nodeId"]
+    assert [item["op"] for item in result["results"]] == ["add", "update", "delete", "link"]
+    assert set(result["updatedNodeIds"]) == {hint_id, "n1"}
+    assert set(result["relinkedNodeIds"]) == {hint_id, "n2"}
+    assert result["deletedNodeIds"] == ["n4"]
+    assert result["warnings"] == []
+
+    story = service.data_manager.get_story("s1")
+    assert [node.id for node in story.tree.nodes] == ["n1", "n2", "n3", hint_id]
+    assert story.tree.nodes[0].title == "Morning"
+    assert [(choice.id, choice.nextNodeId) for choice in story.tree.nodes[1].choices] == [("c2", "n3"), ("c3", hint_id)]
+    assert {(edge.from_, edge.to) for edge in story.tree.edges} == {("n1", "n2"), ("n2", "n3"), ("n2", hint_id), (hint_id, "n3")}
+
+    tables = service.data_manager.supabase.tables
+    assert tables["story_summaries"][0]["scene_count"] == 4
+    # The untouched node's choices were not rewritten
+    assert any(choice["id"] == "c1" and "created_at" not in choice for choice in tables["story_choices"])
+
+
+def test_failed_operation_rejects_the_whole_batch(story_service):
+    service = _service(story_service)
+    before = copy.deepcopy(_tables())
+
+    with pytest.raises(TreeBatchError, match="Operation 1: Choice 'missing' not found") as error:
+        service.apply_tree_batch("s1", _batch(
+            {"op": "update", "nodeId": "n1", "title": "Changed"},
+            {"op": "link", "nodeId": "n2", "choiceId": "missing", "nextNodeId": "n1"},
+        ))
+
+    assert error.value.index == 1
+    tables = service.data_manager.supabase.tables
+    assert {name: tables[name] for name in before} == before
+
+
+def test_batch_endpoint_reports_operation_index(monkeypatch, story_service):
+    service = _service(story_service)
+    monkeypatch.setattr(story_routes, "story_service", service)
+    http = TestClient(main.app)
+
+    body = http.post("/api/v1/stories/s1/tree:batch", json={"operations": [
+        {"op": "update", "nodeId": "n1", "choices": [{"id": "c1", "text": "Go", "nextNodeId": "nowhere"}]}
+    ]}).json()
+    ok = http.post("/api/v1/stories/s1/tree:batch", json={"operations": [{"op": "update", "nodeId": "n3", "text": "The end"}]}).json()
+
+    assert body["error"]["code"] == "VALIDATION_ERROR"
+    assert "missing node 'nowhere'" in body["error"]["message"]
+    assert ok["success"] and ok["data"]["updatedNodeIds"] == ["n3"]
+
+
+def test_edited_node_keeps_its_created_at(story_service):
+    service = _service(story_service)
+    service.data_manager.supabase.tables["story_nodes"][0]["created_at"] = NOW
+
+    service.apply_tree_batch("s1", _batch({"op": "update", "nodeId": "n1", "title": "Morning"}))
+
+    node = service.data_manager.supabase.tables["story_nodes"][0]
+    assert (node["title"], node["created_at"]) == ("Morning", NOW)
+
+
+def test_failed_edge_insert_leaves_the_old_choices_in_place(story_service):
+    service = _service(story_service)
+    supabase = service.data_manager.supabase
+    table = supabase.table
+
+    def failing_edges(name):
+        query = table(name)
+        if name == "story_edges":
+            def insert(values):
+                raise Exception("connection reset")
+            query.insert = insert
+        return query
+
+    supabase.table = failing_edges
+    with pytest.raises(Exception, match="connection reset"):
+        service.apply_tree_batch("s1", _batch(
+            {"op": "update", "nodeId": "n2", "choices": [{"id": "c5", "text": "Share", "nextNodeId": "n3"}]},
+        ))
+
+    assert {choice["id"] for choice in supabase.tables["story_choices"] if choice["node_id"] == "n2"} >= {"c2", "c3"}
+    assert {edge["id"] for edge in supabase.tables["story_edges"]} == {"e1", "e2", "e3"}
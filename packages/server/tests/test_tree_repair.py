@@ -0,0 +1,94 @@
+"""
+Tests for the deterministic story tree repair stage
+"""
+
+import copy
+
+from app.services.tree_repair import repair_tree_structure
+
+
+def _node(node_id, scene, node_type, choices=None):
+    return {
+        "id": node_id,
+        "sceneNumber": scene,
+        "title": f"Scene {scene}",
+        "text": "Once upon a time...",
+        "location": "Park",
+        "type": node_type,
+        "choices": choices or [],
+    }
+
+
+def _valid_tree():
+    nodes = [
+        _node("node_1", 1, "start", [{"id": "c1", "text": "Go", "nextNodeId": "node_2"}]),
+        _node("node_2", 2, "choice", [
+            {"id": "c2a", "text": "Help", "nextNodeId": "node_3"},
+            {"id": "c2b", "text": "Ignore", "nextNodeId": "node_4"},
+        ]),
+        _node("node_3", 3, "normal", [{"id": "c3", "text": "Go on", "nextNodeId": "node_5"}]),
+        _node("node_4", 4, "bad_ending"),
+        _node("node_5", 5, "good_ending"),
+    ]
+    edges = [
+        {"from": node["id"], "to": choice["nextNodeId"], "choiceId": choice["id"]}
+        for node in nodes for choice in node["choices"]
+    ]
+    return {"nodes": nodes, "edges": edges}
+
+
+def _service(story_service, repair_response=None):
+    """StoryService with a fake OpenAI service for the repair loop"""
+    class FakeOpenAI:
+        calls = 0
+
+        def repair_story_tree(self, tree_data, validation_errors, system_prompt, user_prompt_template):
+            FakeOpenAI.calls += 1
+            return copy.deepcopy(repair_response)
+
+    return story_service(None, openai_service=FakeOpenAI())
+
+
+def test_valid_tree_needs_no_repairs():
+    tree = _valid_tree()
+    assert repair_tree_structure(tree) == []
+    assert tree == _valid_tree()
+
+
+def test_mechanical_failures_are_fixed_locally(story_service):
+    tree = _valid_tree()
+    tree["edges"] = tree["edges"][:2]                          # edge list out of sync
+    tree["nodes"][2]["choices"][0]["nextNodeId"] = "Node_5"    # dangling reference
+    tree["nodes"][3]["choices"] = [{"id": "c4", "text": "?", "nextNodeId": "node_1"}]  # ending with choices
+    tree["nodes"][1]["choices"][1]["id"] = "c1"                # duplicate choice ID
+
+    repairs = repair_tree_structure(tree)
+
+    assert len(repairs) == 4
+    service = _service(story_service)
+    assert service._collect_tree_validation_errors(tree) == []
+    assert service._repair_story_tree(tree) is tree
+    assert service.openai_service.calls == 0
+
+
+def test_llm_fix_only_when_local_repair_is_not_enough(story_service):
+    broken = _valid_tree()
+    broken["nodes"] = [n for n in broken["nodes"] if n["type"] != "good_ending"]
+    service = _service(story_service, repair_response=_valid_tree())
+
+    repaired = service._repair_story_tree(broken)
+
+    assert service.openai_service.calls == 1
+    assert service._collect_tree_validation_errors(repaired) == []
+
+
+def test_shared_scene_numbers_do_not_resolve_references():
+    tree = _valid_tree()
+    tree["nodes"][3]["sceneNumber"] = 3                        # node_3 and node_4 both claim scene 3
+    tree["nodes"][0]["choices"][0]["nextNodeId"] = "scene_3"
+    tree["nodes"][2]["choices"][0]["nextNodeId"] = "scene_5"
+
+    repair_tree_structure(tree)
+
+    assert tree["nodes"][0]["choices"][0]["nextNodeId"] == "scene_3"
+    assert tree["nodes"][2]["choices"][0]["nextNodeId"] == "node_5"